@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Concurrent evaluation of an Ollama model over the HTTP API.
+
+Usage:
+    python3 evaluation/evaluate_http.py [--cases data/clinical_cases_val.jsonl]
+        [--model biomistral-clinical:latest] [--concurrency 4] [--limit N]
+        [--host http://localhost:11434] [--out report.json]
+
+Test cases are read from JSONL, one object per line, in either form:
+  - {"instruction": ..., "response": ...}  (training / validation sets): the
+    reference response gives the expected decision and keywords;
+  - {"input": ..., "expected": [...], "description": ...}  (client tests):
+    the case passes when every keyword is in the output.
+
+All cases share one HTTP client and run `--concurrency` at a time. The JSON
+report holds accuracy, mean keyword-match score, p50/p95 latency and time to
+first token, tokens/sec, and one row per case.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.ollama_http import OllamaHTTP  # noqa: E402
+
+DEFAULT_CASES = os.path.join(ROOT, "data", "clinical_cases_val.jsonl")
+DEFAULT_MODEL = "biomistral-clinical:latest"
+
+# termes cliniques comparés entre la réponse de référence et la sortie du modèle
+VOCABULARY = (
+    "irm", "scanner", "pas d'imagerie", "urgen", "injection", "gadolinium", "angio", "ponction",
+    "pré-éclampsie", "surveillance", "traitement symptomatique", "durée", "fièvre", "localisation",
+    "antécédents",
+)
+# examens distingués pour l'exactitude d'une recommandation
+EXAMS = ("pas d'imagerie", "irm", "scanner")
+
+
+@dataclass
+class Case:
+    name: str
+    prompt: str
+    keywords: List[str]
+    reference: Optional[str] = None
+
+
+def load_cases(path: str, limit: Optional[int] = None) -> List[Case]:
+    cases = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if "instruction" in obj:
+                reference = obj.get("response", "")
+                low = reference.lower()
+                cases.append(Case(name=f"{os.path.basename(path)}:{lineno}", prompt=obj["instruction"],
+                                  keywords=[k for k in VOCABULARY if k in low], reference=reference))
+            elif "input" in obj:
+                cases.append(Case(name=obj.get("description") or f"{os.path.basename(path)}:{lineno}",
+                                  prompt=obj["input"], keywords=list(obj.get("expected", []))))
+            else:
+                raise ValueError(f"{path}:{lineno}: expected 'instruction' or 'input'")
+            if limit is not None and len(cases) >= limit:
+                break
+    return cases
+
+
+def _decision(text: str):
+    """(kind, exam) of a response: 'clarify' / 'recommendation' / None, and the first exam named."""
+    low = text.strip().lower()
+    if low.startswith("pour préciser"):
+        return "clarify", None
+    if low.startswith("recommandation"):
+        return "recommendation", next((e for e in EXAMS if e in low), None)
+    return None, None
+
+
+def score(case: Case, output: str) -> Dict[str, Any]:
+    low = output.lower()
+    found = [k for k in case.keywords if k.lower() in low]
+    keyword_score = len(found) / len(case.keywords) if case.keywords else 1.0
+    if case.reference is not None:
+        correct = _decision(output) == _decision(case.reference)
+    else:
+        correct = len(found) == len(case.keywords)
+    return {"correct": correct, "keyword_score": keyword_score,
+            "missing_keywords": [k for k in case.keywords if k not in found]}
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """q-th percentile (0-100) with linear interpolation; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _run_case(client: OllamaHTTP, model: str, case: Case, options) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"name": case.name, "prompt": case.prompt}
+    try:
+        result = client.generate(model, case.prompt, options=options)
+    except Exception as e:  # un cas en erreur ne doit pas arrêter l'évaluation
+        row.update(error=f"{type(e).__name__}: {e}", correct=False, keyword_score=0.0)
+        return row
+    row.update(result.as_dict())
+    row["output"] = row.pop("text")
+    row.update(score(case, result.text))
+    return row
+
+
+def evaluate(cases: Sequence[Case], client: OllamaHTTP, model: str = DEFAULT_MODEL, concurrency: int = 4,
+             options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run every case (at most `concurrency` in flight) and build the report."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        rows = list(pool.map(lambda case: _run_case(client, model, case, options), cases))
+    wall = time.perf_counter() - start
+
+    ok = [r for r in rows if "error" not in r]
+    latencies = [r["total_s"] for r in ok]
+    ttfts = [r["ttft_s"] for r in ok if r["ttft_s"] is not None]
+    eval_tokens = sum(r["eval_tokens"] for r in ok)
+    eval_s = sum(r["eval_s"] for r in ok)
+    n = len(rows)
+    return {
+        "model": model,
+        "host": client.host,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "cases": n,
+        "errors": n - len(ok),
+        "concurrency": concurrency,
+        "accuracy": sum(r["correct"] for r in rows) / n if n else None,
+        "keyword_score": sum(r["keyword_score"] for r in rows) / n if n else None,
+        "latency_s": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                      "mean": sum(latencies) / len(latencies) if latencies else None},
+        "ttft_s": {"p50": percentile(ttfts, 50), "p95": percentile(ttfts, 95)},
+        # débit de génération mesuré par le serveur, et débit global de la campagne
+        "tokens_per_s": eval_tokens / eval_s if eval_s else None,
+        "throughput_tokens_per_s": eval_tokens / wall if wall else None,
+        "wall_s": wall,
+        "results": rows,
+    }
+
+
+def print_summary(report: Dict[str, Any], out=sys.stdout) -> None:
+    def fmt(v, spec=".2f"):
+        return "-" if v is None else format(v, spec)
+
+    print(f"model {report['model']} - {report['cases']} cases, {report['errors']} errors, "
+          f"concurrency {report['concurrency']}, {report['wall_s']:.1f}s", file=out)
+    print(f"accuracy       : {fmt(report['accuracy'], '.1%')}", file=out)
+    print(f"keyword score  : {fmt(report['keyword_score'], '.1%')}", file=out)
+    print(f"latency p50/p95: {fmt(report['latency_s']['p50'])}s / {fmt(report['latency_s']['p95'])}s", file=out)
+    print(f"ttft p50/p95   : {fmt(report['ttft_s']['p50'])}s / {fmt(report['ttft_s']['p95'])}s", file=out)
+    print(f"tokens/s       : {fmt(report['tokens_per_s'], '.1f')} (server), "
+          f"{fmt(report['throughput_tokens_per_s'], '.1f')} (aggregate)", file=out)
+    for row in report["results"]:
+        if "error" in row:
+            print(f"  ERROR  {row['name']}: {row['error']}", file=out)
+        elif not row["correct"]:
+            print(f"  FAIL   {row['name']}: missing {row['missing_keywords']}", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="JSONL file of test cases")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--host", default=None, help="Ollama server (default: OLLAMA_HOST or localhost:11434)")
+    parser.add_argument("--concurrency", type=int, default=4, help="cases in flight at once")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--limit", type=int, default=None, help="evaluate only the first N cases")
+    parser.add_argument("--temperature", type=float, default=None)
+    parser.add_argument("--min-accuracy", type=float, default=0.0, help="exit with 1 below this accuracy")
+    parser.add_argument("--out", default=None, help="JSON report path (default: stdout summary only)")
+    args = parser.parse_args(argv)
+
+    cases = load_cases(args.cases, limit=args.limit)
+    options = {"temperature": args.temperature} if args.temperature is not None else None
+    with OllamaHTTP(args.host, timeout=args.timeout, max_connections=max(1, args.concurrency)) as client:
+        report = evaluate(cases, client, model=args.model, concurrency=args.concurrency, options=options)
+    print_summary(report)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"report written to {args.out}")
+    return 0 if report["errors"] == 0 and (report["accuracy"] or 0.0) >= args.min_accuracy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
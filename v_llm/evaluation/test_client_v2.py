@@ -1,99 +1,70 @@
 #!/usr/bin/env python3
 """
 Test script automatisé pour valider le modèle client v2
+
+Les cas sont dans client_v2_cases.jsonl. Ils passent par l'API HTTP d'Ollama
+(evaluate_http.py) avec un client partagé et plusieurs cas à la fois, au lieu
+d'un `ollama run biomistral-clinical` lancé par cas.
+
+Usage: python3 evaluation/test_client_v2.py [--concurrency 4] [--out rapport.json]
 """
 
-import subprocess
+import argparse
+import json
+import os
 import sys
 
-def test_case(description, input_text, expected_keywords):
-    """Execute un test et vérifie si les mots-clés attendus sont présents"""
-    print(f"\n{'='*70}")
-    print(f"TEST: {description}")
-    print(f"Input: {input_text}")
-    print('-'*70)
-    
-    try:
-        result = subprocess.run(
-            ['ollama', 'run', 'biomistral-clinical'],
-            input=input_text,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        output = result.stdout.strip()
-        print(f"Output: {output}")
-        
-        # Vérifier les mots-clés
-        success = all(keyword.lower() in output.lower() for keyword in expected_keywords)
-        
-        if success:
-            print(f"✅ RÉUSSI - Tous les mots-clés trouvés: {expected_keywords}")
-        else:
-            print(f"❌ ÉCHEC - Mots-clés manquants")
-            missing = [kw for kw in expected_keywords if kw.lower() not in output.lower()]
-            print(f"   Manquants: {missing}")
-        
-        return success
-        
-    except subprocess.TimeoutExpired:
-        print(f"❌ TIMEOUT (>30s)")
-        return False
-    except Exception as e:
-        print(f"❌ ERREUR: {e}")
-        return False
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from evaluate_http import OllamaHTTP, evaluate, load_cases  # noqa: E402
+
+CASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client_v2_cases.jsonl")
+MODEL = "biomistral-clinical"
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30.0, help="délai maximal par cas (s)")
+    parser.add_argument("--out", default=None, help="rapport JSON")
+    args = parser.parse_args()
+
     print("🧪 VALIDATION MODÈLE CLIENT V2.0 - CÉPHALÉES")
     print("="*70)
-    
-    tests = [
-        {
-            "description": "Cas simple → Questions Groupe 1",
-            "input": "Patiente 34 ans, céphalées",
-            "expected": ["groupe 1", "fièvre", "brutale", "déficit"]
-        },
-        {
-            "description": "Urgence (fièvre) → Triage immédiat",
-            "input": "Patient 45 ans, céphalées depuis 2 jours avec fièvre à 39°C",
-            "expected": ["urgence", "adresser"]
-        },
-        {
-            "description": "Urgence (brutal) → Triage immédiat",
-            "input": "Patiente 28 ans, céphalées brutales et intenses depuis 2 heures",
-            "expected": ["urgence"]
-        },
-        {
-            "description": "Contexte oncologique → Scanner injection",
-            "input": "Patiente 55 ans avec antécédent de cancer du sein, céphalées progressives",
-            "expected": ["scanner", "injection", "oncologique"]
-        },
-        {
-            "description": "Cas complet sans urgence → Recommandation IRM",
-            "input": "Patient 40 ans, céphalées progressives depuis 1 mois, pas de fièvre, pas de déficit, pas d'antécédent",
-            "expected": ["recommandation", "irm"]
-        },
-    ]
-    
-    results = []
-    for test in tests:
-        success = test_case(
-            test["description"],
-            test["input"],
-            test["expected"]
-        )
-        results.append(success)
-    
+
+    cases = load_cases(CASES_FILE)
+    with OllamaHTTP(timeout=args.timeout, max_connections=args.concurrency) as client:
+        report = evaluate(cases, client, model=MODEL, concurrency=args.concurrency)
+
+    for case, row in zip(cases, report["results"]):
+        print(f"\n{'='*70}")
+        print(f"TEST: {case.name}")
+        print(f"Input: {case.prompt}")
+        print('-'*70)
+        if "error" in row:
+            print(f"❌ ERREUR: {row['error']}")
+            continue
+        print(f"Output: {row['output']}  ({row['total_s']:.1f}s)")
+        if row["correct"]:
+            print(f"✅ RÉUSSI - Tous les mots-clés trouvés: {case.keywords}")
+        else:
+            print(f"❌ ÉCHEC - Mots-clés manquants")
+            print(f"   Manquants: {row['missing_keywords']}")
+
     # Résumé
     print(f"\n{'='*70}")
     print("📊 RÉSUMÉ DES TESTS")
     print('='*70)
-    passed = sum(results)
-    total = len(results)
+    passed = sum(row["correct"] for row in report["results"])
+    total = len(report["results"])
     print(f"Réussis: {passed}/{total} ({passed*100//total}%)")
-    
+    latency = report["latency_s"]
+    if latency["p50"] is not None:
+        print(f"Latence p50/p95: {latency['p50']:.1f}s / {latency['p95']:.1f}s en {report['wall_s']:.1f}s au total")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+
     if passed == total:
         print("✅ TOUS LES TESTS RÉUSSIS !")
         return 0
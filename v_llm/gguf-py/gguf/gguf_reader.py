@@ -4,11 +4,13 @@
 #
 from __future__ import annotations
 
+import json
 import logging
 import os
+import struct
 import sys
 from collections import OrderedDict
-from typing import Any, Literal, NamedTuple, TypeVar, Union
+from typing import Any, Iterator, Literal, Mapping, NamedTuple, Sequence, TypeVar, Union, overload
 
 import numpy as np
 import numpy.typing as npt
@@ -35,6 +37,9 @@ logger = logging.getLogger(__name__)
 
 READER_SUPPORTED_VERSIONS = [2, GGUF_VERSION]
 
+# Version of the offset index written by GGUFReader(..., lazy=True, index_path=...)
+READER_INDEX_VERSION = 1
+
 
 class ReaderField(NamedTuple):
     # Offset to start of this field.
@@ -108,6 +113,72 @@ class ReaderTensor(NamedTuple):
     field: ReaderField
 
 
+class LazyFields(Mapping[str, ReaderField]):
+    """Read-only, ordered view of the KV fields of a lazy GGUFReader.
+
+    Only the offset of each field is known up front; a field is decoded into
+    a ReaderField the first time it is accessed and cached afterwards.
+    """
+
+    def __init__(self, reader: GGUFReader, fields: OrderedDict[str, ReaderField], offsets: OrderedDict[str, int]):
+        self._reader = reader
+        self._cache = fields
+        self._offsets = offsets
+        self._order = list(fields) + list(offsets)
+
+    def __getitem__(self, key: str) -> ReaderField:
+        field = self._cache.get(key)
+        if field is None:
+            field, _ = self._reader._build_field(self._offsets[key])
+            self._cache[key] = field
+        return field
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._cache or key in self._offsets
+
+    def decoded(self) -> int:
+        """Number of fields decoded so far (including the GGUF.* virtual fields)."""
+        return len(self._cache)
+
+
+class LazyTensors(Sequence[ReaderTensor]):
+    """Read-only list of the tensors of a lazy GGUFReader, decoded on first access."""
+
+    def __init__(self, reader: GGUFReader, names: list[str], offsets: list[int]):
+        self._reader = reader
+        self.names = names
+        self._offsets = offsets
+        self._cache: list[ReaderTensor | None] = [None] * len(names)
+
+    @overload
+    def __getitem__(self, idx: int) -> ReaderTensor: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[ReaderTensor]: ...
+
+    def __getitem__(self, idx: int | slice) -> ReaderTensor | list[ReaderTensor]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        tensor = self._cache[idx]
+        if tensor is None:
+            field = self._reader._get_tensor_info_field(self._offsets[idx])
+            tensor = self._reader._build_tensor(self._reader.data_offset, field)
+            self._cache[idx] = tensor
+        return tensor
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def decoded(self) -> int:
+        return sum(t is not None for t in self._cache)
+
+
 class GGUFReader:
     # I - same as host, S - swapped
     byte_order: Literal['I', 'S'] = 'I'
@@ -129,8 +200,18 @@ class GGUFReader:
         GGUFValueType.BOOL:    np.bool_,
     }
 
-    def __init__(self, path: os.PathLike[str] | str, mode: Literal['r', 'r+', 'c'] = 'r'):
+    # With lazy=True, the header is only scanned once to record where each KV
+    # field and tensor info record starts: fields and tensors are decoded on
+    # first access (reader.fields / reader.tensors behave as a read-only
+    # mapping / list). index_path, if given, caches these offsets in a small
+    # JSON file, reused while the GGUF file keeps the same size and mtime.
+    def __init__(
+        self, path: os.PathLike[str] | str, mode: Literal['r', 'r+', 'c'] = 'r',
+        lazy: bool = False, index_path: os.PathLike[str] | str | None = None,
+    ):
         self.data = np.memmap(path, mode = mode)
+        self.lazy = lazy
+        self._tensor_names: dict[str, int] | None = None
         offs = 0
 
         # Check for GGUF magic
@@ -166,10 +247,28 @@ class GGUFReader:
         offs += self._push_field(ReaderField(offs, 'GGUF.tensor_count', [temp_counts[:1]], [0], [GGUFValueType.UINT64]))
         offs += self._push_field(ReaderField(offs, 'GGUF.kv_count', [temp_counts[1:]], [0], [GGUFValueType.UINT64]))
         tensor_count, kv_count = temp_counts
-        offs = self._build_fields(offs, kv_count)
+        if lazy:
+            index = self._load_index(path, index_path) if index_path is not None else None
+            if index is None:
+                field_offsets, offs = self._scan_fields(offs, kv_count)
+                tensor_names, tensor_offsets, offs = self._scan_tensor_info(offs, tensor_count)
+                if index_path is not None:
+                    self._save_index(path, index_path, field_offsets, tensor_names, tensor_offsets, offs)
+            else:
+                field_offsets = OrderedDict(index['fields'])
+                tensor_names = [name for name, _ in index['tensors']]
+                tensor_offsets = [offset for _, offset in index['tensors']]
+                offs = index['end']
+            self._tensor_names = {name: i for i, name in enumerate(tensor_names)}
+            if len(self._tensor_names) != len(tensor_names):
+                raise ValueError('Found duplicated tensor names')
+            # behaves as a read-only OrderedDict
+            self.fields = LazyFields(self, self.fields, field_offsets)  # type: ignore[assignment]
+        else:
+            offs = self._build_fields(offs, kv_count)
 
-        # Build Tensor Info Fields
-        offs, tensors_fields = self._build_tensor_info(offs, tensor_count)
+            # Build Tensor Info Fields
+            offs, tensors_fields = self._build_tensor_info(offs, tensor_count)
         new_align = self.fields.get('general.alignment')
         if new_align is not None:
             if new_align.types != [GGUFValueType.UINT32]:
@@ -179,7 +278,10 @@ class GGUFReader:
         if padding != 0:
             offs += self.alignment - padding
         self.data_offset = offs
-        self._build_tensors(offs, tensors_fields)
+        if lazy:
+            self.tensors = LazyTensors(self, tensor_names, tensor_offsets)  # type: ignore[assignment]
+        else:
+            self._build_tensors(offs, tensors_fields)
 
     _DT = TypeVar('_DT', bound = npt.DTypeLike)
 
@@ -191,6 +293,13 @@ class GGUFReader:
     def get_tensor(self, idx: int) -> ReaderTensor:
         return self.tensors[idx]
 
+    # Fetch a tensor by name.
+    def get_tensor_by_name(self, name: str) -> Union[ReaderTensor, None]:
+        if self._tensor_names is None:
+            self._tensor_names = {tensor.name: i for i, tensor in enumerate(self.tensors)}
+        idx = self._tensor_names.get(name)
+        return None if idx is None else self.tensors[idx]
+
     def _get(
         self, offset: int, dtype: npt.DTypeLike, count: int = 1, override_order: None | Literal['I', 'S', '<'] = None,
     ) -> npt.NDArray[Any]:
@@ -283,27 +392,125 @@ class GGUFReader:
             [1, 3, 4, 5],
         )
 
+    def _build_field(self, orig_offs: int) -> tuple[ReaderField, int]:
+        offs = orig_offs
+        kv_klen, kv_kdata = self._get_str(offs)
+        offs += int(kv_klen.nbytes + kv_kdata.nbytes)
+        raw_kv_type = self._get(offs, np.uint32)
+        offs += int(raw_kv_type.nbytes)
+        parts: list[npt.NDArray[Any]] = [kv_klen, kv_kdata, raw_kv_type]
+        idxs_offs = len(parts)
+        field_size, field_parts, field_idxs, field_types = self._get_field_parts(offs, raw_kv_type[0])
+        parts += field_parts
+        field = ReaderField(
+            orig_offs,
+            str(bytes(kv_kdata), encoding = 'utf-8'),
+            parts,
+            [idx + idxs_offs for idx in field_idxs],
+            field_types,
+        )
+        return field, offs + field_size
+
     def _build_fields(self, offs: int, count: int) -> int:
         for _ in range(count):
-            orig_offs = offs
-            kv_klen, kv_kdata = self._get_str(offs)
-            offs += int(kv_klen.nbytes + kv_kdata.nbytes)
-            raw_kv_type = self._get(offs, np.uint32)
-            offs += int(raw_kv_type.nbytes)
-            parts: list[npt.NDArray[Any]] = [kv_klen, kv_kdata, raw_kv_type]
-            idxs_offs = len(parts)
-            field_size, field_parts, field_idxs, field_types = self._get_field_parts(offs, raw_kv_type[0])
-            parts += field_parts
-            self._push_field(ReaderField(
-                orig_offs,
-                str(bytes(kv_kdata), encoding = 'utf-8'),
-                parts,
-                [idx + idxs_offs for idx in field_idxs],
-                field_types,
-            ), skip_sum = True)
-            offs += field_size
+            field, offs = self._build_field(offs)
+            self._push_field(field, skip_sum = True)
         return offs
 
+    # Lazy mode: walk the KV fields with struct, recording only where each starts.
+    def _scan_fields(self, offs: int, count: int) -> tuple[OrderedDict[str, int], int]:
+        order = '=' if self.byte_order == 'I' else ('>' if sys.byteorder == 'little' else '<')
+        u32, u64 = struct.Struct(order + 'I'), struct.Struct(order + 'Q')
+        sizes = {gtype: np.dtype(nptype).itemsize for gtype, nptype in self.gguf_scalar_to_np.items()}
+        data = memoryview(self.data)
+
+        def skip(offs: int, gtype: int) -> int:
+            if gtype == GGUFValueType.STRING:
+                return offs + 8 + u64.unpack_from(data, offs)[0]
+            size = sizes.get(gtype)  # type: ignore[call-overload]
+            if size is not None:
+                return offs + size
+            if gtype != GGUFValueType.ARRAY:
+                raise ValueError(f'Unknown/unhandled field type {gtype}')
+            itype = u32.unpack_from(data, offs)[0]
+            alen = u64.unpack_from(data, offs + 4)[0]
+            offs += 12
+            size = sizes.get(itype)  # type: ignore[call-overload]
+            if size is not None:
+                return offs + alen * size
+            if itype == GGUFValueType.STRING:
+                for _ in range(alen):
+                    offs += 8 + u64.unpack_from(data, offs)[0]
+                return offs
+            for _ in range(alen):
+                offs = skip(offs, itype)
+            return offs
+
+        offsets: OrderedDict[str, int] = OrderedDict()
+        try:
+            for _ in range(count):
+                orig_offs = offs
+                klen = u64.unpack_from(data, offs)[0]
+                name = str(data[offs + 8:offs + 8 + klen], encoding = 'utf-8')
+                offs += 8 + klen
+                offs = skip(offs + 4, u32.unpack_from(data, offs)[0])
+                if name in offsets or name in self.fields:
+                    logger.warning(f'Duplicate key {name} at offset {orig_offs}')
+                    name += '_{}'.format(orig_offs)
+                offsets[name] = orig_offs
+        finally:
+            data.release()
+        return offsets, offs
+
+    def _scan_tensor_info(self, offs: int, count: int) -> tuple[list[str], list[int], int]:
+        order = '=' if self.byte_order == 'I' else ('>' if sys.byteorder == 'little' else '<')
+        u32, u64 = struct.Struct(order + 'I'), struct.Struct(order + 'Q')
+        names, offsets = [], []
+        data = memoryview(self.data)
+        try:
+            for _ in range(count):
+                offsets.append(offs)
+                nlen = u64.unpack_from(data, offs)[0]
+                names.append(str(data[offs + 8:offs + 8 + nlen], encoding = 'utf-8'))
+                offs += 8 + nlen
+                n_dims = u32.unpack_from(data, offs)[0]
+                # n_dims, dims, type, offset
+                offs += 4 + 8 * n_dims + 4 + 8
+        finally:
+            data.release()
+        return names, offsets, offs
+
+    def _load_index(self, path: os.PathLike[str] | str, index_path: os.PathLike[str] | str) -> dict[str, Any] | None:
+        try:
+            with open(index_path, 'r', encoding = 'utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stat = os.stat(path)
+        if (index.get('version') != READER_INDEX_VERSION or index.get('size') != stat.st_size
+                or index.get('mtime_ns') != stat.st_mtime_ns or index.get('byte_order') != self.byte_order):
+            logger.debug(f'Stale offset index {index_path}')
+            return None
+        return index
+
+    def _save_index(
+        self, path: os.PathLike[str] | str, index_path: os.PathLike[str] | str,
+        field_offsets: OrderedDict[str, int], tensor_names: list[str], tensor_offsets: list[int], end: int,
+    ) -> None:
+        stat = os.stat(path)
+        index = {
+            'version': READER_INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'byte_order': self.byte_order, 'end': end,
+            'fields': list(field_offsets.items()), 'tensors': list(zip(tensor_names, tensor_offsets)),
+        }
+        tmp_path = f'{index_path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding = 'utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            logger.warning(f'Could not write offset index {index_path}: {e}')
+
     def _build_tensor_info(self, offs: int, count: int) -> tuple[int, list[ReaderField]]:
         tensor_fields = []
         for _ in range(count):
@@ -312,56 +519,60 @@ class GGUFReader:
             tensor_fields.append(field)
         return offs, tensor_fields
 
+    def _build_tensor(self, start_offs: int, field: ReaderField) -> ReaderTensor:
+        _name_len, name_data, _n_dims, dims, raw_dtype, offset_tensor = field.parts
+        tensor_name = str(bytes(name_data), encoding = 'utf-8')
+        ggml_type = GGMLQuantizationType(raw_dtype[0])
+        n_elems = int(np.prod(dims))
+        np_dims = tuple(reversed(dims.tolist()))
+        block_size, type_size = GGML_QUANT_SIZES[ggml_type]
+        n_bytes = n_elems * type_size // block_size
+        data_offs = int(start_offs + offset_tensor[0])
+        item_type: npt.DTypeLike
+        if ggml_type == GGMLQuantizationType.F16:
+            item_count = n_elems
+            item_type = np.float16
+        elif ggml_type == GGMLQuantizationType.F32:
+            item_count = n_elems
+            item_type = np.float32
+        elif ggml_type == GGMLQuantizationType.F64:
+            item_count = n_elems
+            item_type = np.float64
+        elif ggml_type == GGMLQuantizationType.I8:
+            item_count = n_elems
+            item_type = np.int8
+        elif ggml_type == GGMLQuantizationType.I16:
+            item_count = n_elems
+            item_type = np.int16
+        elif ggml_type == GGMLQuantizationType.I32:
+            item_count = n_elems
+            item_type = np.int32
+        elif ggml_type == GGMLQuantizationType.I64:
+            item_count = n_elems
+            item_type = np.int64
+        else:
+            item_count = n_bytes
+            item_type = np.uint8
+            np_dims = quant_shape_to_byte_shape(np_dims, ggml_type)
+        return ReaderTensor(
+            name = tensor_name,
+            tensor_type = ggml_type,
+            shape = dims,
+            n_elements = n_elems,
+            n_bytes = n_bytes,
+            data_offset = data_offs,
+            data = self._get(data_offs, item_type, item_count).reshape(np_dims),
+            field = field,
+        )
+
     def _build_tensors(self, start_offs: int, fields: list[ReaderField]) -> None:
         tensors = []
         tensor_names = set() # keep track of name to prevent duplicated tensors
         for field in fields:
-            _name_len, name_data, _n_dims, dims, raw_dtype, offset_tensor = field.parts
+            tensor = self._build_tensor(start_offs, field)
             # check if there's any tensor having same name already in the list
-            tensor_name = str(bytes(name_data), encoding = 'utf-8')
-            if tensor_name in tensor_names:
-                raise ValueError(f'Found duplicated tensor with name {tensor_name}')
-            tensor_names.add(tensor_name)
-            ggml_type = GGMLQuantizationType(raw_dtype[0])
-            n_elems = int(np.prod(dims))
-            np_dims = tuple(reversed(dims.tolist()))
-            block_size, type_size = GGML_QUANT_SIZES[ggml_type]
-            n_bytes = n_elems * type_size // block_size
-            data_offs = int(start_offs + offset_tensor[0])
-            item_type: npt.DTypeLike
-            if ggml_type == GGMLQuantizationType.F16:
-                item_count = n_elems
-                item_type = np.float16
-            elif ggml_type == GGMLQuantizationType.F32:
-                item_count = n_elems
-                item_type = np.float32
-            elif ggml_type == GGMLQuantizationType.F64:
-                item_count = n_elems
-                item_type = np.float64
-            elif ggml_type == GGMLQuantizationType.I8:
-                item_count = n_elems
-                item_type = np.int8
-            elif ggml_type == GGMLQuantizationType.I16:
-                item_count = n_elems
-                item_type = np.int16
-            elif ggml_type == GGMLQuantizationType.I32:
-                item_count = n_elems
-                item_type = np.int32
-            elif ggml_type == GGMLQuantizationType.I64:
-                item_count = n_elems
-                item_type = np.int64
-            else:
-                item_count = n_bytes
-                item_type = np.uint8
-                np_dims = quant_shape_to_byte_shape(np_dims, ggml_type)
-            tensors.append(ReaderTensor(
-                name = tensor_name,
-                tensor_type = ggml_type,
-                shape = dims,
-                n_elements = n_elems,
-                n_bytes = n_bytes,
-                data_offset = data_offs,
-                data = self._get(data_offs, item_type, item_count).reshape(np_dims),
-                field = field,
-            ))
+            if tensor.name in tensor_names:
+                raise ValueError(f'Found duplicated tensor with name {tensor.name}')
+            tensor_names.add(tensor.name)
+            tensors.append(tensor)
         self.tensors = tensors
@@ -94,7 +94,8 @@ def main() -> None:
     parser.add_argument("--progressbar", action="store_true", help="enable progressbar")
     args = parser.parse_args(None if len(sys.argv) > 1 else ["--help"])
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
-    reader = GGUFReader(args.model, 'r')
+    # only tensors are hashed: skip decoding the metadata (vocab arrays, ...)
+    reader = GGUFReader(args.model, 'r', lazy=True)
     gguf_hash(reader, args.model, not args.progressbar, args.no_layer)
 
 
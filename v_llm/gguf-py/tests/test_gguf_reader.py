@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Necessary to load the local gguf package
+if "NO_LOCAL_GGUF" not in os.environ and (Path(__file__).parent.parent.parent / 'gguf-py').exists():
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import gguf
+
+
+class TestLazyGGUFReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / 'model.gguf'
+        rng = np.random.default_rng(0)
+        writer = gguf.GGUFWriter(self.path, 'llama')
+        writer.add_block_count(2)
+        writer.add_custom_alignment(64)
+        writer.add_token_list([f'tok{i}' for i in range(1000)])
+        writer.add_token_scores([float(i) for i in range(1000)])
+        writer.add_array('test.nested', [[1, 2], [3]])
+        writer.add_string('test.string', 'value')
+        writer.add_tensor('token_embd.weight', rng.standard_normal((16, 32), dtype=np.float32))
+        writer.add_tensor('blk.0.attn_q.weight', gguf.quants.quantize(
+            rng.standard_normal((32, 32), dtype=np.float32), gguf.GGMLQuantizationType.Q8_0),
+            raw_dtype=gguf.GGMLQuantizationType.Q8_0)
+        writer.add_tensor('blk.0.attn_norm.weight', np.ones(32, dtype=np.float16))
+        writer.write_header_to_file()
+        writer.write_kv_data_to_file()
+        writer.write_tensors_to_file()
+        writer.close()
+
+    def assertSameReader(self, eager, lazy):
+        self.assertEqual(list(lazy.fields), list(eager.fields))
+        for name, field in eager.fields.items():
+            other = lazy.fields[name]
+            self.assertEqual((other.offset, other.name, other.types, other.data),
+                             (field.offset, field.name, field.types, field.data))
+            self.assertEqual(len(other.parts), len(field.parts))
+            for a, b in zip(field.parts, other.parts):
+                np.testing.assert_array_equal(a, b)
+            self.assertEqual(other.contents(), field.contents())
+        self.assertEqual((lazy.alignment, lazy.data_offset), (eager.alignment, eager.data_offset))
+        self.assertEqual(len(lazy.tensors), len(eager.tensors))
+        for tensor, other in zip(eager.tensors, lazy.tensors):
+            self.assertEqual((other.name, other.tensor_type, other.n_elements, other.n_bytes, other.data_offset),
+                             (tensor.name, tensor.tensor_type, tensor.n_elements, tensor.n_bytes, tensor.data_offset))
+            np.testing.assert_array_equal(other.shape, tensor.shape)
+            np.testing.assert_array_equal(other.data, tensor.data)
+
+    def test_lazy_matches_eager(self):
+        self.assertSameReader(gguf.GGUFReader(self.path), gguf.GGUFReader(self.path, lazy=True))
+
+    def test_fields_and_tensors_are_decoded_on_access(self):
+        reader = gguf.GGUFReader(self.path, lazy=True)
+        # GGUF.* virtual fields + general.alignment
+        self.assertEqual(reader.fields.decoded(), 4)
+        self.assertEqual(reader.tensors.decoded(), 0)
+        self.assertEqual(reader.get_field('test.string').contents(), 'value')
+        self.assertIsNone(reader.get_field('missing'))
+        self.assertEqual(reader.fields.decoded(), 5)
+        self.assertNotIn(gguf.Keys.Tokenizer.LIST, reader.fields._cache)
+
+        tensor = reader.get_tensor_by_name('blk.0.attn_norm.weight')
+        self.assertEqual(tensor.data.tolist(), [1.0] * 32)
+        self.assertIsNone(reader.get_tensor_by_name('missing'))
+        self.assertEqual(reader.tensors.decoded(), 1)
+        self.assertEqual([t.name for t in reader.tensors[:2]], ['token_embd.weight', 'blk.0.attn_q.weight'])
+
+    def test_get_tensor_by_name_eager(self):
+        reader = gguf.GGUFReader(self.path)
+        self.assertEqual(reader.get_tensor_by_name('blk.0.attn_q.weight').tensor_type, gguf.GGMLQuantizationType.Q8_0)
+        self.assertIsNone(reader.get_tensor_by_name('missing'))
+
+    def test_index_is_reused_until_the_file_changes(self):
+        index_path = Path(self.tmp.name) / 'model.gguf.idx'
+        first = gguf.GGUFReader(self.path, lazy=True, index_path=index_path)
+        index = json.loads(index_path.read_text())
+        self.assertEqual([name for name, _ in index['tensors']], [t.name for t in first.tensors])
+
+        with mock.patch.object(gguf.GGUFReader, '_scan_fields', side_effect=AssertionError('scanned')):
+            self.assertSameReader(gguf.GGUFReader(self.path), gguf.GGUFReader(self.path, lazy=True, index_path=index_path))
+
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        scan_fields = gguf.GGUFReader._scan_fields
+        with mock.patch.object(gguf.GGUFReader, '_scan_fields', autospec=True, side_effect=scan_fields) as scan:
+            reader = gguf.GGUFReader(self.path, lazy=True, index_path=index_path)
+            self.assertEqual(scan.call_count, 1)
+        self.assertSameReader(gguf.GGUFReader(self.path), reader)
+
+        index_path.write_text('not json')
+        self.assertSameReader(gguf.GGUFReader(self.path), gguf.GGUFReader(self.path, lazy=True, index_path=index_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
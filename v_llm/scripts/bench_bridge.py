@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Import-time and per-call cost of the decision-tree bridge.
+
+Usage: python3 scripts/bench_bridge.py [--calls 20000]
+
+Each measurement runs in a fresh interpreter so that import costs are cold:
+  - `import src.decision_tree_bridge` (must not load the decision tree yet),
+  - the first `fill_tree_noninteractive` call (resolves and caches v_arbre_d),
+  - steady-state bridge calls vs. calling the decision logic directly
+    (`analyse_texte_medical` + `decision_imagerie`); the difference is the
+    bridge overhead, which should be close to zero.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEXTS = [
+    "patiente 34 ans céphalées",
+    "Patient 45 ans, céphalées brutales, fièvre, déficit moteur, cancer, chirurgie, pace-maker, enceinte",
+    "patiente 28 ans enceinte de 8 semaines, céphalées progressives",
+]
+
+_PROBE = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+calls, texts = {calls}, {texts!r}
+
+t0 = time.perf_counter()
+import src.decision_tree_bridge as bridge
+t1 = time.perf_counter()
+loaded_after_import = "v_arbre_d.source.main" in sys.modules
+bridge.fill_tree_noninteractive(texts[0])
+t2 = time.perf_counter()
+
+v = bridge._import_v_arbre()
+def direct(text):
+    f = v.analyse_texte_medical(text)
+    return v.decision_imagerie(f)
+
+def measure(fn):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(texts[i % len(texts)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+direct_us = measure(direct)
+bridge_us = measure(bridge.fill_tree_noninteractive)
+print(json.dumps({{
+    "import_bridge_ms": (t1 - t0) * 1e3,
+    "tree_loaded_by_import": loaded_after_import,
+    "first_call_ms": (t2 - t1) * 1e3,
+    "direct_us": direct_us,
+    "bridge_us": bridge_us,
+}}))
+'''
+
+
+def run(calls):
+    code = _PROBE.format(root=ROOT, calls=calls, texts=TEXTS)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--json', dest='json_path', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    r = run(args.calls)
+    print(f"import bridge          : {r['import_bridge_ms']:8.2f} ms (decision tree loaded: {r['tree_loaded_by_import']})")
+    print(f"first call (tree load) : {r['first_call_ms']:8.2f} ms")
+    print(f"decision logic only    : {r['direct_us']:8.2f} us/call")
+    print(f"bridge call            : {r['bridge_us']:8.2f} us/call "
+          f"(overhead {r['bridge_us'] - r['direct_us']:+.2f} us)")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as fh:
+            json.dump(r, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Cross-engine benchmark: v_llm (RAG+LLM), v_sans_llm and v_arbre_d on one corpus.
+
+Usage: python3 scripts/bench_engines.py [--synthetic 500] [--engines v_arbre_d v_sans_llm v_llm]
+           [--warmup 5] [--llm-latency 0.0] [--out report.json]
+
+The corpus is the case text of data/clinical_cases_{train,val}.jsonl, or of
+`--datasets` (e.g. shards of training/generate_cases.py), with the decision of
+the reference response, plus `--synthetic` generated cases
+(v_arbre_d/source/bench_extraction.py, no reference). Each engine is called
+through its public entry point:
+
+  - v_arbre_d : analyse_texte_medical + decision_imagerie,
+  - v_sans_llm: RAGSystem(collection).process_query, index built in a temporary
+    directory with the offline hashing embedding,
+  - v_llm     : rag_biomistral_query over a ChromaDB index (same hashing
+    embedding) and a stand-in Ollama server (src/ollama_standin.py) that
+    returns the reference response of known cases and a clarification
+    otherwise; its numbers measure the pipeline around the model, not the model.
+
+Every engine runs in its own interpreter (`--worker`), so startup time
+(interpreter launch to engine ready, and import + init alone) and peak RSS are
+its own. The report gives per engine throughput, latency p50/p95/p99, startup,
+peak RSS and label counts, and the agreement matrix between engines and the
+reference. Answers are compared as labels: clarify / none (no imaging) / irm /
+scanner / other.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO = os.path.dirname(ROOT)
+SANS_LLM = os.path.join(REPO, "v_sans_llm")
+DATASETS = [os.path.join(ROOT, "data", "clinical_cases_train.jsonl"),
+            os.path.join(ROOT, "data", "clinical_cases_val.jsonl")]
+ENGINES = ("v_arbre_d", "v_sans_llm", "v_llm")
+LABELS = ("clarify", "none", "irm", "scanner", "other", "error")
+
+_EXAMS = (("none", re.compile(r"pas d'imagerie|aucune imagerie")),
+          ("irm", re.compile(r"\birm\b")),
+          ("scanner", re.compile(r"\bscanner\b")))
+_SENTENCE_RE = re.compile(r"(?<=[.;!?])\s+|\n+")
+
+
+def label(text, clarify=False):
+    """Decision label of an answer: the first exam recommended, ignoring contraindicated ones."""
+    if clarify:
+        return "clarify"
+    low = (text or "").strip().lower().replace("’", "'")
+    if low.startswith("pour préciser"):
+        return "clarify"
+    best = None
+    for sentence in _SENTENCE_RE.split(low):
+        if "contre-indiqu" in sentence:
+            continue
+        for name, pattern in _EXAMS:
+            m = pattern.search(sentence)
+            if m and (best is None or m.start() < best[0]):
+                best = (m.start(), name)
+        if best is not None:
+            return best[1]
+    return "other"
+
+
+def case_text(instruction):
+    """Clinical case of a training instruction (the text after 'Cas clinique:')."""
+    return instruction.split("Cas clinique:", 1)[-1].strip()
+
+
+def build_corpus(datasets=DATASETS, synthetic=0, seed=0):
+    """[{id, source, text, reference, response}] — references only for the datasets."""
+    corpus = []
+    for path in datasets:
+        source = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                corpus.append({"id": f"{source}:{lineno}", "source": source,
+                               "text": case_text(obj["instruction"]),
+                               "reference": label(obj["response"]), "response": obj["response"]})
+    if synthetic:
+        sys.path.insert(0, os.path.join(ROOT, "v_arbre_d", "source"))
+        try:
+            from bench_extraction import generer_corpus
+        finally:
+            sys.path.pop(0)
+        for i, text in enumerate(generer_corpus(synthetic, seed)):
+            corpus.append({"id": f"synthetic:{i}", "source": "synthetic", "text": text,
+                           "reference": None, "response": None})
+    return corpus
+
+
+# --- worker side: one engine in a fresh interpreter -------------------------
+
+def _setup_v_arbre_d(args):
+    sys.path.insert(0, ROOT)
+    from v_arbre_d import analyse_texte_medical, decision_imagerie
+
+    return lambda text: label(decision_imagerie(analyse_texte_medical(text)))
+
+
+def _setup_v_sans_llm(args):
+    os.environ["RAG_EMBEDDING_BACKEND"] = "hashing"
+    sys.path.insert(0, SANS_LLM)
+    import indexage
+    import ollama as sans_llm  # v_sans_llm/ollama.py
+
+    collection = indexage.create_index(os.path.join(SANS_LLM, "guidelines.json"),
+                                       db_path=os.path.join(args.tmp, "rag_db"))
+    rag = sans_llm.RAGSystem(collection)
+
+    def run(text):
+        response, needs_more_info = rag.process_query(text)
+        return label(response, clarify=needs_more_info)
+    return run
+
+
+def _setup_v_llm(args):
+    sys.path.insert(0, ROOT)
+    from src.embedding_standin import hashing_embedding
+    from src.indexage import create_index
+    from src.ollama import rag_biomistral_query
+    from src.ollama_http import OllamaHTTP
+
+    collection = create_index(os.path.join(ROOT, "data", "guidelines.json"), collection_name="bench_engines",
+                              embedding_function=hashing_embedding())
+    client = OllamaHTTP(args.host)
+    return lambda text: label(rag_biomistral_query(text, collection, client=client))
+
+
+def _peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes on Linux
+
+
+def run_worker(args):
+    started = time.perf_counter()
+    result = {"engine": args.worker}
+    try:
+        run = globals()["_setup_" + args.worker](args)
+    except Exception as e:  # moteur indisponible ici : on le signale sans arrêter le benchmark
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result["startup_s"] = time.perf_counter() - started
+    result["spawn_to_ready_s"] = time.time() - args.t0
+    result["rss_ready_bytes"] = _peak_rss_bytes()
+
+    with open(args.corpus, "r", encoding="utf-8") as fh:
+        texts = [json.loads(line)["text"] for line in fh]
+    for text in texts[:args.warmup]:
+        try:
+            run(text)
+        except Exception:
+            pass
+    labels, latencies = [], []
+    clock = time.perf_counter
+    wall = clock()
+    for text in texts:
+        start = clock()
+        try:
+            labels.append(run(text))
+        except Exception:
+            labels.append("error")
+        latencies.append(clock() - start)
+    result["wall_s"] = clock() - wall
+    result["labels"] = labels
+    result["latencies_s"] = latencies
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+
+# --- orchestrator ----------------------------------------------------------
+
+def spawn_worker(engine, corpus_path, tmp, host=None, warmup=0):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", engine, "--corpus", corpus_path,
+           "--tmp", tmp, "--warmup", str(warmup), "--t0", repr(time.time())]
+    if host:
+        cmd += ["--host", host]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {"engine": engine, "error": f"worker exited with {proc.returncode}: {proc.stderr.strip()[-500:]}"}
+
+
+def agreement_matrix(columns):
+    """{a: {b: share of cases where a and b give the same label}} over the cases both answered."""
+    matrix = {}
+    for a, la in columns.items():
+        row = matrix[a] = {}
+        for b, lb in columns.items():
+            pairs = [(x, y) for x, y in zip(la, lb) if x not in (None, "error") and y not in (None, "error")]
+            row[b] = sum(x == y for x, y in pairs) / len(pairs) if pairs else None
+    return matrix
+
+
+def summarize(worker):
+    from evaluation.evaluate_http import percentile
+
+    if "error" in worker:
+        return {"error": worker["error"]}
+    lat = worker["latencies_s"]
+    return {
+        "cases": len(lat),
+        "errors": worker["labels"].count("error"),
+        "throughput_per_s": len(lat) / worker["wall_s"] if worker["wall_s"] else None,
+        "latency_ms": {"p50": percentile(lat, 50) * 1e3, "p95": percentile(lat, 95) * 1e3,
+                       "p99": percentile(lat, 99) * 1e3, "mean": sum(lat) / len(lat) * 1e3,
+                       "max": max(lat) * 1e3} if lat else None,
+        "startup_s": worker["startup_s"],
+        "spawn_to_ready_s": worker["spawn_to_ready_s"],
+        "rss_ready_mb": worker["rss_ready_bytes"] / 2**20,
+        "peak_rss_mb": worker["peak_rss_bytes"] / 2**20,
+        "labels": {name: worker["labels"].count(name) for name in LABELS if name in worker["labels"]},
+    }
+
+
+def run_benchmark(corpus, engines=ENGINES, warmup=5, llm_latency=0.0, log=print):
+    """Run every engine over `corpus` and build the report (summaries + agreement matrix)."""
+    from src.ollama_standin import StandinOllama
+
+    answers = {case["text"]: case["response"] for case in corpus if case["response"]}
+    with tempfile.TemporaryDirectory() as tmp, \
+            StandinOllama(answers, token_latency_s=llm_latency) as standin:
+        corpus_path = os.path.join(tmp, "corpus.jsonl")
+        with open(corpus_path, "w", encoding="utf-8") as fh:
+            for case in corpus:
+                fh.write(json.dumps({"text": case["text"]}, ensure_ascii=False) + "\n")
+        workers = {}
+        for engine in engines:
+            log(f"running {engine} over {len(corpus)} cases...")
+            workers[engine] = spawn_worker(engine, corpus_path, tmp, host=standin.url, warmup=warmup)
+        llm_requests = standin.requests
+
+    with_reference = [i for i, case in enumerate(corpus) if case["reference"] is not None]
+    columns = {"reference": [corpus[i]["reference"] for i in with_reference]}
+    all_cases = {}
+    for engine, worker in workers.items():
+        if "error" not in worker:
+            columns[engine] = [worker["labels"][i] for i in with_reference]
+            all_cases[engine] = worker["labels"]
+    return {
+        "corpus": {"cases": len(corpus), "with_reference": len(with_reference),
+                   "sources": {s: sum(c["source"] == s for c in corpus) for s in dict.fromkeys(c["source"] for c in corpus)}},
+        "engines": {engine: summarize(worker) for engine, worker in workers.items()},
+        "standin_requests": llm_requests,
+        # cas avec référence (engines + référence) et corpus complet (engines seuls)
+        "agreement_reference_cases": agreement_matrix(columns),
+        "agreement_all_cases": agreement_matrix(all_cases),
+        "labels": {engine: worker["labels"] for engine, worker in workers.items() if "error" not in worker},
+    }
+
+
+def print_report(report, out=sys.stdout):
+    def fmt(v, spec=".2f"):
+        return "-" if v is None else format(v, spec)
+
+    c = report["corpus"]
+    print(f"corpus: {c['cases']} cases ({', '.join(f'{k} {v}' for k, v in c['sources'].items())})", file=out)
+    print(f"{'engine':<11} {'cases/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'startup s':>10} "
+          f"{'ready s':>8} {'peak MB':>8}  labels", file=out)
+    for engine, s in report["engines"].items():
+        if "error" in s:
+            print(f"{engine:<11} unavailable: {s['error']}", file=out)
+            continue
+        lat = s["latency_ms"] or {}
+        labels = " ".join(f"{k}={v}" for k, v in s["labels"].items())
+        print(f"{engine:<11} {fmt(s['throughput_per_s'], '.1f'):>9} {fmt(lat.get('p50'), '.3f'):>8} "
+              f"{fmt(lat.get('p95'), '.3f'):>8} {fmt(lat.get('p99'), '.3f'):>8} {fmt(s['startup_s']):>10} "
+              f"{fmt(s['spawn_to_ready_s']):>8} {fmt(s['peak_rss_mb'], '.1f'):>8}  {labels}", file=out)
+    for title, key in (("agreement on the cases with a reference", "agreement_reference_cases"),
+                       ("agreement on the whole corpus", "agreement_all_cases")):
+        matrix = report[key]
+        if len(matrix) < 2:
+            continue
+        names = list(matrix)
+        print(f"\n{title}", file=out)
+        print(" " * 11 + "".join(f"{n:>11}" for n in names), file=out)
+        for a in names:
+            print(f"{a:<11}" + "".join(f"{fmt(matrix[a][b], '.1%'):>11}" for b in names), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--datasets", nargs="+", default=DATASETS,
+                        help="instruction/response JSONL files (default: train/val; "
+                             "shards of training/generate_cases.py work too)")
+    parser.add_argument("--synthetic", type=int, default=500, help="generated cases added to the datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls per engine before timing")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stand-in server delay per token (s)")
+    parser.add_argument("--out", default=None, help="JSON report path")
+    # worker mode (internal)
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--tmp", help=argparse.SUPPRESS)
+    parser.add_argument("--host", help=argparse.SUPPRESS)
+    parser.add_argument("--t0", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_worker(args)
+        sys.stdout.write("\n" + json.dumps(result) + "\n")
+        return 0
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    corpus = build_corpus(args.datasets, synthetic=args.synthetic, seed=args.seed)
+    report = run_benchmark(corpus, engines=args.engines, warmup=args.warmup, llm_latency=args.llm_latency,
+                           log=lambda msg: print(msg, file=sys.stderr))
+    print_report(report)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"\nreport written to {args.out}")
+    return 0 if all("error" not in s for s in report["engines"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Rule-table analyze_guidelines vs. the original if-chain, with per-rule profile.
+
+Usage: python3 scripts/bench_guidelines.py [--cases 5000] [--repeat 3] [--seed 0]
+
+`analyze_reference` is the if-chain analyze_guidelines used before the
+decision table (src/guidelines_logic.RULES), kept with the parity tests in
+tests/guidelines_reference.py. The corpus mixes the phrases the rules look for,
+so every rule is reached.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "tests")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src import guidelines_logic  # noqa: E402
+from src.analysis import memo_clear  # noqa: E402
+from v_arbre_d.source.negation import portees_negation  # noqa: E402
+from guidelines_reference import analyze_reference, generer_corpus  # noqa: E402
+
+
+def measure(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        portees_negation.cache_clear()
+        memo_clear()
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    corpus = generer_corpus(args.cases, seed=args.seed)
+    engine = guidelines_logic.ENGINE
+    mismatches = sum(analyze_reference(t) != guidelines_logic.analyze_guidelines(t) for t in corpus)
+
+    reference_us = measure(analyze_reference, corpus, args.repeat)
+    engine_us = measure(guidelines_logic.analyze_guidelines, corpus, args.repeat)
+
+    engine.reset_stats()
+    engine.profiling = True
+    try:
+        portees_negation.cache_clear()
+        memo_clear()
+        for text in corpus:
+            engine.evaluate(text)
+    finally:
+        engine.profiling = False
+    rows = engine.stats()
+
+    print(f"cases: {len(corpus)}  mismatches vs if-chain: {mismatches}")
+    print(f"if-chain   : {reference_us:8.2f} us/case")
+    print(f"rule table : {engine_us:8.2f} us/case")
+    print()
+    print(f"{'rule':<30} {'evaluated':>9} {'hits':>6} {'hit%':>6} {'ns/eval':>8} {'total ms':>9}")
+    for row in rows:
+        print(f"{row['rule']:<30} {row['evaluated']:>9} {row['hits']:>6} {row['hit_rate'] * 100:>5.1f}% "
+              f"{row['mean_ns']:>8.0f} {row['time_us'] / 1000:>9.2f}")
+    print(f"{'(default)':<30} {'':>9} {engine.default_hits:>6}")
+    engine.reset_stats()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump({"cases": len(corpus), "mismatches": mismatches, "reference_us": reference_us,
+                       "engine_us": engine_us, "rules": rows}, fh, indent=2, ensure_ascii=False)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Performance regression gate over the tests/perf benchmarks.
+
+Usage:
+    python3 scripts/perf_gate.py check  [--baseline tests/perf/baseline.json] [--max-regression 25] [--repeat 3] [--allow-missing]
+    python3 scripts/perf_gate.py update [--baseline tests/perf/baseline.json] [--repeat 3]
+    python3 scripts/perf_gate.py run --out current.json [--repeat 3]
+    python3 scripts/perf_gate.py compare BASELINE CURRENT [--max-regression 25] [--allow-missing]
+
+`run` executes `pytest tests/perf` (deterministic engines, retrieval, prompt
+construction, LLM round trip; offline, with the embedding and Ollama
+stand-ins) `--repeat` times and keeps, per benchmark, the run with the lowest
+median. `compare` exits with 1 when a benchmark is slower than its baseline
+by more than the allowed percentage: `--max-regression`, else the baseline's
+"thresholds" entry for that benchmark, else its "max_regression_pct". A
+baseline benchmark absent from the current run also fails, unless
+`--allow-missing` is given (e.g. when running a subset of tests/perf).
+`check` is run + compare; `update` rewrites the baseline and keeps its
+thresholds. Baselines are machine-specific: `compare` warns when the
+baseline was recorded on another machine.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src import perf_gate  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "tests", "perf", "baseline.json")
+
+
+def run(repeat=1, rounds=None, log=print):
+    """Benchmarks of `repeat` pytest sessions, keeping the lowest median of each."""
+    best = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeat):
+            path = os.path.join(tmp, f"run{i}.json")
+            cmd = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "tests/perf", "--perf-save", path]
+            if rounds:
+                cmd += ["--perf-rounds", str(rounds)]
+            log(f"benchmark session {i + 1}/{repeat}...")
+            proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"tests/perf failed:\n{proc.stdout[-2000:]}")
+            for name, stats in perf_gate.load(path)["benchmarks"].items():
+                if name not in best or stats["median"] < best[name]["median"]:
+                    best[name] = stats
+    return best
+
+
+def compare_files(baseline_path, current, max_regression=None, out=None, allow_missing=False):
+    out = out or sys.stdout
+    baseline = perf_gate.load(baseline_path)
+    if baseline.get("machine", {}).get("node") != current.get("machine", {}).get("node"):
+        print(f"warning: baseline recorded on {baseline.get('machine', {}).get('node')!r}, "
+              f"timings compared across machines", file=out)
+    rows = perf_gate.compare(baseline, current, max_regression)
+    perf_gate.print_comparison(rows, out=out)
+    failed = [r["name"] for r in rows if r["status"] == "regression"]
+    missing = [r["name"] for r in rows if r["status"] == "missing"]
+    if failed:
+        print(f"\nFAIL: {len(failed)} regression(s): {', '.join(failed)}", file=out)
+    if missing and not allow_missing:
+        print(f"\nFAIL: {len(missing)} benchmark(s) not run: {', '.join(missing)} "
+              f"(--allow-missing to accept)", file=out)
+    if failed or (missing and not allow_missing):
+        return 1
+    print("\nOK: no regression beyond the limits", file=out)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("check", "update", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--repeat", type=int, default=3, help="pytest sessions, best median kept")
+        p.add_argument("--rounds", type=int, default=None, help="rounds per benchmark")
+        if name == "run":
+            p.add_argument("--out", required=True)
+        else:
+            p.add_argument("--baseline", default=DEFAULT_BASELINE)
+        if name == "check":
+            p.add_argument("--max-regression", type=float, default=None, help="allowed slowdown in percent")
+            p.add_argument("--allow-missing", action="store_true", help="pass when baseline benchmarks were not run")
+    p = sub.add_parser("compare")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--max-regression", type=float, default=None, help="allowed slowdown in percent")
+    p.add_argument("--allow-missing", action="store_true", help="pass when baseline benchmarks were not run")
+    args = parser.parse_args(argv)
+
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    if args.command == "compare":
+        return compare_files(args.baseline, perf_gate.load(args.current), args.max_regression,
+                             allow_missing=args.allow_missing)
+
+    results = run(args.repeat, args.rounds, log=log)
+    if args.command == "run":
+        perf_gate.save(args.out, results)
+        print(f"results written to {args.out}")
+        return 0
+    if args.command == "update":
+        previous = perf_gate.load(args.baseline) if os.path.exists(args.baseline) else {}
+        perf_gate.save(args.baseline, results,
+                       max_regression_pct=previous.get("max_regression_pct", perf_gate.DEFAULT_MAX_REGRESSION_PCT),
+                       thresholds=previous.get("thresholds", {}))
+        print(f"baseline written to {args.baseline}")
+        return 0
+    current = {"machine": perf_gate.machine_info(), "benchmarks": results}
+    return compare_files(args.baseline, current, args.max_regression, allow_missing=args.allow_missing)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
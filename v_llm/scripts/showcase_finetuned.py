@@ -9,8 +9,20 @@ The script will read example prompts (one per line) and call `rag_biomistral_que
 
 This script expects Ollama to be installed and the specified model to be available
 (e.g., a finetuned biomistral model accessible as 'biomistral-clinical:finetuned').
+
+Benchmark mode (--bench) talks to the Ollama HTTP API instead and compares
+several model tags on the same prompts:
+
+    python3 scripts/showcase_finetuned.py --bench --input-file examples.txt \
+        --models biomistral-clinical:latest biomistral-clinical:finetuned --warmup 2 --repeat 5
+
+Each model gets `--warmup` untimed calls (which also load it into memory), then
+every prompt is sent `--repeat` times. Per call it records time to first token,
+total latency, prompt / eval token counts and tokens/sec; the JSON file holds
+every call and the per-model summary printed as a table.
 """
 import argparse
+import json
 import os
 import sys
 import time
@@ -20,28 +32,120 @@ ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from src.ollama import rag_biomistral_query
+from src.ollama import build_rag_prompt, rag_biomistral_query
+from src.ollama_http import OllamaHTTP
+from evaluation.evaluate_http import percentile
 
 class DummyCollection:
     def query(self, query_texts, n_results=3):
         return {'documents': [["doc: guidelines excerpt"]], 'metadatas': [[{'source':'local','motif':'showcase'}]]}
 
 
+def run_benchmark(client, models, prompts, warmup=1, repeat=3, options=None, log=print):
+    """Warm up then time every prompt `repeat` times on each model.
+
+    Returns {"calls": [...], "summary": {model: {...}}}; a failed call is kept
+    with its error and left out of the statistics.
+    """
+    calls = []
+    summary = {}
+    for model in models:
+        load_s = None
+        for i in range(warmup):
+            try:
+                r = client.generate(model, prompts[i % len(prompts)], options=options)
+                if load_s is None:
+                    load_s = r.load_s
+            except Exception as e:
+                log(f'[{model}] warm-up {i + 1}/{warmup} ERROR: {e}')
+        rows = []
+        for rep in range(repeat):
+            for i, prompt in enumerate(prompts):
+                row = {'model': model, 'prompt_index': i, 'repeat': rep}
+                try:
+                    row.update(client.generate(model, prompt, options=options).as_dict())
+                    row['output'] = row.pop('text')
+                except Exception as e:
+                    row['error'] = f'{type(e).__name__}: {e}'
+                rows.append(row)
+            log(f'[{model}] repeat {rep + 1}/{repeat} done')
+        calls.extend(rows)
+
+        ok = [r for r in rows if 'error' not in r]
+        latencies = [r['total_s'] for r in ok]
+        ttfts = [r['ttft_s'] for r in ok if r['ttft_s'] is not None]
+        eval_s = sum(r['eval_s'] for r in ok)
+        summary[model] = {
+            'calls': len(rows),
+            'errors': len(rows) - len(ok),
+            'load_s': load_s,
+            'ttft_p50_s': percentile(ttfts, 50),
+            'ttft_p95_s': percentile(ttfts, 95),
+            'latency_p50_s': percentile(latencies, 50),
+            'latency_p95_s': percentile(latencies, 95),
+            'prompt_tokens_mean': sum(r['prompt_tokens'] for r in ok) / len(ok) if ok else None,
+            'eval_tokens_mean': sum(r['eval_tokens'] for r in ok) / len(ok) if ok else None,
+            'tokens_per_s': sum(r['eval_tokens'] for r in ok) / eval_s if eval_s else None,
+        }
+    return {'calls': calls, 'summary': summary}
+
+
+def print_table(summary, out=sys.stdout):
+    columns = [('ttft p50', 'ttft_p50_s', '.3f'), ('ttft p95', 'ttft_p95_s', '.3f'),
+               ('lat p50', 'latency_p50_s', '.2f'), ('lat p95', 'latency_p95_s', '.2f'),
+               ('prompt tok', 'prompt_tokens_mean', '.0f'), ('eval tok', 'eval_tokens_mean', '.0f'),
+               ('tok/s', 'tokens_per_s', '.1f'), ('errors', 'errors', 'd')]
+    width = max([len('model')] + [len(m) for m in summary])
+    print(f"{'model':<{width}} " + ' '.join(f'{title:>10}' for title, _, _ in columns), file=out)
+    for model, stats in summary.items():
+        cells = ['-' if stats[key] is None else format(stats[key], spec) for _, key, spec in columns]
+        print(f'{model:<{width}} ' + ' '.join(f'{c:>10}' for c in cells), file=out)
+
+
+def bench(args, prompts):
+    if not args.no_rag:
+        # même prompt que l'application, avec un contexte RAG factice
+        prompts = [build_rag_prompt(p, DummyCollection()) for p in prompts]
+    models = args.models or [args.model]
+    options = {'temperature': args.temperature} if args.temperature is not None else None
+    with OllamaHTTP(args.host) as client:
+        result = run_benchmark(client, models, prompts, warmup=args.warmup, repeat=args.repeat, options=options)
+    result.update(date=datetime.now().isoformat(timespec='seconds'), host=client.host, warmup=args.warmup,
+                  repeat=args.repeat, rag=not args.no_rag, prompts=len(prompts))
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    out_path = os.path.join(args.out_dir, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, 'w', encoding='utf-8') as fh:
+        json.dump(result, fh, indent=2, ensure_ascii=False)
+    print()
+    print_table(result['summary'])
+    print('\nBenchmark saved to', out_path)
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--model', required=False, default='biomistral-clinical:latest', help='Model name to display (for logging)')
     p.add_argument('--input-file', required=True, help='File with one prompt per line')
     p.add_argument('--out-dir', default='showcase_outputs', help='Directory to save outputs')
     p.add_argument('--no-rag', action='store_true', help='Bypass RAG and send the prompt as-is')
+    p.add_argument('--bench', action='store_true', help='Benchmark mode over the Ollama HTTP API')
+    p.add_argument('--models', nargs='+', default=None, help='Model tags to compare in benchmark mode (default: --model)')
+    p.add_argument('--warmup', type=int, default=1, help='Untimed calls per model before measuring')
+    p.add_argument('--repeat', type=int, default=3, help='Timed passes over the prompts per model')
+    p.add_argument('--temperature', type=float, default=None, help='Sampling temperature in benchmark mode')
+    p.add_argument('--host', default=None, help='Ollama server (default: OLLAMA_HOST or localhost:11434)')
     args = p.parse_args()
 
+    with open(args.input_file) as f:
+        prompts = [l.strip() for l in f.readlines() if l.strip()]
+    if args.bench:
+        bench(args, prompts)
+        return
+
     os.makedirs(args.out_dir, exist_ok=True)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     out_path = os.path.join(args.out_dir, f'showcase_{timestamp}.txt')
 
-    with open(args.input_file) as f:
-        prompts = [l.strip() for l in f.readlines() if l.strip()]
-
     with open(out_path, 'w') as out_f:
         for i, prompt in enumerate(prompts, 1):
             q = prompt if args.no_rag else prompt
@@ -0,0 +1,139 @@
+"""Shared, bounded memo of the per-text analysis used by the deterministic engines.
+
+The CLI (src/main.py), the decision-tree bridge and guidelines_logic look at the
+same case text several times per turn. `analyze(text)` returns one `Analysis`
+per distinct text, so each view of it is computed at most once while the
+entry stays in the memo:
+
+    a = analyze("Patiente 34 ans, céphalées brutales, pas de fièvre")
+    a.lower       # lowercased text (computed with the entry)
+    a.folded      # ASCII, lowercase, accents removed
+    a.tokens      # words of `folded`
+    a.negations   # negation scopes over `lower` (v_arbre_d/source/negation.py)
+    a.features    # v_arbre_d.analyse_texte_medical(text), read-only
+
+Engine-specific derived values go through `a.memo(name, factory)`.
+Entries are keyed by the text itself: a str caches its hash, so looking up a
+text the engines already hold costs one dict probe, and equal hashes are
+confirmed by comparison (no digest collisions). They are evicted least
+recently used first; `memo_info()` reports the hit ratio of the memo and how
+many times each view was computed.
+"""
+import importlib
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Tuple, TypeVar
+
+from v_arbre_d.source.negation import PorteesNegation, portees_negation
+
+MAXSIZE = 256
+
+_WORD_RE = re.compile(r"\w+")
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def _fold(text: str) -> str:
+    """ASCII lowercase without accents (same normalization as v_arbre_d)."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+class Analysis:
+    """Lazily computed views of one case text."""
+
+    __slots__ = ("text", "lower", "_values", "_memo")
+
+    def __init__(self, text: str, memo: "AnalysisMemo"):
+        self.text = text
+        # every engine starts from the lowercased text
+        self.lower = text.lower()
+        self._values: Dict[str, object] = {}
+        self._memo = memo
+
+    def memo(self, name: str, factory: Callable[[], T]) -> T:
+        """Value `name` of this text, computed by `factory()` on first access."""
+        value = self._values.get(name, _MISSING)
+        if value is _MISSING:
+            self._memo.computed[name] += 1
+            value = self._values[name] = factory()
+        return value
+
+    @property
+    def folded(self) -> str:
+        return self.memo("folded", lambda: _fold(self.text))
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        return self.memo("tokens", lambda: tuple(_WORD_RE.findall(self.folded)))
+
+    @property
+    def negations(self) -> PorteesNegation:
+        return self.memo("negations", lambda: portees_negation(self.lower))
+
+    @property
+    def features(self) -> Mapping[str, object]:
+        """Decision-tree features; copy with dict() before modifying them."""
+        return self.memo("features", self._features)
+
+    def _features(self):
+        v_arbre_d = importlib.import_module("v_arbre_d")
+        return MappingProxyType(v_arbre_d.analyse_texte_medical(self.text))
+
+
+class AnalysisMemo:
+    """Bounded LRU of `Analysis` objects keyed by text."""
+
+    def __init__(self, maxsize: int = MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Analysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.computed: Counter = Counter()
+
+    def analyze(self, text: str) -> Analysis:
+        with self._lock:
+            analysis = self._entries.get(text)
+            if analysis is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return analysis
+            self.misses += 1
+            analysis = self._entries[text] = Analysis(text, self)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def info(self) -> Dict[str, object]:
+        """Lookups served from the memo vs. new texts, and computations per view."""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries), "maxsize": self.maxsize, "computed": dict(self.computed)}
+
+
+_MEMO = AnalysisMemo()
+
+
+def analyze(text: str) -> Analysis:
+    """Shared `Analysis` of `text` (see the module docstring)."""
+    return _MEMO.analyze(text)
+
+
+def memo_info() -> Dict[str, object]:
+    return _MEMO.info()
+
+
+def memo_clear() -> None:
+    _MEMO.clear()
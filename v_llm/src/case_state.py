@@ -0,0 +1,79 @@
+"""Incremental state of the CLI conversation (src/main.py).
+
+The case history only grows: each turn appends the clinician's new text.
+Whether a clarification question is answered is decided by "does the text
+contain ..." checks, which stay true once true, so CaseState runs them on the
+newly appended answer only and keeps the flags. A turn costs the same however
+long the conversation gets.
+
+Only the clinician's own words count: the question text copied into the
+history ("Y a-t-il fièvre ... ?") does not answer itself. A non-empty answer
+does answer its own question, even without keywords ("RAS", "aucun").
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+# indices of the three systematic questions, in the order the model asks them
+DURATION, RED_FLAGS, CONTEXT = 0, 1, 2
+
+_KEYWORDS = {
+    DURATION: ('depuis', 'brutal', 'brutale', 'intense', 'progress'),
+    RED_FLAGS: ('fièvre', 'fievre', 'vomit', 'vomissements', 'convuls', 'perte de connaissance', 'déficit', 'deficit'),
+    CONTEXT: ('enceinte', 'grossesse', 'cancer', 'immunod', 'traumatisme', 'trauma'),
+}
+_DURATION_RE = re.compile(r"\b(\d+\s*(j|jr|jours|semaines|mois|ans))\b")
+# an explicit yes/no or a number answers any question
+_GENERIC = ('oui', 'non')
+_NUMBER_RE = re.compile(r"\d")
+
+# duration expected in the answer to the first question (else the CLI asks for it)
+_ANSWER_DURATION_RE = re.compile(r"\b(\d+\s*(h|heures|jours|semaines|mois|ans))\b")
+
+QUESTION_SPLIT_RE = re.compile(r"[\?;\n\|]")
+ANSWER_SPLIT_RE = re.compile(r"\||,|;")
+
+
+def gives_duration(answer: str) -> bool:
+    """True if the answer to the first question states a duration."""
+    low = answer.lower()
+    return 'depuis' in low or _ANSWER_DURATION_RE.search(low) is not None
+
+
+class CaseState:
+    """Case history plus which clarification questions it already answers."""
+
+    def __init__(self):
+        self.history = ""
+        self.answered = {idx: False for idx in _KEYWORDS}
+        self.generic = False
+
+    def add_input(self, text: str) -> None:
+        """Free text typed by the clinician, appended to the history."""
+        if not self.history:
+            self.history = text
+        else:
+            self.history = self.history.rstrip() + ", " + text.lstrip()
+        self._update(text)
+
+    def add_answer(self, question: str, answer: str, idx: Optional[int] = None) -> None:
+        """Answer to `question` (index `idx`, if known), appended as 'question: answer'."""
+        self.history = self.history.rstrip() + ", " + question.lstrip() + ": " + answer
+        self._update(answer)
+        if idx is not None and answer.strip():
+            self.answered[idx] = True
+
+    def _update(self, text: str) -> None:
+        low = text.lower()
+        if not self.generic:
+            self.generic = any(w in low for w in _GENERIC) or _NUMBER_RE.search(low) is not None
+        for idx, keywords in _KEYWORDS.items():
+            if not self.answered[idx]:
+                self.answered[idx] = any(w in low for w in keywords) or (
+                    idx == DURATION and _DURATION_RE.search(low) is not None)
+
+    def is_answered(self, idx: int) -> bool:
+        return self.generic or self.answered.get(idx, False)
+
+    def open_questions(self, questions: Sequence[str]) -> List[Tuple[int, str]]:
+        """(index, question) for each question of the model not answered yet."""
+        return [(idx, q) for idx, q in enumerate(questions) if not self.is_answered(idx)]
@@ -1,31 +1,30 @@
+import importlib
 import sys
 import os
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from src.analysis import analyze
+except ImportError:  # src/ run on its own: the project root is not in sys.path
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from src.analysis import analyze
 
+
+@lru_cache(maxsize=None)
 def _import_v_arbre():
-    """Attempt to import the v_arbre_d main module by adding project root to sys.path."""
+    """Return the v_arbre_d package, resolved once and cached.
+
+    The package exposes the decision-tree functions lazily (see v_arbre_d/__init__.py).
+    The project root is added to sys.path only if v_arbre_d is not importable yet.
+    """
     try:
-        import v_arbre_d.main as v_arbre_main
-        return v_arbre_main
-    except Exception:
-        # try to add project root to path
-        this_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        if this_dir not in sys.path:
-            sys.path.insert(0, this_dir)
-        try:
-            import v_arbre_d.main as v_arbre_main
-            return v_arbre_main
-        except Exception:
-            # As last resort, try importing by path
-            vpath = os.path.join(this_dir, 'v_arbre_d')
-            if vpath not in sys.path:
-                sys.path.insert(0, vpath)
-            try:
-                import main as v_arbre_main
-                return v_arbre_main
-            except Exception:
-                raise
+        return importlib.import_module('v_arbre_d')
+    except ImportError:
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        if root not in sys.path:
+            sys.path.append(root)
+        return importlib.import_module('v_arbre_d')
 
 
 DEFAULT_QUESTIONS = {
@@ -51,7 +50,8 @@ def fill_tree_noninteractive(initial_text: str) -> Tuple[str, List[str]]:
     Otherwise recommendation_or_none is None and missing_questions is a list of questions to ask the clinician.
     """
     v = _import_v_arbre()
-    f = v.analyse_texte_medical(initial_text)
+    # features shared with the other engines through the analysis memo (read-only)
+    f = analyze(initial_text).features
 
     # Fields we consider important to decide
     required = ["fievre", "brutale", "deficit", "oncologique", "grossesse", "chirurgie", "pacemaker"]
@@ -77,7 +77,8 @@ def run_interactive(initial_text: str) -> str:
     Returns the final recommendation string (including contra-indications display text).
     """
     v = _import_v_arbre()
-    f = v.analyse_texte_medical(initial_text)
+    # own copy: the answers below are written into it
+    f = dict(analyze(initial_text).features)
 
     # Copy same questions as in v_arbre_d.main.chatbot_cephalees
     questions = DEFAULT_QUESTIONS.copy()
@@ -0,0 +1,27 @@
+"""Offline embedding for the RAG index in benchmarks and tests.
+
+ChromaDB's default embedding downloads a model on first use. This returns the
+deterministic hashing embedding of v_sans_llm (`HashingEmbeddingFunction`:
+signed hashing of words and character n-grams, numpy only), loaded by file
+path so that v_sans_llm's own modules (its `ollama.py` in particular) never
+land on sys.path:
+
+    collection = create_index(embedding_function=hashing_embedding())
+"""
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
+
+SANS_LLM_EMBEDDINGS = Path(__file__).resolve().parents[2] / "v_sans_llm" / "embeddings.py"
+
+
+@lru_cache(maxsize=None)
+def _module():
+    spec = importlib.util.spec_from_file_location("sans_llm_embeddings", str(SANS_LLM_EMBEDDINGS))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def hashing_embedding(dim: int = 768):
+    return _module().HashingEmbeddingFunction(dim=dim)
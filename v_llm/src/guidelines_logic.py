@@ -1,5 +1,14 @@
 import re
-from typing import Optional
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from src.analysis import analyze
+except ImportError:  # src/ lancé seul : la racine du projet n'est pas dans sys.path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from src.analysis import analyze
 
 
 def _find_number(text: str) -> Optional[int]:
@@ -26,248 +35,382 @@ def _weeks_from_text(text: str) -> Optional[int]:
 
 
 def _is_negated(text: str, phrase: str) -> bool:
-    """Return True if phrase appears in text but is negated (eg 'pas de fièvre')."""
-    low = text.lower()
-    occurrences = []
-    start = 0
-    while True:
-        idx = low.find(phrase, start)
-        if idx == -1:
-            break
-        occurrences.append(idx)
-        start = idx + len(phrase)
-    if not occurrences:
-        return False
-    # If any occurrence is not negated -> overall not negated
-    for idx in occurrences:
-        lookback = low[max(0, idx-30):idx]
-        if not any(k in lookback for k in ["pas", "sans", "aucun", "aucune", "ne "]):
-            return False
-    # all occurrences are negated
-    return True
+    """Return True if phrase appears in text but every occurrence is negated (eg 'pas de fièvre')."""
+    analysis = analyze(text)
+    return phrase in analysis.lower and analysis.negations.nie(phrase)
 
 
 def _present(text: str, phrase: str) -> bool:
-    """Return True if phrase appears and is not negated."""
-    low = text.lower()
-    if phrase in low:
-        return not _is_negated(low, phrase)
-    return False
-
+    """Return True if phrase appears at least once outside a negation scope.
 
-def analyze_guidelines(text: str) -> Optional[str]:
+    Negation scopes are computed once per text by the shared tagger in
+    v_arbre_d/source/negation.py and kept in the src/analysis.py memo.
     """
-    Analyse déterministe du texte clinique et retourne une seule ligne de recommandation
-    ou None si on ne prend pas de décision et laisse la génération LLM se faire.
+    analysis = analyze(text)
+    return phrase in analysis.lower and analysis.negations.present(phrase)
 
-    Cette fonction est conçue pour couvrir les cas de tests présents dans
-    `test_guidelines_outputs.py`.
-    """
-    t = text.lower()
-
-    # Urgences: require presence of 'céphalées' and a non-negated severe sign
-    if t.strip() == "céphalées":
-        return "poser des questions systématiques"
-
-    if "céphal" in t:
-        severe = False
-        if _present(t, "coup de tonnerre") or _present(t, "céphalées brutales") or _present(t, "brutales"):
-            severe = True
-        if _present(t, "fièvre"):
-            severe = True
-        if _present(t, "déficit moteur") or _present(t, "déficit sensitif"):
-            severe = True
-        # ajouter d'autres signes d'alerte fréquents
-        if _present(t, "perte de connaissance") or _present(t, "convuls") or _present(t, "vomit") or _present(t, "vomissements"):
-            severe = True
-        if severe:
-            return "URGENCE: Adresser aux urgences immédiatement"
-
-    # Contexte oncologique -> scanner en 1ère intention (tenir compte de la négation)
-    if _present(t, "antécédents oncologiques") or _present(t, "antécédent oncologique"):
-        return "contexte oncologique"
-    if _present(t, "cancer") or _present(t, "oncologique") or _present(t, "néoplasie"):
-        return "Scanner en 1ère intention: Scanner cérébral avec injection (contexte oncologique)"
-
-    # Scanner: grossesse et test de grossesse
-    if "scanner" in t:
-        # si on parle explicitement d'une grossesse en semaines/mois
-        if "enceinte" in t or "grossesse" in t:
-            w = _weeks_from_text(t)
-            if w is not None:
-                # Contre-indication absolue si grossesse débutante <2-4 semaines
-                if w <= 4:
-                    return "Contre-indication absolue"
-                # sinon on renvoie qu'il faut vérifier (ex: test de grossesse si femme <50)
-            # si pas d'info sur durée, conseiller le test chez femme <50
-            if "femme" in t and not _is_negated(t, "femme"):
-                return "test de grossesse"
-
-        # Scanner injecté -> créatinine si >60 ans ou antécédents rénaux
-        if "scanner inject" in t or "scanner injecté" in t or "scanner injecte" in t:
-            age = _find_number(t) or 0
-            if age >= 60:
-                return "dosage créatinine"
-            if any(x in t for x in ["antécédent rénal", "antécédent de chirurgie rénale", "malformation rénale", "antécédent rénal", "malformation rénale"]):
-                return "dosage créatinine"
-            # allergies
-            if "allergie" in t and not _is_negated(t, "allergie"):
-                if "iode" in t or "produit de contraste" in t:
-                    return "vérifier allergie au produit de contraste iodé"
-                if "bétadine" in t or "betadine" in t:
-                    return "ne contre-indique pas le scanner"
-                if "crustac" in t:
-                    return "ne contre-indique pas le scanner"
-
-        # cas général femme d'âge en âge fertile sans info
-        if "femme" in t and ("âge" in t or "ans" in t or "femme de" in t) and (not _present(t, "ménopause")):
-            # si on demande explicitement "pas de ménopause" ou âge <50 et scanner demandé
-            if "pas de ménopause" in t or ("femme de" in t and _find_number(t) and _find_number(t) < 50):
-                return "test de grossesse"
 
-    # IRM: chirurgie récente
-    if "irm" in t or "irm demand" in t:
-        if "chirurgie" in t and ("récente" in t or "il y a" in t):
-            w = _weeks_from_text(t)
-            # si on a une info sur les semaines et <6 semaines
-            if w is not None and w < 6:
-                return "attendre la 6ème semaine"
-            # texte parlant de matériel
-            if "pose de matériel" in t or "matériel" in t:
-                return "attendre la 6ème semaine"
-
-        # grossesse débutante <3 mois -> contre-indication à l'IRM
-        if "enceinte" in t or "grossesse" in t:
-            w = _weeks_from_text(t)
-            if w is not None and w < 12:
-                return "contre-indication à l’IRM"
-            if w is None and "femme" in t:
-                # si femme enceinte sans durée précise, considérer comme contre-indication
-                return "contre-indication à l’IRM"
-
-        # pacemaker
-        if "pace-maker" in t or "pacemaker" in t or "pace maker" in t:
-            return "se rapprocher du centre d’imagerie"
-
-    # If pacemaker is present but the request is a scanner (or no IRM requested), prefer scanner
-    if ("pace-maker" in t or "pacemaker" in t or "pace maker" in t) and "irm" not in t:
-        return "Scanner cérébral"
+# ---------------------------------------------------------------------------
+# Rule engine: conditions are small declarative objects over the features of
+# one case. RuleEngine turns the whole table into one generated Python
+# function (an if-chain again), so evaluating it costs what the hand-written
+# chain cost, and the features shared by several rules are extracted once.
+# ---------------------------------------------------------------------------
 
-    # valves, prothèses, matériel spécifique
-    if any(k in t for k in ["valve cardiaque", "prothèse aortique", "valve de dérivation", "valve", "prothèse mécanique"]):
-        return "envoyer les références du matériel"
+_DURATION_RE = re.compile(r"depuis|\b\d+\s*(h|heures|jours|semaines|mois)\b|brutal|brutale|intense|progress")
+_AGE_MENTION_RE = re.compile(r"\b(?:patient|patiente|homme|femme)\b\s*\d+\s*ans\b")
+_YEARS_RE = re.compile(r"\b\d+\s*ans\b")
+_NOT_FIRST_EPISODE_RE = re.compile(r"pas\s+premier")
 
-    # prothèse articulaire ou ostéosynthèse posé >6 semaines => aucun problème
-    if any(k in t for k in ["prothèse articulaire", "prothèse de hanche", "matériel d'ostéosynthèse", "prothèse"]) and ("il y a" in t or "posée" in t or "posée il y a" in t):
-        w = _weeks_from_text(t)
-        if w is None or w >= 6:
-            return "aucun problème"
-        if w < 6:
-            return "attendre la 6ème semaine"
 
-    # claustrophobie
-    if "claustroph" in t:
-        return "se rapprocher du centre d’imagerie"
+class _Case:
+    """Numeric features of one text, extracted lazily and at most once."""
 
-    # IRM injectée
-    if "irm inject" in t or "irm injectée" in t:
-        if "déjà eu" in t or "ayant déjà eu" in t:
-            return "pas besoin de créatinine"
-        if "allergie" in t:
-            return "vérifier absence d’allergie"
+    __slots__ = ("text", "_weeks", "_number")
 
-    # Céphalées: questions systématiques et cas spécifiques
-    if "céphalé" in t or "céphalées" in t:
-        # priorité urgences déjà gérée plus haut
-        # Si le texte ne contient pas d'informations essentielles (durée, signes
-        # d'alerte, grossesse/antécédents oncologiques), considérer les données
-        # comme manquantes et demander des précisions au lieu de prendre une
-        # décision par défaut.
-        import re as _re
-        # Duration-like info or character (brutal/intense/progressive)
-        # Ignore patterns that likely refer to patient age (eg 'patiente 35 ans').
-        age_pattern = bool(_re.search(r"\b(?:patient|patiente|homme|femme)\b\s*\d+\s*ans\b", t))
-        has_duration = bool(_re.search(r"depuis|\b\d+\s*(h|heures|jours|semaines|mois)\b|brutal|brutale|intense|progress", t))
-        # If there's a standalone '\d+ ans' and it does not look like an age, treat as duration
-        if not has_duration:
-            if _re.search(r"\b\d+\s*ans\b", t) and not age_pattern:
-                has_duration = True
-        # Any red flag explicitly present and not negated
-        has_redflag = any(_present(t, k) for k in ["fièvre", "fievre", "coup de tonnerre", "céphalées brutales", "brutales", "déficit moteur", "déficit sensitif", "convuls", "vomit", "vomissements", "perte de connaissance"]) 
-        # grossesse / antécédents oncologiques
-        has_preg_or_onco = any(_present(t, k) for k in ["enceinte", "grossesse", "cancer", "oncologique", "antécédent oncologique", "antécédents oncologiques"]) 
-
-        # Si aucune des informations essentielles n'est fournie (ni durée/caractère,
-        # ni signes d'alerte, ni grossesse/antécédents), demander des précisions.
-        if not (has_duration or has_redflag or has_preg_or_onco):
-            # Construire les questions de clarification dans le même format
-            # utilisé par le reste du programme.
-            return ("Pour préciser: Depuis quand et quel caractère ont les céphalées ? | "
+    def __init__(self, text: str):
+        self.text = text
+        self._weeks = _Case
+        self._number = _Case
+
+    @property
+    def weeks(self) -> Optional[int]:
+        if self._weeks is _Case:
+            self._weeks = _weeks_from_text(self.text)
+        return self._weeks
+
+    @property
+    def number(self) -> int:
+        """First number of the text (usually the age), 0 when there is none."""
+        if self._number is _Case:
+            self._number = _find_number(self.text) or 0
+        return self._number
+
+
+class _Compiler:
+    """Collects the constants referenced by the generated source."""
+
+    def __init__(self):
+        self.namespace: Dict[str, object] = {}
+
+    def const(self, value) -> str:
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+
+class Condition:
+    """Base class: `source()` returns a Python expression over `t` (lowered text),
+    `neg` (its negation scopes) and `case` (lazy numeric features)."""
+
+    def source(self, compiler: _Compiler) -> str:
+        raise NotImplementedError
+
+
+class Has(Condition):
+    """Any of the phrases occurs in the text (plain substring)."""
+
+    def __init__(self, *phrases: str):
+        self.phrases = phrases
+
+    def source(self, compiler):
+        return "(" + " or ".join(f"{p!r} in t" for p in self.phrases) + ")"
+
+
+class Present(Condition):
+    """Any of the phrases occurs outside a negation scope."""
+
+    def __init__(self, *phrases: str):
+        self.phrases = phrases
+
+    def source(self, compiler):
+        return "(" + " or ".join(f"({p!r} in t and neg.present({p!r}))" for p in self.phrases) + ")"
+
+
+class Equals(Condition):
+    """The stripped text is exactly `value`."""
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def source(self, compiler):
+        return f"(t.strip() == {self.value!r})"
+
+
+class Matches(Condition):
+    """A compiled regular expression matches somewhere in the text."""
+
+    def __init__(self, pattern: "re.Pattern"):
+        self.pattern = pattern
+
+    def source(self, compiler):
+        return f"({compiler.const(self.pattern.search)}(t) is not None)"
+
+
+_OPERATORS = ("<", "<=", ">", ">=")
+
+
+class Weeks(Condition):
+    """Compare the pregnancy / surgery duration in weeks; `Weeks(None)` when none is given."""
+
+    def __init__(self, op: Optional[str], value: int = 0):
+        if op is not None and op not in _OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        self.op = op
+        self.value = value
+
+    def source(self, compiler):
+        if self.op is None:
+            return "(case.weeks is None)"
+        return f"(case.weeks is not None and case.weeks {self.op} {self.value!r})"
+
+
+class Number(Condition):
+    """Compare the first number of the text (0 when absent)."""
+
+    def __init__(self, op: str, value: int):
+        if op not in _OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        self.op = op
+        self.value = value
+
+    def source(self, compiler):
+        return f"(case.number {self.op} {self.value!r})"
+
+
+class All(Condition):
+    def __init__(self, *conditions: Condition):
+        self.conditions = conditions
+
+    def source(self, compiler):
+        return "(" + " and ".join(c.source(compiler) for c in self.conditions) + ")"
+
+
+class Any(Condition):
+    def __init__(self, *conditions: Condition):
+        self.conditions = conditions
+
+    def source(self, compiler):
+        return "(" + " or ".join(c.source(compiler) for c in self.conditions) + ")"
+
+
+class Not(Condition):
+    def __init__(self, condition: Condition):
+        self.condition = condition
+
+    def source(self, compiler):
+        return f"(not {self.condition.source(compiler)})"
+
+
+class Rule:
+    """One line of the decision table: the first rule whose condition holds wins."""
+
+    __slots__ = ("name", "condition", "output")
+
+    def __init__(self, name: str, condition: Condition, output: str):
+        self.name = name
+        self.condition = condition
+        self.output = output
+
+
+class RuleEngine:
+    """Ordered rules compiled into a first-match evaluator.
+
+    The table is compiled twice: a plain function returning the index of the
+    first matching rule (-1 for the default), and an instrumented copy that
+    also times every evaluated condition, used while `profiling` is True.
+    Hit counters are always kept; `stats()` reports them with the timings.
+    """
+
+    def __init__(self, rules, default: str):
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        names = [r.name for r in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("rule names must be unique")
+        self.default = default
+        self._outputs = tuple(r.output for r in self.rules)
+        self.profiling = False
+        n = len(self.rules)
+        self.hits, self.timed_evaluations, self.time_ns = [0] * n, [0] * n, [0] * n
+        self.default_hits = 0
+        self._match = self._compile(profiled=False)
+        self._match_profiled = self._compile(profiled=True)
+
+    def _compile(self, profiled: bool) -> Callable[[str, object, _Case], int]:
+        compiler = _Compiler()
+        lines = ["def match(t, neg, case):"]
+        if profiled:
+            compiler.namespace.update(clock=time.perf_counter_ns, timed=self.timed_evaluations, spent=self.time_ns)
+        for i, rule in enumerate(self.rules):
+            condition = rule.condition.source(compiler)
+            if profiled:
+                lines += [f"    start = clock()",
+                          f"    matched = {condition}",
+                          f"    spent[{i}] += clock() - start",
+                          f"    timed[{i}] += 1",
+                          f"    if matched: return {i}"]
+            else:
+                lines.append(f"    if {condition}: return {i}  # {rule.name}")
+        lines.append("    return -1")
+        code = compile("\n".join(lines), f"<rules {'profiled' if profiled else 'plain'}>", "exec")
+        exec(code, compiler.namespace)
+        return compiler.namespace["match"]
+
+    def reset_stats(self) -> None:
+        # zeroed in place: the profiled function holds references to these lists
+        for counters in (self.hits, self.timed_evaluations, self.time_ns):
+            counters[:] = [0] * len(counters)
+        self.default_hits = 0
+
+    def evaluate(self, text: str) -> str:
+        analysis = analyze(text)
+        t = analysis.lower
+        match = self._match_profiled if self.profiling else self._match
+        i = match(t, analysis.negations, analysis.memo("guidelines", lambda: _Case(t)))
+        if i < 0:
+            self.default_hits += 1
+            return self.default
+        self.hits[i] += 1
+        return self._outputs[i]
+
+    def stats(self) -> List[Dict]:
+        """Per-rule counters in table order.
+
+        First-match order means rule i was evaluated once for every call that
+        reached it: the hits of rules i.. plus the calls that fell through.
+        """
+        reached = self.default_hits
+        evaluated = [0] * len(self.rules)
+        for i in range(len(self.rules) - 1, -1, -1):
+            reached += self.hits[i]
+            evaluated[i] = reached
+        rows = []
+        for i, rule in enumerate(self.rules):
+            timed = self.timed_evaluations[i]
+            rows.append({
+                "rule": rule.name,
+                "output": rule.output,
+                "evaluated": evaluated[i],
+                "hits": self.hits[i],
+                "hit_rate": self.hits[i] / evaluated[i] if evaluated[i] else 0.0,
+                "time_us": self.time_ns[i] / 1000,
+                "mean_ns": self.time_ns[i] / timed if timed else 0.0,
+            })
+        return rows
+
+# ---------------------------------------------------------------------------
+# Decision table (order matters: the first matching rule wins).
+# ---------------------------------------------------------------------------
+
+HEADACHE = Has("céphal")
+RED_FLAGS = ("coup de tonnerre", "céphalées brutales", "brutales", "fièvre", "déficit moteur", "déficit sensitif",
+             "perte de connaissance", "convuls", "vomit", "vomissements")
+SERIOUS_CONTEXT = ("fièvre", "déficit moteur", "déficit sensitif", "cancer", "oncologique")
+PREGNANCY = Has("enceinte", "grossesse")
+SCANNER = Has("scanner")
+INJECTED_SCANNER = All(SCANNER, Has("scanner inject", "scanner injecté", "scanner injecte"))
+IODINE_ALLERGY = All(INJECTED_SCANNER, Present("allergie"))
+IRM = Has("irm")
+RECENT_SURGERY = All(IRM, Has("chirurgie"), Has("récente", "il y a"))
+PACEMAKER = Has("pace-maker", "pacemaker", "pace maker")
+PROSTHESIS = All(Has("prothèse articulaire", "prothèse de hanche", "matériel d'ostéosynthèse", "prothèse"),
+                 Has("il y a", "posée", "posée il y a"))
+INJECTED_IRM = Has("irm inject", "irm injectée")
+HEADACHE_QUESTIONS = Has("céphalé", "céphalées")
+# essential information for a headache: duration or character, red flag, pregnancy / cancer
+HAS_DURATION = Any(Matches(_DURATION_RE), All(Matches(_YEARS_RE), Not(Matches(_AGE_MENTION_RE))))
+ESSENTIAL_INFO = Any(HAS_DURATION, Present("fievre", *RED_FLAGS),
+                     Present("enceinte", "grossesse", "cancer", "oncologique", "antécédent oncologique",
+                             "antécédents oncologiques"))
+CHRONIC_CONSTANT = Has("constantes chroniques", "céphalées constantes")
+
+CLARIFY_HEADACHE = ("Pour préciser: Depuis quand et quel caractère ont les céphalées ? | "
                     "Y a‑t‑il fièvre, vomissements, perte de connaissance, convulsions ou déficit neurologique focal ? | "
                     "La patiente est‑elle enceinte, a‑t‑elle des antécédents majeurs (cancer, immunodépression) ou un traumatisme crânien récent ?")
 
-        # douleurs articulaires -> maladie de Horton
-        if "douleurs articulaires" in t or "douleur artic" in t:
-            if "suspect" in t or "suspicion" in t or "maladie" in t:
-                return "maladie de Horton"
-            return "maladie de Horton"
-
-        # troubles visuels
-        if "troubles visuels" in t:
-            if "image stroboscopique" in t:
-                return "préciser le type de trouble visuel"
-        if "cécité" in t and not _is_negated(t, "cécité"):
-            return "considérer comme déficit moteur"
-
-        # vertiges => considérer comme déficit moteur
-        if "vertige" in t and not _is_negated(t, "vertige"):
-            return "considérer comme déficit moteur"
-
-        # acouphènes
-        if "acouph" in t:
-            return "préciser sur l’ordonnance"
-
-        # premier épisode
-        if _present(t, "premier épisode"):
-            return "premier épisode"
-        # explicit pattern 'pas premier épisode' or 'pas premier'
-        if re.search(r"pas\s+premier", t) and "épisode" in t:
-            return "déjà un bilan"
-        if "pas premier épisode" in t:
-            return "déjà un bilan"
-
-        # Prioritise: chronic but not 'constantes chroniques' -> Group 1
-        if ("chron" in t or "chroniques" in t) and not ("constantes chroniques" in t or "céphalées constantes" in t):
-            if not any(_present(t, k) for k in ["fièvre", "déficit moteur", "déficit sensitif", "cancer", "oncologique"]):
-                return "Pour préciser: Groupe 1"
-
-        # chroniques constantes -> 'chroniques ou par crises'
-        if "constantes chroniques" in t or "céphalées constantes" in t or ("chroniques" in t and "constantes" in t):
-            return "chroniques ou par crises"
-
-        # antécédents particuliers
-        if "antécédents oncologiques" in t or ("antécédents" in t and "infect" in t):
-            return "antécédents particuliers"
-
-        # chroniques -> Pour préciser: Groupe 1 when explicitly chronic and no other red flags
-        if ("chron" in t or "constantes" in t) and not any(_present(t, k) for k in ["fièvre", "déficit moteur", "déficit sensitif", "cancer", "oncologique"]):
-            return "Pour préciser: Groupe 1"
-
-        # progressives depuis X -> IRM si absence de contre-indication
-        if "progress" in t or "progressives" in t:
-            w = _weeks_from_text(t)
-            if w is None or w >= 4:
-                return "IRM cérébrale"
-
-        # crises répétées -> chronicité / par crises
-        if "crises" in t or "crises répétées" in t:
-            return "chroniques ou par crises"
-
-        # Default for headaches without red flags: IRM en première intention
-        if not any(_present(t, k) for k in ["fièvre", "déficit moteur", "déficit sensitif", "cancer", "oncologique"]) and "chron" not in t:
-            return "IRM en première intention"
-
-    # sinon renvoyer un rappel de poser les questions systématiques
-    return "poser des questions systématiques"
+RULES = (
+    Rule("headache_only", Equals("céphalées"), "poser des questions systématiques"),
+    # Urgences: 'céphal' and a non-negated severe sign
+    Rule("urgency", All(HEADACHE, Present(*RED_FLAGS)), "URGENCE: Adresser aux urgences immédiatement"),
+    # Contexte oncologique -> scanner en 1ère intention
+    Rule("oncology_history", Present("antécédents oncologiques", "antécédent oncologique"), "contexte oncologique"),
+    Rule("oncology", Present("cancer", "oncologique", "néoplasie"),
+         "Scanner en 1ère intention: Scanner cérébral avec injection (contexte oncologique)"),
+    # Scanner: grossesse débutante et test de grossesse
+    Rule("scanner_early_pregnancy", All(SCANNER, PREGNANCY, Weeks("<=", 4)), "Contre-indication absolue"),
+    Rule("scanner_pregnancy_test", All(SCANNER, PREGNANCY, Present("femme")), "test de grossesse"),
+    # Scanner injecté -> créatinine si >= 60 ans ou antécédents rénaux, puis allergies
+    Rule("injected_scanner_age", All(INJECTED_SCANNER, Number(">=", 60)), "dosage créatinine"),
+    Rule("injected_scanner_renal", All(INJECTED_SCANNER, Has("antécédent rénal", "antécédent de chirurgie rénale",
+                                                             "malformation rénale")), "dosage créatinine"),
+    Rule("iodine_allergy", All(IODINE_ALLERGY, Has("iode", "produit de contraste")),
+         "vérifier allergie au produit de contraste iodé"),
+    Rule("betadine_allergy", All(IODINE_ALLERGY, Has("bétadine", "betadine")), "ne contre-indique pas le scanner"),
+    Rule("shellfish_allergy", All(IODINE_ALLERGY, Has("crustac")), "ne contre-indique pas le scanner"),
+    # femme en âge de procréer sans autre information
+    Rule("scanner_childbearing_age",
+         All(SCANNER, Has("femme"), Has("âge", "ans", "femme de"), Not(Present("ménopause")),
+             Any(Has("pas de ménopause"), All(Has("femme de"), Number(">", 0), Number("<", 50)))),
+         "test de grossesse"),
+    # IRM: chirurgie récente
+    Rule("irm_recent_surgery_weeks", All(RECENT_SURGERY, Weeks("<", 6)), "attendre la 6ème semaine"),
+    Rule("irm_recent_surgery_material", All(RECENT_SURGERY, Has("pose de matériel", "matériel")),
+         "attendre la 6ème semaine"),
+    # grossesse débutante <3 mois -> contre-indication à l'IRM
+    Rule("irm_pregnancy_weeks", All(IRM, PREGNANCY, Weeks("<", 12)), "contre-indication à l’IRM"),
+    Rule("irm_pregnancy_unknown", All(IRM, PREGNANCY, Weeks(None), Has("femme")), "contre-indication à l’IRM"),
+    Rule("irm_pacemaker", All(IRM, PACEMAKER), "se rapprocher du centre d’imagerie"),
+    Rule("pacemaker_scanner", All(PACEMAKER, Not(IRM)), "Scanner cérébral"),
+    # valves, prothèses, matériel spécifique
+    Rule("valve", Has("valve cardiaque", "prothèse aortique", "valve de dérivation", "valve", "prothèse mécanique"),
+         "envoyer les références du matériel"),
+    Rule("prosthesis_recent", All(PROSTHESIS, Weeks("<", 6)), "attendre la 6ème semaine"),
+    Rule("prosthesis", PROSTHESIS, "aucun problème"),
+    Rule("claustrophobia", Has("claustroph"), "se rapprocher du centre d’imagerie"),
+    # IRM injectée
+    Rule("injected_irm_previous", All(INJECTED_IRM, Has("déjà eu", "ayant déjà eu")), "pas besoin de créatinine"),
+    Rule("injected_irm_allergy", All(INJECTED_IRM, Has("allergie")), "vérifier absence d’allergie"),
+    # Céphalées: questions systématiques et cas spécifiques
+    Rule("headache_clarify", All(HEADACHE_QUESTIONS, Not(ESSENTIAL_INFO)), CLARIFY_HEADACHE),
+    Rule("horton", All(HEADACHE_QUESTIONS, Has("douleurs articulaires", "douleur artic")), "maladie de Horton"),
+    Rule("visual_stroboscopic", All(HEADACHE_QUESTIONS, Has("troubles visuels"), Has("image stroboscopique")),
+         "préciser le type de trouble visuel"),
+    Rule("blindness", All(HEADACHE_QUESTIONS, Present("cécité")), "considérer comme déficit moteur"),
+    Rule("vertigo", All(HEADACHE_QUESTIONS, Present("vertige")), "considérer comme déficit moteur"),
+    Rule("tinnitus", All(HEADACHE_QUESTIONS, Has("acouph")), "préciser sur l’ordonnance"),
+    Rule("first_episode", All(HEADACHE_QUESTIONS, Present("premier épisode")), "premier épisode"),
+    Rule("not_first_episode",
+         All(HEADACHE_QUESTIONS, Any(All(Matches(_NOT_FIRST_EPISODE_RE), Has("épisode")), Has("pas premier épisode"))),
+         "déjà un bilan"),
+    Rule("chronic_group1", All(HEADACHE_QUESTIONS, Has("chron", "chroniques"), Not(CHRONIC_CONSTANT),
+                               Not(Present(*SERIOUS_CONTEXT))), "Pour préciser: Groupe 1"),
+    Rule("chronic_constant", All(HEADACHE_QUESTIONS, Any(CHRONIC_CONSTANT, All(Has("chroniques"), Has("constantes")))),
+         "chroniques ou par crises"),
+    Rule("particular_history",
+         All(HEADACHE_QUESTIONS, Any(Has("antécédents oncologiques"), All(Has("antécédents"), Has("infect")))),
+         "antécédents particuliers"),
+    Rule("constant_group1", All(HEADACHE_QUESTIONS, Has("chron", "constantes"), Not(Present(*SERIOUS_CONTEXT))),
+         "Pour préciser: Groupe 1"),
+    Rule("progressive", All(HEADACHE_QUESTIONS, Has("progress", "progressives"), Any(Weeks(None), Weeks(">=", 4))),
+         "IRM cérébrale"),
+    Rule("attacks", All(HEADACHE_QUESTIONS, Has("crises", "crises répétées")), "chroniques ou par crises"),
+    Rule("headache_default", All(HEADACHE_QUESTIONS, Not(Present(*SERIOUS_CONTEXT)), Not(Has("chron"))),
+         "IRM en première intention"),
+)
+
+ENGINE = RuleEngine(RULES, default="poser des questions systématiques")
+
 
-    return None
+def analyze_guidelines(text: str) -> Optional[str]:
+    """
+    Analyse déterministe du texte clinique et retourne une seule ligne de recommandation
+    (ou None si on ne prend pas de décision et laisse la génération LLM se faire).
+
+    Les règles sont déclarées dans RULES et évaluées dans l'ordre par ENGINE : la
+    première dont la condition est vraie donne la réponse. Les caractéristiques du
+    texte (négations, durée, âge) ne sont extraites qu'une fois par texte (mémo
+    partagé de src/analysis.py), et `ENGINE.stats()` donne le nombre de
+    déclenchements (et la durée si `ENGINE.profiling`) de chaque règle. La table couvre les cas de
+    `test_guidelines_outputs.py`.
+    """
+    return ENGINE.evaluate(text)
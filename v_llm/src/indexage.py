@@ -3,11 +3,13 @@ import json
 from chromadb.utils import embedding_functions
 
 # fonction qui créer l'indexage du rag a partir de chromaDB
-def create_index(guidelines_file="data/guidelines.json", collection_name="guidelines_collection"):
+# embedding_function: remplace l'embedding standard (ex. embedding hors-ligne pour les benchmarks)
+def create_index(guidelines_file="data/guidelines.json", collection_name="guidelines_collection",
+                 embedding_function=None):
     client = chromadb.Client()
     collection = client.get_or_create_collection(
         name=collection_name,   # pour l'instant on utilise un embedding standard
-        embedding_function=embedding_functions.DefaultEmbeddingFunction()
+        embedding_function=embedding_function or embedding_functions.DefaultEmbeddingFunction()
     )
 
 # on extrait les keys json etc
@@ -1,8 +1,15 @@
 from pathlib import Path
+import sys
 from indexage import create_index
 import importlib.util
 from pathlib import Path as _Path
 
+# racine du projet : état incrémental de la conversation (src/case_state.py)
+_ROOT = str(_Path(__file__).resolve().parents[1])
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+from src.case_state import ANSWER_SPLIT_RE, QUESTION_SPLIT_RE, CaseState, gives_duration
+
 # Load the local `ollama.py` module explicitly to avoid shadowing by the
 # installed `ollama` package in site-packages.
 _ollama_path = _Path(__file__).parent / "ollama.py"
@@ -21,8 +28,11 @@ def main():
 
     print("Décrivez le cas clinique du patient (ou tapez 'quit' pour quitter)\n")
 
-    case_history = ""
+    state = CaseState()
+    # questions de clarification en cours : (indice de la question du modèle, question)
     pending_questions = None
+    # questions déjà reposées une fois sans réponse : au tour suivant, on rappelle le modèle
+    reasked = False
     while True:
         user_input = input("Médecin: ")
 
@@ -34,73 +44,56 @@ def main():
         # Si on attend des réponses aux questions de clarification en cours 
         # On traite le dernier input utilisateur comme une réponse 
         if pending_questions:
-            import re
-            answers = [a.strip() for a in re.split(r"\||,|;", user_input) if a.strip()]
+            answers = [a.strip() for a in ANSWER_SPLIT_RE.split(user_input) if a.strip()]
             # associe les réponses aux questions
-            for i, q in enumerate(pending_questions):
+            for i, (idx, q) in enumerate(pending_questions):
                 ans = answers[i] if i < len(answers) else ''
-                # on vérifie que la durée des symptomes est donnée dans la première réponse, sinon on demande à clarifier
-                if i == 0:
-                    lcans = ans.lower()
-                    # cherce les mots clés
-                    if not ("depuis" in lcans or re.search(r"\b(\d+\s*(h|heures|jours|jours|semaines|mois|ans))\b", lcans)):
-                        # demande la duration
-                        follow = input("Précisez la durée (ex: '2 jours', '1 semaine', '2 semaines', ou 'depuis 3 jours'): ")
-                        if follow.lower() in ["quit", "exit", "q"]:
-                            print("Fin de session.")
-                            return
-                        if follow.strip():
-                            # associe caractères et la duration si elle est donnée
-                            if ans:
-                                ans = ans + ", depuis " + follow.strip()
-                            else:
-                                ans = "depuis " + follow.strip()
-                case_history = case_history.rstrip() + ", " + q.lstrip() + ": " + ans
+                # on vérifie que la durée des symptomes est donnée dans la réponse à la première question, sinon on demande à clarifier
+                if idx == 0 and not gives_duration(ans):
+                    # demande la duration
+                    follow = input("Précisez la durée (ex: '2 jours', '1 semaine', '2 semaines', ou 'depuis 3 jours'): ")
+                    if follow.lower() in ["quit", "exit", "q"]:
+                        print("Fin de session.")
+                        return
+                    if follow.strip():
+                        # associe caractères et la duration si elle est donnée
+                        if ans:
+                            ans = ans + ", depuis " + follow.strip()
+                        else:
+                            ans = "depuis " + follow.strip()
+                # l'état n'est mis à jour qu'à partir de cette réponse ; une réponse non vide clôt sa question
+                state.add_answer(q, ans, idx)
+            still_open = [(idx, q) for idx, q in pending_questions if not state.is_answered(idx)]
+            # aucune réponse : le modèle reposerait les mêmes questions, on les repose une fois sans l'appeler
+            if len(still_open) == len(pending_questions) and not reasked:
+                reasked = True
+                _print_questions(pending_questions)
+                continue
             pending_questions = None
+            reasked = False
         else:
-            # accumule les données en les stockant dans case_history
-            if not case_history:
-                case_history = user_input
-            else:
-                # on ajoute la clarification à case_history
-                case_history = case_history.rstrip() + ", " + user_input.lstrip()
+            # accumule les données dans l'historique du cas
+            state.add_input(user_input)
 
-        response = rag_biomistral_query(case_history, collection)
+        response = rag_biomistral_query(state.history, collection)
 
         # si le modèle demande des clarifications, on extrait les questions et on les labeles comme en cours dans l'array candidates
         if isinstance(response, str) and response.startswith("Pour préciser:"):
             questions_text = response[len("Pour préciser:"):].strip()
-            import re
-            candidates = [q.strip() for q in re.split(r"[\?;\n\|]", questions_text) if q.strip()]
+            candidates = [q.strip() for q in QUESTION_SPLIT_RE.split(questions_text) if q.strip()]
             if not candidates:
                 candidates = [questions_text]
 
-            # si dans case_history on y trouve deja les infos que demande le modèle, on refait une query
-            def _is_answered(idx, ch_text):
-                lc = ch_text.lower()
-                if idx == 0:
-                    if 'depuis' in lc or re.search(r"\b(\d+\s*(j|jr|jours|semaines|mois|ans))\b", lc) or any(w in lc for w in ['brutal', 'brutale', 'intense', 'progress']):
-                        return True
-                if idx == 1:
-                    if any(w in lc for w in ['fièvre', 'fievre', 'vomit', 'vomissements', 'convuls', 'perte de connaissance', 'déficit', 'deficit']):
-                        return True
-                if idx == 2:
-                    if any(w in lc for w in ['enceinte', 'grossesse', 'cancer', 'immunod', 'traumatisme', 'trauma']):
-                        return True
-                if any(w in lc for w in ['oui', 'non']) or re.search(r"\d{1,3}", lc):
-                    return True
-                return False
-
-            answered_flags = [_is_answered(i, case_history) for i in range(len(candidates))]
-            if all(answered_flags):
-                response = rag_biomistral_query(case_history, collection)
+            # si l'historique répond déjà à toutes les questions du modèle, on refait une query
+            open_questions = state.open_questions(candidates)
+            if not open_questions:
+                response = rag_biomistral_query(state.history, collection)
                 print(f"\nBioMistral : {response}\n")
                 continue
 
-            # associe les questions en cours a l'array candidates
-            pending_questions = candidates
-            print("\nBioMistral : Pour préciser (répondez sur une seule ligne, séparées par '|' ou des virgules) :")
-            print(" | ".join(pending_questions))
+            # seules les questions encore sans réponse sont posées
+            pending_questions = open_questions
+            _print_questions(pending_questions)
             continue
 
         # si le modèle ne respecte pas le format, on return ce fallback hardcoder avec des questions pour clarifier
@@ -116,12 +109,17 @@ def main():
                 if ans.lower() in ["quit", "exit", "q"]:
                     print("Fin de session.")
                     return
-                case_history = case_history.rstrip() + ", " + q + ": " + ans.strip()
+                state.add_answer(q, ans.strip())
 
-            # refaire une query du rag avec les nouveaux inputs stockés dans case_history
-            response = rag_biomistral_query(case_history, collection)
+            # refaire une query du rag avec les nouveaux inputs stockés dans l'historique
+            response = rag_biomistral_query(state.history, collection)
 
         print(f"\nBioMistral : {response}\n")
 
+
+def _print_questions(pending_questions):
+    print("\nBioMistral : Pour préciser (répondez sur une seule ligne, séparées par '|' ou des virgules) :")
+    print(" | ".join(q for _, q in pending_questions))
+
 if __name__ == "__main__":
     main()
@@ -41,8 +41,8 @@ def _normalize_response(resp: Any) -> str:
         return str(getattr(resp, 'content'))
     return str(resp)
 
-# lance un rag query, récupère le contexte venant de chromaDB, construit un prompt et appelle Biomistral
-def rag_biomistral_query(question: str, collection) -> str:
+# construit le prompt envoyé au modèle à partir du contexte ChromaDB (partagé avec scripts/showcase_finetuned.py)
+def build_rag_prompt(question: str, collection) -> str:
 
 # 1 - récupére le contexte de ChromaDB
     results = collection.query(query_texts=[question], n_results=3)
@@ -85,11 +85,16 @@ Le JSON doit être la SEULE chose dans la réponse (aucun autre texte).
 
 RÉPONDS maintenant en FRANÇAIS.
 """
+    return prompt
 
 
+# lance un rag query, récupère le contexte venant de chromaDB, construit un prompt et appelle Biomistral
+# client: objet exposant generate(model=, prompt=) (ex. src.ollama_http.OllamaHTTP), sinon le paquet ollama installé
+def rag_biomistral_query(question: str, collection, client=None) -> str:
+    prompt = build_rag_prompt(question, collection)
 
     # 3 on import ollama et on apelle le modèle
-    ollama = _import_installed_ollama()
+    ollama = client if client is not None else _import_installed_ollama()
 
     #  appelle le modèle
     def _call_model(p: str):
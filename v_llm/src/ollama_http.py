@@ -0,0 +1,113 @@
+"""Minimal client for the Ollama HTTP API (`/api/generate`), shared across threads.
+
+`ollama run` in a subprocess pays a process spawn and a model attach per call;
+one `OllamaHTTP` keeps a pooled connection to the server instead and can be
+used concurrently. Responses are streamed so the time to first token is
+measured on the client, and the token counts / durations reported by the
+server in the final chunk are kept:
+
+    client = OllamaHTTP()                      # OLLAMA_HOST or http://localhost:11434
+    r = client.generate("biomistral-clinical:latest", "Patiente 34 ans, céphalées")
+    r.text, r.ttft_s, r.total_s, r.eval_tokens, r.tokens_per_s
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+DEFAULT_HOST = "http://localhost:11434"
+
+
+@dataclass
+class GenerateResult:
+    model: str
+    text: str
+    ttft_s: Optional[float]       # client side: request sent -> first non-empty chunk
+    total_s: float                # client side: request sent -> last chunk
+    prompt_tokens: int = 0        # server side (prompt_eval_count)
+    eval_tokens: int = 0          # server side (eval_count)
+    prompt_eval_s: float = 0.0
+    eval_s: float = 0.0
+    load_s: float = 0.0
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        """Generation throughput measured by the server (eval tokens / eval time)."""
+        return self.eval_tokens / self.eval_s if self.eval_s else None
+
+    @property
+    def response(self) -> str:
+        """Same field name as the `ollama` package's generate() result."""
+        return self.text
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["tokens_per_s"] = self.tokens_per_s
+        return d
+
+
+class OllamaHTTP:
+    """Thread-safe wrapper around one pooled `httpx.Client`."""
+
+    def __init__(self, host: Optional[str] = None, timeout: float = 120.0, max_connections: int = 16,
+                 transport: Optional[httpx.BaseTransport] = None):
+        host = host or os.environ.get("OLLAMA_HOST") or DEFAULT_HOST
+        if "://" not in host:
+            host = "http://" + host
+        self.host = host.rstrip("/")
+        self._client = httpx.Client(
+            base_url=self.host,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> GenerateResult:
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        parts = []
+        ttft = None
+        final: Dict[str, Any] = {}
+        start = time.perf_counter()
+        with self._client.stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"ollama: {chunk['error']}")
+                piece = chunk.get("response", "")
+                if piece:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    parts.append(piece)
+                if chunk.get("done"):
+                    final = chunk
+                    break
+        total = time.perf_counter() - start
+        return GenerateResult(
+            model=model,
+            text="".join(parts),
+            ttft_s=ttft,
+            total_s=total,
+            prompt_tokens=final.get("prompt_eval_count", 0),
+            eval_tokens=final.get("eval_count", 0),
+            # durations are reported in nanoseconds
+            prompt_eval_s=final.get("prompt_eval_duration", 0) / 1e9,
+            eval_s=final.get("eval_duration", 0) / 1e9,
+            load_s=final.get("load_duration", 0) / 1e9,
+        )
@@ -0,0 +1,137 @@
+"""Stand-in Ollama server for offline benchmarks and tests.
+
+Serves `/api/generate` and `/api/chat` (streamed NDJSON or a single JSON
+object, like Ollama) with deterministic answers: the first registered case
+whose text occurs in the prompt gives the reply, any other prompt gets
+`default`. Optional delays per request and per generated token stand in for
+the model's prefill and decoding time:
+
+    with StandinOllama({"céphalées brutales": "Recommandation: IRM ..."}) as server:
+        OllamaHTTP(server.url).generate("biomistral-clinical:latest", prompt)
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+DEFAULT_ANSWER = ("Pour préciser: Depuis quand et quel caractère ont les céphalées ? | "
+                  "Y a‑t‑il fièvre, vomissements, perte de connaissance, convulsions ou déficit neurologique focal ? | "
+                  "La patiente est‑elle enceinte, a‑t‑elle des antécédents majeurs (cancer, immunodépression) ?")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # un client qui ferme sa connexion keep-alive en quittant n'est pas une erreur
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandinOllama:
+    def __init__(self, answers: Optional[Dict[str, str]] = None, default: str = DEFAULT_ANSWER,
+                 latency_s: float = 0.0, token_latency_s: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        # les cas les plus longs d'abord : un cas contenu dans un autre ne le masque pas
+        self.answers = sorted((answers or {}).items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.default = default
+        self.latency_s = latency_s
+        self.token_latency_s = token_latency_s
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def answer(self, prompt: str) -> str:
+        for case, reply in self.answers:
+            if case in prompt:
+                return reply
+        return self.default
+
+    def start(self) -> "StandinOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # pas de journal par requête
+                pass
+
+            def do_POST(self):
+                if self.path not in ("/api/generate", "/api/chat"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with standin._lock:
+                    standin.requests += 1
+                if self.path == "/api/chat":
+                    prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+                else:
+                    prompt = body.get("prompt", "")
+                start = time.perf_counter()
+                time.sleep(standin.latency_s)
+                tokens = standin.answer(prompt).split(" ")
+                pieces = [t + (" " if i < len(tokens) - 1 else "") for i, t in enumerate(tokens)]
+
+                def chunk(piece, done):
+                    if self.path == "/api/chat":
+                        out = {"model": body.get("model"), "message": {"role": "assistant", "content": piece}}
+                    else:
+                        out = {"model": body.get("model"), "response": piece}
+                    out["done"] = done
+                    return out
+
+                final = {"prompt_eval_count": len(prompt.split()), "eval_count": len(tokens),
+                         "load_duration": 0, "prompt_eval_duration": int(standin.latency_s * 1e9)}
+                if body.get("stream", True):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    decode_start = time.perf_counter()
+                    for piece in pieces:
+                        time.sleep(standin.token_latency_s)
+                        self._write_chunk(chunk(piece, False))
+                    final.update(chunk("", True), eval_duration=int((time.perf_counter() - decode_start) * 1e9),
+                                 total_duration=int((time.perf_counter() - start) * 1e9))
+                    self._write_chunk(final)
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    time.sleep(standin.token_latency_s * len(tokens))
+                    final.update(chunk("".join(pieces), True),
+                                 eval_duration=int(standin.token_latency_s * len(tokens) * 1e9),
+                                 total_duration=int((time.perf_counter() - start) * 1e9))
+                    data = json.dumps(final).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+            def _write_chunk(self, obj):
+                data = json.dumps(obj, ensure_ascii=False).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,166 @@
+"""Timing benchmarks with JSON baselines and a regression check.
+
+The `benchmark` fixture of tests/perf (a small subset of pytest-benchmark's)
+times a callable and records its statistics here; `--perf-save PATH` writes
+them as JSON at the end of the session. `compare` then checks a results file
+against a stored baseline, benchmark by benchmark, on the median time per call:
+
+    benchmark(analyze_guidelines, "céphalées brutales")       # in a test
+    pytest tests/perf --perf-save current.json
+    python scripts/perf_gate.py compare tests/perf/baseline.json current.json
+
+A benchmark regresses when it is more than `max_regression_pct` slower than
+its baseline; the limit is global or set per benchmark in the baseline file.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_ROUNDS = 5
+DEFAULT_MIN_TIME = 0.005          # seconds per round: calls are batched up to this
+DEFAULT_MAX_REGRESSION_PCT = 25.0
+
+# benchmark name -> statistics, filled by the fixture during a pytest session
+RESULTS: Dict[str, Dict[str, Any]] = {}
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Statistics of per-call times (seconds)."""
+    return {
+        "rounds": len(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+class Benchmark:
+    """Callable timer bound to one test: `benchmark(fn, *args)` runs and times `fn`.
+
+    The call is repeated in rounds of `iterations` calls; `iterations` is
+    calibrated so that a round lasts at least `min_time`, and each round gives
+    one per-call sample. Returns the result of `fn`.
+    """
+
+    def __init__(self, name: str, rounds: int = DEFAULT_ROUNDS, min_time: float = DEFAULT_MIN_TIME,
+                 timer: Callable[[], float] = time.perf_counter, results: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.rounds = rounds
+        self.min_time = min_time
+        self.timer = timer
+        self.results = RESULTS if results is None else results
+        self.stats: Optional[Dict[str, Any]] = None
+
+    def __call__(self, fn: Callable, *args, **kwargs):
+        result = fn(*args, **kwargs)  # warm-up; its result goes back to the test
+        iterations = self._calibrate(lambda: fn(*args, **kwargs))
+        samples = []
+        for _ in range(self.rounds):
+            start = self.timer()
+            for _ in range(iterations):
+                fn(*args, **kwargs)
+            samples.append((self.timer() - start) / iterations)
+        self._record(samples, iterations)
+        return result
+
+    def pedantic(self, fn: Callable, args=(), kwargs=None, setup: Optional[Callable[[], None]] = None,
+                 rounds: Optional[int] = None, iterations: int = 1):
+        """Explicit rounds; `setup` runs untimed before each round (e.g. to clear a cache)."""
+        kwargs = kwargs or {}
+        result = None
+        samples = []
+        for _ in range(rounds or self.rounds):
+            if setup is not None:
+                setup()
+            start = self.timer()
+            for _ in range(iterations):
+                result = fn(*args, **kwargs)
+            samples.append((self.timer() - start) / iterations)
+        self._record(samples, iterations)
+        return result
+
+    def _calibrate(self, call: Callable[[], Any]) -> int:
+        iterations = 1
+        while True:
+            start = self.timer()
+            for _ in range(iterations):
+                call()
+            elapsed = self.timer() - start
+            if elapsed >= self.min_time or iterations >= 1 << 20:
+                return iterations
+            iterations = max(iterations * 2, int(iterations * self.min_time / elapsed) if elapsed > 0 else 0)
+
+    def _record(self, samples: List[float], iterations: int) -> None:
+        self.stats = dict(summarize(samples), iterations=iterations)
+        self.results[self.name] = self.stats
+
+
+def machine_info() -> Dict[str, Any]:
+    return {"node": platform.node(), "machine": platform.machine(), "processor": platform.processor(),
+            "python": platform.python_version(), "implementation": platform.python_implementation(),
+            "cpu_count": os.cpu_count()}
+
+
+def save(path: str, results: Dict[str, Dict[str, Any]], **extra) -> Dict[str, Any]:
+    data = {"date": datetime.now().isoformat(timespec="seconds"), "machine": machine_info(),
+            "benchmarks": dict(sorted(results.items()))}
+    data.update(extra)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    return data
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            max_regression_pct: Optional[float] = None) -> List[Dict[str, Any]]:
+    """One row per benchmark: baseline / current median and status.
+
+    status: "ok", "regression" (slower than allowed), "new" (no baseline) or
+    "missing" (in the baseline, not run). The limit is `max_regression_pct`
+    if given, else the baseline's per-benchmark "thresholds" entry, else its
+    "max_regression_pct", else DEFAULT_MAX_REGRESSION_PCT.
+    """
+    thresholds = baseline.get("thresholds", {})
+    default = baseline.get("max_regression_pct", DEFAULT_MAX_REGRESSION_PCT)
+    base, cur = baseline.get("benchmarks", {}), current.get("benchmarks", {})
+    rows = []
+    for name in sorted(set(base) | set(cur)):
+        limit = max_regression_pct if max_regression_pct is not None else thresholds.get(name, default)
+        row = {"name": name, "limit_pct": limit,
+               "baseline": base[name]["median"] if name in base else None,
+               "current": cur[name]["median"] if name in cur else None,
+               "change_pct": None}
+        if row["baseline"] is None:
+            row["status"] = "new"
+        elif row["current"] is None:
+            row["status"] = "missing"
+        else:
+            row["change_pct"] = (row["current"] / row["baseline"] - 1.0) * 100.0
+            row["status"] = "regression" if row["change_pct"] > limit else "ok"
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], out=sys.stdout) -> None:
+    def us(v):
+        return "-" if v is None else f"{v * 1e6:.2f}"
+
+    width = max([len(r["name"]) for r in rows] + [9])
+    print(f"{'benchmark':<{width}} {'base µs':>10} {'now µs':>10} {'change':>8} {'limit':>7}  status", file=out)
+    for r in rows:
+        change = "-" if r["change_pct"] is None else f"{r['change_pct']:+.1f}%"
+        print(f"{r['name']:<{width}} {us(r['baseline']):>10} {us(r['current']):>10} {change:>8} "
+              f"{r['limit_pct']:>6.0f}%  {r['status']}", file=out)
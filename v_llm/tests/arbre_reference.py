@@ -0,0 +1,57 @@
+"""
+Version d'origine de analyse_texte_medical (une recherche regex par information),
+conservée à l'identique comme oracle du test de parité (test_arbre_extraction.py)
+et comme référence de v_arbre_d/source/bench_extraction.py
+"""
+
+import re
+import unicodedata
+
+
+def analyse_reference(texte):
+    """Version d'origine de analyse_texte_medical : une dizaine de `re.search` par texte"""
+    t_norm = unicodedata.normalize("NFKD", texte)
+    t_norm = t_norm.encode("ascii", "ignore").decode("ascii").lower()
+
+    age_re = re.compile(r"\b(?P<age>\d{1,3})\s*ans?\b")
+    preg_detect_re = re.compile(r"\b(?:enceinte|grossesse|gestation)\b")
+    sem_re = re.compile(r"\b(?:enceinte|grossesse).*?(?P<weeks>\d{1,2})\s*(?:sem(?:aines?)?|sa|semaine)\b")
+    mois_re = re.compile(r"\b(?:enceinte|grossesse).*?(?P<months>\d{1,2})\s*mois\b")
+
+    age_match = age_re.search(t_norm)
+    age = int(age_match.group('age')) if age_match else None
+    if age is not None and not (0 <= age <= 120):
+        age = None
+
+    if re.search(r"\bpatiente\b", t_norm):
+        sexe = "f"
+    elif re.search(r"\bpatient\b", t_norm):
+        sexe = "m"
+    else:
+        sexe = None
+
+    grossesse_detectee = bool(preg_detect_re.search(t_norm))
+    sem_match = sem_re.search(t_norm)
+    mois_match = mois_re.search(t_norm)
+    semaines = None
+    if sem_match:
+        semaines = int(sem_match.group('weeks'))
+    elif mois_match:
+        semaines = int(mois_match.group('months')) * 4
+    if semaines is not None and not (0 <= semaines <= 45):
+        semaines = None
+
+    return {
+        "age": age,
+        "sexe": sexe,
+        "grossesse": grossesse_detectee,
+        "grossesse_sem": semaines,
+        "fievre": bool(re.search(r"\b(?:fievre|febrile|febr|fiev)\b", t_norm)),
+        "brutale": bool(re.search(r"\b(?:brutal\w*|coup de tonnerre)\b", t_norm)),
+        "deficit": bool(re.search(r"\b(?:deficit|deficitaire|paralys(?:ie|is)?|paresi(?:e)?|hemipleg(?:ie)?|trouble moteur|trouble sensitif)\b", t_norm)),
+        "oncologique": bool(re.search(r"\b(?:cancer|oncolog|tumeur|metast)\b", t_norm)),
+        "chirurgie": bool(re.search(r"\b(?:chirurg|oper(?:at(?:ion|oire))?|materiel|prothese|osteosynth|postop|postoperatoire)\b", t_norm)),
+        "pacemaker": bool(re.search(r"\b(?:pace[- _]?maker|pacemaker|stimulateur)\b", t_norm)),
+        "claustrophobie": bool(re.search(r"\bclaustro\w*\b", t_norm)),
+        "vertige": bool(re.search(r"\bvertig\w*\b", t_norm)),
+    }
@@ -1,4 +1,7 @@
+import ast
 import sys, os
+
+import pytest
 # Ajouter la racine du projet et le dossier src dans sys.path pour les tests
 root = os.path.dirname(os.path.dirname(__file__))
 if root not in sys.path:
@@ -6,3 +9,29 @@ if root not in sys.path:
 src_dir = os.path.join(root, 'src')
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
+
+
+
+@pytest.fixture(scope='session')
+def golden_inputs():
+    """Entrées de tests/test_guidelines_outputs.py (lues statiquement : ce script importe la pile RAG)"""
+    with open(os.path.join(root, 'tests', 'test_guidelines_outputs.py'), encoding='utf-8') as fh:
+        tree = ast.parse(fh.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'test_cases' for t in node.targets):
+            return [case['input'] for case in ast.literal_eval(node.value)]
+    raise AssertionError('test_cases not found')
+
+
+# Benchmarks de tests/perf (voir src/perf_gate.py)
+def pytest_addoption(parser):
+    group = parser.getgroup('perf', 'benchmarks (tests/perf)')
+    group.addoption('--perf-rounds', type=int, default=None, help='rounds per benchmark (default 5)')
+    group.addoption('--perf-save', default=None, metavar='PATH', help='write benchmark results as JSON')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = session.config.getoption('--perf-save')
+    if path:
+        from src import perf_gate
+        perf_gate.save(path, perf_gate.RESULTS)
@@ -0,0 +1,11 @@
+import pytest
+
+from src import perf_gate
+
+
+@pytest.fixture
+def benchmark(request):
+    """Timer à la pytest-benchmark ; le résultat est enregistré sous le nom du test."""
+    rounds = request.config.getoption('--perf-rounds') or perf_gate.DEFAULT_ROUNDS
+    return perf_gate.Benchmark(request.node.name, rounds=rounds)
+
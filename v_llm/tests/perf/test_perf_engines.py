@@ -0,0 +1,31 @@
+"""Deterministic engines over the golden inputs (one benchmark call = one pass over all of them)."""
+from src import analysis
+from src.guidelines_logic import analyze_guidelines
+from v_arbre_d import analyse_texte_medical, decision_imagerie
+
+
+def _guidelines_pass(texts):
+    return [analyze_guidelines(t) for t in texts]
+
+
+def test_guidelines_cold(benchmark, golden_inputs):
+    # mémo vidé avant chaque tour : analyse complète de chaque texte
+    out = benchmark.pedantic(_guidelines_pass, args=(golden_inputs,), setup=analysis.memo_clear,
+                             rounds=4 * benchmark.rounds)
+    assert len(out) == len(golden_inputs) and all(out)
+
+
+def test_guidelines_memo_hit(benchmark, golden_inputs):
+    _guidelines_pass(golden_inputs)
+    out = benchmark(_guidelines_pass, golden_inputs)
+    assert len(out) == len(golden_inputs)
+
+
+def test_arbre_extraction(benchmark, golden_inputs):
+    out = benchmark(lambda texts: [analyse_texte_medical(t) for t in texts], golden_inputs)
+    assert all('age' in f for f in out)
+
+
+def test_arbre_decision(benchmark, golden_inputs):
+    out = benchmark(lambda texts: [decision_imagerie(analyse_texte_medical(t)) for t in texts], golden_inputs)
+    assert all(isinstance(d, str) and d for d in out)
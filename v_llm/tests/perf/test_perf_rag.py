@@ -0,0 +1,56 @@
+"""Retrieval, prompt construction and the LLM round trip, offline.
+
+The index uses the hashing embedding (src/embedding_standin.py) and the model
+is the stand-in server (src/ollama_standin.py): these benchmarks time our own
+code around ChromaDB and Ollama, not an embedding model or BioMistral.
+"""
+import pathlib
+
+import pytest
+
+from src.embedding_standin import hashing_embedding
+from src.indexage import create_index
+from src.ollama import build_rag_prompt, rag_biomistral_query
+from src.ollama_http import OllamaHTTP
+from src.ollama_standin import StandinOllama
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture(scope='module')
+def embedding():
+    return hashing_embedding()
+
+
+@pytest.fixture(scope='module')
+def collection(embedding):
+    return create_index(str(ROOT / 'data' / 'guidelines.json'), collection_name='perf_guidelines',
+                        embedding_function=embedding)
+
+
+@pytest.fixture(scope='module')
+def llm_client():
+    with StandinOllama({'céphalées': 'Recommandation: IRM cérébrale sans injection.'}) as server, \
+            OllamaHTTP(server.url) as client:
+        yield client
+
+
+def test_query_embedding(benchmark, embedding, golden_inputs):
+    vectors = benchmark(embedding, golden_inputs)
+    assert len(vectors) == len(golden_inputs)
+
+
+def test_retrieval(benchmark, collection, golden_inputs):
+    out = benchmark(lambda texts: [collection.query(query_texts=[t], n_results=3) for t in texts], golden_inputs)
+    assert all(len(r['documents'][0]) == 3 for r in out)
+
+
+def test_prompt_construction(benchmark, collection, golden_inputs):
+    prompts = benchmark(lambda texts: [build_rag_prompt(t, collection) for t in texts], golden_inputs)
+    assert all(t in p for t, p in zip(golden_inputs, prompts))
+
+
+def test_rag_llm_round_trip(benchmark, collection, llm_client, golden_inputs):
+    texts = golden_inputs[:10]
+    out = benchmark(lambda: [rag_biomistral_query(t, collection, client=llm_client) for t in texts])
+    assert all(o.startswith(('Recommandation:', 'Pour préciser:')) for o in out)
@@ -0,0 +1,54 @@
+import pytest
+
+from src import analysis
+from src.analysis import AnalysisMemo, analyze, memo_clear, memo_info
+from src.decision_tree_bridge import fill_tree_noninteractive
+from src.guidelines_logic import analyze_guidelines
+
+
+def test_views_are_computed_once_per_text():
+    memo = AnalysisMemo(maxsize=4)
+    a = memo.analyze("Patiente 34 ans, Céphalées brutales, pas de fièvre")
+    assert memo.analyze("Patiente 34 ans, Céphalées brutales, pas de fièvre") is a
+    assert a.lower == "patiente 34 ans, céphalées brutales, pas de fièvre"
+    assert a.folded == "patiente 34 ans, cephalees brutales, pas de fievre"
+    assert a.tokens[:3] == ("patiente", "34", "ans")
+    assert a.negations.present("brutales") and a.negations.nie("fièvre")
+    assert a.features["age"] == 34 and not a.features["fievre"]
+    a.negations, a.features, a.tokens
+    info = memo.info()
+    assert (info["hits"], info["misses"], info["hit_ratio"]) == (1, 1, 0.5)
+    assert info["computed"] == {"folded": 1, "tokens": 1, "negations": 1, "features": 1}
+
+
+def test_features_are_read_only():
+    f = AnalysisMemo().analyze("patient 30 ans").features
+    with pytest.raises(TypeError):
+        f["fievre"] = True
+
+
+def test_lru_eviction():
+    memo = AnalysisMemo(maxsize=2)
+    first = memo.analyze("a")
+    memo.analyze("b")
+    memo.analyze("a")  # 'b' becomes the least recently used
+    memo.analyze("c")
+    assert memo.info()["size"] == 2
+    assert memo.analyze("a") is first
+    assert memo.info()["misses"] == 3
+    memo.analyze("b")
+    assert memo.info()["misses"] == 4
+    with pytest.raises(ValueError):
+        AnalysisMemo(maxsize=0)
+
+
+def test_engines_share_the_memo():
+    memo_clear()
+    text = "Patiente 34 ans, céphalées brutales, pas de fièvre, scanner demandé"
+    analyze_guidelines(text)
+    fill_tree_noninteractive(text)
+    analyze_guidelines(text)
+    info = memo_info()
+    assert info["misses"] == 1 and info["hits"] == 2
+    assert info["computed"]["negations"] == 1 and info["computed"]["features"] == 1
+    assert analysis.analyze(text) is analyze(text)
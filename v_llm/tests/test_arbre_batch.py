@@ -0,0 +1,55 @@
+import json
+import subprocess
+import sys
+import os
+
+import pytest
+
+from v_arbre_d.source import batch
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+BATCH = os.path.join(PROJECT_ROOT, 'v_arbre_d', 'source', 'batch.py')
+
+
+def run_batch(path, *args):
+    proc = subprocess.run([sys.executable, BATCH, str(path), *args], capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+def test_batch_jsonl_keeps_order_across_workers(tmp_path):
+    textes = ["patiente 30 ans enceinte de 8 semaines, céphalées", "patient 50 ans, fièvre", "patient 40 ans"] * 20
+    entree = tmp_path / "demandes.jsonl"
+    with open(entree, "w", encoding="utf-8") as fh:
+        for i, texte in enumerate(textes):
+            fh.write(json.dumps({"id": f"d{i}", "texte": texte}, ensure_ascii=False) + "\n")
+        fh.write("{pas du json\n")
+
+    sequentiel = run_batch(entree, "--workers", "1")
+    parallele = run_batch(entree, "--workers", "2", "--taille-paquet", "7")
+    assert parallele == sequentiel
+    assert [r["id"] for r in parallele[:-1]] == [f"d{i}" for i in range(len(textes))]
+    assert parallele[0]["features"]["grossesse_sem"] == 8
+    assert "urgence" in parallele[1]["recommandation"]
+    assert "Remarques complémentaires" in parallele[2]["contre_indications"]
+    assert "erreur" in parallele[-1]
+
+
+def test_batch_csv(tmp_path):
+    entree = tmp_path / "demandes.csv"
+    entree.write_text("numero,demande\n7,\"patient 45 ans, antécédent de cancer\"\n", encoding="utf-8")
+    (resultat,) = run_batch(entree, "--id", "numero", "--workers", "1")
+    assert resultat["id"] == "7"
+    assert resultat["features"]["oncologique"] is True
+
+
+@pytest.mark.parametrize("taille", [0, -3])
+def test_batch_rejects_empty_packets(tmp_path, taille):
+    with pytest.raises(ValueError):
+        list(batch.analyser_flux([("d0", "patient 40 ans", None)], workers=1, taille_paquet=taille))
+
+    entree = tmp_path / "demandes.jsonl"
+    entree.write_text(json.dumps({"id": "d0", "texte": "patient 40 ans"}) + "\n", encoding="utf-8")
+    proc = subprocess.run([sys.executable, BATCH, str(entree), "--taille-paquet", str(taille)],
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 2 and "--taille-paquet" in proc.stderr
@@ -0,0 +1,23 @@
+import itertools
+
+from v_arbre_d.source import main as arbre
+
+# toutes les bornes des tranches, plus des valeurs saisies à la main (0, négatif, décimal)
+SEMAINES = [None, 0, -2, 1, 3, 3.5, 4, 8, 11, 11.9, 12, 16, 45]
+
+
+def test_table_matches_decision_tree_exhaustively():
+    signes = arbre.SIGNES_DECISION
+    for valeurs in itertools.product([False, True], repeat=len(signes)):
+        for semaines in SEMAINES:
+            f = dict(zip(signes, valeurs))
+            f.update(grossesse_sem=semaines, age=70, sexe="f", claustrophobie=True)
+            assert arbre.decision_imagerie(f) == arbre._rediger_decision_imagerie(f), (f, semaines)
+
+
+def test_table_size_and_truthy_values():
+    assert len(arbre._TABLE_DECISION) == 4 << len(arbre.SIGNES_DECISION)
+    f = {signe: 0 for signe in arbre.SIGNES_DECISION}
+    f.update(oncologique=1, grossesse_sem=None)
+    assert arbre.decision_imagerie(f) == arbre._rediger_decision_imagerie(f)
+    assert "oncologique" in arbre.decision_imagerie(f)
@@ -0,0 +1,118 @@
+import re
+
+import pytest
+
+from arbre_reference import analyse_reference
+from v_arbre_d.source import bench_extraction as bench
+from v_arbre_d.source import main as arbre
+from v_arbre_d.source.negation import portees_negation
+
+# informations dont la valeur doit être strictement identique à la version d'origine
+EXACT_KEYS = ["age", "sexe", "grossesse_sem"]
+# détections booléennes : sur-ensemble de la référence (keywords.json ajoute des
+# synonymes), sauf pour les déclencheurs retirés volontairement ci-dessous
+BOOL_KEYS = ["grossesse", "fievre", "brutale", "deficit", "oncologique", "chirurgie", "pacemaker",
+             "claustrophobie", "vertige"]
+# déclencheurs de la référence retirés de keywords.json (mot seul trop ambigu)
+EXCLUS = {"chirurgie": ["materiel"]}
+
+CASES = [
+    "Patiente 32 ans enceinte de 3 mois, céphalées brutales en coup de tonnerre",
+    "patiente 28 ans, grossesse 10 SA, céphalées fébriles",
+    "Patient 45 ans, céphalées, antécédent de cancer du poumon, pace-maker",
+    "patient 150 ans enceinte de 50 semaines",
+    "enceinte\n12 semaines, patiente 30 ans",
+    "enceinte 12\nsemaines puis 20 semaines",
+    "grossesse123 sem, 7 ans",
+    "patiente enceinte12sa vertiges",
+    "Homme 60 ans, chirurgie récente avec matériel, claustrophobe, hémiplégie",
+    "Patient 50 ans, céphalées, matériel informatique",
+    "patiente 35 ans, matériel d'ostéosynthèse",
+    "",
+]
+
+
+def _sans_portees_niees(texte):
+    """Texte normalisé dont les portées de négation sont effacées (la référence les ignore)"""
+    t_norm = arbre._normaliser(texte)
+    portees = portees_negation(t_norm)
+    for debut, fin in zip(portees.debuts, portees.fins):
+        t_norm = t_norm[:debut] + " " * (fin - debut) + t_norm[fin:]
+    return t_norm
+
+
+def _sans_exclus(t_norm, cle):
+    """Texte normalisé dont les déclencheurs retirés de `cle` sont effacés"""
+    for mot in EXCLUS.get(cle, ()):
+        t_norm = re.sub(rf"\b{mot}\b", lambda m: " " * len(m.group()), t_norm)
+    return t_norm
+
+
+def test_parity_with_reference():
+    ecarts_exclus = 0
+    for texte in CASES + bench.generer_corpus(3000, seed=7):
+        new = arbre.analyse_texte_medical(texte)
+        ref = analyse_reference(texte)
+        affirme_norm = _sans_portees_niees(texte)
+        affirme = analyse_reference(affirme_norm)
+        for key in EXACT_KEYS:
+            attendu = ref[key]
+            if key == "grossesse_sem" and not new["grossesse"]:
+                attendu = None
+            assert new[key] == attendu, (key, texte)
+        for key in BOOL_KEYS:
+            if new[key] or not affirme[key]:
+                continue
+            # seul écart admis : la référence n'a vu qu'un déclencheur retiré
+            assert not analyse_reference(_sans_exclus(affirme_norm, key))[key], (key, texte)
+            ecarts_exclus += 1
+    # les déclencheurs retirés sont bien exercés (cas « matériel » seul de CASES)
+    assert ecarts_exclus > 0
+
+
+def test_keywords_json_synonyms():
+    f = arbre.analyse_texte_medical(
+        "Patiente 40 ans, fièvreuse, oncologique, métastases, vision floue, acouphènes, douleur de la mâchoire"
+    )
+    assert f["fievre"] and f["oncologique"]
+    assert f["troubles_visuels"] and f["acouphene"] and f["douleurs_articulaires"]
+    assert not f["pacemaker"] and not f["grossesse"]
+
+
+@pytest.mark.parametrize("texte, signe", [
+    ("Patient 40 ans, opérationnel au travail, céphalées depuis 2 jours", "chirurgie"),
+    ("matériel informatique au bureau", "chirurgie"),
+    ("céphalée temporale droite", "douleurs_articulaires"),
+    ("vision normale, pas de photophobie", "troubles_visuels"),
+    ("contexte flou", "troubles_visuels"),
+    ("traitement par febuxostat", "fievre"),
+])
+def test_unrelated_words_are_not_matched(texte, signe):
+    assert not arbre.analyse_texte_medical(texte)[signe]
+
+
+@pytest.mark.parametrize("texte, signe", [
+    ("opéré il y a 3 semaines", "chirurgie"),
+    ("patiente opérée du genou", "chirurgie"),
+    ("opérations multiples", "chirurgie"),
+    ("douleur de l'articulation temporo-mandibulaire", "douleurs_articulaires"),
+    ("vision floue", "troubles_visuels"),
+    ("troubles visuels transitoires", "troubles_visuels"),
+])
+def test_anchored_keywords(texte, signe):
+    assert arbre.analyse_texte_medical(texte)[signe]
+
+
+def test_unrelated_word_does_not_change_decision():
+    texte = "Patient 40 ans, {} au travail, céphalées depuis 2 jours"
+    f = arbre.analyse_texte_medical(texte.format("opérationnel"))
+    assert not f["chirurgie"]
+    assert "postopératoire" not in arbre.decision_imagerie(f)
+    assert "postopératoire" in arbre.decision_imagerie(arbre.analyse_texte_medical(texte.format("opéré")))
+
+
+def test_returns_all_features():
+    f = arbre.analyse_texte_medical("patient 30 ans")
+    assert list(f)[:4] == ["age", "sexe", "grossesse", "grossesse_sem"]
+    assert set(arbre.SIGNES) - {"grossesse"} <= set(f)
+    assert f["age"] == 30 and f["sexe"] == "m"
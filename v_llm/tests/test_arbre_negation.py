@@ -0,0 +1,58 @@
+import pytest
+
+from v_arbre_d.source import main as arbre
+from v_arbre_d.source.negation import etiqueter, portees_negation
+
+
+def _niees(texte):
+    portees = etiqueter(texte)
+    return [texte[debut:fin] for debut, fin in zip(portees.debuts, portees.fins)]
+
+
+@pytest.mark.parametrize("texte, attendu", [
+    ("céphalées brutales, pas de fièvre ni déficit moteur", ["de fièvre", "déficit moteur"]),
+    ("pas de fièvre, céphalées brutales", ["de fièvre"]),
+    ("il n'a plus de fièvre mais vomissements", ["de fièvre"]),
+    ("sans antécédent oncologique", ["antécédent oncologique"]),
+    ("aucun déficit sensitif", ["déficit sensitif"]),
+    ("test de grossesse négatif, céphalées", ["test de grossesse"]),
+    ("céphalées, pas premier épisode", ["premier épisode"]),
+    # déclencheur collé à une ponctuation ouvrante
+    ("céphalées (pas de fièvre)", ["de fièvre"]),
+    ("céphalées (sans fièvre)", ["fièvre"]),
+    ("céphalées [pas de fièvre]", ["de fièvre"]),
+    ("céphalées «pas de fièvre»", ["de fièvre"]),
+    ('céphalées "pas de fièvre"', ["de fièvre"]),
+    ("céphalées/pas de fièvre", ["de fièvre"]),
+    # pseudo-négations et faux déclencheurs
+    ("pas seulement des céphalées, fièvre", []),
+    ("méningite non exclue", []),
+    ("céphalées plus intenses, patient passé aux urgences", []),
+    ("", []),
+])
+def test_scopes(texte, attendu):
+    assert _niees(texte) == attendu
+
+
+def test_window_limits_scope():
+    texte = "sans un deux trois quatre cinq six sept"
+    assert _niees(texte) == ["un deux trois quatre cinq six"]
+
+
+def test_concepts_with_polarity():
+    portees = portees_negation("fièvre la veille, pas de fièvre ce jour, sans vomissements")
+    assert portees.present("fièvre") and not portees.nie("fièvre")
+    assert portees.nie("vomissements") and not portees.present("vomissements")
+    assert not portees.present("déficit") and not portees.nie("déficit")
+    polarites = [(c.terme, c.nie) for c in portees.concepts(["vomissements", "fièvre"])]
+    assert polarites == [("fièvre", False), ("fièvre", True), ("vomissements", True)]
+
+
+def test_decision_tree_ignores_negated_signs():
+    f = arbre.analyse_texte_medical("Patiente 30 ans, pas de fièvre, céphalées brutales, pas enceinte de 8 semaines")
+    assert f["brutale"] and not f["fievre"]
+    assert not f["grossesse"] and f["grossesse_sem"] is None
+    f = arbre.analyse_texte_medical("patient 50 ans sans déficit ni antécédent de cancer, fièvre")
+    assert f["fievre"] and not f["deficit"] and not f["oncologique"]
+    for texte in ["céphalées (pas de fièvre)", "céphalées (sans fièvre)", "céphalées/pas de fièvre"]:
+        assert not arbre.analyse_texte_medical(texte)["fievre"], texte
@@ -0,0 +1,135 @@
+import asyncio, json
+
+import pytest
+
+from v_arbre_d.source import service
+
+
+def test_consultation_flow():
+    c = service.Consultation("patiente 30 ans, céphalées, fièvre")
+    # fièvre détectée dans le texte : première question = installation brutale
+    assert c.prochaine_question()[0] == "brutale"
+    for cle in ["brutale", "deficit", "oncologique"]:
+        c.repondre(cle, "n")
+    c.repondre("grossesse", True)
+    assert c.prochaine_question()[0] == "grossesse_sem"
+    c.repondre("grossesse_sem", "4-12")
+    for cle in ["chirurgie", "pacemaker", "claustrophobie"]:
+        c.repondre(cle, False)
+    etat = c.etat()
+    assert etat["etat"] == "termine" and etat["features"]["grossesse_sem"] == 8
+    assert "urgence" in etat["recommandation"]
+    with pytest.raises(service.ReponseInvalide):
+        c.repondre("grossesse_sem", 80)
+    with pytest.raises(service.ReponseInvalide):
+        c.repondre("inconnue", True)
+
+
+def test_invalid_answer_leaves_session_unchanged():
+    svc = service.ServiceArbre()
+    statut, etat = svc.traiter("POST", "/consultations", json.dumps({"texte": "patiente 30 ans, céphalées"}).encode())
+    chemin = f"/consultations/{etat['session']}/reponses"
+    statut, apres = svc.traiter("POST", chemin, json.dumps({"reponses": {"fievre": True, "grossesse_sem": 80}}).encode())
+    assert statut == 400 and "hors plage" in apres["erreur"]
+    assert apres["features"] == etat["features"] and apres["question"] == etat["question"]
+    assert svc.sessions.obtenir(etat["session"]).repondues == set()
+
+    statut, apres = svc.traiter("POST", chemin, json.dumps({"reponses": {"fievre": True, "deficit": "non"}}).encode())
+    assert statut == 200 and apres["features"]["fievre"] and apres["question"]["cle"] == "brutale"
+
+
+def test_unexpected_error_returns_json_500(monkeypatch, capsys):
+    def panne(features):
+        raise RuntimeError("panne")
+
+    monkeypatch.setattr(service, "decision_imagerie", panne)
+    svc = service.ServiceArbre()
+    corps = json.dumps({"texte": "patient 40 ans, céphalées"}).encode()
+    statut, etat = svc.traiter("POST", "/consultations", corps)
+    for cle in ["fievre", "brutale", "deficit", "oncologique", "chirurgie", "pacemaker"]:
+        assert svc.traiter("POST", f"/consultations/{etat['session']}/reponses",
+                           json.dumps({"cle": cle, "valeur": False}).encode())[0] == 200
+    statut, objet = svc.traiter("POST", f"/consultations/{etat['session']}/reponses",
+                                json.dumps({"cle": "claustrophobie", "valeur": False}).encode())
+    assert statut == 500 and objet == {"erreur": "erreur interne du service"}
+    assert "RuntimeError: panne" in capsys.readouterr().err
+
+    async def main():
+        serveur_http = service.ServeurHTTP(svc)
+        serveur = await serveur_http.demarrer(port=0)
+        port = serveur.sockets[0].getsockname()[1]
+        try:
+            assert await _requete(port, "GET", f"/consultations/{etat['session']}") == \
+                (500, {"erreur": "erreur interne du service"})
+        finally:
+            serveur_http._purge.cancel()
+            serveur.close()
+            await serveur.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_no_pregnancy_question_for_men():
+    c = service.Consultation("patient 40 ans, céphalées")
+    vues = []
+    while c.prochaine_question():
+        cle, _ = c.prochaine_question()
+        vues.append(cle)
+        c.repondre(cle, False)
+    assert "grossesse" not in vues and vues[0] == "fievre"
+
+
+def test_session_ttl():
+    maintenant = [0.0]
+    store = service.SessionStore(ttl=10, max_sessions=2, horloge=lambda: maintenant[0])
+    a = store.creer("a")
+    maintenant[0] = 5
+    b = store.creer("b")
+    maintenant[0] = 12
+    assert store.obtenir(a) is None and store.obtenir(b) == "b"
+    store.creer("c")
+    store.creer("d")
+    assert len(store) == 2 and store.obtenir(b) is None
+    maintenant[0] = 100
+    assert store.purger() == 2 and len(store) == 0
+
+
+async def _requete(port, methode, chemin, objet=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    corps = json.dumps(objet).encode() if objet is not None else b""
+    writer.write(f"{methode} {chemin} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                 f"Content-Length: {len(corps)}\r\n\r\n".encode() + corps)
+    await writer.drain()
+    reponse = await reader.read()
+    writer.close()
+    entete, _, corps = reponse.partition(b"\r\n\r\n")
+    return int(entete.split()[1]), json.loads(corps)
+
+
+def test_http_concurrent_sessions():
+    async def scenario(port, i):
+        statut, etat = await _requete(port, "POST", "/consultations", {"texte": f"patient {20 + i % 50} ans, céphalées"})
+        assert statut == 201
+        while etat["etat"] == "question":
+            statut, etat = await _requete(port, "POST", f"/consultations/{etat['session']}/reponses",
+                                          {"cle": etat["question"]["cle"], "valeur": "non"})
+            assert statut == 200
+        return etat
+
+    async def main():
+        serveur_http = service.ServeurHTTP()
+        serveur = await serveur_http.demarrer(port=0)
+        port = serveur.sockets[0].getsockname()[1]
+        try:
+            etats = await asyncio.gather(*(scenario(port, i) for i in range(200)))
+            assert all("IRM" in e["recommandation"] for e in etats)
+            assert (await _requete(port, "GET", "/sante"))[1]["sessions"] == 200
+            assert (await _requete(port, "GET", "/consultations/inconnue"))[0] == 404
+            assert (await _requete(port, "POST", f"/consultations/{etats[0]['session']}/reponses",
+                                   {"cle": "fievre", "valeur": "peut-être"}))[0] == 400
+        finally:
+            serveur_http._purge.cancel()
+            serveur.close()
+            await serveur.wait_closed()
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import pathlib, sqlite3
+
+import pytest
+
+from v_arbre_d.source import main as arbre
+from v_arbre_d.source import store as store_mod
+
+reports_dir = pathlib.Path(__file__).resolve().parents[1] / 'reports'
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = store_mod.ConsultationStore(str(tmp_path / "consultations.db"), taille_lot=3)
+    yield s
+    s.close()
+
+
+def test_save_report_and_lookups(store, monkeypatch):
+    monkeypatch.setattr(arbre, "_STORE", store)
+    texte = "patiente 30 ans enceinte de 8 semaines, céphalées"
+    f = arbre.analyse_texte_medical(texte)
+    decision = arbre.decision_imagerie(f)
+    ordonnance = arbre.generer_ordonnance(f, texte, decision, arbre.get_contraindications_text(f))
+
+    doc_id = arbre.save_ordonnance(ordonnance, f=f, decision=decision, demande=texte)
+    doc = store.document(doc_id)
+    assert doc["texte"] == ordonnance and doc["type"] == "ordonnance"
+    assert doc["age"] == 30 and doc["sexe"] == "f" and doc["nom"].startswith("ordonnance_")
+    assert [d["id"] for d in store.par_recommandation(decision)] == [doc_id]
+    assert [d["id"] for d in store.par_patient(store_mod.PATIENT_INCONNU)] == [doc_id]
+    assert [d["id"] for d in store.rechercher("IRM contre-indiquee")] == [doc_id]
+
+
+def _run_cli(monkeypatch, reponses, enregistrer):
+    """Lance chatbot_cephalees : `reponses` alimente input(), `enregistrer` les questions d'enregistrement"""
+    reponses = iter(reponses)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(reponses))
+    monkeypatch.setattr(arbre, "demander_oui_non",
+                        lambda prompt: enregistrer.get(prompt.split()[-1], False) if prompt.startswith("Voulez-vous") else False)
+    arbre.chatbot_cephalees()
+
+
+def test_cli_stores_patient_identifier(store, monkeypatch):
+    monkeypatch.setattr(arbre, "_STORE", store)
+    _run_cli(monkeypatch, ["patient 45 ans, céphalées", "", "DUPONT-123", ""],
+             {"récapitulatif": True, "médicale": True})
+    docs = store.par_patient("DUPONT-123")
+    assert sorted(d["type"] for d in docs) == ["ordonnance", "rapport"]
+    assert not store.par_patient(store_mod.PATIENT_INCONNU)
+
+    # ordonnance seule : l'identifiant est demandé à ce moment-là ; vide -> PATIENT_INCONNU
+    _run_cli(monkeypatch, ["patient 45 ans, céphalées", "", ""], {"médicale": True})
+    assert [d["type"] for d in store.par_patient(store_mod.PATIENT_INCONNU)] == ["ordonnance"]
+
+
+def test_batched_writes_and_date_range(store):
+    for jour in range(1, 6):
+        store.ajouter("rapport", f"rapport {jour}", cree_le=f"2025-11-0{jour} 10:00:00", recommandation="IRM")
+    # taille_lot=3 : un lot écrit, deux documents encore en attente
+    assert len(store) == 3
+    assert store.flush() == 2
+    assert [d["texte"] for d in store.par_date("2025-11-02", "2025-11-04")] == ["rapport 2", "rapport 3", "rapport 4"]
+    assert len(store.par_date(debut="2025-11-04 10:00:00")) == 2
+
+
+def test_append_only(store):
+    doc_id = store.enregistrer("rapport", "texte")
+    with pytest.raises(sqlite3.DatabaseError):
+        store._conn.execute("UPDATE documents SET texte = 'x' WHERE id = ?", (doc_id,))
+    with pytest.raises(sqlite3.DatabaseError):
+        store._conn.execute("DELETE FROM documents")
+    with pytest.raises(ValueError):
+        store.enregistrer("note", "texte")
+
+
+def test_import_and_export_roundtrip(store, tmp_path):
+    fichiers = sorted(p for p in reports_dir.iterdir() if p.is_file())
+    assert store.importer_fichiers(fichiers) == len(fichiers)
+    ordonnances = store.par_date(type="ordonnance")
+    assert ordonnances and all(d["recommandation"] for d in ordonnances)
+    for chemin in store.exporter(store.par_date(), tmp_path / "export"):
+        original = reports_dir / pathlib.Path(chemin).name
+        assert pathlib.Path(chemin).read_text(encoding="utf-8") == original.read_text(encoding="utf-8")
@@ -0,0 +1,81 @@
+import importlib.util
+import io
+import pathlib
+
+import httpx
+
+from src.ollama import rag_biomistral_query
+from src.ollama_http import OllamaHTTP
+from src.ollama_standin import DEFAULT_ANSWER, StandinOllama
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('bench_engines', str(ROOT / 'scripts' / 'bench_engines.py'))
+bench = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench)
+
+
+class StaticCollection:
+    def query(self, query_texts, n_results=3):
+        return {'documents': [['IRM en première intention']], 'metadatas': [[{'source': 'HAS', 'motif': 'cephalees'}]]}
+
+
+def test_standin_streams_known_answers_and_defaults():
+    answers = {'Patient 45 ans, céphalées brutales': 'Recommandation: Scanner cérébral sans injection en urgence.'}
+    with StandinOllama(answers) as server, OllamaHTTP(server.url) as client:
+        known = client.generate('biomistral-clinical:latest', 'CAS CLINIQUE:\nPatient 45 ans, céphalées brutales\n')
+        other = client.generate('biomistral-clinical:latest', 'patiente 30 ans')
+        assert server.requests == 2
+    assert known.text == answers['Patient 45 ans, céphalées brutales']
+    assert known.ttft_s is not None and known.eval_tokens == len(known.text.split(' '))
+    assert other.text == DEFAULT_ANSWER
+
+
+def test_standin_chat_and_non_stream():
+    with StandinOllama({'cas': 'Recommandation: IRM'}) as server:
+        r = httpx.post(server.url + '/api/chat', json={'model': 'm', 'stream': False,
+                                                       'messages': [{'role': 'user', 'content': 'un cas'}]})
+        assert r.json()['message']['content'] == 'Recommandation: IRM' and r.json()['done']
+        assert httpx.post(server.url + '/api/other', json={}).status_code == 404
+
+
+def test_rag_query_through_http_client():
+    with StandinOllama({'céphalées': 'Recommandation: IRM cérébrale'}) as server, OllamaHTTP(server.url) as client:
+        out = rag_biomistral_query('patiente 34 ans céphalées', StaticCollection(), client=client)
+    assert out == 'Recommandation: IRM cérébrale'
+
+
+def test_labels():
+    assert bench.label('Pour préciser: Durée ?') == 'clarify'
+    assert bench.label(None, clarify=True) == 'clarify'
+    assert bench.label("Recommandation: Pas d'imagerie en première intention; surveillance.") == 'none'
+    assert bench.label('Recommandation: IRM cérébrale en urgence, scanner si indisponible') == 'irm'
+    assert bench.label('Il est recommandé de l’adresser aux urgences pour la réalisation d’un scanner.') == 'scanner'
+    # la phrase de contre-indication ne compte pas comme recommandation
+    assert bench.label("L’IRM est contre-indiquée avant 3 mois. Un scanner pourra être envisagé.") == 'scanner'
+    assert bench.label('La grossesse étant supérieure à 3 mois, les examens peuvent être réalisés.') == 'other'
+
+
+def test_agreement_matrix_skips_errors():
+    matrix = bench.agreement_matrix({'a': ['irm', 'none', 'clarify', 'error'],
+                                     'b': ['irm', 'scanner', 'clarify', 'irm']})
+    assert matrix['a']['b'] == matrix['b']['a'] == 2 / 3
+    assert matrix['b']['b'] == 1.0
+
+
+def test_corpus_and_cross_engine_report():
+    corpus = bench.build_corpus(synthetic=20, seed=1)
+    assert len(corpus) == 220 and sum(c['reference'] is None for c in corpus) == 20
+    assert not any(c['text'].startswith('Vous êtes') for c in corpus)
+    small = corpus[:15] + corpus[-5:]
+    report = bench.run_benchmark(small, engines=('v_arbre_d', 'v_llm'), warmup=1, log=lambda *_: None)
+    for engine in ('v_arbre_d', 'v_llm'):
+        s = report['engines'][engine]
+        assert 'error' not in s, s
+        assert s['cases'] == 20 and s['errors'] == 0
+        assert s['latency_ms']['p50'] <= s['latency_ms']['p99'] and s['peak_rss_mb'] > 0 and s['startup_s'] > 0
+    # le serveur de substitution rend la réponse de référence des cas connus
+    assert report['agreement_reference_cases']['v_llm']['reference'] == 1.0
+    assert report['standin_requests'] == 21
+    out = io.StringIO()
+    bench.print_report(report, out=out)
+    assert 'v_arbre_d' in out.getvalue() and 'agreement' in out.getvalue()
@@ -0,0 +1,102 @@
+from src.case_state import CaseState, gives_duration
+
+QUESTIONS = [
+    "Depuis quand et quel caractère ont les céphalées",
+    "Y a‑t‑il fièvre, vomissements, perte de connaissance, convulsions ou déficit neurologique focal",
+    "La patiente est‑elle enceinte, a‑t‑elle des antécédents majeurs (cancer, immunodépression)",
+]
+
+
+def test_history_is_built_like_before():
+    state = CaseState()
+    state.add_input("céphalées ")
+    state.add_input("  pulsatiles")
+    state.add_answer(QUESTIONS[0], "brutales")
+    assert state.history == "céphalées, pulsatiles, " + QUESTIONS[0] + ": brutales"
+
+
+def test_questions_open_until_answered():
+    state = CaseState()
+    state.add_input("céphalées")
+    assert [idx for idx, _ in state.open_questions(QUESTIONS)] == [0, 1, 2]
+    # the question text copied into the history does not answer it
+    state.add_answer(QUESTIONS[1], "")
+    assert [idx for idx, _ in state.open_questions(QUESTIONS)] == [0, 1, 2]
+    state.add_answer(QUESTIONS[0], "brutale")
+    state.add_answer(QUESTIONS[1], "vomissements")
+    assert state.open_questions(QUESTIONS) == [(2, QUESTIONS[2])]
+    state.add_answer(QUESTIONS[2], "enceinte")
+    assert state.open_questions(QUESTIONS) == []
+
+
+def test_yes_no_or_number_answers_everything():
+    state = CaseState()
+    state.add_input("patiente 33 ans, céphalées")
+    assert state.open_questions(QUESTIONS + ["autre question"]) == []
+    state = CaseState()
+    state.add_input("céphalées")
+    state.add_answer(QUESTIONS[2], "non")
+    assert state.open_questions(QUESTIONS) == []
+
+
+def test_duration_pattern_on_appended_text_only():
+    state = CaseState()
+    state.add_input("céphalées depuis")
+    assert state.is_answered(0) and not state.is_answered(1)
+    assert gives_duration("depuis 3 jours") and gives_duration("2 heures")
+    assert not gives_duration("brutale")
+
+
+def test_negative_answers_close_their_question():
+    for answer in ("pas d'antécédent particulier", "aucun", "RAS", "négatif"):
+        state = CaseState()
+        state.add_input("céphalées")
+        state.add_answer(QUESTIONS[2], answer, 2)
+        assert state.is_answered(2), answer
+        assert not state.is_answered(1)
+
+
+def _run_cli(monkeypatch, inputs, responses):
+    from src import main as cli
+
+    inputs, responses, queries = iter(inputs), iter(responses), []
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    monkeypatch.setattr(cli, 'create_index', lambda path: None)
+
+    def fake_query(history, collection):
+        queries.append(history)
+        return next(responses)
+
+    monkeypatch.setattr(cli, 'rag_biomistral_query', fake_query)
+    cli.main()
+    return queries
+
+
+def test_cli_moves_on_after_answers_without_keywords(monkeypatch, capsys):
+    queries = _run_cli(monkeypatch, [
+        "céphalées depuis hier",
+        "RAS | pas d'antécédent particulier",
+        "quit",
+    ], [
+        "Pour préciser: " + " | ".join(QUESTIONS),
+        "Recommandation: IRM cérébrale",
+    ])
+    assert len(queries) == 2
+    assert queries[1].endswith(QUESTIONS[2] + ": pas d'antécédent particulier")
+    assert "Recommandation: IRM cérébrale" in capsys.readouterr().out
+
+
+def test_cli_reasks_empty_answers_only_once(monkeypatch, capsys):
+    queries = _run_cli(monkeypatch, [
+        "céphalées",
+        "|", "",  # pas de réponse, ni de durée
+        "|", "",
+        "quit",
+    ], [
+        "Pour préciser: " + " | ".join(QUESTIONS),
+        "Recommandation: scanner cérébral",
+    ])
+    assert len(queries) == 2
+    out = capsys.readouterr().out
+    assert out.count("Pour préciser (répondez") == 2
+    assert "Recommandation: scanner cérébral" in out
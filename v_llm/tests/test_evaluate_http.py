@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'evaluation'))
+
+import evaluate_http as ev  # noqa: E402
+from src.ollama_http import OllamaHTTP  # noqa: E402
+
+ANSWERS = {
+    "urgence": "Recommandation: IRM cérébrale en urgence (<24h).",
+    "simple": "Pour préciser: Durée ? Fièvre/vomissements/convulsions ?",
+}
+
+
+def _fake_server(delay=0.0, active=None):
+    """MockTransport streaming NDJSON chunks like /api/generate"""
+    def handler(request):
+        body = json.loads(request.content)
+        if active is not None:
+            with active['lock']:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+        time.sleep(delay)
+        if active is not None:
+            with active['lock']:
+                active['now'] -= 1
+        if body['prompt'] == 'boom':
+            return httpx.Response(500, text='model not found')
+        text = ANSWERS['urgence'] if 'brutal' in body['prompt'] else ANSWERS['simple']
+        words = text.split(' ')
+        lines = [json.dumps({'model': body['model'], 'response': w + ' ', 'done': False}) for w in words]
+        lines.append(json.dumps({'done': True, 'prompt_eval_count': 12, 'eval_count': len(words),
+                                 'eval_duration': 500_000_000, 'prompt_eval_duration': 100_000_000}))
+        return httpx.Response(200, content='\n'.join(lines).encode())
+    return httpx.MockTransport(handler)
+
+
+def test_generate_collects_stream_and_counters():
+    client = OllamaHTTP('localhost:11434', transport=_fake_server())
+    r = client.generate('m', 'céphalées brutales')
+    assert r.text.strip() == ANSWERS['urgence']
+    assert r.ttft_s is not None and r.total_s >= r.ttft_s
+    assert (r.prompt_tokens, r.eval_tokens) == (12, 6)
+    assert r.tokens_per_s == 12.0
+    assert client.host == 'http://localhost:11434'
+
+
+def test_load_validation_cases():
+    cases = ev.load_cases(os.path.join(ROOT, 'data', 'clinical_cases_val.jsonl'))
+    assert len(cases) == 40
+    assert all(c.reference and c.keywords for c in cases)
+    client_cases = ev.load_cases(os.path.join(ROOT, 'evaluation', 'client_v2_cases.jsonl'), limit=2)
+    assert [c.keywords for c in client_cases][1] == ['urgence', 'adresser']
+    assert client_cases[0].reference is None
+
+
+def test_score_reference_and_keywords():
+    case = ev.Case('c', 'p', ['irm', 'urgen'], reference=ANSWERS['urgence'])
+    assert ev.score(case, 'Recommandation: IRM cérébrale en urgence')['correct']
+    s = ev.score(case, 'Recommandation: Scanner cérébral en urgence')
+    assert not s['correct'] and s['keyword_score'] == 0.5 and s['missing_keywords'] == ['irm']
+    assert not ev.score(case, 'Pour préciser: durée ?')['correct']
+    kw = ev.Case('c', 'p', ['urgence', 'adresser'])
+    assert ev.score(kw, 'URGENCE: adresser aux urgences')['correct']
+
+
+def test_percentile():
+    assert ev.percentile([], 50) is None
+    assert ev.percentile([3, 1, 2], 50) == 2
+    assert ev.percentile([1, 2, 3, 4], 95) == 3.85
+
+
+def test_evaluate_runs_concurrently_and_reports():
+    active = {'lock': threading.Lock(), 'now': 0, 'max': 0}
+    cases = [ev.Case(f'c{i}', 'céphalées brutales', ['irm', 'urgen'], reference=ANSWERS['urgence'])
+             for i in range(8)]
+    cases.append(ev.Case('err', 'boom', ['irm']))
+    with OllamaHTTP(transport=_fake_server(delay=0.05, active=active)) as client:
+        report = ev.evaluate(cases, client, model='m', concurrency=4)
+    assert active['max'] > 1
+    assert report['cases'] == 9 and report['errors'] == 1
+    assert report['accuracy'] == 8 / 9
+    assert report['latency_s']['p50'] >= 0.05 and report['latency_s']['p95'] >= report['latency_s']['p50']
+    assert report['tokens_per_s'] == 12.0
+    assert 'HTTPStatusError' in report['results'][-1]['error']
+    json.dumps(report)
@@ -0,0 +1,166 @@
+import importlib.util
+import json
+import pathlib
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+from safetensors.torch import save_file  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('export_lora_gguf', str(ROOT / 'training' / 'export_lora_gguf.py'))
+export = importlib.util.module_from_spec(spec)
+sys.modules['export_lora_gguf'] = export
+spec.loader.exec_module(export)
+gguf = export.gguf
+Q = gguf.GGMLQuantizationType
+
+N_HEAD, N_KV, HIDDEN, INTER, BLOCKS, VOCAB = 4, 2, 256, 512, 2, 16
+HF_SHAPES = {'self_attn.q_proj': (HIDDEN, HIDDEN), 'self_attn.k_proj': (HIDDEN // 2, HIDDEN),
+             'self_attn.v_proj': (HIDDEN // 2, HIDDEN), 'self_attn.o_proj': (HIDDEN, HIDDEN),
+             'mlp.gate_proj': (INTER, HIDDEN), 'mlp.up_proj': (INTER, HIDDEN), 'mlp.down_proj': (HIDDEN, INTER)}
+# un type par module : flottants, quantifiés requantifiables, et Q4_K (pas de quantificateur Python)
+BASE_TYPES = {'self_attn.q_proj': Q.F32, 'self_attn.k_proj': Q.F16, 'self_attn.v_proj': Q.F32,
+              'self_attn.o_proj': Q.Q8_0, 'mlp.gate_proj': Q.Q4_0, 'mlp.up_proj': Q.Q4_K, 'mlp.down_proj': Q.F32}
+
+
+def _gguf_name(module):
+    return gguf.get_tensor_name_map(gguf.MODEL_ARCH.LLAMA, BLOCKS).get_name(module, try_suffixes=('.weight',))
+
+
+def _to_gguf_rows(module, w):
+    if module.endswith('q_proj.weight'):
+        return export.permute(w, N_HEAD, N_HEAD)
+    if module.endswith('k_proj.weight'):
+        return export.permute(w, N_HEAD, N_KV)
+    return w
+
+
+@pytest.fixture(scope='module')
+def base(tmp_path_factory):
+    """Modèle llama minuscule : config.json HF et GGUF de base (poids q/k permutés comme convert-hf-to-gguf)."""
+    directory = tmp_path_factory.mktemp('base')
+    rng = np.random.default_rng(0)
+    (directory / 'config.json').write_text(json.dumps({
+        'architectures': ['MistralForCausalLM'], 'num_attention_heads': N_HEAD, 'num_key_value_heads': N_KV,
+        'num_hidden_layers': BLOCKS}), encoding='utf-8')
+    writer = gguf.GGUFWriter(directory / 'base.gguf', 'llama')
+    writer.add_block_count(BLOCKS)
+    writer.add_head_count(N_HEAD)
+    writer.add_head_count_kv(N_KV)
+    writer.add_token_list([f'tok{i}' for i in range(VOCAB)])
+    writer.add_tensor('token_embd.weight', rng.standard_normal((VOCAB, HIDDEN), dtype=np.float32))
+    base_weights = {}
+    for layer in range(BLOCKS):
+        for suffix, shape in HF_SHAPES.items():
+            module = f'model.layers.{layer}.{suffix}.weight'
+            qtype = BASE_TYPES[suffix]
+            if qtype == Q.Q4_K:
+                data = np.zeros(gguf.quant_shape_to_byte_shape(shape, qtype), dtype=np.uint8)
+            else:
+                data = gguf.quants.quantize(_to_gguf_rows(module, rng.standard_normal(shape, dtype=np.float32)), qtype)
+            writer.add_tensor(_gguf_name(module), data, raw_dtype=qtype)
+            base_weights[module] = gguf.quants.dequantize(data, qtype)
+        writer.add_tensor(f'blk.{layer}.attn_norm.weight', np.ones(HIDDEN, dtype=np.float32))
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_tensors_to_file()
+    writer.close()
+    return directory, base_weights
+
+
+def _adapter(directory, r=4, alpha=8, **config):
+    torch.manual_seed(0)
+    weights, pairs = {}, {}
+    for layer in range(BLOCKS):
+        for suffix, (out_features, in_features) in HF_SHAPES.items():
+            module = f'model.layers.{layer}.{suffix}'
+            a, b = torch.randn(r, in_features) / 4, torch.randn(out_features, r) / 4
+            weights[f'base_model.model.{module}.lora_A.weight'] = a
+            weights[f'base_model.model.{module}.lora_B.weight'] = b
+            pairs[module + '.weight'] = (a.numpy(), b.numpy())
+    directory.mkdir(exist_ok=True)
+    save_file(weights, str(directory / 'adapter_model.safetensors'))
+    targets = sorted({s.split('.')[-1] for s in HF_SHAPES})
+    config = dict({'r': r, 'lora_alpha': alpha, 'target_modules': targets, 'fan_in_fan_out': False}, **config)
+    (directory / 'adapter_config.json').write_text(json.dumps(config), encoding='utf-8')
+    return pairs
+
+
+def _scale(module):
+    return (16 if 'v_proj' in module else 8) / 4
+
+
+def test_hparams_from_gguf_and_hf_config_agree(base):
+    directory, _ = base
+    assert export.base_hparams(directory / 'base.gguf') == export.base_hparams(directory) == {
+        'arch': 'llama', 'n_head': N_HEAD, 'n_head_kv': N_KV, 'block_count': BLOCKS}
+
+
+def test_adapter_gguf_reproduces_each_delta(base, tmp_path):
+    directory, _ = base
+    pairs = _adapter(tmp_path / 'adapter', alpha_pattern={'v_proj': 16})
+    report = export.export_adapter(tmp_path / 'adapter', directory, tmp_path / 'lora.gguf', outtype='f32',
+                                   log=lambda msg: None)
+    assert report['pairs'] == len(pairs)
+
+    reader = gguf.GGUFReader(tmp_path / 'lora.gguf')
+    assert reader.get_field('general.type').contents() == 'adapter'
+    assert reader.get_field('adapter.type').contents() == 'lora'
+    alpha = reader.get_field('adapter.lora.alpha').contents()
+    tensors = {t.name: t.data for t in reader.tensors}
+    assert len(tensors) == 2 * len(pairs)
+    for module, (a, b) in pairs.items():
+        name = _gguf_name(module)
+        a_g, b_g = tensors[name + '.lora_a'], tensors[name + '.lora_b']
+        # llama.cpp : delta = (alpha / rang) · B · A, en ordre de lignes GGUF
+        np.testing.assert_allclose(alpha / a_g.shape[0] * b_g @ a_g,
+                                   _to_gguf_rows(module, _scale(module) * b @ a), rtol=1e-5, atol=1e-6)
+
+
+def test_adapter_gguf_f16_is_half_the_size(base, tmp_path):
+    directory, _ = base
+    _adapter(tmp_path / 'adapter')
+    f32 = export.export_adapter(tmp_path / 'adapter', directory, tmp_path / 'a32.gguf', outtype='f32', log=lambda m: None)
+    f16 = export.export_adapter(tmp_path / 'adapter', directory, tmp_path / 'a16.gguf', outtype='f16', log=lambda m: None)
+    assert f16['size'] < 0.6 * f32['size']
+    types = {t.tensor_type for t in gguf.GGUFReader(tmp_path / 'a16.gguf').tensors}
+    assert types == {Q.F16}
+
+
+def test_fuse_streams_base_gguf_and_keeps_types(base, tmp_path):
+    directory, base_weights = base
+    pairs = _adapter(tmp_path / 'adapter', alpha_pattern={'v_proj': 16})
+    report = export.fuse(tmp_path / 'adapter', directory / 'base.gguf', tmp_path / 'fused.gguf', log=lambda m: None)
+    assert report['fused'] == len(pairs)
+    assert report['requantized'] == [f'blk.{i}.ffn_up.weight' for i in range(BLOCKS)]
+
+    src, out = gguf.GGUFReader(directory / 'base.gguf'), gguf.GGUFReader(tmp_path / 'fused.gguf')
+    assert [t.name for t in out.tensors] == [t.name for t in src.tensors]
+    assert out.get_field('tokenizer.ggml.tokens').contents() == [f'tok{i}' for i in range(VOCAB)]
+    assert out.get_field('llama.attention.head_count_kv').contents() == N_KV
+    fused = {t.name: t for t in out.tensors}
+    for t in src.tensors:
+        if t.name in ('token_embd.weight',) or 'norm' in t.name:
+            assert t.tensor_type == fused[t.name].tensor_type and np.array_equal(t.data, fused[t.name].data)
+    for module, (a, b) in pairs.items():
+        suffix = module.split('.', 3)[-1][:-len('.weight')]
+        t = fused[_gguf_name(module)]
+        assert t.tensor_type == (Q.Q8_0 if BASE_TYPES[suffix] == Q.Q4_K else BASE_TYPES[suffix])
+        expected = base_weights[module] + _to_gguf_rows(module, _scale(module) * b @ a)
+        got = gguf.quants.dequantize(t.data, t.tensor_type)
+        tol = {Q.F32: 1e-5, Q.F16: 1e-2, Q.Q8_0: 0.05, Q.Q4_0: 0.5}[t.tensor_type] * np.abs(expected).max()
+        np.testing.assert_allclose(got, expected, atol=tol, rtol=0)
+
+
+def test_fuse_rejects_mismatched_adapter(base, tmp_path):
+    directory, _ = base
+    _adapter(tmp_path / 'adapter', r=4)
+    config = json.loads((tmp_path / 'adapter' / 'adapter_config.json').read_text())
+    config['fan_in_fan_out'] = True
+    (tmp_path / 'adapter' / 'adapter_config.json').write_text(json.dumps(config))
+    with pytest.raises(ValueError, match='fan_in_fan_out'):
+        export.fuse(tmp_path / 'adapter', directory / 'base.gguf', tmp_path / 'fused.gguf', log=lambda m: None)
+    assert not (tmp_path / 'fused.gguf').exists()
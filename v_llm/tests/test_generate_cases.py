@@ -0,0 +1,90 @@
+import importlib.util
+import json
+import pathlib
+import sys
+
+from src.guidelines_logic import analyze_guidelines
+from v_arbre_d import analyse_texte_medical, decision_imagerie
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('generate_cases', str(ROOT / 'training' / 'generate_cases.py'))
+gen = importlib.util.module_from_spec(spec)
+sys.modules['generate_cases'] = gen  # les workers retrouvent generate_batch par son module
+spec.loader.exec_module(gen)
+
+
+def _read(out_dir):
+    manifest = json.loads((out_dir / 'manifest.json').read_text(encoding='utf-8'))
+    rows = {}
+    for split in ('train', 'val'):
+        rows[split] = [json.loads(line) for shard in manifest['splits'][split]['shards']
+                       for line in (out_dir / shard).read_text(encoding='utf-8').splitlines()]
+    return manifest, rows
+
+
+def test_shards_are_unique_labelled_and_split(tmp_path):
+    manifest = gen.generate(1500, tmp_path, seed=7, workers=1, shard_size=400, batch_size=200, log=lambda *_: None)
+    manifest, rows = _read(tmp_path)
+    cases = rows['train'] + rows['val']
+    assert manifest['cases'] == len(cases) == 1500
+    assert manifest['splits']['train']['shards'][:2] == ['train-00000.jsonl', 'train-00001.jsonl']
+    assert all(len((tmp_path / s).read_text(encoding='utf-8').splitlines()) <= 400
+               for s in manifest['splits']['train']['shards'])
+    assert 0.15 < len(rows['val']) / 1500 < 0.25
+    texts = [c['instruction'].split('Cas clinique:\n', 1)[1] for c in cases]
+    assert len({gen.digest(t) for t in texts}) == 1500
+    assert sum(manifest['categories'].values()) == 1500
+    for case, text in list(zip(cases, texts))[:200]:
+        assert case['labels'] == {'guidelines': analyze_guidelines(text),
+                                  'decision_tree': decision_imagerie(analyse_texte_medical(text))}
+        assert case['response'].startswith(('Recommandation:', 'Pour préciser:'))
+
+
+def _base(case):
+    """Texte du gabarit : sans le changement de sexe ni les éléments de contexte ajoutés par make_case."""
+    text = case['instruction'].split('Cas clinique:\n', 1)[1]
+    while any(text.endswith(', ' + c) for c in gen.CONTEXTE):
+        text = text.rsplit(', ', 1)[0]
+    if case['category'] != 'pregnancy':
+        text = text.replace('Patiente ', 'Patient ', 1)
+    return text
+
+
+def test_variants_of_a_template_draw_stay_in_one_split(tmp_path):
+    gen.generate(3000, tmp_path, seed=5, workers=1, batch_size=500, log=lambda *_: None)
+    _, rows = _read(tmp_path)
+    splits = {}
+    for split, cases in rows.items():
+        for case in cases:
+            splits.setdefault(_base(case), set()).add(split)
+    assert sum(len(s) > 1 for s in splits.values()) == 0
+    # le corpus contient bien des variantes d'un même tirage
+    assert len(splits) < len(rows['train']) + len(rows['val'])
+
+
+def test_corpus_does_not_depend_on_worker_count(tmp_path):
+    gen.generate(600, tmp_path / 'one', seed=3, workers=1, batch_size=100, log=lambda *_: None)
+    gen.generate(600, tmp_path / 'two', seed=3, workers=2, batch_size=100, log=lambda *_: None)
+    for split in ('train', 'val'):
+        assert (tmp_path / 'one' / f'{split}-00000.jsonl').read_bytes() == \
+            (tmp_path / 'two' / f'{split}-00000.jsonl').read_bytes()
+
+
+def test_stops_when_template_space_is_exhausted(tmp_path, monkeypatch):
+    def make_case(rng):
+        text = f'cas {rng.randint(0, 9)}'
+        return {'instruction': 'x', 'response': 'r', 'category': 'c'}, text, text
+
+    monkeypatch.setattr(gen, 'make_case', make_case)
+    messages = []
+    manifest = gen.generate(50, tmp_path, workers=1, batch_size=20, max_stale_batches=3, log=messages.append)
+    assert manifest['cases'] == 10 and manifest['duplicates'] > 0
+    assert 'no new case' in messages[-1]
+
+
+def test_seeded_streams_are_independent():
+    import random
+    a = [gen.make_case(random.Random('1/0'))[1] for _ in range(3)]
+    b = [gen.make_case(random.Random('1/1'))[1] for _ in range(3)]
+    assert a != b
+    assert a == [gen.make_case(random.Random('1/0'))[1] for _ in range(3)]
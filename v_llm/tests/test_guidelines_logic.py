@@ -27,3 +27,11 @@ def test_irm_on_progressive():
 def test_urgency_on_loss_of_consciousness():
     out = analyze_guidelines("Patient 33 ans, céphalées brutales, perte de connaissance")
     assert out and ("URGENCE" in out or "urgence" in out)
+
+
+def test_negation_does_not_leak_past_punctuation():
+    # 'pas' ne nie que sa proposition : les céphalées brutales restent un signe d'alerte
+    out = analyze_guidelines("Patient 40 ans, pas de fièvre, céphalées brutales")
+    assert out and "URGENCE" in out
+    out = analyze_guidelines("céphalées, sans fièvre, cancer du sein")
+    assert out and "contexte oncologique" in out
@@ -0,0 +1,66 @@
+import pytest
+
+from guidelines_reference import analyze_reference, generer_corpus
+from src import guidelines_logic as rules
+
+
+# negation triggers stuck to opening punctuation: the sign stays negated
+PUNCTUATED_NEGATIONS = [
+    "patiente 30 ans, céphalées (pas de fièvre)",
+    "patiente 30 ans, céphalées (sans fièvre)",
+    "patiente 30 ans, céphalées [pas de fièvre]",
+    "patiente 30 ans, céphalées «pas de fièvre»",
+    'patiente 30 ans, céphalées "pas de fièvre"',
+    "patiente 30 ans, céphalées/pas de fièvre",
+]
+
+
+def test_output_cases_loaded(golden_inputs):
+    assert len(golden_inputs) > 40
+
+
+def test_parity_with_if_chain(golden_inputs):
+    for text in golden_inputs + PUNCTUATED_NEGATIONS + generer_corpus(3000, seed=11):
+        assert rules.analyze_guidelines(text) == analyze_reference(text), text
+
+
+@pytest.mark.parametrize('text', PUNCTUATED_NEGATIONS)
+def test_punctuated_negation_is_not_urgent(text):
+    assert rules.analyze_guidelines(text) == rules.analyze_guidelines('patiente 30 ans, céphalées, pas de fièvre')
+    assert not rules.analyze_guidelines(text).startswith('URGENCE')
+
+
+def test_every_rule_reached_by_corpus(golden_inputs):
+    engine = rules.RuleEngine(rules.RULES, default=rules.ENGINE.default)
+    for text in golden_inputs + generer_corpus(5000, seed=0):
+        engine.evaluate(text)
+    unreached = [row['rule'] for row in engine.stats() if not row['hits']]
+    # the stroboscopic rule needs 'troubles visuels' and 'image stroboscopique' without any earlier rule
+    assert set(unreached) <= {'visual_stroboscopic'}
+
+
+def test_stats_counts_hits_and_evaluations():
+    engine = rules.RuleEngine(rules.RULES, default=rules.ENGINE.default)
+    engine.evaluate('céphalées')
+    engine.evaluate('céphalées brutales, fièvre')
+    engine.evaluate('bonjour')
+    rows = {row['rule']: row for row in engine.stats()}
+    assert rows['headache_only']['evaluated'] == 3 and rows['headache_only']['hits'] == 1
+    assert rows['urgency']['evaluated'] == 2 and rows['urgency']['hits'] == 1
+    assert rows['oncology_history']['evaluated'] == 1
+    assert engine.default_hits == 1
+    assert all(row['time_us'] == 0 for row in rows.values())
+
+    engine.profiling = True
+    engine.evaluate('céphalées, pace-maker')
+    rows = {row['rule']: row for row in engine.stats()}
+    assert rows['pacemaker_scanner']['hits'] == 1 and rows['pacemaker_scanner']['mean_ns'] > 0
+    assert rows['valve']['time_us'] == 0
+
+    engine.reset_stats()
+    assert not any(row['hits'] or row['evaluated'] or row['time_us'] for row in engine.stats())
+
+
+def test_rule_names_unique():
+    with pytest.raises(ValueError):
+        rules.RuleEngine([rules.Rule('a', rules.Has('x'), '1'), rules.Rule('a', rules.Has('y'), '2')], default='')
@@ -0,0 +1,159 @@
+import importlib.util
+import json
+import pathlib
+import sys
+
+import pytest
+
+torch = pytest.importorskip('torch')
+from safetensors.torch import load_file, save_file  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('merge_biomistral', str(ROOT / 'training' / 'merge_biomistral.py'))
+merge = importlib.util.module_from_spec(spec)
+sys.modules['merge_biomistral'] = merge
+spec.loader.exec_module(merge)
+
+TARGETS = ['q_proj', 'k_proj', 'v_proj', 'o_proj', 'gate_proj', 'up_proj', 'down_proj']
+
+
+@pytest.fixture(scope='module')
+def base_dir(tmp_path_factory):
+    """Mistral minuscule aléatoire, en bf16, découpé en plusieurs shards par save_pretrained."""
+    transformers = pytest.importorskip('transformers')
+    torch.manual_seed(0)
+    config = transformers.MistralConfig(vocab_size=64, hidden_size=32, intermediate_size=48, num_hidden_layers=2,
+                                        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=64)
+    model = transformers.MistralForCausalLM(config).to(torch.bfloat16)
+    directory = tmp_path_factory.mktemp('base')
+    model.save_pretrained(directory, max_shard_size='20KB')
+    (directory / 'tokenizer.json').write_text('{}', encoding='utf-8')
+    assert (directory / merge.INDEX_NAME).exists()
+    return directory
+
+
+def _adapter(directory, base_dir, r=4, alpha=8, **config):
+    """Adapters aléatoires (B non nul) pour tous les modules ciblés du modèle de base."""
+    torch.manual_seed(1)
+    weights = {}
+    for shard in merge.shard_files(base_dir)[0]:
+        for name, tensor in load_file(str(base_dir / shard)).items():
+            module = name[:-len('.weight')]
+            if name.endswith('.weight') and module.rsplit('.', 1)[-1] in TARGETS:
+                out_features, in_features = tensor.shape
+                weights[f'base_model.model.{module}.lora_A.weight'] = torch.randn(r, in_features)
+                weights[f'base_model.model.{module}.lora_B.weight'] = torch.randn(out_features, r)
+    directory.mkdir(exist_ok=True)
+    save_file(weights, str(directory / 'adapter_model.safetensors'))
+    config = dict({'r': r, 'lora_alpha': alpha, 'target_modules': TARGETS, 'fan_in_fan_out': False}, **config)
+    (directory / 'adapter_config.json').write_text(json.dumps(config), encoding='utf-8')
+    return weights
+
+
+def _dense_merge(base_dir, weights, scale_of):
+    """Référence : tout le modèle en mémoire, W += B·A·échelle."""
+    state = {}
+    for shard in merge.shard_files(base_dir)[0]:
+        state.update(load_file(str(base_dir / shard)))
+    for key, a in weights.items():
+        if '.lora_A.' in key:
+            module = key[len('base_model.model.'):-len('.lora_A.weight')]
+            b = weights[key.replace('lora_A', 'lora_B')]
+            w = state[module + '.weight']
+            state[module + '.weight'] = (w.float() + scale_of(module) * (b @ a)).to(w.dtype)
+    return state
+
+
+def _load_all(directory):
+    state = {}
+    for shard in merge.shard_files(directory)[0]:
+        state.update(load_file(str(directory / shard)))
+    return state
+
+
+def test_streaming_merge_matches_dense_merge(base_dir, tmp_path):
+    weights = _adapter(tmp_path / 'adapter', base_dir)
+    report = merge.merge(base_dir, tmp_path / 'adapter', tmp_path / 'out', log=lambda msg: None)
+
+    shards, index = merge.shard_files(base_dir)
+    assert report['shards'] == len(shards) > 1
+    assert report['merged'] == report['lora_pairs'] == 2 * len(TARGETS)
+    assert sorted(p.name for p in (tmp_path / 'out').glob('*.safetensors')) == shards
+    out_index = json.loads((tmp_path / 'out' / merge.INDEX_NAME).read_text())
+    assert out_index['weight_map'] == index['weight_map']
+    assert out_index['metadata']['total_size'] == report['total_size']
+    assert {'config.json', 'generation_config.json', 'tokenizer.json'} <= set(report['copied'])
+
+    expected = _dense_merge(base_dir, weights, lambda module: 8 / 4)
+    merged, base = _load_all(tmp_path / 'out'), _load_all(base_dir)
+    assert merged.keys() == expected.keys()
+    for name, tensor in expected.items():
+        assert merged[name].dtype == tensor.dtype == torch.bfloat16
+        torch.testing.assert_close(merged[name], tensor)
+        if name.rsplit('.', 2)[-2] not in TARGETS:
+            assert torch.equal(merged[name], base[name]), name
+
+
+def test_merged_checkpoint_loads_with_transformers(base_dir, tmp_path):
+    transformers = pytest.importorskip('transformers')
+    weights = _adapter(tmp_path / 'adapter', base_dir)
+    merge.merge(base_dir, tmp_path / 'adapter', tmp_path / 'out', log=lambda msg: None)
+    model = transformers.MistralForCausalLM.from_pretrained(tmp_path / 'out', dtype=torch.bfloat16)
+    expected = _dense_merge(base_dir, weights, lambda module: 2.0)
+    state = model.state_dict()
+    for name, tensor in expected.items():
+        torch.testing.assert_close(state[name], tensor)
+
+
+def test_alpha_pattern_rslora_and_fan_in_fan_out(tmp_path):
+    torch.manual_seed(2)
+    base = tmp_path / 'base'
+    base.mkdir()
+    w = {'layer.q_proj.weight': torch.randn(6, 5), 'layer.v_proj.weight': torch.randn(6, 5),
+         'norm.weight': torch.ones(5)}
+    save_file(w, str(base / merge.SINGLE_NAME), metadata={'format': 'pt'})
+    adapter = tmp_path / 'adapter'
+    adapter.mkdir()
+    # fan_in_fan_out (Conv1D façon GPT-2) : le poids est stocké (in, out), soit (6, 5) pour A (2, 6) et B (5, 2)
+    a_q, b_q, a_v, b_v = torch.randn(2, 6), torch.randn(5, 2), torch.randn(2, 6), torch.randn(5, 2)
+    save_file({'base_model.model.layer.q_proj.lora_A.weight': a_q, 'base_model.model.layer.q_proj.lora_B.weight': b_q,
+               'base_model.model.layer.v_proj.lora_A.weight': a_v, 'base_model.model.layer.v_proj.lora_B.weight': b_v},
+              str(adapter / 'adapter_model.safetensors'))
+    (adapter / 'adapter_config.json').write_text(json.dumps({
+        'r': 2, 'lora_alpha': 4, 'alpha_pattern': {'v_proj': 8}, 'use_rslora': True,
+        'target_modules': ['q_proj', 'v_proj'], 'fan_in_fan_out': True}), encoding='utf-8')
+
+    report = merge.merge(base, adapter, tmp_path / 'out', log=lambda msg: None)
+    out = load_file(str(tmp_path / 'out' / merge.SINGLE_NAME))
+    assert report['merged'] == 2 and not (tmp_path / 'out' / merge.INDEX_NAME).exists()
+    torch.testing.assert_close(out['layer.q_proj.weight'], w['layer.q_proj.weight'] + 4 / 2 ** 0.5 * (b_q @ a_q).T)
+    torch.testing.assert_close(out['layer.v_proj.weight'], w['layer.v_proj.weight'] + 8 / 2 ** 0.5 * (b_v @ a_v).T)
+    assert torch.equal(out['norm.weight'], w['norm.weight'])
+    assert merge.read_header(tmp_path / 'out' / merge.SINGLE_NAME)[0]['__metadata__'] == {'format': 'pt'}
+
+
+def test_mismatches_are_rejected_before_writing(base_dir, tmp_path):
+    _adapter(tmp_path / 'adapter', base_dir, target_modules=['q_proj'])
+    with pytest.raises(ValueError, match='target_modules'):
+        merge.merge(base_dir, tmp_path / 'adapter', tmp_path / 'out', log=lambda msg: None)
+
+    _adapter(tmp_path / 'adapter', base_dir)
+    weights = load_file(str(tmp_path / 'adapter' / 'adapter_model.safetensors'))
+    key = next(k for k in weights if k.endswith('q_proj.lora_A.weight'))
+    weights[key] = torch.randn(4, 7)
+    save_file(weights, str(tmp_path / 'adapter' / 'adapter_model.safetensors'))
+    with pytest.raises(ValueError, match='forme'):
+        merge.merge(base_dir, tmp_path / 'adapter', tmp_path / 'out', log=lambda msg: None)
+    assert not (tmp_path / 'out').exists()
+
+    with pytest.raises(ValueError, match='--out'):
+        merge.merge(base_dir, tmp_path / 'adapter', base_dir, log=lambda msg: None)
+
+
+def test_header_roundtrip_is_aligned(tmp_path):
+    header = {'x': {'dtype': 'F32', 'shape': [1], 'data_offsets': [0, 4]}}
+    raw = merge.header_bytes(header)
+    assert len(raw) % 8 == 0
+    (tmp_path / 'h.safetensors').write_bytes(raw + b'\0' * 4)
+    assert merge.read_header(tmp_path / 'h.safetensors') == (header, len(raw))
+    assert load_file(str(tmp_path / 'h.safetensors'))['x'].tolist() == [0.0]
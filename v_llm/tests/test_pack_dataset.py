@@ -0,0 +1,125 @@
+import importlib.util
+import json
+import pathlib
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('pack_dataset', str(ROOT / 'training' / 'pack_dataset.py'))
+pack = importlib.util.module_from_spec(spec)
+sys.modules['pack_dataset'] = pack
+spec.loader.exec_module(pack)
+
+WORDS = ['patient', 'patiente', 'ans', 'céphalées', 'fièvre', 'irm', 'scanner', 'urgence', 'recommandation:',
+         'pour', 'préciser:', '###', 'instruction:', 'response:']
+
+
+@pytest.fixture(scope='module')
+def tokenizer_dir(tmp_path_factory):
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+
+    vocab = {'<unk>': 0, '<s>': 1, '</s>': 2}
+    vocab.update({w: i + 3 for i, w in enumerate(WORDS)})
+    vocab.update({str(n): len(vocab) + n for n in range(100)})
+    tok = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    tok.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tok.post_processor = processors.TemplateProcessing(single='<s> $A', special_tokens=[('<s>', 1)])
+    directory = tmp_path_factory.mktemp('tok')
+    tok.save(str(directory / 'tokenizer.json'))
+    (directory / 'tokenizer_config.json').write_text(
+        json.dumps({'bos_token': '<s>', 'eos_token': '</s>', 'pad_token': '<unk>'}), encoding='utf-8')
+    return directory
+
+
+def _examples(n, seed=0):
+    rng = random.Random(seed)
+    return [{'instruction': f"patient {rng.randint(1, 90)} ans " + ' '.join(rng.choices(WORDS[3:8], k=rng.randint(1, 60))),
+             'response': rng.choice(['recommandation: irm urgence', 'pour préciser: fièvre'])} for _ in range(n)]
+
+
+def test_best_fit_places_every_example_once():
+    rng = random.Random(1)
+    lengths = [rng.randint(5, 120) for _ in range(3000)] + [256]
+    bins = pack.pack(lengths, 256)
+    assert sorted(i for b in bins for i in b) == list(range(len(lengths)))
+    assert all(sum(lengths[i] for i in b) <= 256 for b in bins)
+    assert sum(lengths) / (len(bins) * 256) > 0.95
+
+
+def test_build_and_read_packed_sequences(tmp_path, tokenizer_dir):
+    rows = _examples(500)
+    src = tmp_path / 'train.jsonl'
+    src.write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in rows), encoding='utf-8')
+    meta = pack.build([str(src)], tokenizer_dir, tmp_path / 'packed', seq_len=64, window=128, log=lambda *_: None)
+
+    ids = np.load(tmp_path / 'packed' / 'input_ids.npy', mmap_mode='r')
+    seg = np.load(tmp_path / 'packed' / 'segment_ids.npy', mmap_mode='r')
+    assert ids.dtype == np.uint16 and ids.shape == seg.shape == (meta['sequences'], 64)
+    assert meta['examples'] == 500 and meta['packing_efficiency'] > meta['padded_efficiency']
+    assert meta['tokens'] == int((seg > 0).sum())
+
+    tok, bos, eos, pad = pack.load_tokenizer(tokenizer_dir)
+    encoded = [tok.encode(pack.format_example(r['instruction'], r['response'])).ids + [eos] for r in rows]
+    expected = sorted(tuple(e[:64]) for e in encoded)
+    found = []
+    for row_ids, row_seg in zip(ids, seg):
+        for s in set(row_seg.tolist()) - {0}:
+            found.append(tuple(row_ids[row_seg == s].tolist()))
+        assert (row_ids[row_seg == 0] == pad).all()
+    assert sorted(found) == expected
+    assert meta['truncated'] == sum(len(e) > 64 for e in encoded) > 0
+
+    data = pack.PackedDataset(tmp_path / 'packed', with_mask=True)
+    item = data[0]
+    starts = np.flatnonzero(np.diff(np.asarray(seg[0], dtype=int), prepend=-1) != 0)
+    assert (item['position_ids'][starts] == 0).all()
+    assert (item['labels'][starts] == -100).all() and (item['labels'][np.asarray(seg[0]) == 0] == -100).all()
+    assert item['input_ids'][item['labels'] != -100].tolist() == item['labels'][item['labels'] != -100].tolist()
+    mask = item['attention_mask'][0]
+    s0 = np.asarray(seg[0])
+    i, j = np.nonzero(mask == 0)
+    assert (j <= i).all() and ((s0[i] == s0[j]) | (i == j)).all()
+
+
+def test_torch_items(tmp_path, tokenizer_dir):
+    torch = pytest.importorskip('torch')
+    src = tmp_path / 'val.jsonl'
+    src.write_text(''.join(json.dumps(r) + '\n' for r in _examples(20, seed=2)), encoding='utf-8')
+    pack.build([str(src)], tokenizer_dir / 'tokenizer.json', tmp_path / 'p', seq_len=128, log=lambda *_: None)
+    item = pack.PackedDataset(tmp_path / 'p', as_torch=True)[0]
+    assert item['input_ids'].dtype == torch.int64 and item['position_ids'].shape == (128,)
+
+
+@pytest.mark.parametrize('attn_implementation', ['eager', 'sdpa'])
+def test_mask_isolates_packed_examples(tmp_path, tokenizer_dir, attn_implementation):
+    """Modifier l'exemple 1 d'une séquence ne change pas les logits de l'exemple 2."""
+    torch = pytest.importorskip('torch')
+    transformers = pytest.importorskip('transformers')
+    assert pack.needs_mask(attn_implementation) and not pack.needs_mask('flash_attention_2')
+    src = tmp_path / 'train.jsonl'
+    src.write_text(''.join(json.dumps(r) + '\n' for r in _examples(40, seed=3)), encoding='utf-8')
+    pack.build([str(src)], tokenizer_dir, tmp_path / 'p', seq_len=128, window=40, log=lambda *_: None)
+    torch.manual_seed(0)
+    config = transformers.MistralConfig(vocab_size=128, hidden_size=32, intermediate_size=48, num_hidden_layers=2,
+                                        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=128)
+    model = transformers.MistralForCausalLM._from_config(config, attn_implementation=attn_implementation)
+    model = model.to(torch.bfloat16).eval()
+
+    data = pack.PackedDataset(tmp_path / 'p', with_mask=True, as_torch=True, mask_dtype=model.dtype)
+    row = next(r for r in range(len(data)) if len(set(data.segment_ids[r].tolist()) - {0}) >= 2)
+    seg = torch.from_numpy(np.asarray(data.segment_ids[row], dtype=np.int64))
+    batch = transformers.default_data_collator([data[row]])
+    batch.pop('labels')
+    perturbed = {k: v.clone() for k, v in batch.items()}
+    first = (seg == 1).nonzero()[1:, 0]
+    perturbed['input_ids'][0, first] = (perturbed['input_ids'][0, first] + 1) % 128
+    second = seg == 2
+    with torch.no_grad():
+        logits = model(**batch).logits[0, second]
+        assert torch.equal(model(**perturbed).logits[0, second], logits)
+        # sans masque, l'exemple 2 voit l'exemple 1
+        del batch['attention_mask'], perturbed['attention_mask']
+        assert not torch.equal(model(**perturbed).logits[0, second], model(**batch).logits[0, second])
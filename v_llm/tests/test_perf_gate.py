@@ -0,0 +1,88 @@
+import importlib.util
+import io
+import json
+import pathlib
+
+from src import perf_gate
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('perf_gate_cli', str(ROOT / 'scripts' / 'perf_gate.py'))
+cli = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cli)
+
+
+class FakeClock:
+    """Horloge avançant de `step` secondes à chaque appel de la fonction mesurée."""
+
+    def __init__(self, step):
+        self.now, self.step = 0.0, step
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, *args):
+        self.now += self.step
+        return len(args)
+
+
+def test_benchmark_calibrates_and_records():
+    clock, results = FakeClock(0.001), {}
+    bench = perf_gate.Benchmark('t', rounds=3, min_time=0.004, timer=clock, results=results)
+    assert bench(clock.tick, 'a', 'b') == 2
+    assert results['t']['iterations'] == 4 and results['t']['rounds'] == 3
+    assert abs(results['t']['median'] - 0.001) < 1e-12 and results['t']['stddev'] < 1e-12
+
+
+def test_pedantic_runs_setup_each_round():
+    clock, results, calls = FakeClock(0.002), {}, []
+    bench = perf_gate.Benchmark('p', timer=clock, results=results)
+    bench.pedantic(clock.tick, setup=lambda: calls.append(1), rounds=7, iterations=2)
+    assert len(calls) == 7 and results['p']['rounds'] == 7 and results['p']['iterations'] == 2
+
+
+def _file(tmp_path, name, medians, **extra):
+    data = {'machine': perf_gate.machine_info(),
+            'benchmarks': {k: {'median': v} for k, v in medians.items()}}
+    data.update(extra)
+    path = tmp_path / name
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_compare_limits_and_statuses():
+    baseline = {'max_regression_pct': 20, 'thresholds': {'noisy': 50},
+                'benchmarks': {'a': {'median': 1.0}, 'noisy': {'median': 1.0}, 'gone': {'median': 1.0}}}
+    current = {'benchmarks': {'a': {'median': 1.3}, 'noisy': {'median': 1.3}, 'added': {'median': 1.0}}}
+    rows = {r['name']: r for r in perf_gate.compare(baseline, current)}
+    assert rows['a']['status'] == 'regression' and round(rows['a']['change_pct']) == 30
+    assert rows['noisy']['status'] == 'ok'
+    assert rows['gone']['status'] == 'missing' and rows['added']['status'] == 'new'
+    # une limite explicite s'applique à tous les benchmarks
+    rows = {r['name']: r for r in perf_gate.compare(baseline, current, max_regression_pct=35)}
+    assert rows['a']['status'] == rows['noisy']['status'] == 'ok'
+
+
+def test_compare_command_exit_code(tmp_path, capsys):
+    base = _file(tmp_path, 'base.json', {'a': 1.0, 'b': 2.0}, max_regression_pct=10)
+    assert cli.main(['compare', base, _file(tmp_path, 'ok.json', {'a': 1.05, 'b': 1.5})]) == 0
+    assert cli.main(['compare', base, _file(tmp_path, 'slow.json', {'a': 1.2, 'b': 2.0})]) == 1
+    out = capsys.readouterr().out
+    assert 'FAIL: 1 regression(s): a' in out and '+20.0%' in out
+
+
+def test_missing_benchmark_fails_unless_allowed(tmp_path, capsys):
+    base = _file(tmp_path, 'base.json', {'a': 1.0, 'b': 2.0}, max_regression_pct=10)
+    partial = _file(tmp_path, 'partial.json', {'a': 1.0})
+    assert cli.main(['compare', base, partial]) == 1
+    assert 'FAIL: 1 benchmark(s) not run: b' in capsys.readouterr().out
+    assert cli.main(['compare', base, partial, '--allow-missing']) == 0
+    assert 'OK: no regression' in capsys.readouterr().out
+
+
+def test_stored_baseline_covers_perf_tests():
+    baseline = perf_gate.load(str(ROOT / 'tests' / 'perf' / 'baseline.json'))
+    names = {line.split('(')[0][4:] for path in (ROOT / 'tests' / 'perf').glob('test_*.py')
+             for line in path.read_text(encoding='utf-8').splitlines() if line.startswith('def test_')}
+    assert names == set(baseline['benchmarks'])
+    assert set(baseline['thresholds']) <= names
+    perf_gate.print_comparison(perf_gate.compare(baseline, baseline), out=io.StringIO())
@@ -0,0 +1,47 @@
+import importlib.util
+import io
+import json
+import pathlib
+
+import httpx
+
+from src.ollama_http import OllamaHTTP
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('showcase_finetuned', str(ROOT / 'scripts' / 'showcase_finetuned.py'))
+showcase = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(showcase)
+
+
+def _server(seen):
+    def handler(request):
+        body = json.loads(request.content)
+        seen.append(body['model'])
+        if body['model'] == 'broken':
+            return httpx.Response(404, text='model not found')
+        fast = body['model'].endswith('finetuned')
+        lines = [json.dumps({'response': 'Recommandation: IRM', 'done': False}),
+                 json.dumps({'done': True, 'prompt_eval_count': 40, 'eval_count': 20, 'load_duration': 2_000_000_000,
+                             'eval_duration': (250_000_000 if fast else 1_000_000_000)})]
+        return httpx.Response(200, content='\n'.join(lines).encode())
+    return httpx.MockTransport(handler)
+
+
+def test_benchmark_warmup_repeat_and_summary():
+    seen = []
+    client = OllamaHTTP(transport=_server(seen))
+    models = ['biomistral-clinical:latest', 'biomistral-clinical:finetuned', 'broken']
+    result = showcase.run_benchmark(client, models, ['p1', 'p2'], warmup=2, repeat=3, log=lambda *_: None)
+    # 2 warm-up + 3 x 2 timed calls per model
+    assert [seen.count(m) for m in models] == [8, 8, 8]
+    assert len(result['calls']) == 18
+    base, tuned, broken = (result['summary'][m] for m in models)
+    assert base['tokens_per_s'] == 20.0 and tuned['tokens_per_s'] == 80.0
+    assert base['load_s'] == 2.0 and base['prompt_tokens_mean'] == 40
+    assert base['ttft_p50_s'] is not None and base['latency_p95_s'] >= base['latency_p50_s']
+    assert broken['errors'] == 6 and broken['tokens_per_s'] is None
+
+    out = io.StringIO()
+    showcase.print_table(result['summary'], out=out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4 and lines[3].startswith('broken') and lines[3].split()[-1] == '6'
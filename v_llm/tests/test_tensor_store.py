@@ -0,0 +1,160 @@
+import filecmp
+import importlib.util
+import json
+import os
+import pathlib
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+from safetensors.torch import save_file  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(name, str(ROOT / 'training' / f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+merge = _load('merge_biomistral')
+ts = _load('tensor_store')
+import gguf  # noqa: E402  (gguf-py local, ajouté au chemin par tensor_store)
+
+
+@pytest.fixture(scope='module')
+def variants(tmp_path_factory):
+    """Deux variantes fusionnées d'une même base en deux shards, qui ne diffèrent que par q_proj."""
+    root = tmp_path_factory.mktemp('models')
+    torch.manual_seed(0)
+    base = root / 'base'
+    base.mkdir()
+    weight_map = {}
+    for shard in range(2):
+        name = f'model-0000{shard + 1}-of-00002.safetensors'
+        tensors = {f'model.layers.{shard}.self_attn.q_proj.weight': torch.randn(64, 64),
+                   f'model.layers.{shard}.mlp.up_proj.weight': torch.randn(128, 64),
+                   f'model.layers.{shard}.input_layernorm.weight': torch.ones(64)}
+        save_file(tensors, str(base / name), metadata={'format': 'pt'})
+        weight_map.update(dict.fromkeys(tensors, name))
+    (base / merge.INDEX_NAME).write_text(json.dumps({'metadata': {}, 'weight_map': weight_map}))
+    (base / 'config.json').write_text('{"architectures": ["MistralForCausalLM"]}')
+
+    out = {}
+    for variant in ('clinical', 'client'):
+        adapter = root / f'{variant}_lora'
+        adapter.mkdir()
+        save_file({f'base_model.model.model.layers.{i}.self_attn.q_proj.lora_{ab}.weight':
+                   torch.randn(*((4, 64) if ab == 'A' else (64, 4))) for i in range(2) for ab in 'AB'},
+                  str(adapter / 'adapter_model.safetensors'))
+        (adapter / 'adapter_config.json').write_text(json.dumps({'r': 4, 'lora_alpha': 8, 'target_modules': ['q_proj']}))
+        merge.merge(base, adapter, root / f'{variant}_merged', log=lambda msg: None)
+        out[variant] = root / f'{variant}_merged'
+    return out
+
+
+def _same_tree(a, b):
+    names = sorted(p.name for p in a.iterdir())
+    assert names == sorted(p.name for p in b.iterdir())
+    match, mismatch, errors = filecmp.cmpfiles(a, b, names, shallow=False)
+    assert not mismatch and not errors
+
+
+def test_variants_share_everything_but_lora_tensors(variants, tmp_path):
+    store = ts.TensorStore(tmp_path / 'store')
+    first = store.add('clinical', variants['clinical'], log=lambda m: None)
+    second = store.add('client', variants['client'], log=lambda m: None)
+    # les deux input_layernorm (uns) sont identiques : dédoublonnés dans le même modèle
+    assert first['added'] == first['size'] - 64 * 4
+    q_bytes = 2 * 64 * 64 * 4
+    assert second['added'] == q_bytes
+
+    stats = store.stats()
+    assert stats['models']['client']['unique'] == stats['models']['clinical']['unique'] == q_bytes
+    assert stats['stored'] == first['added'] + second['added']
+    assert stats['saved'] > 0.5 * stats['models']['client']['size']
+    segments = {name for f in store.manifest('client')['files'] for name, _, _ in f['segments']}
+    assert {ts.HEADER, 'model.layers.0.self_attn.q_proj.weight', 'config.json'} <= segments
+
+
+def test_checkout_is_byte_identical_and_hardlinked(variants, tmp_path):
+    store = ts.TensorStore(tmp_path / 'store')
+    for name, path in variants.items():
+        store.add(name, path, workers=1, log=lambda m: None)
+
+    report = store.checkout('client', tmp_path / 'a', log=lambda m: None)
+    _same_tree(variants['client'], tmp_path / 'a')
+    assert report['built'] == len(list(variants['client'].iterdir()))
+    again = store.checkout('client', tmp_path / 'b', log=lambda m: None)
+    assert again['built'] == 0
+    config_a, config_b = tmp_path / 'a' / 'config.json', tmp_path / 'b' / 'config.json'
+    assert os.stat(config_a).st_ino == os.stat(config_b).st_ino
+    assert not os.access(config_a, os.W_OK) or os.geteuid() == 0
+    store.checkout('clinical', tmp_path / 'c', log=lambda m: None)
+    _same_tree(variants['clinical'], tmp_path / 'c')
+    assert os.stat(tmp_path / 'c' / 'config.json').st_ino == os.stat(config_a).st_ino
+
+    store.checkout('clinical', tmp_path / 'd', link=False, log=lambda m: None)
+    _same_tree(variants['clinical'], tmp_path / 'd')
+    assert os.stat(tmp_path / 'd' / 'config.json').st_nlink == 1
+
+
+def test_gguf_files_are_split_per_tensor(tmp_path):
+    rng = np.random.default_rng(0)
+    shared = {f'blk.{i}.ffn_up.weight': rng.standard_normal((32, 64), dtype=np.float32) for i in range(3)}
+    for variant in ('a', 'b'):
+        (tmp_path / variant).mkdir()
+        writer = gguf.GGUFWriter(tmp_path / variant / 'model.gguf', 'llama')
+        writer.add_block_count(3)
+        writer.add_tensor('blk.0.attn_q.weight', rng.standard_normal((32, 32), dtype=np.float32))
+        for name, tensor in shared.items():
+            writer.add_tensor(name, tensor)
+        writer.write_header_to_file()
+        writer.write_kv_data_to_file()
+        writer.write_tensors_to_file()
+        writer.close()
+
+    names = [name for name, _, _ in ts.segments(tmp_path / 'a' / 'model.gguf')]
+    assert names == [ts.HEADER, 'blk.0.attn_q.weight', *shared]
+    store = ts.TensorStore(tmp_path / 'store')
+    store.add('a', tmp_path / 'a', log=lambda m: None)
+    report = store.add('b', tmp_path / 'b', log=lambda m: None)
+    assert report['added'] == 32 * 32 * 4
+    store.checkout('b', tmp_path / 'out', log=lambda m: None)
+    _same_tree(tmp_path / 'b', tmp_path / 'out')
+
+
+def test_verify_rm_and_gc(variants, tmp_path):
+    store = ts.TensorStore(tmp_path / 'store')
+    for name, path in variants.items():
+        store.add(name, path, log=lambda m: None)
+    assert store.verify(log=lambda m: None) == []
+    store.checkout('client', tmp_path / 'client', log=lambda m: None)
+
+    stored = store.stats()['stored']
+    unique = store.stats()['models']['client']['unique']
+    store.remove('client')
+    freed = store.gc(log=lambda m: None)['freed']
+    assert store.stats()['stored'] == stored - unique
+    # le checkout de client garde ses liens physiques : il reste intact après le gc
+    assert freed >= unique
+    _same_tree(variants['client'], tmp_path / 'client')
+
+    digest = store.manifest('clinical')['files'][0]['segments'][-1][1]
+    blob = store.blob_path(digest)
+    blob.write_bytes(b'x' * blob.stat().st_size)
+    assert store.verify(log=lambda m: None) == [digest]
+
+
+def test_cli_stats(variants, tmp_path, capsys):
+    for name, path in variants.items():
+        assert ts.main(['--store', str(tmp_path / 'store'), 'add', name, str(path)]) == 0
+    assert ts.main(['--store', str(tmp_path / 'store'), 'stats']) == 0
+    out = capsys.readouterr().out
+    assert 'clinical' in out and 'client' in out and 'saved' in out
+    assert ts.main(['--store', str(tmp_path / 'store'), 'verify']) == 0
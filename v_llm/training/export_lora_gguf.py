@@ -0,0 +1,234 @@
+"""
+export_lora_gguf.py - Adapters LoRA -> GGUF, sans checkpoint HF fusionné
+
+Remplace la chaîne merge_biomistral.py -> convert-hf-to-gguf.py -> quantize
+(trois écritures de 14+ Go) par une seule étape, au choix :
+
+1. Adapter GGUF (défaut) : les paires lora_A / lora_B des adapters PEFT sont
+   écrites avec GGUFWriter dans un petit fichier GGUF de type "adapter"
+   (quelques dizaines de Mo), chargé par llama.cpp / Ollama au-dessus du modèle
+   de base GGUF existant :
+       FROM ./biomistral-7b.Q4_K_M.gguf
+       ADAPTER ./biomistral_clinical_lora_v2.gguf
+2. Fusion (--fuse) : le modèle de base GGUF est relu tenseur par tenseur (mmap)
+   et réécrit tel quel, sauf les poids ciblés qui reçoivent W += B·A·échelle
+   (déquantifiés en float32, puis requantifiés dans leur type d'origine ;
+   Q8_0 pour les types que gguf-py ne sait pas quantifier, K-quants compris).
+   Fusionner dans une base F16 puis passer llama-quantize garde la qualité des
+   K-quants.
+
+Dans les deux cas les noms HF sont traduits en noms GGUF (TensorNameMap) et
+la permutation des lignes de q_proj / k_proj faite par convert-hf-to-gguf.py
+pour l'architecture llama (Mistral compris) est appliquée à B. Une seule
+valeur adapter.lora.alpha est stockée : l'échelle propre à chaque module
+(alpha_pattern, use_rslora) est reportée dans B.
+
+--base donne l'architecture et les hyperparamètres : fichier GGUF ou
+répertoire HF (config.json) ; il doit être un GGUF avec --fuse.
+
+Usage:
+python export_lora_gguf.py --adapter ../models/biomistral_clinical_lora_v2 --base ../models/biomistral-7b.Q4_K_M.gguf --out ../models/biomistral_clinical_lora_v2.gguf
+python export_lora_gguf.py --adapter ../models/biomistral_clinical_client_lora_v2 --base ../models/biomistral-7b.F16.gguf --fuse --out ../models/biomistral_clinical_client_lora_v2.F16.gguf
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+TRAINING_DIR = Path(__file__).resolve().parent
+if str(TRAINING_DIR) not in sys.path:
+    sys.path.insert(0, str(TRAINING_DIR))
+if 'NO_LOCAL_GGUF' not in os.environ:
+    sys.path.insert(1, str(TRAINING_DIR.parent / 'gguf-py'))
+import gguf  # noqa: E402
+
+from merge_biomistral import load_adapter  # noqa: E402
+
+# architectures HF converties en "llama" par convert-hf-to-gguf.py (LlamaModel)
+HF_ARCHS = {"LlamaForCausalLM": "llama", "MistralForCausalLM": "llama"}
+OUT_TYPES = {"f32": gguf.GGMLQuantizationType.F32, "f16": gguf.GGMLQuantizationType.F16,
+             "bf16": gguf.GGMLQuantizationType.BF16}
+FALLBACK_TYPE = gguf.GGMLQuantizationType.Q8_0
+
+
+def permute(weights, n_head, n_head_kv):
+    """Même permutation que LlamaModel.permute (convert-hf-to-gguf.py), sur les lignes."""
+    if n_head_kv is not None and n_head != n_head_kv:
+        n_head = n_head_kv
+    return (weights.reshape(n_head, 2, weights.shape[0] // n_head // 2, *weights.shape[1:])
+            .swapaxes(1, 2)
+            .reshape(weights.shape))
+
+
+def base_hparams(base):
+    """{arch, n_head, n_head_kv, block_count} d'un modèle GGUF ou d'un répertoire HF."""
+    base = Path(base)
+    if base.suffix == ".gguf":
+        # lazy : seuls les quelques champs lus sont décodés, pas le vocabulaire
+        reader = gguf.GGUFReader(base, lazy=True)
+        arch = reader.get_field(gguf.Keys.General.ARCHITECTURE).contents()
+
+        def value(key, default=None):
+            field = reader.get_field(key.format(arch=arch))
+            return default if field is None else field.contents()
+
+        n_head = value(gguf.Keys.Attention.HEAD_COUNT)
+        hparams = {"arch": arch, "n_head": n_head, "n_head_kv": value(gguf.Keys.Attention.HEAD_COUNT_KV, n_head),
+                   "block_count": value(gguf.Keys.LLM.BLOCK_COUNT)}
+    else:
+        with open(base / "config.json" if base.is_dir() else base, encoding="utf-8") as f:
+            config = json.load(f)
+        hf_arch = (config.get("architectures") or ["?"])[0]
+        hparams = {"arch": HF_ARCHS.get(hf_arch, hf_arch), "n_head": config["num_attention_heads"],
+                   "n_head_kv": config.get("num_key_value_heads", config["num_attention_heads"]),
+                   "block_count": config["num_hidden_layers"]}
+    if hparams["arch"] != "llama":
+        raise ValueError(f"architecture {hparams['arch']} non prise en charge (llama / Mistral uniquement)")
+    return hparams
+
+
+def gguf_lora(adapter_dir, hparams):
+    """(config, {nom GGUF: (A, B, échelle)}) : adapters PEFT en noms et ordre de lignes GGUF, float32."""
+    config, lora = load_adapter(adapter_dir)
+    if config.get("fan_in_fan_out"):
+        raise ValueError("fan_in_fan_out non pris en charge pour l'architecture llama")
+    name_map = gguf.get_tensor_name_map(gguf.MODEL_ARCH.LLAMA, hparams["block_count"])
+    out = {}
+    for hf_name, (a, b, scale) in lora.items():
+        name = name_map.get_name(hf_name, try_suffixes=(".weight",))
+        if name is None:
+            raise ValueError(f"pas de nom GGUF pour {hf_name}")
+        a, b = a.float().numpy(), b.float().numpy()
+        if hf_name.endswith("q_proj.weight"):
+            b = permute(b, hparams["n_head"], hparams["n_head"])
+        elif hf_name.endswith("k_proj.weight"):
+            b = permute(b, hparams["n_head"], hparams["n_head_kv"])
+        out[name] = (a, b, scale)
+    return config, out
+
+
+def export_adapter(adapter_dir, base, out_path, outtype="f16", log=print):
+    """Écrit l'adapter GGUF (tenseurs <nom>.lora_a / <nom>.lora_b) ; renvoie un rapport."""
+    start = time.perf_counter()
+    hparams = base_hparams(base)
+    config, lora = gguf_lora(adapter_dir, hparams)
+    alpha = float(config.get("lora_alpha", config["r"]))
+    qtype = OUT_TYPES[outtype]
+
+    writer = gguf.GGUFWriter(out_path, hparams["arch"])
+    writer.add_type(gguf.GGUFType.ADAPTER)
+    writer.add_name(Path(adapter_dir).name)
+    writer.add_string(gguf.Keys.Adapter.TYPE, "lora")
+    writer.add_float32(gguf.Keys.Adapter.LORA_ALPHA, alpha)
+    for name, (a, b, scale) in lora.items():
+        # llama.cpp applique alpha / rang : l'écart avec l'échelle du module passe dans B
+        native = alpha / a.shape[0]
+        if scale != native:
+            b = b * (scale / native)
+        for suffix, tensor in ((".lora_a", a), (".lora_b", b)):
+            writer.add_tensor(name + suffix, gguf.quants.quantize(np.ascontiguousarray(tensor), qtype),
+                              raw_dtype=qtype)
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_tensors_to_file()
+    writer.close()
+    log(f"{len(lora)} LoRA pairs -> {out_path}")
+    return {"pairs": len(lora), "alpha": alpha, "size": Path(out_path).stat().st_size,
+            "elapsed_s": round(time.perf_counter() - start, 3)}
+
+
+@lru_cache(maxsize=None)
+def can_requantize(qtype):
+    try:
+        gguf.quants.quantize(np.zeros((1, 256), dtype=np.float32), qtype)
+    except NotImplementedError:
+        return False
+    return True
+
+
+def _copy_fields(reader, writer):
+    """Métadonnées du modèle de base, hors champs virtuels et architecture (écrite par GGUFWriter)."""
+    for field in reader.fields.values():
+        if field.name == gguf.Keys.General.ARCHITECTURE or field.name.startswith('GGUF.'):
+            continue
+        val_type = field.types[0]
+        sub_type = field.types[-1] if val_type == gguf.GGUFValueType.ARRAY else None
+        writer.add_key_value(field.name, field.contents(), val_type, sub_type=sub_type)
+        if field.name == gguf.Keys.General.ALIGNMENT:
+            writer.data_alignment = field.contents()
+
+
+def fuse(adapter_dir, base_gguf, out_path, log=print):
+    """Réécrit `base_gguf` dans `out_path` avec les adapters fusionnés, un tenseur à la fois."""
+    start = time.perf_counter()
+    hparams = base_hparams(base_gguf)
+    _, lora = gguf_lora(adapter_dir, hparams)
+    reader = gguf.GGUFReader(base_gguf)
+    tensors = {t.name: t for t in reader.tensors}
+    for name, (a, b, _) in lora.items():
+        if name not in tensors:
+            raise ValueError(f"{name} introuvable dans {base_gguf}")
+        if [int(d) for d in tensors[name].shape] != [a.shape[1], b.shape[0]]:
+            raise ValueError(f"{name} : forme {tensors[name].shape.tolist()}, LoRA {[a.shape[1], b.shape[0]]}")
+
+    writer = gguf.GGUFWriter(out_path, hparams["arch"])
+    _copy_fields(reader, writer)
+    out_types = {}
+    for t in reader.tensors:
+        if t.name not in lora:
+            writer.add_tensor_info(t.name, t.data.shape, t.data.dtype, t.data.nbytes, t.tensor_type)
+            continue
+        qtype = t.tensor_type if can_requantize(t.tensor_type) else FALLBACK_TYPE
+        out_types[t.name] = qtype
+        shape = tuple(reversed([int(d) for d in t.shape]))
+        block_size, type_size = gguf.GGML_QUANT_SIZES[qtype]
+        writer.add_tensor_info(t.name, shape, np.float32, t.n_elements * type_size // block_size, qtype)
+    requantized = sorted({t.name for t in reader.tensors if out_types.get(t.name, t.tensor_type) != t.tensor_type})
+    if requantized:
+        log(f"warning: {len(requantized)} tensors stored as {FALLBACK_TYPE.name} "
+            f"(no Python quantizer for their type)")
+
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_ti_data_to_file()
+    for t in reader.tensors:
+        if t.name not in lora:
+            writer.write_tensor_data(t.data)
+            continue
+        a, b, scale = lora[t.name]
+        weight = gguf.quants.dequantize(t.data, t.tensor_type)
+        if not weight.flags.writeable:
+            weight = weight.copy()
+        weight += (b * scale) @ a
+        writer.write_tensor_data(gguf.quants.quantize(weight, out_types[t.name]))
+        del weight
+    writer.close()
+    log(f"{len(lora)} tensors fused into {len(reader.tensors)} -> {out_path}")
+    return {"fused": len(lora), "tensors": len(reader.tensors), "requantized": requantized,
+            "size": Path(out_path).stat().st_size, "elapsed_s": round(time.perf_counter() - start, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adapters LoRA -> GGUF (adapter ou fusion en flux)")
+    parser.add_argument('--adapter', required=True, help="répertoire des adapters (adapter_config.json)")
+    parser.add_argument('--base', required=True, help="modèle de base : fichier GGUF ou répertoire HF")
+    parser.add_argument('--out', required=True, help="fichier GGUF de sortie")
+    parser.add_argument('--fuse', action='store_true', help="fusionner dans le GGUF de base au lieu d'un adapter")
+    parser.add_argument('--outtype', choices=sorted(OUT_TYPES), default="f16", help="type des tenseurs de l'adapter")
+    args = parser.parse_args(argv)
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    if args.fuse:
+        report = fuse(args.adapter, args.base, args.out, log=log)
+    else:
+        report = export_adapter(args.adapter, args.base, args.out, outtype=args.outtype, log=log)
+    print(f"{report['size'] / 2**20:.1f} MiB written in {report['elapsed_s']:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
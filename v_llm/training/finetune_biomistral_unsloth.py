@@ -12,15 +12,21 @@ pip install --no-deps "xformers<0.0.27" trl peft accelerate bitsandbytes
 
 Usage:
 python finetune_biomistral_unsloth.py --model_name BioMistral/BioMistral-7B --train_file clinical_cases_train.jsonl --val_file clinical_cases_val.jsonl --output_dir biomistral_clinical_lora
+
+Avec un dataset pré-tokenisé et compacté (pack_dataset.py, répertoires train/ et val/) :
+python finetune_biomistral_unsloth.py --packed_dir packed --output_dir biomistral_clinical_lora
 """
 
 import argparse
+import os
 import torch
 from datasets import load_dataset
-from transformers import TrainingArguments
+from transformers import Trainer, TrainingArguments, default_data_collator
 from trl import SFTTrainer
 from unsloth import FastLanguageModel
 
+from pack_dataset import PackedDataset, format_example, needs_mask, print_report
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Fine-tune BioMistral avec Unsloth LoRA")
@@ -30,6 +36,8 @@ def parse_args():
                         help="Fichier JSONL d'entraînement")
     parser.add_argument("--val_file", type=str, default="clinical_cases_val.jsonl",
                         help="Fichier JSONL de validation")
+    parser.add_argument("--packed_dir", type=str, default=None,
+                        help="Dataset compacté de pack_dataset.py (train/ et val/), remplace --train_file/--val_file")
     parser.add_argument("--output_dir", type=str, default="biomistral_clinical_lora",
                         help="Répertoire de sortie pour le modèle fine-tuné")
     parser.add_argument("--max_seq_length", type=int, default=2048,
@@ -56,12 +64,7 @@ def formatting_prompts_func(examples):
     texts = []
     for instruction, response in zip(instructions, responses):
         # Format Alpaca-style
-        text = f"""### Instruction:
-{instruction}
-
-### Response:
-{response}"""
-        texts.append(text)
+        texts.append(format_example(instruction, response))
     return {"text": texts}
 
 
@@ -104,15 +107,30 @@ def main():
     
     # 3. Charger les datasets
     print("📂 Chargement des datasets...")
-    train_dataset = load_dataset("json", data_files=args.train_file, split="train")
-    val_dataset = load_dataset("json", data_files=args.val_file, split="train")
-    
-    print(f"  Train: {len(train_dataset)} exemples")
-    print(f"  Validation: {len(val_dataset)} exemples")
-    
-    # 4. Formater les prompts
-    train_dataset = train_dataset.map(formatting_prompts_func, batched=True)
-    val_dataset = val_dataset.map(formatting_prompts_func, batched=True)
+    if args.packed_dir:
+        # séquences déjà tokenisées et compactées, lues en mmap ; frontières d'exemples portées par position_ids,
+        # que seul flash_attention_2 lit : les autres attentions reçoivent le masque bloc-diagonal
+        attn_implementation = getattr(model.config, "_attn_implementation", None)
+        with_mask = needs_mask(attn_implementation)
+        print(f"  Attention: {attn_implementation} ({'masque bloc-diagonal' if with_mask else 'frontières par position_ids'})")
+        packed_kwargs = dict(with_mask=with_mask, as_torch=True, mask_dtype=model.dtype)
+        train_dataset = PackedDataset(os.path.join(args.packed_dir, "train"), **packed_kwargs)
+        val_dataset = PackedDataset(os.path.join(args.packed_dir, "val"), **packed_kwargs)
+        if train_dataset.meta["seq_len"] > args.max_seq_length:
+            raise SystemExit(f"--packed_dir rangé en {train_dataset.meta['seq_len']} tokens > --max_seq_length {args.max_seq_length}")
+        print_report(train_dataset.meta)
+        print(f"  Train: {len(train_dataset)} séquences")
+        print(f"  Validation: {len(val_dataset)} séquences")
+    else:
+        train_dataset = load_dataset("json", data_files=args.train_file, split="train")
+        val_dataset = load_dataset("json", data_files=args.val_file, split="train")
+
+        print(f"  Train: {len(train_dataset)} exemples")
+        print(f"  Validation: {len(val_dataset)} exemples")
+
+        # 4. Formater les prompts
+        train_dataset = train_dataset.map(formatting_prompts_func, batched=True)
+        val_dataset = val_dataset.map(formatting_prompts_func, batched=True)
     
     # 5. Configurer l'entraînement
     print("\n⚙️  Configuration de l'entraînement...")
@@ -156,6 +174,10 @@ def main():
     ]
 
     last_exc = None
+    if args.packed_dir:
+        # déjà tokenisé : pas de préparation SFT, les lots sont empilés tels quels
+        trainer = Trainer(**trainer_kwargs, data_collator=default_data_collator)
+        trainer_attempts = []
     for extra_kwargs in trainer_attempts:
         try:
             trainer = SFTTrainer(**trainer_kwargs, **extra_kwargs)
@@ -186,7 +208,7 @@ def main():
     print(f"Modèle merged sauvegardé: {merged_output}")
     print("\nProchaines étapes:")
     print("1. Testez le modèle avec test_scenarios.py")
-    print("2. Convertissez en GGUF pour Ollama (voir FINE_TUNING_GUIDE.md)")
+    print("2. Exportez les adapters en GGUF pour Ollama : training/export_lora_gguf.py (sans passer par le merge)")
     print("3. Créez un Modelfile et ajoutez à Ollama\n")
 
 
@@ -0,0 +1,215 @@
+"""
+generate_cases.py
+
+Générateur de cas synthétiques en flux, pour les gros fine-tunings et les tests de charge.
+- Mêmes gabarits que generate_finetune_dataset.py, enrichis de variantes neutres
+  (sexe, éléments de contexte) pour atteindre des millions de cas distincts
+- Tâches indépendantes réparties sur `--workers` processus ; chaque tâche a son
+  propre flux aléatoire (random.Random(f"{seed}/{tâche}")) : le corpus dépend de
+  --seed, pas du nombre de workers
+- Dédoublonnage par empreinte (blake2b 64 bits du texte normalisé), 8 octets
+  par cas conservés en mémoire ; le reste est écrit au fil de l'eau
+- Chaque cas porte ses étiquettes : analyze_guidelines (src/guidelines_logic.py)
+  et l'arbre de décision (v_arbre_d)
+- Sortie en shards JSONL (train-00000.jsonl, val-00000.jsonl, ...) ; la part
+  validation est choisie par l'empreinte du cas de gabarit avant variantes :
+  stable d'une génération à l'autre, et toutes les variantes d'un même tirage
+  (mêmes âge, durée, caractère, même réponse) tombent du même côté
+- manifest.json : paramètres, nombre de cas, doublons écartés, répartition par catégorie
+
+Les shards se lisent directement par l'entraînement et les benchmarks :
+python finetune_biomistral_unsloth.py --train_file 'cases/train-*.jsonl' --val_file 'cases/val-*.jsonl'
+python ../scripts/bench_engines.py --datasets cases/val-00000.jsonl
+
+Usage:
+python generate_cases.py --n 1000000 --out-dir cases --workers 8 [--shard-size 100000] [--seed 42]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+from pathlib import Path
+
+TRAINING_DIR = Path(__file__).resolve().parent
+ROOT = TRAINING_DIR.parent
+for path in (str(TRAINING_DIR), str(ROOT)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from generate_finetune_dataset import INSTRUCTION_PREFIX, make_example  # noqa: E402
+
+# éléments de contexte sans effet sur la réponse attendue du gabarit
+CONTEXTE = ["HTA traitée", "tabagisme actif", "diabète de type 2", "dyslipidémie", "asthme connu",
+            "hypothyroïdie substituée", "travail sur écran", "stress professionnel", "sommeil de mauvaise qualité",
+            "consommation de café importante", "sous paracétamol", "sportif régulier"]
+_SPACES = re.compile(r"\s+")
+
+
+def make_case(rng):
+    """(exemple, texte, texte du gabarit) : variantes de sexe (hors grossesse) et 0 à 2 éléments de contexte."""
+    ex = make_example(rng)
+    text = base = ex["instruction"][len(INSTRUCTION_PREFIX):]
+    if ex["category"] != "pregnancy" and rng.random() < 0.5:
+        text = text.replace("Patient ", "Patiente ", 1)
+    extra = rng.sample(CONTEXTE, rng.choice((0, 1, 1, 2)))
+    if extra:
+        text = text + ", " + ", ".join(extra)
+    ex["instruction"] = INSTRUCTION_PREFIX + text
+    return ex, text, base
+
+
+def digest(text):
+    """Empreinte 64 bits du texte normalisé (casse et espaces ignorés)."""
+    key = _SPACES.sub(" ", text.strip().lower()).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _labeler():
+    from src.guidelines_logic import analyze_guidelines
+    from v_arbre_d import analyse_texte_medical, decision_imagerie
+
+    return lambda text: {"guidelines": analyze_guidelines(text),
+                         "decision_tree": decision_imagerie(analyse_texte_medical(text))}
+
+
+_LABEL = None
+
+
+def generate_batch(task):
+    """Tâche (seed, index, taille) -> [(empreinte, empreinte du gabarit, catégorie, ligne JSON)], sans doublon interne."""
+    global _LABEL
+    if _LABEL is None:
+        _LABEL = _labeler()
+    seed, index, size = task
+    rng = random.Random(f"{seed}/{index}")
+    seen, out = set(), []
+    for i in range(size):
+        ex, text, base = make_case(rng)
+        h = digest(text)
+        if h in seen:
+            continue
+        seen.add(h)
+        record = {"id": f"{seed}-{index}-{i}", "instruction": ex["instruction"], "response": ex["response"],
+                  "category": ex["category"], "labels": _LABEL(text)}
+        out.append((h, digest(base), ex["category"], json.dumps(record, ensure_ascii=False)))
+    return out
+
+
+class ShardWriter:
+    """Écrit des lignes dans prefix-00000.jsonl, prefix-00001.jsonl, ... par blocs de `shard_size`."""
+
+    def __init__(self, out_dir, prefix, shard_size):
+        self.out_dir, self.prefix, self.shard_size = Path(out_dir), prefix, shard_size
+        self.shards, self.count = [], 0
+        self._fh = None
+
+    def write(self, line):
+        if self._fh is None or self.count % self.shard_size == 0:
+            self._open_next()
+        self._fh.write(line + "\n")
+        self.count += 1
+
+    def _open_next(self):
+        self.close()
+        path = self.out_dir / f"{self.prefix}-{len(self.shards):05d}.jsonl"
+        self.shards.append(path.name)
+        self._fh = open(path, "w", encoding="utf-8")
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def generate(n, out_dir, seed=42, workers=None, shard_size=100_000, batch_size=1000, val_ratio=0.2,
+             max_stale_batches=50, log=print):
+    """Écrit `n` cas distincts en shards dans `out_dir` et renvoie le manifeste."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    writers = {"train": ShardWriter(out_dir, "train", shard_size), "val": ShardWriter(out_dir, "val", shard_size)}
+    val_cut = int(val_ratio * 1000)
+    seen, categories = set(), Counter()
+    duplicates = generated = 0
+    next_task = stale = 0
+    start = time.perf_counter()
+
+    def batches(pool):
+        nonlocal next_task
+        while True:
+            window = range(next_task, next_task + 4 * workers)
+            next_task = window.stop
+            tasks = [(seed, i, batch_size) for i in window]
+            yield from (pool.imap(generate_batch, tasks) if pool else map(generate_batch, tasks))
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        for batch in batches(pool):
+            fresh = 0
+            generated += batch_size
+            for h, group, category, line in batch:
+                if len(seen) >= n:
+                    break
+                if h in seen:
+                    duplicates += 1
+                    continue
+                seen.add(h)
+                fresh += 1
+                categories[category] += 1
+                writers["val" if group % 1000 < val_cut else "train"].write(line)
+            duplicates += batch_size - len(batch)
+            if len(seen) >= n:
+                break
+            # espace des gabarits épuisé : on s'arrête plutôt que de boucler sans fin
+            stale = stale + 1 if fresh == 0 else 0
+            if stale >= max_stale_batches:
+                log(f"warning: no new case in {stale} batches, stopping at {len(seen)} cases")
+                break
+            if len(seen) // shard_size != (len(seen) - fresh) // shard_size:
+                log(f"{len(seen)} cases ({len(seen) / (time.perf_counter() - start):.0f}/s)")
+    finally:
+        if pool is not None:
+            pool.terminate()
+        for writer in writers.values():
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    manifest = {
+        "seed": seed, "requested": n, "cases": len(seen), "generated": generated, "duplicates": duplicates,
+        "val_ratio": val_ratio, "shard_size": shard_size, "batch_size": batch_size, "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "splits": {name: {"cases": w.count, "shards": w.shards} for name, w in writers.items()},
+        "categories": dict(sorted(categories.items())),
+    }
+    with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cas synthétiques étiquetés en shards JSONL")
+    parser.add_argument('--n', type=int, default=100_000, help="nombre de cas distincts")
+    parser.add_argument('--out-dir', default=str(TRAINING_DIR / "cases"))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="processus (défaut : nombre de CPU)")
+    parser.add_argument('--shard-size', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1000, help="cas par tâche")
+    parser.add_argument('--val-ratio', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    manifest = generate(args.n, args.out_dir, seed=args.seed, workers=args.workers, shard_size=args.shard_size,
+                        batch_size=args.batch_size, val_ratio=args.val_ratio,
+                        log=lambda msg: print(msg, file=sys.stderr))
+    print(f"{manifest['cases']} cases ({manifest['splits']['train']['cases']} train, "
+          f"{manifest['splits']['val']['cases']} val), {manifest['duplicates']} duplicates dropped, "
+          f"{manifest['elapsed_s']:.1f}s -> {args.out_dir}")
+    return 0 if manifest["cases"] == manifest["requested"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -54,67 +54,66 @@ DURATIONS = ["2 heures", "4 heures", "12 heures", "1 jour", "2 jours", "3 jours"
 CHARACTER = ["brutale", "intense", "progressive", "soudaine", "oppressive"]
 ASSOCIATED = ["vomissements", "fièvre", "perte de connaissance", "convulsions", "déficit neurologique"]
 IMMUNO = ["VIH", "chimiothérapie", "greffe", "cancer avancé"]
+INSTRUCTION_PREFIX = "Vous êtes un assistant médical expert. Répondez strictement en français.\n\nCas clinique:\n"
+
+CATEGORIES = [
+    ("red_flags", 0.35),
+    ("no_red_flags", 0.2),
+    ("pregnancy", 0.08),
+    ("immuno", 0.08),
+    ("trauma", 0.07),
+    ("ambiguous", 0.07),
+    ("negations", 0.08),
+    ("short_case", 0.07),
+]
+
+
+def make_example(rng=random):
+    """Un exemple tiré avec `rng` (module random ou random.Random) : instruction, response, category."""
+    cat = rng.choices([c[0] for c in CATEGORIES], weights=[c[1] for c in CATEGORIES], k=1)[0]
+    tmpl = rng.choice(TEMPLATES[cat])
+    age = rng.randint(1, 90)
+    dur = rng.choice(DURATIONS)
+    char = rng.choice(CHARACTER)
+    assoc = rng.choice(ASSOCIATED)
+    imm = rng.choice(IMMUNO)
+    preg_w = rng.randint(6, 38)
+    loc = rng.choice(["frontale", "hémicrânienne droite", "hémicrânienne gauche", "péri-orbitaire"]) 
+
+    if cat == 'red_flags':
+        instr = tmpl[0].format(age, char, dur, assoc)
+        resp = tmpl[1].format(assoc)
+    elif cat == 'no_red_flags':
+        instr = tmpl[0].format(age, char, dur)
+        resp = tmpl[1]
+    elif cat == 'pregnancy':
+        instr = tmpl[0].format(age, preg_w, char, dur, f"{rng.randint(110, 140)}/{rng.randint(60, 90)}")
+        resp = tmpl[1]
+    elif cat == 'immuno':
+        instr = tmpl[0].format(age, imm, rng.choice(["38.5°C", "39°C", "37.8°C"]), rng.choice(["confusion modérée", "confusion sévère"]))
+        resp = tmpl[1]
+    elif cat == 'trauma':
+        instr = tmpl[0].format(age, rng.choice(["oui", "non"]), rng.choice(["oui", "non"]))
+        resp = tmpl[1]
+    elif cat == 'ambiguous':
+        instr = tmpl[0].format(age, char, "antécédent de migraine")
+        resp = tmpl[1]
+    elif cat == 'negations':
+        instr = tmpl[0].format(age, char, dur)
+        resp = tmpl[1]
+    else:
+        instr = tmpl[0].format(age, "céphalée")
+        resp = tmpl[1]
+
+    return {
+        "instruction": INSTRUCTION_PREFIX + instr,
+        "response": resp,
+        "category": cat
+    }
+
 
 def gen_examples(n=200):
-    examples = []
-    categories = [
-        ("red_flags", 0.35),
-        ("no_red_flags", 0.2),
-        ("pregnancy", 0.08),
-        ("immuno", 0.08),
-        ("trauma", 0.07),
-        ("ambiguous", 0.07),
-        ("negations", 0.08),
-        ("short_case", 0.07),
-    ]
-    weights = [c[1] for c in categories]
-    cat_names = [c[0] for c in categories]
-
-    for i in range(n):
-        cat = random.choices(cat_names, weights=weights, k=1)[0]
-        tmpl = random.choice(TEMPLATES[cat])
-        age = random.randint(1, 90)
-        dur = random.choice(DURATIONS)
-        char = random.choice(CHARACTER)
-        assoc = random.choice(ASSOCIATED)
-        imm = random.choice(IMMUNO)
-        preg_w = random.randint(6, 38)
-        loc = random.choice(["frontale", "hémicrânienne droite", "hémicrânienne gauche", "péri-orbitaire"]) 
-
-        if cat == 'red_flags':
-            instr = tmpl[0].format(age, char, dur, assoc)
-            resp = tmpl[1].format(assoc)
-        elif cat == 'no_red_flags':
-            instr = tmpl[0].format(age, char, dur)
-            resp = tmpl[1]
-        elif cat == 'pregnancy':
-            instr = tmpl[0].format(age, preg_w, char, dur, f"{random.randint(110, 140)}/{random.randint(60, 90)}")
-            resp = tmpl[1]
-        elif cat == 'immuno':
-            instr = tmpl[0].format(age, imm, random.choice(["38.5°C", "39°C", "37.8°C"]), random.choice(["confusion modérée", "confusion sévère"]))
-            resp = tmpl[1]
-        elif cat == 'trauma':
-            instr = tmpl[0].format(age, random.choice(["oui", "non"]), random.choice(["oui", "non"]))
-            resp = tmpl[1]
-        elif cat == 'ambiguous':
-            instr = tmpl[0].format(age, char, "antécédent de migraine")
-            resp = tmpl[1]
-        elif cat == 'negations':
-            instr = tmpl[0].format(age, char, dur)
-            resp = tmpl[1]
-        else:
-            instr = tmpl[0].format(age, "céphalée")
-            resp = tmpl[1]
-
-        instruction = "Vous êtes un assistant médical expert. Répondez strictement en français.\n\nCas clinique:\n" + instr
-        response = resp
-        examples.append({
-            "instruction": instruction,
-            "response": response,
-            "category": cat
-        })
-
-    return examples
+    return [make_example(random) for _ in range(n)]
 
 
 def save_examples(examples, train_ratio=0.8):
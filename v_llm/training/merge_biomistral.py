@@ -1,19 +1,273 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from peft import PeftModel
+"""
+merge_biomistral.py - Fusion LoRA en flux, shard par shard
 
-# Chemins à adapter selon ton organisation
-base_model_path = "/Users/alexpeirano/Desktop/commande_entreprise/BioMistral-7B"  # Dossier du modèle HuggingFace
-lora_adapters_path = "/Users/alexpeirano/Desktop/commande_entreprise/v_llm/models/biomistral_clinical_lora_v2"  # Dossier dézippé des adapters
+Fusionne les adapters LoRA (PEFT) dans le modèle de base sans jamais charger le
+modèle entier en mémoire :
+- chaque shard model-*.safetensors est lu séparément ; les tenseurs non ciblés
+  sont recopiés octet pour octet, par blocs
+- seuls les poids des modules de adapter_config.json (target_modules) ayant une
+  paire lora_A / lora_B reçoivent W += B·A·(alpha/r) : poids lu en mémoire
+  projetée (mmap), calcul en float32, retour au dtype d'origine
+  (rank_pattern, alpha_pattern, use_rslora et fan_in_fan_out pris en compte)
+- la fusion ne change ni forme ni dtype : l'en-tête de chaque shard de sortie
+  est écrit d'avance, puis les tenseurs un par un ; la mémoire de pointe est
+  celle du plus gros tenseur fusionné (en float32), quelle que soit la taille
+  du modèle
+- model.safetensors.index.json réécrit (total_size), config.json, tokenizer et
+  autres fichiers du modèle de base recopiés
 
-# Charger le modèle de base
-model = AutoModelForCausalLM.from_pretrained(base_model_path, torch_dtype="auto")
-tokenizer = AutoTokenizer.from_pretrained(base_model_path)
+Toutes les correspondances adapter -> poids (nom, forme, dtype) sont vérifiées
+avant d'écrire quoi que ce soit.
 
-# Appliquer les adapters LoRA
-model = PeftModel.from_pretrained(model, lora_adapters_path)
-model = model.merge_and_unload()
+Usage:
+python merge_biomistral.py --base ../../BioMistral-7B --adapter ../models/biomistral_clinical_lora_v2 --out ../models/biomistral_clinical_lora_v2_merged
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import resource
+import shutil
+import struct
+import sys
+import time
+import warnings
+from pathlib import Path
 
-# Sauvegarder le modèle fusionné
-output_dir = "../models/biomistral_clinical_lora_v2_merged"
-model.save_pretrained(output_dir, safe_serialization=True)
-tokenizer.save_pretrained(output_dir)
\ No newline at end of file
+INDEX_NAME = "model.safetensors.index.json"
+SINGLE_NAME = "model.safetensors"
+COPY_CHUNK = 16 << 20
+# dtypes safetensors fusionnables -> attribut torch (torch importé à l'usage : read_header et
+# shard_files servent aussi aux outils sans torch, comme tensor_store.py)
+TORCH_DTYPES = {"F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16"}
+# poids du modèle de base jamais recopiés tels quels (ils ne seraient pas fusionnés)
+WEIGHT_SUFFIXES = (".safetensors", ".bin", ".pt", ".pth", ".gguf")
+_LORA_KEY = re.compile(r"^(?:base_model\.model\.)?(?P<module>.+)\.lora_(?P<which>[AB])(?:\.[^.]+)?\.weight$")
+
+
+def read_header(path):
+    """(en-tête JSON, position du début des données) d'un fichier safetensors."""
+    with open(path, "rb") as f:
+        (size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(size))
+    return header, 8 + size
+
+
+def header_bytes(header):
+    """En-tête safetensors sérialisé : taille sur 8 octets + JSON complété à un multiple de 8."""
+    raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    raw += b" " * (-len(raw) % 8)
+    return struct.pack("<Q", len(raw)) + raw
+
+
+def shard_files(model_dir):
+    """(noms des shards dans l'ordre, index ou None) d'un modèle HF en safetensors."""
+    model_dir = Path(model_dir)
+    if (model_dir / INDEX_NAME).exists():
+        with open(model_dir / INDEX_NAME, encoding="utf-8") as f:
+            index = json.load(f)
+        return list(dict.fromkeys(sorted(index["weight_map"].values()))), index
+    if (model_dir / SINGLE_NAME).exists():
+        return [SINGLE_NAME], None
+    shards = sorted(p.name for p in model_dir.glob("model-*.safetensors"))
+    if not shards:
+        raise FileNotFoundError(f"aucun poids safetensors dans {model_dir}")
+    return shards, None
+
+
+def _matches(module, pattern):
+    return module == pattern or re.fullmatch(rf"(?:.*\.)?{pattern}", module) is not None
+
+
+def is_target(module, target_modules):
+    """Même règle que PEFT : chaîne = regex sur le nom complet, liste = nom ou suffixe."""
+    if target_modules in (None, "all-linear"):
+        return True
+    if isinstance(target_modules, str):
+        return re.fullmatch(target_modules, module) is not None
+    return any(module == t or module.endswith("." + t) for t in target_modules)
+
+
+def lora_scale(config, module, rank):
+    """alpha/r (ou alpha/sqrt(r) avec use_rslora), alpha_pattern prioritaire sur lora_alpha."""
+    alpha = config.get("lora_alpha", rank)
+    for pattern, value in (config.get("alpha_pattern") or {}).items():
+        if _matches(module, pattern):
+            alpha = value
+            break
+    return alpha / math.sqrt(rank) if config.get("use_rslora") else alpha / rank
+
+
+def load_adapter(adapter_dir):
+    """(config, {nom du poids de base: (A, B, échelle)}) d'un répertoire d'adapters PEFT."""
+    import torch
+
+    adapter_dir = Path(adapter_dir)
+    with open(adapter_dir / "adapter_config.json", encoding="utf-8") as f:
+        config = json.load(f)
+    if (adapter_dir / "adapter_model.safetensors").exists():
+        from safetensors.torch import load_file
+
+        weights = load_file(str(adapter_dir / "adapter_model.safetensors"))
+    else:
+        weights = torch.load(adapter_dir / "adapter_model.bin", map_location="cpu", weights_only=True)
+
+    pairs = {}
+    for key, tensor in weights.items():
+        m = _LORA_KEY.match(key)
+        if m is None:
+            raise ValueError(f"tenseur d'adapter non pris en charge : {key}")
+        pairs.setdefault(m["module"], {})[m["which"]] = tensor
+
+    lora = {}
+    for module, pair in sorted(pairs.items()):
+        if set(pair) != {"A", "B"}:
+            raise ValueError(f"paire LoRA incomplète pour {module}")
+        if not is_target(module, config.get("target_modules")):
+            raise ValueError(f"{module} absent de target_modules {config.get('target_modules')}")
+        a, b = pair["A"], pair["B"]
+        if a.shape[0] != b.shape[1]:
+            raise ValueError(f"rangs incohérents pour {module} : A {tuple(a.shape)}, B {tuple(b.shape)}")
+        lora[module + ".weight"] = (a, b, lora_scale(config, module, a.shape[0]))
+    return config, lora
+
+
+def merge_tensor(weight, a, b, scale, fan_in_fan_out=False):
+    """weight + scale·B·A (transposé si fan_in_fan_out), calculé en float32, au dtype de weight."""
+    import torch
+
+    merged = weight.to(torch.float32, copy=True)
+    a, b = a.to(torch.float32), b.to(torch.float32)
+    if fan_in_fan_out:
+        merged.addmm_(a.T, b.T, alpha=scale)
+    else:
+        merged.addmm_(b, a, alpha=scale)
+    return merged.to(weight.dtype)
+
+
+def _check(headers, lora, fan_in_fan_out):
+    """Chaque paire LoRA doit viser un poids flottant de forme (B.shape[0], A.shape[1])."""
+    found = {name: spec for header, _ in headers.values() for name, spec in header.items() if name != "__metadata__"}
+    for name, (a, b, _) in lora.items():
+        if name not in found:
+            raise ValueError(f"{name} introuvable dans le modèle de base")
+        shape = [a.shape[1], b.shape[0]] if fan_in_fan_out else [b.shape[0], a.shape[1]]
+        if found[name]["shape"] != shape:
+            raise ValueError(f"{name} : forme {found[name]['shape']}, LoRA {shape}")
+        if found[name]["dtype"] not in TORCH_DTYPES:
+            raise ValueError(f"{name} : dtype {found[name]['dtype']} non flottant")
+
+
+def _copy_range(src, dst, start, length, buffer):
+    src.seek(start)
+    view = memoryview(buffer)
+    while length > 0:
+        n = src.readinto(view[:min(length, len(buffer))])
+        if not n:
+            raise EOFError("shard tronqué")
+        dst.write(view[:n])
+        length -= n
+
+
+def merge_shard(src, dst, header, data_start, lora, fan_in_fan_out=False):
+    """Écrit `dst` = shard `src` avec les poids de `lora` fusionnés ; renvoie (tenseurs fusionnés, octets)."""
+    import torch
+
+    metadata = header.get("__metadata__")
+    names = sorted((k for k in header if k != "__metadata__"), key=lambda k: header[k]["data_offsets"][0])
+    out_header, offset = {}, 0
+    for name in names:
+        begin, end = header[name]["data_offsets"]
+        out_header[name] = {"dtype": header[name]["dtype"], "shape": header[name]["shape"],
+                            "data_offsets": [offset, offset + end - begin]}
+        offset += end - begin
+    if metadata is not None:
+        out_header["__metadata__"] = metadata
+
+    merged = 0
+    buffer = bytearray(COPY_CHUNK)
+    tmp = Path(str(dst) + ".tmp")
+    with open(src, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, open(tmp, "wb") as out:
+        out.write(header_bytes(out_header))
+        for name in names:
+            begin, end = (data_start + o for o in header[name]["data_offsets"])
+            if name not in lora:
+                _copy_range(f, out, begin, end - begin, buffer)
+                continue
+            with warnings.catch_warnings():
+                # vue en lecture seule sur le mmap : merge_tensor ne l'écrit jamais
+                warnings.simplefilter("ignore", UserWarning)
+                raw = torch.frombuffer(mm, dtype=torch.uint8, count=end - begin, offset=begin)
+            weight = raw.view(getattr(torch, TORCH_DTYPES[header[name]["dtype"]])).reshape(header[name]["shape"])
+            a, b, scale = lora[name]
+            out.write(merge_tensor(weight, a, b, scale, fan_in_fan_out).contiguous().view(torch.uint8).numpy())
+            del raw, weight
+            if hasattr(mm, "madvise"):
+                # rend les pages lues : la mémoire ne grossit pas d'un tenseur fusionné à l'autre
+                page = begin - begin % mmap.PAGESIZE
+                mm.madvise(mmap.MADV_DONTNEED, page, end - page)
+            merged += 1
+    os.replace(tmp, dst)
+    return merged, offset
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilo-octets sous Linux
+
+
+def merge(base_dir, adapter_dir, out_dir, log=print):
+    """Fusionne `adapter_dir` dans `base_dir` vers `out_dir`, shard par shard ; renvoie un rapport."""
+    base_dir, out_dir = Path(base_dir), Path(out_dir)
+    if out_dir.resolve() == base_dir.resolve():
+        raise ValueError("--out doit différer du modèle de base")
+    start = time.perf_counter()
+    config, lora = load_adapter(adapter_dir)
+    fan_in_fan_out = bool(config.get("fan_in_fan_out"))
+    shards, index = shard_files(base_dir)
+    headers = {shard: read_header(base_dir / shard) for shard in shards}
+    _check(headers, lora, fan_in_fan_out)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    merged = total_size = 0
+    for i, shard in enumerate(shards, 1):
+        header, data_start = headers[shard]
+        n, size = merge_shard(base_dir / shard, out_dir / shard, header, data_start, lora, fan_in_fan_out)
+        merged += n
+        total_size += size
+        log(f"[{i}/{len(shards)}] {shard}: {n} tensors merged")
+
+    if index is not None:
+        index = {"metadata": dict(index.get("metadata") or {}, total_size=total_size),
+                 "weight_map": index["weight_map"]}
+        with open(out_dir / INDEX_NAME, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+            f.write("\n")
+    copied = []
+    for path in sorted(base_dir.iterdir()):
+        if path.is_file() and not path.name.startswith(".") and path.name != INDEX_NAME \
+                and not path.name.endswith(WEIGHT_SUFFIXES) and not path.name.endswith(".index.json"):
+            shutil.copy2(path, out_dir / path.name)
+            copied.append(path.name)
+
+    return {"shards": len(shards), "merged": merged, "lora_pairs": len(lora), "total_size": total_size,
+            "copied": copied, "elapsed_s": round(time.perf_counter() - start, 3), "peak_rss": peak_rss_bytes()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fusion LoRA en flux, shard par shard")
+    parser.add_argument('--base', required=True, help="répertoire du modèle HuggingFace (safetensors)")
+    parser.add_argument('--adapter', required=True, help="répertoire des adapters (adapter_config.json)")
+    parser.add_argument('--out', required=True, help="répertoire du modèle fusionné")
+    args = parser.parse_args(argv)
+    report = merge(args.base, args.adapter, args.out, log=lambda msg: print(msg, file=sys.stderr))
+    print(f"{report['merged']} tensors merged in {report['shards']} shard(s), "
+          f"{report['total_size'] / 2**30:.2f} GiB written, peak RSS {report['peak_rss'] / 2**20:.0f} MiB, "
+          f"{report['elapsed_s']:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+pack_dataset.py - Dataset pré-tokenisé et compacté pour le fine-tuning
+
+Au lieu de formater chaque exemple à la volée et de le compléter jusqu'à
+max_seq_length, on tokenise une seule fois (tokenizer.json du modèle, via la
+bibliothèque `tokenizers`) et on range plusieurs exemples par séquence :
+- chaque exemple = texte Alpaca (format_example) + EOS, jamais coupé entre deux
+  séquences (tronqué seulement s'il dépasse seq_len à lui seul)
+- rangement best-fit décroissant par fenêtres de `--window` exemples, en flux
+- frontières conservées dans segment_ids (1, 2, ... par exemple ; 0 = padding) :
+  position_ids repartent de 0 à chaque exemple et la perte ne traverse pas une
+  frontière. L'attention, elle, ne s'arrête aux frontières que si elle découpe
+  les séquences sur position_ids (flash_attention_2) ; sinon (eager, sdpa) il
+  faut le masque bloc-diagonal : PackedDataset(with_mask=True)
+
+Sortie (un répertoire par split) : input_ids.npy et segment_ids.npy, de forme
+(séquences, seq_len), lisibles en np.load(..., mmap_mode="r"), et meta.json
+(tokens réels, efficacité du rangement, tokens utiles par étape d'optimisation
+avec et sans rangement). PackedDataset lit ce répertoire pour l'entraînement.
+
+Usage:
+python pack_dataset.py --tokenizer ../models/biomistral_clinical_lora_v2 --inputs clinical_cases_train.jsonl --out packed/train
+python pack_dataset.py --tokenizer ../models/biomistral_clinical_lora_v2 --inputs 'cases/train-*.jsonl' --out packed/train --seq-len 2048
+"""
+import argparse
+import glob
+import json
+import sys
+import time
+from bisect import bisect_left, insort
+from pathlib import Path
+
+import numpy as np
+
+HEADER_SIZE = 128  # en-tête .npy de taille fixe, réécrit avec la forme finale
+
+
+def format_example(instruction, response):
+    """Texte Alpaca d'un exemple (même format que formatting_prompts_func)."""
+    return f"""### Instruction:
+{instruction}
+
+### Response:
+{response}"""
+
+
+def load_tokenizer(path):
+    """Tokenizer et (bos, eos, pad) depuis un tokenizer.json ou le répertoire du modèle."""
+    from tokenizers import Tokenizer
+
+    path = Path(path)
+    directory = path if path.is_dir() else path.parent
+    tokenizer = Tokenizer.from_file(str(directory / "tokenizer.json" if path.is_dir() else path))
+    config = {}
+    for name in ("special_tokens_map.json", "tokenizer_config.json"):
+        if (directory / name).exists():
+            with open(directory / name, encoding="utf-8") as f:
+                config.update(json.load(f))
+
+    def token_id(key, default):
+        value = config.get(key, default)
+        if isinstance(value, dict):
+            value = value.get("content")
+        return tokenizer.token_to_id(value) if value is not None else None
+
+    eos = token_id("eos_token", "</s>")
+    pad = token_id("pad_token", None)
+    return tokenizer, token_id("bos_token", "<s>"), eos, pad if pad is not None else eos
+
+
+def iter_examples(patterns):
+    """(instruction, response) des fichiers JSONL, motifs glob acceptés, en flux."""
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) or [pattern]
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        obj = json.loads(line)
+                        yield obj["instruction"], obj["response"]
+
+
+def _window(iterator, size):
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def pack(lengths, seq_len):
+    """Best-fit décroissant : liste de séquences, chacune la liste des indices de ses exemples."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__, reverse=True)
+    rooms = []     # places restantes distinctes des séquences ouvertes, triées
+    by_room = {}   # place restante -> séquences ouvertes
+    bins = []
+    for i in order:
+        n = lengths[i]
+        j = bisect_left(rooms, n)
+        if j == len(rooms):
+            b, room = len(bins), seq_len
+            bins.append([])
+        else:
+            room = rooms[j]
+            b = by_room[room].pop()
+            if not by_room[room]:
+                del rooms[j]
+        bins[b].append(i)
+        left = room - n
+        if left:
+            if not by_room.get(left):
+                insort(rooms, left)
+                by_room[left] = []
+            by_room[left].append(b)
+    return bins
+
+
+class _NpyWriter:
+    """Tableau .npy 2-D écrit ligne à ligne ; la forme est fixée à la fermeture."""
+
+    def __init__(self, path, dtype, width):
+        self.path, self.dtype, self.width = path, np.dtype(dtype), width
+        self.rows = 0
+        self.f = open(path, "wb")
+        self.f.write(_npy_header(self.dtype, (0, width)))
+
+    def write(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        self.f.write(block.tobytes())
+        self.rows += block.shape[0]
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(_npy_header(self.dtype, (self.rows, self.width)))
+        self.f.close()
+
+
+def _npy_header(dtype, shape):
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": tuple(shape)})
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+def build(inputs, tokenizer_path, out_dir, seq_len=2048, window=20_000, batch_size=2, grad_accum=4, log=print):
+    """Tokenise et range les exemples de `inputs` dans `out_dir` ; renvoie meta.json."""
+    tokenizer, bos, eos, pad = load_tokenizer(tokenizer_path)
+    vocab = tokenizer.get_vocab_size()
+    dtype = np.uint16 if vocab <= np.iinfo(np.uint16).max + 1 else np.uint32
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ids_out = _NpyWriter(out_dir / "input_ids.npy", dtype, seq_len)
+    seg_out = _NpyWriter(out_dir / "segment_ids.npy", np.uint16, seq_len)
+    examples = tokens = truncated = 0
+    longest = 0
+    start = time.perf_counter()
+    try:
+        for chunk in _window(iter_examples(inputs), window):
+            encodings = tokenizer.encode_batch([format_example(i, r) for i, r in chunk])
+            seqs = []
+            for enc in encodings:
+                ids = enc.ids + [eos] if eos is not None else enc.ids
+                if len(ids) > seq_len:
+                    ids = ids[:seq_len]
+                    truncated += 1
+                seqs.append(ids)
+            lengths = [len(s) for s in seqs]
+            bins = pack(lengths, seq_len)
+            ids_block = np.full((len(bins), seq_len), pad, dtype=dtype)
+            seg_block = np.zeros((len(bins), seq_len), dtype=np.uint16)
+            for row, members in enumerate(bins):
+                pos = 0
+                for segment, i in enumerate(members, 1):
+                    n = lengths[i]
+                    ids_block[row, pos:pos + n] = seqs[i]
+                    seg_block[row, pos:pos + n] = segment
+                    pos += n
+            ids_out.write(ids_block)
+            seg_out.write(seg_block)
+            examples += len(seqs)
+            tokens += sum(lengths)
+            longest = max(longest, max(lengths))
+            log(f"{examples} examples -> {ids_out.rows} sequences")
+    finally:
+        ids_out.close()
+        seg_out.close()
+
+    sequences = ids_out.rows
+    mean_len = tokens / examples if examples else 0.0
+    # tokens utiles par étape d'optimisation : séquences rangées vs un exemple complété par séquence
+    per_step = batch_size * grad_accum
+    meta = {
+        "tokenizer": str(tokenizer_path), "vocab_size": vocab, "dtype": np.dtype(dtype).name,
+        "seq_len": seq_len, "bos_id": bos, "eos_id": eos, "pad_id": pad, "window": window,
+        "examples": examples, "sequences": sequences, "tokens": tokens, "truncated": truncated,
+        "mean_example_tokens": round(mean_len, 2), "max_example_tokens": longest,
+        "examples_per_sequence": round(examples / sequences, 3) if sequences else 0.0,
+        "packing_efficiency": round(tokens / (sequences * seq_len), 4) if sequences else 0.0,
+        "padded_efficiency": round(mean_len / seq_len, 4),
+        "batch_size": batch_size, "gradient_accumulation_steps": grad_accum,
+        "tokens_per_step": round(per_step * tokens / sequences, 1) if sequences else 0.0,
+        "tokens_per_step_padded": round(per_step * mean_len, 1),
+        "steps_per_epoch": -(-sequences // per_step),
+        "steps_per_epoch_padded": -(-examples // per_step),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def block_causal_mask(segment_ids):
+    """Masque booléen (L, L) : causal et limité à l'exemple de chaque token (padding isolé)."""
+    seg = np.asarray(segment_ids)
+    same = seg[:, None] == seg[None, :]
+    return np.tril(same) & (seg[:, None] > 0) | np.eye(len(seg), dtype=bool)
+
+
+def needs_mask(attn_implementation):
+    """False si l'attention découpe elle-même les séquences rangées sur position_ids."""
+    return attn_implementation != "flash_attention_2"
+
+
+class PackedDataset:
+    """Séquences rangées par build(), lues en mmap : input_ids, position_ids, labels (listes d'entiers par défaut).
+
+    labels vaut -100 sur le padding et sur le premier token de chaque exemple,
+    pour que la prédiction décalée ne relie jamais deux exemples.
+    `with_mask=True` ajoute attention_mask, le masque bloc-diagonal au format
+    4-D additif des modèles transformers (0 = autorisé, minimum du type sinon,
+    (1, L, L) par séquence) : un masque booléen est ignoré en attention eager.
+    `mask_dtype` (torch) doit être celui du modèle, sdpa refusant les types mélangés.
+    """
+
+    def __init__(self, directory, with_mask=False, as_torch=False, mask_dtype=None):
+        directory = Path(directory)
+        with open(directory / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.input_ids = np.load(directory / "input_ids.npy", mmap_mode="r")
+        self.segment_ids = np.load(directory / "segment_ids.npy", mmap_mode="r")
+        self.with_mask, self.as_torch, self.mask_dtype = with_mask, as_torch, mask_dtype
+
+    def __len__(self):
+        return self.input_ids.shape[0]
+
+    def __getitem__(self, index):
+        ids = np.asarray(self.input_ids[index], dtype=np.int64)
+        seg = np.asarray(self.segment_ids[index], dtype=np.int64)
+        starts = np.flatnonzero(np.diff(seg, prepend=-1) != 0)
+        # position dans l'exemple : indice moins le début du segment courant
+        position_ids = np.arange(len(seg)) - np.repeat(starts, np.diff(np.append(starts, len(seg))))
+        labels = ids.copy()
+        labels[seg == 0] = -100
+        labels[starts] = -100
+        item = {"input_ids": ids, "position_ids": position_ids, "labels": labels}
+        allowed = block_causal_mask(seg)[None] if self.with_mask else None
+        if self.as_torch:
+            import torch
+            item = {k: torch.from_numpy(v) for k, v in item.items()}
+            if allowed is not None:
+                dtype = self.mask_dtype or torch.float32
+                mask = torch.zeros(allowed.shape, dtype=dtype)
+                item["attention_mask"] = mask.masked_fill_(~torch.from_numpy(allowed), torch.finfo(dtype).min)
+            return item
+        if allowed is not None:
+            item["attention_mask"] = np.where(allowed, 0, np.finfo(np.float32).min).astype(np.float32)
+        return item
+
+
+def print_report(meta, out=sys.stdout):
+    print(f"{meta['examples']} exemples -> {meta['sequences']} séquences de {meta['seq_len']} tokens "
+          f"({meta['examples_per_sequence']} exemples/séquence, {meta['truncated']} tronqués)", file=out)
+    print(f"tokens réels : {meta['tokens']} (moyenne {meta['mean_example_tokens']}, max {meta['max_example_tokens']})",
+          file=out)
+    print(f"efficacité   : {meta['packing_efficiency']:.1%} rangé, {meta['padded_efficiency']:.1%} complété", file=out)
+    print(f"tokens/étape : {meta['tokens_per_step']:.0f} rangé, {meta['tokens_per_step_padded']:.0f} complété "
+          f"(batch {meta['batch_size']} x accumulation {meta['gradient_accumulation_steps']})", file=out)
+    print(f"étapes/epoch : {meta['steps_per_epoch']} rangé, {meta['steps_per_epoch_padded']} complété", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dataset pré-tokenisé et compacté (.npy en mmap)")
+    parser.add_argument("--tokenizer", required=True, help="tokenizer.json ou répertoire du modèle")
+    parser.add_argument("--inputs", nargs="+", required=True, help="fichiers JSONL instruction/response (glob accepté)")
+    parser.add_argument("--out", required=True, help="répertoire de sortie")
+    parser.add_argument("--seq-len", type=int, default=2048)
+    parser.add_argument("--window", type=int, default=20_000, help="exemples rangés ensemble")
+    parser.add_argument("--batch-size", type=int, default=2, help="pour le rapport tokens/étape")
+    parser.add_argument("--grad-accum", type=int, default=4, help="pour le rapport tokens/étape")
+    args = parser.parse_args(argv)
+    meta = build(args.inputs, args.tokenizer, args.out, seq_len=args.seq_len, window=args.window,
+                 batch_size=args.batch_size, grad_accum=args.grad_accum,
+                 log=lambda msg: print(msg, file=sys.stderr))
+    print_report(meta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+tensor_store.py - Stockage adressé par contenu des modèles (safetensors, GGUF)
+
+Les variantes fusionnées (biomistral_clinical_lora_v2_merged,
+biomistral_clinical_client_lora_v2_merged, ...) sont des checkpoints 7B
+complets qui ne diffèrent que par les tenseurs touchés par LoRA. Le magasin
+découpe chaque fichier en segments et n'en garde qu'une copie :
+- safetensors : l'en-tête, puis un segment par tenseur
+- GGUF : l'en-tête (métadonnées + infos tenseurs), puis un segment par tenseur
+  (padding d'alignement compris)
+- autres fichiers (config.json, tokenizer, ...) : un seul segment
+Chaque segment est un blob blobs/ab/abcdef... nommé par son SHA-256 ; un
+modèle n'est plus qu'un petit manifeste JSON (manifests/<nom>.json) qui
+liste, fichier par fichier, ses segments dans l'ordre.
+
+checkout reconstruit les fichiers à l'identique (octet pour octet). Par défaut
+chaque fichier reconstruit est gardé une fois dans files/ et exposé par lien
+physique, en lecture seule : deux checkouts d'un même fichier ne coûtent rien,
+et la reconstruction passe par copy_file_range (copie côté noyau, voire
+reflink sur btrfs / XFS). --copy écrit des fichiers indépendants à la place.
+
+Usage:
+python tensor_store.py --store ../models/store add clinical ../models/biomistral_clinical_lora_v2_merged
+python tensor_store.py --store ../models/store add client ../models/biomistral_clinical_client_lora_v2_merged
+python tensor_store.py --store ../models/store stats
+python tensor_store.py --store ../models/store checkout client ../models/client_merged [--copy]
+python tensor_store.py --store ../models/store verify | rm client | gc
+"""
+import argparse
+import hashlib
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+TRAINING_DIR = Path(__file__).resolve().parent
+if str(TRAINING_DIR) not in sys.path:
+    sys.path.insert(0, str(TRAINING_DIR))
+if 'NO_LOCAL_GGUF' not in os.environ:
+    sys.path.insert(1, str(TRAINING_DIR.parent / 'gguf-py'))
+
+from merge_biomistral import read_header  # noqa: E402
+
+CHUNK = 8 << 20
+HEADER = "__header__"
+
+
+def cut_points(path):
+    """{position: nom du segment qui y commence} ; la fin du fichier clôt le dernier segment."""
+    path = Path(path)
+    if path.suffix == ".safetensors":
+        header, data_start = read_header(path)
+        cuts = {data_start + spec["data_offsets"][0]: name for name, spec in header.items() if name != "__metadata__"}
+        cuts[0] = HEADER
+        return cuts
+    if path.suffix == ".gguf":
+        import gguf
+
+        reader = gguf.GGUFReader(path, lazy=True)
+        cuts = {t.data_offset: t.name for t in reader.tensors}
+        cuts[0] = HEADER
+        del reader
+        return cuts
+    return {0: path.name}
+
+
+def segments(path):
+    """[(nom, position, taille)] couvrant tout le fichier, dans l'ordre."""
+    size = os.path.getsize(path)
+    cuts = sorted(cut_points(path).items())
+    bounds = [offset for offset, _ in cuts[1:]] + [size]
+    return [(name, offset, end - offset) for (offset, name), end in zip(cuts, bounds) if end > offset]
+
+
+def _hash_range(f, offset, size, buffer):
+    digest = hashlib.sha256()
+    view = memoryview(buffer)
+    f.seek(offset)
+    while size > 0:
+        n = f.readinto(view[:min(size, len(buffer))])
+        if not n:
+            raise EOFError(f"{f.name} tronqué")
+        digest.update(view[:n])
+        size -= n
+    return digest.hexdigest()
+
+
+def _copy_range(src, dst, offset, size):
+    """Copie [offset, offset + size) de src à la fin de dst (copy_file_range si disponible)."""
+    if hasattr(os, "copy_file_range"):
+        src.flush()
+        dst.flush()
+        try:
+            done = 0
+            while done < size:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), size - done, offset + done)
+                if n == 0:
+                    raise EOFError(f"{src.name} tronqué")
+                done += n
+            dst.seek(0, os.SEEK_END)
+            return
+        except OSError:
+            dst.seek(0, os.SEEK_END)
+            dst.truncate(dst.tell() - done)
+    src.seek(offset)
+    while size > 0:
+        data = src.read(min(size, CHUNK))
+        if not data:
+            raise EOFError(f"{src.name} tronqué")
+        dst.write(data)
+        size -= len(data)
+
+
+class TensorStore:
+    """Magasin de blobs SHA-256 + manifestes de modèles, dans un répertoire."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        for sub in ("blobs", "manifests", "files", "tmp"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, digest):
+        return self.root / "blobs" / digest[:2] / digest
+
+    def manifest_path(self, name):
+        return self.root / "manifests" / f"{name}.json"
+
+    def models(self):
+        return sorted(p.stem for p in (self.root / "manifests").glob("*.json"))
+
+    def manifest(self, name):
+        with open(self.manifest_path(name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _add_file(self, path):
+        """Segments d'un fichier, blobs absents copiés dans le magasin ; renvoie (entrée, octets ajoutés)."""
+        buffer = bytearray(CHUNK)
+        entry, added = [], 0
+        with open(path, "rb") as f:
+            for name, offset, size in segments(path):
+                digest = _hash_range(f, offset, size, buffer)
+                blob = self.blob_path(digest)
+                if not blob.exists():
+                    blob.parent.mkdir(exist_ok=True)
+                    tmp = self.root / "tmp" / f"{digest}.{os.getpid()}.{threading.get_ident()}"
+                    with open(tmp, "wb") as out:
+                        _copy_range(f, out, offset, size)
+                    os.replace(tmp, blob)
+                    added += size
+                entry.append([name, digest, size])
+        return {"path": path.name, "size": os.path.getsize(path), "segments": entry}, added
+
+    def add(self, name, model_dir, workers=4, log=print):
+        """Range les fichiers de `model_dir` sous le nom `name` ; renvoie un rapport."""
+        start = time.perf_counter()
+        model_dir = Path(model_dir)
+        paths = sorted(p for p in model_dir.iterdir() if p.is_file() and not p.name.startswith("."))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(self._add_file, paths))
+        files = [entry for entry, _ in results]
+        added = sum(n for _, n in results)
+        manifest = {"name": name, "source": str(model_dir), "created": datetime.now().isoformat(timespec="seconds"),
+                    "size": sum(f["size"] for f in files), "files": files}
+        tmp = self.manifest_path(name).with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+            f.write("\n")
+        os.replace(tmp, self.manifest_path(name))
+        log(f"{name}: {len(files)} files, {manifest['size'] / 2**30:.2f} GiB, {added / 2**30:.2f} GiB new")
+        return {"files": len(files), "size": manifest["size"], "added": added,
+                "elapsed_s": round(time.perf_counter() - start, 3)}
+
+    @staticmethod
+    def file_id(entry):
+        """Identifiant d'un fichier reconstruit : empreinte de sa liste de segments."""
+        return hashlib.sha256("\n".join(d for _, d, _ in entry["segments"]).encode("ascii")).hexdigest()
+
+    def build(self, entry, dest):
+        """Écrit le fichier décrit par `entry` dans `dest` (via un fichier temporaire)."""
+        tmp = Path(f"{dest}.tmp")
+        with open(tmp, "wb") as out:
+            for _, digest, size in entry["segments"]:
+                with open(self.blob_path(digest), "rb") as blob:
+                    _copy_range(blob, out, 0, size)
+        if os.path.getsize(tmp) != entry["size"]:
+            os.remove(tmp)
+            raise ValueError(f"{entry['path']} : taille reconstruite incorrecte")
+        os.replace(tmp, dest)
+
+    def checkout(self, name, out_dir, link=True, log=print):
+        """Reconstruit le modèle `name` dans `out_dir` ; liens physiques vers files/ si `link`."""
+        start = time.perf_counter()
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        built = 0
+        for entry in self.manifest(name)["files"]:
+            dest = out_dir / entry["path"]
+            if not link:
+                self.build(entry, dest)
+                built += 1
+                continue
+            cached = self.root / "files" / self.file_id(entry)
+            if not cached.exists():
+                self.build(entry, cached)
+                # partagé par tous les liens : lecture seule pour qu'une écriture en place ne le corrompe pas
+                os.chmod(cached, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                built += 1
+            if dest.exists() or dest.is_symlink():
+                dest.unlink()
+            try:
+                os.link(cached, dest)
+            except OSError:  # autre système de fichiers
+                self.build(entry, dest)
+        log(f"{name} -> {out_dir} ({built} files built)")
+        return {"built": built, "elapsed_s": round(time.perf_counter() - start, 3)}
+
+    def stats(self):
+        """Tailles logiques par modèle, octets partagés et place réellement occupée par les blobs."""
+        refs, models = {}, {}
+        for name in self.models():
+            manifest = self.manifest(name)
+            digests = {d: s for f in manifest["files"] for _, d, s in f["segments"]}
+            models[name] = {"size": manifest["size"], "files": len(manifest["files"]), "digests": digests}
+            for d in digests:
+                refs[d] = refs.get(d, 0) + 1
+        blob_sizes = {p.name: p.stat().st_size for p in (self.root / "blobs").glob("*/*")}
+        for info in models.values():
+            digests = info.pop("digests")
+            info["unique"] = sum(s for d, s in digests.items() if refs[d] == 1)
+            info["shared"] = sum(s for d, s in digests.items() if refs[d] > 1)
+        logical = sum(m["size"] for m in models.values())
+        stored = sum(blob_sizes.values())
+        cache = sum(p.stat().st_size for p in (self.root / "files").iterdir() if p.stat().st_nlink == 1)
+        return {"models": models, "logical": logical, "blobs": len(blob_sizes), "stored": stored,
+                "saved": logical - stored, "unlinked_cache": cache}
+
+    def verify(self, log=print):
+        """Relit chaque blob référencé et contrôle son SHA-256 ; renvoie les blobs absents ou corrompus."""
+        buffer = bytearray(CHUNK)
+        bad = []
+        digests = {d: s for name in self.models() for f in self.manifest(name)["files"] for _, d, s in f["segments"]}
+        for digest, size in sorted(digests.items()):
+            path = self.blob_path(digest)
+            if not path.exists() or path.stat().st_size != size:
+                bad.append(digest)
+                continue
+            with open(path, "rb") as f:
+                if _hash_range(f, 0, size, buffer) != digest:
+                    bad.append(digest)
+        log(f"{len(digests) - len(bad)}/{len(digests)} blobs ok")
+        return bad
+
+    def remove(self, name):
+        self.manifest_path(name).unlink()
+
+    def gc(self, log=print):
+        """Supprime les blobs non référencés et les fichiers de files/ sans lien extérieur ni manifeste."""
+        live = set()
+        live_files = set()
+        for name in self.models():
+            for entry in self.manifest(name)["files"]:
+                live.update(d for _, d, _ in entry["segments"])
+                live_files.add(self.file_id(entry))
+        freed = removed = 0
+        for path in list((self.root / "blobs").glob("*/*")) + list((self.root / "tmp").iterdir()):
+            if path.name not in live:
+                freed += path.stat().st_size
+                removed += 1
+                path.unlink()
+        for path in (self.root / "files").iterdir():
+            if path.name not in live_files or path.stat().st_nlink == 1:
+                freed += path.stat().st_size
+                removed += 1
+                path.unlink()
+        log(f"{removed} files removed, {freed / 2**20:.1f} MiB freed")
+        return {"removed": removed, "freed": freed}
+
+
+def print_stats(stats, out=None):
+    out = out or sys.stdout
+
+    def gib(n):
+        return f"{n / 2**30:.2f}"
+
+    width = max([len(n) for n in stats["models"]] + [5])
+    print(f"{'model':<{width}} {'GiB':>8} {'shared':>8} {'unique':>8}", file=out)
+    for name, info in stats["models"].items():
+        print(f"{name:<{width}} {gib(info['size']):>8} {gib(info['shared']):>8} {gib(info['unique']):>8}", file=out)
+    ratio = stats["stored"] / stats["logical"] if stats["logical"] else 1.0
+    print(f"\n{gib(stats['logical'])} GiB of models in {stats['blobs']} blobs = {gib(stats['stored'])} GiB on disk "
+          f"({ratio:.0%}), {gib(stats['saved'])} GiB saved", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stockage des modèles par tenseur, adressé par contenu")
+    parser.add_argument('--store', required=True, help="répertoire du magasin")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("add", help="ranger un répertoire de modèle")
+    p.add_argument("name")
+    p.add_argument("model_dir")
+    p.add_argument("--workers", type=int, default=4, help="fichiers hachés en parallèle")
+    p = sub.add_parser("checkout", help="reconstruire un modèle")
+    p.add_argument("name")
+    p.add_argument("out_dir")
+    p.add_argument("--copy", action="store_true", help="fichiers indépendants plutôt que liens physiques")
+    p = sub.add_parser("rm", help="retirer un manifeste (les blobs partent au gc)")
+    p.add_argument("name")
+    for name in ("ls", "stats", "verify", "gc"):
+        sub.add_parser(name)
+    args = parser.parse_args(argv)
+
+    store = TensorStore(args.store)
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    if args.command == "add":
+        store.add(args.name, args.model_dir, workers=args.workers, log=log)
+    elif args.command == "checkout":
+        store.checkout(args.name, args.out_dir, link=not args.copy, log=log)
+    elif args.command == "rm":
+        store.remove(args.name)
+    elif args.command == "ls":
+        for name in store.models():
+            print(name)
+    elif args.command == "stats":
+        print_stats(store.stats())
+    elif args.command == "verify":
+        return 1 if store.verify(log=log) else 0
+    elif args.command == "gc":
+        store.gc(log=log)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Arbre décisionnel des céphalées (sans LLM)
+
+Les fonctions de source/main.py sont accessibles directement depuis le paquet :
+
+    import v_arbre_d
+    f = v_arbre_d.analyse_texte_medical("patiente 34 ans, céphalées brutales")
+    v_arbre_d.decision_imagerie(f)
+
+Le module n'est importé qu'au premier accès à l'un de ces attributs (PEP 562),
+puis chaque attribut est mis en cache dans le paquet.
+"""
+
+import importlib
+
+_MODULE = ".source.main"
+
+__all__ = [
+    "QUESTIONS",
+    "SIGNES",
+    "analyse_texte_medical",
+    "decision_imagerie",
+    "get_contraindications_text",
+    "afficher_contraindications",
+    "generer_ordonnance",
+    "save_report",
+    "save_ordonnance",
+    "chatbot_cephalees",
+]
+
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_MODULE, __name__), name)
+    # les accès suivants ne repassent plus par __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
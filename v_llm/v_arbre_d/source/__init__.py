@@ -0,0 +1 @@
+"""Implémentation de l'arbre décisionnel (voir v_arbre_d/__init__.py)"""
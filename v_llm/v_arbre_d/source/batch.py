@@ -0,0 +1,175 @@
+"""
+Traitement par lots de l'arbre décisionnel (céphalées)
+
+Usage :
+    python source/batch.py demandes.jsonl -o resultats.jsonl
+    python source/batch.py demandes.csv --champ texte --id numero --workers 8
+    cat demandes.jsonl | python source/batch.py - > resultats.jsonl
+
+Entrée : JSONL (un objet par ligne, ou une simple chaîne) ou CSV avec en-tête.
+Sortie : JSONL, une ligne par demande et dans l'ordre d'entrée :
+    {"id": ..., "features": {...}, "recommandation": "...", "contre_indications": "..."}
+
+Les demandes sont lues au fil de l'eau et envoyées aux processus par paquets ;
+le nombre de paquets en cours est borné, donc la mémoire ne dépend pas de la
+taille du fichier.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    from .main import analyse_texte_medical, decision_imagerie, get_contraindications_text
+except ImportError:  # lancé comme script : python source/batch.py
+    from main import analyse_texte_medical, decision_imagerie, get_contraindications_text
+
+# noms de colonnes essayés quand --champ n'est pas précisé
+CHAMPS_TEXTE = ("texte", "text", "demande", "instruction")
+
+
+def analyser_texte(texte):
+    """Extraction + décision + contre-indications pour une demande"""
+    f = analyse_texte_medical(texte)
+    return {
+        "features": f,
+        "recommandation": decision_imagerie(f),
+        "contre_indications": get_contraindications_text(f),
+    }
+
+
+def _texte_de(enregistrement, champ):
+    if isinstance(enregistrement, str):
+        return enregistrement
+    if champ:
+        return enregistrement[champ]
+    for nom in CHAMPS_TEXTE:
+        if nom in enregistrement:
+            return enregistrement[nom]
+    raise KeyError(f"aucun champ texte parmi {', '.join(CHAMPS_TEXTE)}")
+
+
+def lire_enregistrements(flux, format="jsonl", champ=None, champ_id="id"):
+    """Génère (id, texte, erreur) pour chaque demande du flux texte `flux`.
+
+    L'id est la valeur du champ `champ_id` si présent, sinon le numéro de ligne
+    (de donnée, à partir de 1). Une ligne illisible donne (id, None, message)
+    au lieu d'interrompre le traitement.
+    """
+    if format == "csv":
+        lignes = enumerate(csv.DictReader(flux), start=1)
+    else:
+        lignes = ((numero, ligne) for numero, ligne in enumerate(flux, start=1) if ligne.strip())
+
+    for numero, ligne in lignes:
+        try:
+            enregistrement = json.loads(ligne) if format != "csv" else ligne
+            identifiant = numero
+            if isinstance(enregistrement, dict) and enregistrement.get(champ_id) not in (None, ""):
+                identifiant = enregistrement[champ_id]
+            yield identifiant, _texte_de(enregistrement, champ), None
+        except (ValueError, KeyError, TypeError) as e:
+            yield numero, None, f"ligne {numero} : {e}"
+
+
+def _traiter_paquet(paquet):
+    """Exécuté dans un processus de travail : une liste de demandes -> une liste de résultats"""
+    resultats = []
+    for identifiant, texte, erreur in paquet:
+        if erreur is None:
+            try:
+                resultats.append({"id": identifiant, **analyser_texte(texte)})
+                continue
+            except Exception as e:
+                erreur = f"{type(e).__name__} : {e}"
+        resultats.append({"id": identifiant, "erreur": erreur})
+    return resultats
+
+
+def _paquets(enregistrements, taille):
+    iterateur = iter(enregistrements)
+    while True:
+        paquet = list(islice(iterateur, taille))
+        if not paquet:
+            return
+        yield paquet
+
+
+def analyser_flux(enregistrements, workers=None, taille_paquet=256, paquets_en_vol=None):
+    """Applique l'arbre décisionnel à un itérable de (id, texte, erreur) et génère les résultats dans l'ordre.
+
+    `workers` <= 1 : traitement dans le processus courant. Sinon, un pool de
+    processus reçoit des paquets de `taille_paquet` demandes ; au plus
+    `paquets_en_vol` paquets (par défaut 2 par processus) sont soumis sans que
+    leur résultat ait été consommé.
+    """
+    if taille_paquet < 1:
+        raise ValueError(f"taille_paquet doit être >= 1 (reçu {taille_paquet})")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for paquet in _paquets(enregistrements, taille_paquet):
+            yield from _traiter_paquet(paquet)
+        return
+
+    paquets_en_vol = paquets_en_vol or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_cours = deque()
+        for paquet in _paquets(enregistrements, taille_paquet):
+            en_cours.append(pool.submit(_traiter_paquet, paquet))
+            if len(en_cours) >= paquets_en_vol:
+                yield from en_cours.popleft().result()
+        while en_cours:
+            yield from en_cours.popleft().result()
+
+
+def _ouvrir_entree(chemin):
+    if chemin == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    return open(chemin, "r", encoding="utf-8", newline="")
+
+
+def _entier_positif(valeur):
+    n = int(valeur)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"entier >= 1 attendu (reçu {valeur})")
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entree", help="fichier JSONL ou CSV ('-' pour l'entrée standard)")
+    parser.add_argument("-o", "--sortie", default="-", help="fichier JSONL de sortie (défaut : sortie standard)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="format d'entrée (défaut : d'après l'extension, sinon jsonl)")
+    parser.add_argument("--champ", default=None, help=f"champ du texte (défaut : {', '.join(CHAMPS_TEXTE)})")
+    parser.add_argument("--id", dest="champ_id", default="id", help="champ identifiant (défaut : id)")
+    parser.add_argument("--workers", type=int, default=None, help="processus de travail (défaut : nombre de CPU)")
+    parser.add_argument("--taille-paquet", type=_entier_positif, default=256, help="demandes par paquet (>= 1)")
+    args = parser.parse_args(argv)
+
+    format = args.format or ("csv" if args.entree.lower().endswith(".csv") else "jsonl")
+    n = erreurs = 0
+    with _ouvrir_entree(args.entree) as entree:
+        sortie = sys.stdout if args.sortie == "-" else open(args.sortie, "w", encoding="utf-8")
+        try:
+            enregistrements = lire_enregistrements(entree, format=format, champ=args.champ, champ_id=args.champ_id)
+            for resultat in analyser_flux(enregistrements, workers=args.workers, taille_paquet=args.taille_paquet):
+                sortie.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+                n += 1
+                erreurs += "erreur" in resultat
+        finally:
+            if sortie is not sys.stdout:
+                sortie.close()
+    print(f"{n} demandes traitées ({erreurs} en erreur)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
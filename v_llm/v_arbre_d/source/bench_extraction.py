@@ -0,0 +1,98 @@
+"""
+Débit de l'extraction d'informations (analyse_texte_medical) sur un corpus synthétique
+
+Usage :
+    python source/bench_extraction.py                 # 100 000 textes
+    python source/bench_extraction.py --n 500000 --seed 1
+
+Compare l'extracteur compilé (un seul parcours du texte) à l'implémentation de
+référence (une recherche regex par information), conservée à l'identique avec
+le test de parité dans tests/arbre_reference.py.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# tests/ de v_llm : oracle de référence partagé avec le test de parité
+TESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "tests")
+
+
+# Fragments combinés aléatoirement pour produire des demandes d'examen réalistes
+_SUJETS = ["Patiente", "Patient", "patiente", "Mme", "M.", "Enfant", "Homme", "Femme", ""]
+_AGES = ["{n} ans", "{n}ans", "{n} an", "âgée de {n} ans", "{n} ans et demi", ""]
+_GROSSESSES = [
+    "enceinte de {w} semaines", "enceinte de {w} SA", "grossesse de {w} sem", "grossesse {w}sa",
+    "enceinte de {m} mois", "grossesse à {m} mois", "enceinte", "grossesse en cours", "gestation",
+    "enceinte,\n{w} semaines", "{w} semaines de grossesse", "",
+]
+_SIGNES = [
+    "céphalées", "céphalée brutale", "coup de tonnerre", "installation brutale", "fièvre", "fébrile",
+    "fièvreuse", "déficit moteur", "trouble moteur", "paralysie faciale", "parésie", "hémiplégie droite",
+    "cancer du sein", "antécédent oncologique", "tumeur", "métastases", "chirurgie récente", "opération",
+    "opéré il y a 3 semaines", "prothèse de hanche", "matériel d'ostéosynthèse", "postopératoire",
+    "pace-maker", "pacemaker", "stimulateur cardiaque", "claustrophobe", "vertiges", "vision floue",
+    "troubles visuels", "acouphènes", "bourdonnements", "douleur temporale", "mâchoire", "nausées",
+    "vomissements", "photophobie", "depuis 2 jours", "depuis 3 mois", "traitement 12 sem", "sans fièvre",
+]
+_SEPARATEURS = [", ", ". ", " et ", "\n", " ; ", " "]
+
+
+def generer_texte(rng):
+    morceaux = [
+        rng.choice(_SUJETS),
+        rng.choice(_AGES).format(n=rng.randint(0, 130)),
+        rng.choice(_GROSSESSES).format(w=rng.randint(0, 60), m=rng.randint(0, 14)),
+    ]
+    morceaux += rng.sample(_SIGNES, rng.randint(0, 6))
+    rng.shuffle(morceaux)
+    texte = ""
+    for morceau in morceaux:
+        if morceau:
+            texte += morceau + rng.choice(_SEPARATEURS)
+    return texte.strip()
+
+
+def generer_corpus(n, seed=0):
+    """Liste de `n` textes synthétiques (déterministe pour une graine donnée)"""
+    rng = random.Random(seed)
+    return [generer_texte(rng) for _ in range(n)]
+
+
+def _mesurer(fonction, corpus):
+    start = time.perf_counter()
+    for texte in corpus:
+        fonction(texte)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000, help="nombre de textes du corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        from .main import analyse_texte_medical
+    except ImportError:  # lancé comme script
+        from main import analyse_texte_medical
+    if TESTS_DIR not in sys.path:
+        sys.path.insert(0, TESTS_DIR)
+    from arbre_reference import analyse_reference
+
+    corpus = generer_corpus(args.n, args.seed)
+    taille_mo = sum(len(t.encode("utf-8")) for t in corpus) / 1e6
+    print(f"Corpus : {args.n} textes, {taille_mo:.1f} Mo")
+
+    resultats = {}
+    for nom, fonction in (("référence", analyse_reference), ("compilé", analyse_texte_medical)):
+        duree = _mesurer(fonction, corpus)
+        resultats[nom] = duree
+        print(f"{nom:<10} {duree:7.2f}s  {args.n / duree:>10,.0f} textes/s  {taille_mo / duree:6.2f} Mo/s")
+    print(f"Accélération : x{resultats['référence'] / resultats['compilé']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
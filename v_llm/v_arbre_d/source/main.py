@@ -1,7 +1,15 @@
+import json
+import os
 import re
 import unicodedata
-import readchar
 from datetime import datetime
+from itertools import compress
+from operator import itemgetter
+
+try:
+    from .negation import motif_declencheurs, portees_negation
+except ImportError:  # lancé comme script
+    from negation import motif_declencheurs, portees_negation
 
 # seuils de grossesses en semaine
 GROSSESSE_EARLY_THRESHOLD = 4  
@@ -14,83 +22,161 @@ GROSSESSE_EXAMPLE_LT4 = 3
 GROSSESSE_EXAMPLE_4_12 = 8
 GROSSESSE_EXAMPLE_GT12 = 16
 
+# mots-clés par signe clinique (mots entiers ou racines « xxx* », accents facultatifs) : data/keywords.json
+KEYWORDS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "keywords.json")
+
+# mots après lesquels une durée (semaines ou mois) est lue comme celle de la grossesse
+ANCRES_GROSSESSE = ("enceinte", "grossesse")
+
+
+def _normaliser(texte):
+    """Texte en ASCII minuscule, sans accents"""
+    texte = unicodedata.normalize("NFKD", texte)
+    return texte.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def _motif_racine(racine):
+    """Mot-clé de keywords.json -> motif : espaces et '-' acceptent aussi '_' ou rien (pace-maker)"""
+    return r"[- _]?".join(re.escape(mot) for mot in re.split(r"[\s-]+", racine))
+
+
+def _motif_mot_cle(mot):
+    """'racine*' : tout mot qui commence par la racine ; sinon le mot entier, au pluriel / féminin près"""
+    if mot.endswith("*"):
+        return _motif_racine(mot[:-1]) + "[a-z]*"
+    # (?![a-z]) et non \b : un chiffre collé au mot reste lisible comme durée ('enceinte12sa')
+    return _motif_racine(mot) + "e?s?(?![a-z])"
+
+
+def compiler_extracteur(chemin=KEYWORDS_FILE):
+    """Compile une seule expression régulière couvrant toutes les informations recherchées.
+
+    Chaque alternative porte un groupe nommé : âge, durée en semaines ou en mois,
+    sexe, saut de ligne, déclencheur de négation (negation.py), puis un groupe par
+    signe clinique de keywords.json. Un mot-clé terminé par '*' est une racine,
+    reconnue en début de mot ('fiev*' couvre 'fievre', 'fievreux') ; les autres
+    sont des mots entiers, au pluriel / féminin près ('opere' couvre 'operee',
+    mais 'operation' ne couvre pas 'operationnel').
+    Un seul parcours `finditer` suffit donc à remplir tout le dictionnaire.
+    Retourne (regex, noms_des_signes) ; les groupes des signes sont nommés s0, s1, ...
+    """
+    with open(chemin, "r", encoding="utf-8") as fh:
+        keywords = json.load(fh)
+
+    signes = []
+    alternatives_signes = [r"(?P<sexe>patiente?)\b", rf"(?P<neg>{motif_declencheurs(accents=False)})"]
+    for signe, mots in keywords.items():
+        mots_cles = sorted({_normaliser(m).strip() for m in mots if m.strip("* ")}, key=len, reverse=True)
+        if not mots_cles:
+            continue
+        # [a-z]* et non \w* : un chiffre collé au mot reste lisible comme durée ('enceinte12sa')
+        alternatives_signes.append(rf"(?P<s{len(signes)}>{'|'.join(map(_motif_mot_cle, mots_cles))})")
+        signes.append(signe)
+
+    # Les lookaheads écartent d'emblée les positions qui ne peuvent rien commencer
+    # (milieu de mot, ponctuation) : c'est là que se joue le débit
+    nombres = (
+        r"(?=[\n\d])(?:(?P<nl>\n)"
+        r"|(?P<semaines>\d{1,2})\s*(?:sem(?:aines?)?|sa|semaine)\b"
+        r"|(?P<mois>\d{1,2})\s*mois\b"
+        r"|\b(?P<age>\d{1,3})\s*ans?\b)"
+    )
+    mots = r"\b(?=[a-z])(?:" + "|".join(alternatives_signes) + ")"
+    return re.compile(nombres + "|" + mots), tuple(signes)
+
+
+_EXTRACTEUR, SIGNES = compiler_extracteur()
+
+
 def analyse_texte_medical(texte):
     """Analyse le texte libre du médecin pour extraire les informations détectées.
 
-    Améliorations :
-    - normalisation ASCII (suppression des accents) pour faire des recherches plus robustes,
-    - utilisation de motifs avec bornes de mots et groupes nommés,
-    - contrôles de plausibilité sur les valeurs numériques extraites.
+    Un seul parcours du texte normalisé (ASCII minuscule) par l'extracteur compilé
+    à l'import : l'âge est le premier « N ans », le sexe vient de « patiente » /
+    « patient », et la durée de grossesse est la première durée (semaines, à défaut
+    mois x 4) qui suit « enceinte » ou « grossesse » sur la même ligne.
+    Un signe cité dans une portée de négation (« pas de fièvre », « sans
+    déficit », voir negation.py) n'est pas retenu ; les portées ne sont calculées
+    que si l'extracteur a rencontré un déclencheur.
+    Contrôles de plausibilité : âge 0-120 ans, grossesse 0-45 semaines.
     """
-    # Normaliser le texte pour les recherches : enlever les accents et travailler en ascii minuscule
-    t_norm = unicodedata.normalize("NFKD", texte)
-    t_norm = t_norm.encode("ascii", "ignore").decode("ascii").lower()
-
-    # Précompiler patterns
-    age_re = re.compile(r"\b(?P<age>\d{1,3})\s*ans?\b")
-    preg_detect_re = re.compile(r"\b(?:enceinte|grossesse|gestation)\b")
-    sem_re = re.compile(r"\b(?:enceinte|grossesse).*?(?P<weeks>\d{1,2})\s*(?:sem(?:aines?)?|sa|semaine)\b")
-    mois_re = re.compile(r"\b(?:enceinte|grossesse).*?(?P<months>\d{1,2})\s*mois\b")
-
-    # Age
-    age_match = age_re.search(t_norm)
-    age = int(age_match.group('age')) if age_match else None
+    t_norm = _normaliser(texte)
+
+    age = None
+    age_vu = False
+    sexes = set()
+    semaines = None
+    mois = None
+    ancre = False  # 'enceinte' / 'grossesse' déjà rencontré sur la ligne courante
+    mentions = []  # (position, signe)
+    negation = False
+
+    for m in _EXTRACTEUR.finditer(t_norm):
+        groupe = m.lastgroup
+        if groupe == "nl":
+            ancre = False
+            continue
+        if groupe == "age":
+            if not age_vu:
+                age_vu = True
+                age = int(m.group("age"))
+        elif groupe == "semaines":
+            if ancre and semaines is None:
+                semaines = int(m.group("semaines"))
+        elif groupe == "mois":
+            if ancre and mois is None:
+                mois = int(m.group("mois"))
+        elif groupe == "sexe":
+            sexes.add(m.group("sexe"))
+        elif groupe == "neg":
+            negation = True
+        else:
+            signe = SIGNES[int(groupe[1:])]
+            mentions.append((m.start(), signe))
+            if signe == "grossesse" and m.group().startswith(ANCRES_GROSSESSE):
+                ancre = True
+        if "\n" in m.group():
+            # une durée peut s'écrire sur deux lignes ('12\nsemaines') : la ligne change après elle
+            ancre = False
+
+    if negation:
+        portees = portees_negation(t_norm)
+        detectes = {signe for position, signe in mentions if not portees.est_nie(position)}
+    else:
+        detectes = {signe for _, signe in mentions}
+
     if age is not None and not (0 <= age <= 120):
         age = None
 
-    # detection du sexe
-    if re.search(r"\bpatiente\b", t_norm):
+    if "patiente" in sexes:
         sexe = "f"
-    elif re.search(r"\bpatient\b", t_norm):
+    elif "patient" in sexes:
         sexe = "m"
     else:
         sexe = None
 
-    # Détection grossesse et extraction durée
-    grossesse_detectee = bool(preg_detect_re.search(t_norm))
-    sem_match = sem_re.search(t_norm)
-    mois_match = mois_re.search(t_norm)
-    semaines = None
-    if sem_match:
-        try:
-            semaines = int(sem_match.group('weeks'))
-        except (ValueError, TypeError):
-            semaines = None
-    elif mois_match:
-        try:
-            mois = int(mois_match.group('months'))
-            semaines = mois * 4
-        except (ValueError, TypeError):
-            semaines = None
-    if semaines is not None and not (0 <= semaines <= 45):
+    if "grossesse" not in detectes:
+        # grossesse niée (« pas enceinte ») : la durée lue après n'est pas retenue
+        semaines = mois = None
+    if semaines is None and mois is not None:
+        semaines = mois * 4
+    if semaines is not None and not (0 <= semaines <= GROSSESSE_MAX_WEEKS):
         semaines = None
 
-    # Détections binaires (patterns ascii simplifiés)
-    return {
+    resultat = {
         "age": age,
         "sexe": sexe,
-        "grossesse": grossesse_detectee,
+        "grossesse": "grossesse" in detectes,
         "grossesse_sem": semaines,
-    # fièvre / fébrile / febrile
-    "fievre": bool(re.search(r"\b(?:fievre|febrile|febr|fiev)\b", t_norm)),
-    # détecte 'brutal', 'brutale', 'brutales' et l'expression 'coup de tonnerre'
-    "brutale": bool(re.search(r"\b(?:brutal\w*|coup de tonnerre)\b", t_norm)),
-    # déficit moteur / paralysie / paresie / hémiplégie / troubles sensitifs
-    "deficit": bool(re.search(r"\b(?:deficit|deficitaire|paralys(?:ie|is)?|paresi(?:e)?|hemipleg(?:ie)?|trouble moteur|trouble sensitif)\b", t_norm)),
-    # oncologie / cancer / tumeur / métastase
-    "oncologique": bool(re.search(r"\b(?:cancer|oncolog|tumeur|metast)\b", t_norm)),
-    # chirurgie, opératoire, matériel, prothèse, ostéosynthèse, postop
-    "chirurgie": bool(re.search(r"\b(?:chirurg|oper(?:at(?:ion|oire))?|materiel|prothese|osteosynth|postop|postoperatoire)\b", t_norm)),
-    # pacemaker / pace-maker / stimulateur
-    "pacemaker": bool(re.search(r"\b(?:pace[- _]?maker|pacemaker|stimulateur)\b", t_norm)),
-    # claustrophobie*
-    "claustrophobie": bool(re.search(r"\bclaustro\w*\b", t_norm)),
-    # vertige / vertiges
-    "vertige": bool(re.search(r"\bvertig\w*\b", t_norm))
     }
-
-def decision_imagerie(f):
-    """Recommandation clinique rédigée."""
+    # fievre, brutale, deficit, ... dans l'ordre de keywords.json
+    for signe in SIGNES:
+        if signe != "grossesse":
+            resultat[signe] = signe in detectes
+    return resultat
+
+def _rediger_decision_imagerie(f):
+    """Recommandation clinique rédigée (arbre de décision, source de la table précalculée)."""
     texte = ""
 
     # Sujet neutre pour les recommandations
@@ -182,6 +268,58 @@ def decision_imagerie(f):
     )
     return texte
 
+# Signes lus par l'arbre de décision, dans l'ordre des bits de l'index
+SIGNES_DECISION = ("fievre", "brutale", "deficit", "vertige", "oncologique", "grossesse", "chirurgie", "pacemaker")
+
+# Une durée représentative par tranche de grossesse_sem : absente, < 4, 4-11, >= 12 semaines
+_SEMAINES_PAR_TRANCHE = (None, GROSSESSE_EXAMPLE_LT4, GROSSESSE_EXAMPLE_4_12, GROSSESSE_EXAMPLE_GT12)
+
+
+def _tranche_grossesse(semaines):
+    if not semaines:
+        return 0
+    if semaines < GROSSESSE_EARLY_THRESHOLD:
+        return 1
+    if semaines < GROSSESSE_FIRST_TRIMESTER:
+        return 2
+    return 3
+
+
+_LIRE_SIGNES = itemgetter(*SIGNES_DECISION)
+# poids de chaque signe dans l'index : bit du signe x nombre de tranches
+_POIDS_SIGNES = tuple(len(_SEMAINES_PAR_TRANCHE) << bit for bit in range(len(SIGNES_DECISION)))
+
+
+def _index_decision(f):
+    # compress retient les poids des signes présents (valeurs vraies), sans boucle Python
+    return sum(compress(_POIDS_SIGNES, _LIRE_SIGNES(f))) + _tranche_grossesse(f.get("grossesse_sem"))
+
+
+def compiler_table_decision():
+    """Énumère une fois toutes les combinaisons (2^8 signes x 4 tranches de grossesse).
+
+    Retourne le tuple des recommandations indexé par `_index_decision` ; les
+    textes identiques sont partagés.
+    """
+    textes = {}
+    table = []
+    for masque in range(1 << len(SIGNES_DECISION)):
+        for semaines in _SEMAINES_PAR_TRANCHE:
+            f = {signe: bool(masque >> bit & 1) for bit, signe in enumerate(SIGNES_DECISION)}
+            f["grossesse_sem"] = semaines
+            texte = _rediger_decision_imagerie(f)
+            table.append(textes.setdefault(texte, texte))
+    return tuple(table)
+
+
+_TABLE_DECISION = compiler_table_decision()
+
+
+def decision_imagerie(f):
+    """Recommandation clinique rédigée (lecture dans la table précalculée)."""
+    return _TABLE_DECISION[_index_decision(f)]
+
+
 def afficher_contraindications(f):
     """Affiche les rappels en style fluide."""
     print(get_contraindications_text(f))
@@ -456,59 +594,62 @@ def generer_ordonnance(f, texte_initial, decision, contraindications_text):
     return "\n".join(ordonnance)
 
 
-def save_report(report_text, filename=None):
-    """Enregistre le texte `report_text` dans un fichier .txt (UTF-8).
-    Si `filename` est None ou vide, génère un nom basé sur la date/heure.
-    Retourne le chemin du fichier créé.
-    """
-    import os
-    # Obtenir le répertoire du script (source/) puis remonter au parent (v_arbre_d/)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)  # v_arbre_d/
-    reports_dir = os.path.join(project_root, "reports")
-    os.makedirs(reports_dir, exist_ok=True)
-
-    if not filename:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"rapport_cephalees_{ts}.txt"
-
-    # Si l'utilisateur a fourni un nom simple, l'enregistrer dans reports/
-    if not os.path.isabs(filename):
-        filename = os.path.join(reports_dir, filename)
-
-    with open(filename, "w", encoding="utf-8") as fh:
-        fh.write(report_text)
-
-    return os.path.abspath(filename)
+_STORE = None
 
 
-def save_ordonnance(ordonnance_text, filename=None):
-    """Enregistre l'ordonnance dans un fichier .txt (UTF-8) dans le dossier ordonnances/.
-    Si `filename` est None ou vide, génère un nom basé sur la date/heure.
-    Retourne le chemin du fichier créé.
+def _store_consultations():
+    """Base des rapports et ordonnances (reports/consultations.db), ouverte au premier enregistrement"""
+    global _STORE
+    if _STORE is None:
+        try:
+            from .store import ConsultationStore
+        except ImportError:  # lancé comme script : python source/main.py
+            from store import ConsultationStore
+        _STORE = ConsultationStore()
+    return _STORE
+
+
+def save_report(report_text, filename=None, f=None, decision=None, demande=None, patient=None):
+    """Enregistre le rapport `report_text` dans la base des consultations.
+    `filename` est le nom du fichier produit par un export texte (python source/store.py export) ;
+    s'il est None ou vide, il est généré à partir de la date/heure.
+    `patient` est l'identifiant saisi par le médecin (recherche `store.py liste --patient`) ;
+    s'il est None ou vide, le document est rangé sous PATIENT_INCONNU.
+    Retourne l'identifiant du document.
     """
-    import os
-    # Obtenir le répertoire du script (source/) puis remonter au parent (v_arbre_d/)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)  # v_arbre_d/
-    ordonnances_dir = os.path.join(project_root, "ordonnances")
-    os.makedirs(ordonnances_dir, exist_ok=True)
+    return _store_consultations().enregistrer(
+        "rapport", report_text, nom=filename or None, features=f, recommandation=decision, demande=demande,
+        patient=patient or None,
+    )
 
-    if not filename:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"ordonnance_{ts}.txt"
 
-    # Si l'utilisateur a fourni un nom simple, l'enregistrer dans ordonnances/
-    if not os.path.isabs(filename):
-        filename = os.path.join(ordonnances_dir, filename)
+def save_ordonnance(ordonnance_text, filename=None, f=None, decision=None, demande=None, patient=None):
+    """Enregistre l'ordonnance dans la base des consultations (voir save_report).
+    Retourne l'identifiant du document.
+    """
+    return _store_consultations().enregistrer(
+        "ordonnance", ordonnance_text, nom=filename or None, features=f, recommandation=decision, demande=demande,
+        patient=patient or None,
+    )
 
-    with open(filename, "w", encoding="utf-8") as fh:
-        fh.write(ordonnance_text)
+# ici sous forme de tuple avec la key f qui correspond au return de analyse_texte_medicale et le texte qui est la question à poser
+QUESTIONS = [
+    ("fievre", "Fièvre ?"),
+    ("brutale", "Installation brutale (coup de tonnerre) ?"),
+    ("deficit", "Déficit moteur ou sensitif ?"),
+    ("oncologique", "Antécédent de cancer ?"),
+    ("grossesse", "Grossesse en cours ?"),
+    ("chirurgie", "Chirurgie récente (<6 semaines avec matériel) ?"),
+    ("pacemaker", "Pace-maker ?"),
+    ("claustrophobie", "Claustrophobie ?")
+]
 
-    return os.path.abspath(filename)
 
 def demander_oui_non(prompt):
     """Lecture directe d'une touche (o/n ou ← retour)."""
+    # import local : seul le mode terminal a besoin de readchar (pas le service JSON)
+    import readchar
+
     print(prompt + " (o/n) : ", end="", flush=True)
     while True:
         key = readchar.readkey()
@@ -534,17 +675,7 @@ def chatbot_cephalees():
     if f["sexe"]:
         print(f"Sexe détecté : {'femme' if f['sexe']=='f' else 'homme'}")
 
-# ici sous forme de tuple avec la key f qui correspond au return de analyse_texte_medicale et le texte qui est la question à poser
-    questions = [
-        ("fievre", "Fièvre ?"),
-        ("brutale", "Installation brutale (coup de tonnerre) ?"),
-        ("deficit", "Déficit moteur ou sensitif ?"),
-        ("oncologique", "Antécédent de cancer ?"),
-        ("grossesse", "Grossesse en cours ?"),
-        ("chirurgie", "Chirurgie récente (<6 semaines avec matériel) ?"),
-        ("pacemaker", "Pace-maker ?"),
-        ("claustrophobie", "Claustrophobie ?")
-    ]
+    questions = QUESTIONS
 
     i = 0
     while i < len(questions):
@@ -696,18 +827,25 @@ def chatbot_cephalees():
     ordonnance_text = generer_ordonnance(f, texte, decision, contraindications_text)
 
     # Proposer l'enregistrement/impression
+    # identifiant patient demandé au premier enregistrement, réutilisé pour l'ordonnance
+    patient = None
     print("\n")
     if demander_oui_non("Voulez-vous enregistrer le rapport récapitulatif"):
         fname = input("Nom du fichier (laisser vide pour générer automatiquement) : ").strip()
-        saved_path = save_report(report_text, fname if fname else None)
-        print(f"Rapport enregistré : {saved_path}")
+        patient = input("Identifiant patient (laisser vide si inconnu) : ").strip()
+        doc_id = save_report(report_text, fname if fname else None, f=f, decision=decision, demande=texte,
+                             patient=patient)
+        print(f"Rapport enregistré : n° {doc_id} (export texte : python source/store.py export --id {doc_id} -o reports/)")
     
     # Toujours générer l'ordonnance
     print("\n")
     if demander_oui_non("Voulez-vous générer l'ordonnance médicale"):
         fname_ordonnance = input("Nom de l'ordonnance (laisser vide pour générer automatiquement) : ").strip()
-        saved_ordonnance = save_ordonnance(ordonnance_text, fname_ordonnance if fname_ordonnance else None)
-        print(f"Ordonnance enregistrée : {saved_ordonnance}")
+        if patient is None:
+            patient = input("Identifiant patient (laisser vide si inconnu) : ").strip()
+        doc_id = save_ordonnance(ordonnance_text, fname_ordonnance if fname_ordonnance else None,
+                                 f=f, decision=decision, demande=texte, patient=patient)
+        print(f"Ordonnance enregistrée : n° {doc_id} (export texte : python source/store.py export --id {doc_id} -o ordonnances/)")
         print("\n⚠️  IMPORTANT : Cette ordonnance doit être revue et validée par le médecin prescripteur.")
 
 if __name__ == "__main__":
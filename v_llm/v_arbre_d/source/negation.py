@@ -0,0 +1,254 @@
+"""
+Portées de négation d'un texte clinique (approche NegEx, un seul parcours)
+
+Le texte, mis en minuscules, est coupé en propositions à la ponctuation ;
+seules les propositions contenant un mot déclencheur (accentué ou non) sont
+relues mot à mot :
+  - un déclencheur (« pas », « sans », « aucun », « ni », « n'... plus »...)
+    ouvre une portée sur les FENETRE mots qui le suivent ;
+  - une post-négation (« test de grossesse négatif ») couvre ceux qui la précèdent ;
+  - une portée s'arrête à la fin de la proposition, à une conjonction de rupture
+    (« mais », « sauf »...) ou au déclencheur suivant ;
+  - les pseudo-négations (« pas seulement », « sans doute », « non exclu »...)
+    n'ouvrent aucune portée.
+
+    portees = portees_negation("céphalées brutales, pas de fièvre ni déficit")
+    portees.present("brutales")   # True
+    portees.present("fièvre")     # False : toutes les occurrences sont niées
+    portees.concepts(["fièvre", "déficit", "brutales"])
+
+Les positions sont celles du texte fourni, accentué ou non, en minuscules ou
+non : les appelants cherchent leurs termes dans ce même texte.
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+# nombre maximal de mots couverts par une portée
+FENETRE = 6
+
+# déclencheurs : la portée couvre les mots suivants
+DECLENCHEURS = frozenset({
+    "pas", "sans", "aucun", "aucune", "aucuns", "aucunes", "ni", "non", "jamais", "rien",
+    "absence", "nul", "nulle",
+})
+# déclencheurs valables seulement après « ne » / « n' » dans la même proposition
+DECLENCHEURS_NE = frozenset({"plus", "guere"})
+
+# post-négations : la portée couvre les mots précédents de la proposition
+POST_DECLENCHEURS = frozenset({
+    "negatif", "negative", "negatifs", "negatives", "absent", "absente", "absents", "absentes",
+    "exclu", "exclue", "exclus", "exclues", "elimine", "eliminee", "ecarte", "ecartee",
+})
+
+# pseudo-négations : séquences commençant par un déclencheur qui ne nient rien
+PSEUDO_NEGATIONS = (
+    ("pas", "seulement"), ("pas", "uniquement"), ("non", "seulement"), ("pas", "forcement"),
+    ("pas", "toujours"), ("sans", "doute"), ("pas", "de", "changement"),
+    ("pas", "d", "amelioration"), ("sans", "amelioration"), ("pas", "exclu"), ("pas", "exclue"),
+    ("non", "exclu"), ("non", "exclue"), ("pas", "elimine"), ("pas", "eliminee"),
+    ("pas", "ecarte"), ("pas", "ecartee"),
+)
+
+# fin de portée : ponctuation de proposition et conjonctions de rupture
+PONCTUATION_FIN = ".,;:!?\n"
+CONJONCTIONS_FIN = frozenset({
+    "mais", "cependant", "toutefois", "pourtant", "neanmoins", "sauf", "hormis", "excepte", "malgre",
+})
+
+_ACCENTS = {"a": "aàâä", "e": "eéèêë", "i": "iîï", "o": "oôö", "u": "uùûü", "c": "cç"}
+_PROPOSITIONS = re.compile(r"[^" + re.escape(PONCTUATION_FIN) + r"]+")
+_MOT = re.compile(r"\w+")
+
+
+def _graphies(forme):
+    """Graphies accentuées d'une forme ASCII (seuls les 'e' prennent un accent dans ces mots)"""
+    choix = ["eéèê" if c == "e" else c for c in forme]
+    return {"".join(lettres) for lettres in product(*choix)}
+
+
+# graphie en minuscules -> forme ASCII, pour tous les mots qui jouent un rôle
+_FORMES = {
+    graphie: forme
+    for forme in DECLENCHEURS | DECLENCHEURS_NE | POST_DECLENCHEURS | CONJONCTIONS_FIN | {"ne", "n"}
+    | {mot for sequence in PSEUDO_NEGATIONS for mot in sequence}
+    for graphie in _graphies(forme)
+}
+# graphies des déclencheurs : une proposition qui n'en contient aucun est ignorée
+_GRAPHIES_DECLENCHEURS = frozenset(g for g, f in _FORMES.items() if f in DECLENCHEURS | DECLENCHEURS_NE | POST_DECLENCHEURS)
+
+Concept = namedtuple("Concept", "terme debut fin nie")
+
+
+def _motif_sans_accents(forme):
+    return "".join(f"[{_ACCENTS[c]}]" if c in _ACCENTS else re.escape(c) for c in forme)
+
+
+def motif_declencheurs(accents=True):
+    """Motif regex reconnaissant un mot déclencheur (pré- ou post-négation).
+
+    Un texte qui n'en contient aucun n'a pas de portée : un extracteur qui
+    parcourt déjà le texte peut intégrer ce motif pour n'appeler
+    `portees_negation` qu'au besoin (`accents=False` pour un texte normalisé).
+    """
+    formes = sorted(DECLENCHEURS | DECLENCHEURS_NE | POST_DECLENCHEURS, key=len, reverse=True)
+    if accents:
+        formes = [_motif_sans_accents(f) for f in formes]
+    return "(?:" + "|".join(formes) + r")\b"
+
+
+def _pseudos_par_tete():
+    index = {}
+    for sequence in sorted(PSEUDO_NEGATIONS, key=len, reverse=True):
+        index.setdefault(sequence[0], []).append(sequence)
+    return index
+
+
+_PSEUDOS = _pseudos_par_tete()
+
+
+class PorteesNegation:
+    """Intervalles [début, fin) du texte situés dans une portée de négation"""
+
+    __slots__ = ("texte", "debuts", "fins")
+
+    def __init__(self, texte, portees):
+        self.texte = texte
+        self.debuts = [debut for debut, _ in portees]
+        self.fins = [fin for _, fin in portees]
+
+    def __bool__(self):
+        return bool(self.debuts)
+
+    def __repr__(self):
+        return f"PorteesNegation({list(zip(self.debuts, self.fins))!r})"
+
+    def est_nie(self, position):
+        """Vrai si le caractère à `position` est dans une portée de négation"""
+        i = bisect_right(self.debuts, position) - 1
+        return i >= 0 and position < self.fins[i]
+
+    def occurrences(self, terme):
+        """Occurrences de `terme` (sous-chaîne du texte) avec leur polarité"""
+        debut = self.texte.find(terme)
+        while debut != -1:
+            fin = debut + len(terme)
+            yield Concept(terme, debut, fin, self.est_nie(debut))
+            debut = self.texte.find(terme, fin)
+
+    def present(self, terme):
+        """Vrai si `terme` apparaît au moins une fois hors d'une portée de négation"""
+        debut = self.texte.find(terme)
+        if not self.debuts:
+            return debut != -1
+        while debut != -1:
+            if not self.est_nie(debut):
+                return True
+            debut = self.texte.find(terme, debut + len(terme))
+        return False
+
+    def nie(self, terme):
+        """Vrai si `terme` apparaît et que toutes ses occurrences sont niées"""
+        debut = self.texte.find(terme)
+        if debut == -1 or not self.debuts:
+            return False
+        return not self.present(terme)
+
+    def concepts(self, termes):
+        """Toutes les occurrences des `termes`, triées par position"""
+        trouves = [c for terme in termes for c in self.occurrences(terme)]
+        trouves.sort(key=lambda c: (c.debut, -c.fin))
+        return trouves
+
+
+def _etiqueter_proposition(bas, debut, fin, portees):
+    """Portées d'une proposition (texte en minuscules) ajoutées à `portees`"""
+    formes_connues = _FORMES
+    mots = [(m.start(), m.end(), formes_connues.get(m.group(), m.group())) for m in _MOT.finditer(bas, debut, fin)]
+    formes = [mot[2] for mot in mots]
+    ouverte = None  # [début, fin, mots restants] de la portée en cours
+    ne_arme = False
+    debut_segment = 0  # premier mot après la dernière conjonction de rupture
+
+    def fermer():
+        if ouverte is not None and ouverte[0] is not None:
+            portees.append((ouverte[0], ouverte[1]))
+
+    i = 0
+    n = len(mots)
+    while i < n:
+        debut_mot, fin_mot, forme = mots[i]
+        if forme in CONJONCTIONS_FIN:
+            fermer()
+            ouverte = None
+            ne_arme = False
+            debut_segment = i + 1
+            i += 1
+            continue
+
+        for sequence in _PSEUDOS.get(forme, ()):
+            if tuple(formes[i:i + len(sequence)]) == sequence:
+                i += len(sequence)
+                break
+        else:
+            if forme in DECLENCHEURS or (ne_arme and forme in DECLENCHEURS_NE):
+                fermer()
+                ouverte = [None, None, FENETRE]
+            elif forme in POST_DECLENCHEURS:
+                fermer()
+                ouverte = None
+                # les FENETRE mots précédents, sans remonter avant la conjonction
+                j = max(debut_segment, i - FENETRE)
+                if j < i:
+                    portees.append((mots[j][0], mots[i - 1][1]))
+            else:
+                if forme == "ne" or forme == "n":
+                    ne_arme = True
+                if ouverte is not None:
+                    if ouverte[0] is None:
+                        ouverte[0] = debut_mot
+                    ouverte[1] = fin_mot
+                    ouverte[2] -= 1
+                    if not ouverte[2]:
+                        fermer()
+                        ouverte = None
+            i += 1
+    fermer()
+
+
+def etiqueter(texte):
+    """Calcule les portées de négation de `texte` en un seul parcours.
+
+    Le texte est coupé en propositions à la ponctuation ; seules celles qui
+    contiennent un mot déclencheur (test d'ensemble sur les mots `\w+`, sans
+    boucle Python) sont relues mot à mot. Les mots sont découpés comme dans
+    `_etiqueter_proposition` : un déclencheur collé à « ( », « « », « / »... compte.
+    """
+    bas = texte.lower()
+    if len(bas) != len(texte):  # minuscule de longueur différente (rare) : positions d'origine
+        bas = texte
+    portees = []
+    for proposition in _PROPOSITIONS.finditer(bas):
+        mots = _MOT.findall(bas, proposition.start(), proposition.end())
+        if not _GRAPHIES_DECLENCHEURS.isdisjoint(mots):
+            _etiqueter_proposition(bas, proposition.start(), proposition.end(), portees)
+
+    # fusion des intervalles qui se chevauchent (les post-négations arrivent en retard)
+    portees.sort()
+    fusion = []
+    for debut, fin in portees:
+        if fusion and debut <= fusion[-1][1]:
+            if fin > fusion[-1][1]:
+                fusion[-1] = (fusion[-1][0], fin)
+        else:
+            fusion.append((debut, fin))
+    return PorteesNegation(texte, fusion)
+
+
+@lru_cache(maxsize=2048)
+def portees_negation(texte):
+    """`etiqueter(texte)` mis en cache : un texte est souvent interrogé pour de nombreux termes"""
+    return etiqueter(texte)
@@ -0,0 +1,387 @@
+"""
+Service JSON de l'arbre décisionnel (céphalées), sans saisie clavier
+
+Usage :
+    python source/service.py --port 8080 --ttl 1800
+
+API (HTTP/1.1, JSON) :
+    POST   /consultations                   {"texte": "..."}             -> question suivante ou recommandation
+    POST   /consultations/<id>/reponses     {"cle": "fievre", "valeur": true}
+                                            ou {"reponses": {"fievre": false, "grossesse_sem": 8}}
+    GET    /consultations/<id>              état courant
+    DELETE /consultations/<id>
+    GET    /sante                           nombre de sessions ouvertes
+
+Chaque réponse contient "etat" : "question" (avec "question": {"cle", "texte", "type"})
+ou "termine" (avec "recommandation" et "contre_indications"). Une requête
+refusée renvoie {"erreur": "..."} (400 si une des réponses est invalide : aucune
+n'est alors enregistrée, 500 pour une erreur interne). Les consultations
+vivent en mémoire et expirent après `ttl` secondes sans requête.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+
+try:
+    from .main import (
+        GROSSESSE_EXAMPLE_4_12,
+        GROSSESSE_EXAMPLE_GT12,
+        GROSSESSE_EXAMPLE_LT4,
+        GROSSESSE_MAX_WEEKS,
+        QUESTIONS,
+        analyse_texte_medical,
+        decision_imagerie,
+        get_contraindications_text,
+    )
+except ImportError:  # lancé comme script : python source/service.py
+    from main import (
+        GROSSESSE_EXAMPLE_4_12,
+        GROSSESSE_EXAMPLE_GT12,
+        GROSSESSE_EXAMPLE_LT4,
+        GROSSESSE_MAX_WEEKS,
+        QUESTIONS,
+        analyse_texte_medical,
+        decision_imagerie,
+        get_contraindications_text,
+    )
+
+QUESTION_SEMAINES = "Durée de la grossesse (semaines, ou '<4', '4-12', '>12') ?"
+# mêmes catégories que la saisie non numérique du mode terminal
+CATEGORIES_SEMAINES = {"<4": GROSSESSE_EXAMPLE_LT4, "4-12": GROSSESSE_EXAMPLE_4_12, ">12": GROSSESSE_EXAMPLE_GT12}
+
+_OUI = {"o", "oui", "y", "yes", "true", "1"}
+_NON = {"n", "non", "no", "false", "0"}
+
+TAILLE_MAX_CORPS = 64 * 1024
+
+
+class ReponseInvalide(ValueError):
+    """Clé ou valeur de réponse non reconnue (HTTP 400)"""
+
+
+def _oui_non(valeur):
+    if isinstance(valeur, bool):
+        return valeur
+    texte = str(valeur).strip().lower()
+    if texte in _OUI:
+        return True
+    if texte in _NON:
+        return False
+    raise ReponseInvalide(f"réponse oui/non attendue, reçu : {valeur!r}")
+
+
+def _semaines(valeur):
+    if valeur is None or valeur == "":
+        return None
+    if isinstance(valeur, str) and valeur.strip() in CATEGORIES_SEMAINES:
+        return CATEGORIES_SEMAINES[valeur.strip()]
+    try:
+        semaines = int(valeur)
+    except (TypeError, ValueError):
+        raise ReponseInvalide(f"nombre de semaines ou catégorie ({', '.join(CATEGORIES_SEMAINES)}) attendu")
+    if not 0 <= semaines <= GROSSESSE_MAX_WEEKS:
+        raise ReponseInvalide(f"nombre de semaines hors plage (0-{GROSSESSE_MAX_WEEKS})")
+    return semaines
+
+
+class Consultation:
+    """Déroulé de chatbot_cephalees sans entrée/sortie : questions posées une à une par clé.
+
+    Comme en mode terminal, les signes déjà détectés dans le texte ne sont pas
+    redemandés, la grossesse n'est pas demandée pour un homme ou après 50 ans,
+    et sa durée est demandée dès qu'elle est connue sans durée. Une réponse
+    déjà donnée peut être corrigée en renvoyant la même clé.
+    """
+
+    def __init__(self, texte):
+        self.texte = texte
+        self.features = analyse_texte_medical(texte)
+        self.repondues = set()
+
+    def prochaine_question(self):
+        """(clé, texte) de la prochaine question, ou None si la recommandation peut être rendue"""
+        f = self.features
+        for cle, question in QUESTIONS:
+            if cle == "grossesse":
+                if f["grossesse"]:
+                    if f.get("grossesse_sem") is None and "grossesse_sem" not in self.repondues:
+                        return "grossesse_sem", QUESTION_SEMAINES
+                    continue
+                if f["sexe"] == "m" or (f["age"] and f["age"] >= 50):
+                    continue
+            if f[cle] or cle in self.repondues:
+                continue
+            return cle, question
+        return None
+
+    @staticmethod
+    def _valeur(cle, valeur):
+        if cle == "grossesse_sem":
+            return _semaines(valeur)
+        if cle in dict(QUESTIONS):
+            return _oui_non(valeur)
+        raise ReponseInvalide(f"question inconnue : {cle}")
+
+    def repondre(self, cle, valeur):
+        self.repondre_tout({cle: valeur})
+
+    def repondre_tout(self, reponses):
+        """Enregistre plusieurs réponses : toutes sont validées avant la première modification"""
+        valeurs = {cle: self._valeur(cle, valeur) for cle, valeur in reponses.items()}
+        self.features.update(valeurs)
+        self.repondues.update(valeurs)
+
+    def etat(self):
+        question = self.prochaine_question()
+        if question is not None:
+            cle, texte = question
+            return {
+                "etat": "question",
+                "question": {"cle": cle, "texte": texte, "type": "semaines" if cle == "grossesse_sem" else "oui_non"},
+                "features": self.features,
+            }
+        return {
+            "etat": "termine",
+            "features": self.features,
+            "recommandation": decision_imagerie(self.features),
+            "contre_indications": get_contraindications_text(self.features),
+        }
+
+
+class SessionStore:
+    """Consultations en mémoire, expirées après `ttl` secondes sans accès.
+
+    L'OrderedDict est trié par dernier accès : l'expiration parcourt les plus
+    anciennes en tête et s'arrête à la première encore valide. Au-delà de
+    `max_sessions`, les moins récemment utilisées sont évincées.
+    """
+
+    def __init__(self, ttl=1800, max_sessions=10000, horloge=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._horloge = horloge
+        self._sessions = OrderedDict()  # id -> (expiration, consultation)
+
+    def creer(self, consultation):
+        self.purger()
+        identifiant = uuid.uuid4().hex
+        self._sessions[identifiant] = (self._horloge() + self.ttl, consultation)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return identifiant
+
+    def obtenir(self, identifiant):
+        entree = self._sessions.get(identifiant)
+        if entree is None:
+            return None
+        expiration, consultation = entree
+        maintenant = self._horloge()
+        if expiration <= maintenant:
+            del self._sessions[identifiant]
+            return None
+        self._sessions[identifiant] = (maintenant + self.ttl, consultation)
+        self._sessions.move_to_end(identifiant)
+        return consultation
+
+    def supprimer(self, identifiant):
+        return self._sessions.pop(identifiant, None) is not None
+
+    def purger(self):
+        """Retire les sessions expirées ; retourne leur nombre"""
+        maintenant = self._horloge()
+        n = 0
+        while self._sessions:
+            identifiant, (expiration, _) = next(iter(self._sessions.items()))
+            if expiration > maintenant:
+                break
+            del self._sessions[identifiant]
+            n += 1
+        return n
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class ServiceArbre:
+    """Routage des requêtes JSON ; `traiter` est indépendant du transport HTTP"""
+
+    def __init__(self, sessions=None):
+        self.sessions = sessions if sessions is not None else SessionStore()
+
+    def _consultation(self, identifiant):
+        consultation = self.sessions.obtenir(identifiant)
+        if consultation is None:
+            return None, (HTTPStatus.NOT_FOUND, {"erreur": "consultation inconnue ou expirée"})
+        return consultation, None
+
+    def traiter(self, methode, chemin, corps=b""):
+        """Retourne (statut HTTP, objet JSON) pour une requête ; une erreur inattendue donne un 500"""
+        try:
+            return self._traiter(methode, chemin, corps)
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"erreur": "erreur interne du service"}
+
+    def _traiter(self, methode, chemin, corps):
+        try:
+            donnees = json.loads(corps) if corps else {}
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"erreur": "corps JSON invalide"}
+        if not isinstance(donnees, dict):
+            return HTTPStatus.BAD_REQUEST, {"erreur": "objet JSON attendu"}
+
+        parties = [p for p in chemin.split("?", 1)[0].split("/") if p]
+        if parties == ["sante"] and methode == "GET":
+            return HTTPStatus.OK, {"statut": "ok", "sessions": len(self.sessions)}
+        if not parties or parties[0] != "consultations" or len(parties) > 3:
+            return HTTPStatus.NOT_FOUND, {"erreur": f"route inconnue : {chemin}"}
+
+        if len(parties) == 1:
+            if methode != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"erreur": "POST attendu"}
+            texte = donnees.get("texte")
+            if not isinstance(texte, str) or not texte.strip():
+                return HTTPStatus.BAD_REQUEST, {"erreur": "champ 'texte' manquant"}
+            consultation = Consultation(texte)
+            identifiant = self.sessions.creer(consultation)
+            return HTTPStatus.CREATED, {"session": identifiant, **consultation.etat()}
+
+        identifiant = parties[1]
+        if len(parties) == 2:
+            if methode == "GET":
+                consultation, erreur = self._consultation(identifiant)
+                return erreur or (HTTPStatus.OK, {"session": identifiant, **consultation.etat()})
+            if methode == "DELETE":
+                if self.sessions.supprimer(identifiant):
+                    return HTTPStatus.OK, {"session": identifiant, "etat": "supprime"}
+                return HTTPStatus.NOT_FOUND, {"erreur": "consultation inconnue ou expirée"}
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"erreur": "GET ou DELETE attendu"}
+
+        if parties[2] != "reponses":
+            return HTTPStatus.NOT_FOUND, {"erreur": f"route inconnue : {chemin}"}
+        if methode != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"erreur": "POST attendu"}
+        consultation, erreur = self._consultation(identifiant)
+        if erreur:
+            return erreur
+        reponses = donnees.get("reponses")
+        if reponses is None:
+            if "cle" not in donnees:
+                return HTTPStatus.BAD_REQUEST, {"erreur": "champ 'cle' ou 'reponses' manquant"}
+            reponses = {donnees["cle"]: donnees.get("valeur")}
+        if not isinstance(reponses, dict):
+            return HTTPStatus.BAD_REQUEST, {"erreur": "'reponses' doit être un objet {cle: valeur}"}
+        try:
+            consultation.repondre_tout(reponses)
+        except ReponseInvalide as e:
+            return HTTPStatus.BAD_REQUEST, {"erreur": str(e), "session": identifiant, **consultation.etat()}
+        return HTTPStatus.OK, {"session": identifiant, **consultation.etat()}
+
+
+def _reponse_http(statut, objet, garder_connexion):
+    corps = json.dumps(objet, ensure_ascii=False).encode("utf-8")
+    entete = (
+        f"HTTP/1.1 {statut.value} {statut.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(corps)}\r\n"
+        f"Connection: {'keep-alive' if garder_connexion else 'close'}\r\n\r\n"
+    )
+    return entete.encode("latin-1") + corps
+
+
+class ServeurHTTP:
+    """Serveur HTTP/1.1 minimal (asyncio, bibliothèque standard), connexions persistantes"""
+
+    def __init__(self, service=None, delai_inactivite=30.0, periode_purge=60.0):
+        self.service = service or ServiceArbre()
+        self.delai_inactivite = delai_inactivite
+        self.periode_purge = periode_purge
+
+    async def _lire_requete(self, reader):
+        ligne = await asyncio.wait_for(reader.readline(), self.delai_inactivite)
+        if not ligne:
+            return None
+        methode, cible, version = ligne.decode("latin-1").split()
+        entetes = {}
+        while True:
+            ligne = await asyncio.wait_for(reader.readline(), self.delai_inactivite)
+            if ligne in (b"\r\n", b"\n", b""):
+                break
+            nom, _, valeur = ligne.decode("latin-1").partition(":")
+            entetes[nom.strip().lower()] = valeur.strip()
+        return methode.upper(), cible, version, entetes
+
+    async def _connexion(self, reader, writer):
+        try:
+            while True:
+                try:
+                    requete = await self._lire_requete(reader)
+                except ValueError:
+                    writer.write(_reponse_http(HTTPStatus.BAD_REQUEST, {"erreur": "requête HTTP invalide"}, False))
+                    break
+                if requete is None:
+                    break
+                methode, cible, version, entetes = requete
+                longueur = int(entetes.get("content-length") or 0)
+                if longueur > TAILLE_MAX_CORPS:
+                    writer.write(_reponse_http(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erreur": "corps trop volumineux"}, False))
+                    break
+                corps = await asyncio.wait_for(reader.readexactly(longueur), self.delai_inactivite) if longueur else b""
+
+                connexion = entetes.get("connection", "").lower()
+                garder = connexion == "keep-alive" if version == "HTTP/1.0" else connexion != "close"
+                statut, objet = self.service.traiter(methode, cible, corps)
+                writer.write(_reponse_http(statut, objet, garder))
+                await writer.drain()
+                if not garder:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _purger_periodiquement(self):
+        while True:
+            await asyncio.sleep(self.periode_purge)
+            self.service.sessions.purger()
+
+    async def demarrer(self, host="127.0.0.1", port=8080):
+        """Démarre l'écoute et la purge des sessions ; retourne le serveur asyncio"""
+        serveur = await asyncio.start_server(self._connexion, host, port)
+        self._purge = asyncio.get_running_loop().create_task(self._purger_periodiquement())
+        return serveur
+
+    async def servir(self, host="127.0.0.1", port=8080):
+        serveur = await self.demarrer(host, port)
+        adresse = serveur.sockets[0].getsockname()
+        print(f"Service de l'arbre décisionnel : http://{adresse[0]}:{adresse[1]} (Ctrl+C pour arrêter)")
+        async with serveur:
+            await serveur.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttl", type=float, default=1800, help="expiration d'une consultation inactive (secondes)")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    service = ServiceArbre(SessionStore(ttl=args.ttl, max_sessions=args.max_sessions))
+    periode = max(1.0, min(60.0, args.ttl / 4))
+    try:
+        asyncio.run(ServeurHTTP(service, periode_purge=periode).servir(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
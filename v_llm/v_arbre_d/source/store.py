@@ -0,0 +1,366 @@
+"""
+Stockage indexé des rapports et ordonnances (SQLite + recherche plein texte FTS5)
+
+Chaque consultation enregistrée conserve le texte complet (identique aux
+anciens fichiers .txt), la demande du clinicien, les informations détectées,
+la recommandation et l'horodatage. La base est en ajout seul : un document
+n'est jamais modifié ni supprimé.
+
+Usage :
+    python source/store.py liste --depuis 2025-11-01 --type ordonnance
+    python source/store.py cherche "scanner injection"
+    python source/store.py export --id 12 -o ordonnances/
+    python source/store.py import ../reports ordonnances/      # reprise des anciens .txt
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # v_arbre_d/
+DEFAULT_DB = os.path.join(PROJECT_ROOT, "reports", "consultations.db")
+
+TYPES = ("rapport", "ordonnance")
+PATIENT_INCONNU = "[À COMPLÉTER]"
+
+_COLONNES = ("type", "cree_le", "nom", "patient", "age", "sexe", "demande", "recommandation", "features", "texte")
+_INSERT = f"INSERT INTO documents ({', '.join(_COLONNES)}) VALUES ({', '.join('?' * len(_COLONNES))})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL CHECK (type IN ('rapport', 'ordonnance')),
+    cree_le TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    patient TEXT NOT NULL,
+    age INTEGER,
+    sexe TEXT,
+    demande TEXT,
+    recommandation TEXT,
+    features TEXT,
+    texte TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_date ON documents (cree_le);
+CREATE INDEX IF NOT EXISTS documents_type_date ON documents (type, cree_le);
+CREATE INDEX IF NOT EXISTS documents_patient ON documents (patient, cree_le);
+CREATE INDEX IF NOT EXISTS documents_recommandation ON documents (recommandation);
+CREATE TRIGGER IF NOT EXISTS documents_sans_modification BEFORE UPDATE ON documents
+BEGIN SELECT RAISE(ABORT, 'documents en ajout seul'); END;
+CREATE TRIGGER IF NOT EXISTS documents_sans_suppression BEFORE DELETE ON documents
+BEGIN SELECT RAISE(ABORT, 'documents en ajout seul'); END;
+"""
+
+# Index plein texte synchronisé par trigger (la table étant en ajout seul, l'insertion suffit)
+_SCHEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    demande, recommandation, texte,
+    content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_fts_ajout AFTER INSERT ON documents
+BEGIN
+    INSERT INTO documents_fts (rowid, demande, recommandation, texte)
+    VALUES (new.id, new.demande, new.recommandation, new.texte);
+END;
+"""
+
+
+def _horodatage(valeur=None):
+    if valeur is None:
+        valeur = datetime.now()
+    if isinstance(valeur, datetime):
+        return valeur.isoformat(sep=" ", timespec="seconds")
+    return str(valeur)
+
+
+def _borne(valeur, fin=False):
+    """Date ou date-heure -> chaîne comparable à cree_le ; une date de fin seule inclut toute la journée"""
+    if valeur is None:
+        return None
+    if isinstance(valeur, str):
+        valeur = datetime.fromisoformat(valeur) if len(valeur) > 10 else date.fromisoformat(valeur)
+    if not isinstance(valeur, datetime):
+        valeur = datetime.combine(valeur + timedelta(days=1) if fin else valeur, datetime.min.time())
+    return _horodatage(valeur)
+
+
+def _requete_fts(texte):
+    """Chaque mot devient un terme entre guillemets : pas d'interprétation de la syntaxe FTS5"""
+    return " ".join('"' + mot.replace('"', '""') + '"' for mot in texte.split())
+
+
+class ConsultationStore:
+    """Base des rapports et ordonnances.
+
+    Les écritures passent par une file : `ajouter` met en attente et
+    l'ensemble est écrit dans une seule transaction tous les `taille_lot`
+    documents ou à l'appel de `flush` (aussi à la fermeture). `enregistrer`
+    écrit immédiatement et retourne l'identifiant du document.
+    """
+
+    def __init__(self, chemin=DEFAULT_DB, taille_lot=500):
+        self.chemin = chemin
+        self.taille_lot = taille_lot
+        if chemin != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self._conn = sqlite3.connect(chemin)
+        self._conn.row_factory = sqlite3.Row
+        if chemin != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_SCHEMA_FTS)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite compilé sans FTS5 : recherche par LIKE
+            self.fts = False
+        self._en_attente = []
+
+    # ---------------------------------------------------------------- écriture
+
+    @staticmethod
+    def _ligne(type, texte, nom=None, features=None, recommandation=None, demande=None, patient=None, cree_le=None):
+        if type not in TYPES:
+            raise ValueError(f"Type de document inconnu : {type} (choix : {', '.join(TYPES)})")
+        cree_le = _horodatage(cree_le)
+        if not nom:
+            suffixe = re.sub(r"\D", "", cree_le)
+            nom = f"rapport_cephalees_{suffixe[:8]}_{suffixe[8:]}.txt" if type == "rapport" else f"ordonnance_{suffixe[:8]}_{suffixe[8:]}.txt"
+        features = features or {}
+        return (
+            type, cree_le, nom, patient or PATIENT_INCONNU, features.get("age"), features.get("sexe"),
+            demande, recommandation, json.dumps(features, ensure_ascii=False) if features else None, texte,
+        )
+
+    def ajouter(self, type, texte, **champs):
+        """Met un document en attente d'écriture (voir `flush`)"""
+        self._en_attente.append(self._ligne(type, texte, **champs))
+        if len(self._en_attente) >= self.taille_lot:
+            self.flush()
+
+    def flush(self):
+        """Écrit les documents en attente dans une seule transaction ; retourne leur nombre"""
+        lignes, self._en_attente = self._en_attente, []
+        if lignes:
+            with self._conn:
+                self._conn.executemany(
+                    _INSERT,
+                    lignes,
+                )
+        return len(lignes)
+
+    def enregistrer(self, type, texte, **champs):
+        """Écrit un document (et ceux en attente) immédiatement ; retourne son identifiant"""
+        self.flush()
+        with self._conn:
+            cur = self._conn.execute(
+                _INSERT,
+                self._ligne(type, texte, **champs),
+            )
+        return cur.lastrowid
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------------------------------- lecture
+
+    def _select(self, where="1", params=(), ordre="cree_le, id", limite=None):
+        sql = f"SELECT * FROM documents WHERE {where} ORDER BY {ordre}"
+        if limite:
+            sql += f" LIMIT {int(limite)}"
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def document(self, identifiant):
+        rows = self._select("id = ?", (identifiant,))
+        return rows[0] if rows else None
+
+    def par_date(self, debut=None, fin=None, type=None, limite=None):
+        """Documents créés entre `debut` et `fin` (dates ou date-heures ISO, fin incluse pour une date)"""
+        clauses, params = [], []
+        if debut is not None:
+            clauses.append("cree_le >= ?")
+            params.append(_borne(debut))
+        if fin is not None:
+            clauses.append("cree_le < ?" if len(str(fin)) <= 10 else "cree_le <= ?")
+            params.append(_borne(fin, fin=True))
+        if type:
+            clauses.append("type = ?")
+            params.append(type)
+        return self._select(" AND ".join(clauses) or "1", params, limite=limite)
+
+    def par_patient(self, patient, type=None):
+        if type:
+            return self._select("patient = ? AND type = ?", (patient, type))
+        return self._select("patient = ?", (patient,))
+
+    def par_recommandation(self, recommandation, type=None):
+        """Recommandation exacte (les textes de l'arbre décisionnel sont en nombre fini)"""
+        if type:
+            return self._select("recommandation = ? AND type = ?", (recommandation, type))
+        return self._select("recommandation = ?", (recommandation,))
+
+    def rechercher(self, texte, type=None, limite=50):
+        """Recherche plein texte (demande, recommandation, texte), les plus pertinents d'abord"""
+        if not texte.strip():
+            return []
+        filtre_type = " AND d.type = ?" if type else ""
+        if self.fts:
+            sql = (
+                "SELECT d.* FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                f"WHERE documents_fts MATCH ?{filtre_type} ORDER BY bm25(documents_fts) LIMIT ?"
+            )
+            params = [_requete_fts(texte)]
+        else:
+            mots = texte.split()
+            sql = (
+                "SELECT d.* FROM documents d WHERE "
+                + " AND ".join("(d.demande LIKE ? OR d.recommandation LIKE ? OR d.texte LIKE ?)" for _ in mots)
+                + f"{filtre_type} ORDER BY d.cree_le DESC, d.id DESC LIMIT ?"
+            )
+            params = [f"%{mot}%" for mot in mots for _ in range(3)]
+        if type:
+            params.append(type)
+        return [dict(row) for row in self._conn.execute(sql, params + [int(limite)])]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ---------------------------------------------------------------- export / reprise
+
+    @staticmethod
+    def exporter(documents, dossier):
+        """Écrit chaque document au format texte d'origine dans `dossier` ; retourne les chemins"""
+        os.makedirs(dossier, exist_ok=True)
+        chemins = []
+        for doc in documents:
+            chemin = os.path.join(dossier, os.path.basename(doc["nom"]))
+            if os.path.exists(chemin):
+                racine, ext = os.path.splitext(chemin)
+                chemin = f"{racine}_{doc['id']}{ext}"
+            with open(chemin, "w", encoding="utf-8") as fh:
+                fh.write(doc["texte"])
+            chemins.append(os.path.abspath(chemin))
+        return chemins
+
+    def importer_fichiers(self, chemins):
+        """Reprend d'anciens rapports/ordonnances .txt (écriture par lots) ; retourne le nombre importé"""
+        n = 0
+        for chemin in chemins:
+            with open(chemin, "r", encoding="utf-8") as fh:
+                texte = fh.read()
+            self.ajouter(**_analyser_fichier(texte, chemin))
+            n += 1
+        self.flush()
+        return n
+
+
+def _section(texte, titre):
+    """Contenu d'une section « TITRE : » d'un ancien fichier, jusqu'à la ligne vide ou au séparateur suivant"""
+    m = re.search(rf"^{re.escape(titre)}\s*:?\s*\n+(.*?)(?:\n\s*\n|\n-{{10,}}|\Z)", texte, re.M | re.S)
+    return m.group(1).strip() if m else None
+
+
+def _analyser_fichier(texte, chemin):
+    """Champs structurés retrouvés dans un ancien fichier .txt (en-tête, demande, recommandation)"""
+    ordonnance = "ORDONNANCE MÉDICALE" in texte
+    cree_le = None
+    m = re.search(r"Date : (\d{4}-\d{2}-\d{2})\s+Heure : (\d{2}:\d{2}:\d{2})", texte)
+    if m:
+        cree_le = f"{m.group(1)} {m.group(2)}"
+    else:
+        m = re.search(r"Date : (\d{2})/(\d{2})/(\d{4})\s*\nHeure : (\d{2}:\d{2})", texte)
+        if m:
+            cree_le = f"{m.group(3)}-{m.group(2)}-{m.group(1)} {m.group(4)}:00"
+    if cree_le is None:
+        cree_le = datetime.fromtimestamp(os.path.getmtime(chemin))
+    return {
+        "type": "ordonnance" if ordonnance else "rapport",
+        "texte": texte,
+        "nom": os.path.basename(chemin),
+        "cree_le": cree_le,
+        "demande": _section(texte, "MOTIF DE CONSULTATION" if ordonnance else "CLINICIEN — TEXTE FOURNI"),
+        "recommandation": _section(texte, "Choix de l'examen d'imagerie" if ordonnance else "RECOMMANDATION"),
+    }
+
+
+def _fichiers(chemins):
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            for nom in sorted(os.listdir(chemin)):
+                complet = os.path.join(chemin, nom)
+                if os.path.isfile(complet) and not nom.startswith(".") and not nom.endswith((".db", "-wal", "-shm")):
+                    yield complet
+        else:
+            yield chemin
+
+
+def _afficher(documents):
+    for doc in documents:
+        reco = (doc["recommandation"] or "").replace("\n", " ")
+        print(f"{doc['id']:>6}  {doc['cree_le']}  {doc['type']:<10}  {doc['patient']:<15}  {reco[:70]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"base SQLite (défaut : {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="commande", required=True)
+
+    p_liste = sub.add_parser("liste", help="documents par date, patient ou recommandation")
+    p_liste.add_argument("--depuis", default=None)
+    p_liste.add_argument("--jusqu", default=None)
+    p_liste.add_argument("--type", choices=TYPES, default=None)
+    p_liste.add_argument("--patient", default=None)
+    p_liste.add_argument("--recommandation", default=None)
+
+    p_cherche = sub.add_parser("cherche", help="recherche plein texte")
+    p_cherche.add_argument("texte")
+    p_cherche.add_argument("--type", choices=TYPES, default=None)
+    p_cherche.add_argument("--limite", type=int, default=50)
+
+    p_export = sub.add_parser("export", help="réécrire des documents au format texte")
+    p_export.add_argument("--id", type=int, nargs="*", default=None)
+    p_export.add_argument("--depuis", default=None)
+    p_export.add_argument("--jusqu", default=None)
+    p_export.add_argument("--type", choices=TYPES, default=None)
+    p_export.add_argument("-o", "--dossier", required=True)
+
+    p_import = sub.add_parser("import", help="importer d'anciens fichiers .txt (fichiers ou dossiers)")
+    p_import.add_argument("chemins", nargs="+")
+
+    args = parser.parse_args(argv)
+    with ConsultationStore(args.db) as store:
+        if args.commande == "liste":
+            if args.patient:
+                documents = store.par_patient(args.patient, type=args.type)
+            elif args.recommandation:
+                documents = store.par_recommandation(args.recommandation, type=args.type)
+            else:
+                documents = store.par_date(args.depuis, args.jusqu, type=args.type)
+            _afficher(documents)
+        elif args.commande == "cherche":
+            _afficher(store.rechercher(args.texte, type=args.type, limite=args.limite))
+        elif args.commande == "export":
+            if args.id:
+                documents = [d for d in map(store.document, args.id) if d]
+            else:
+                documents = store.par_date(args.depuis, args.jusqu, type=args.type)
+            for chemin in store.exporter(documents, args.dossier):
+                print(chemin)
+        elif args.commande == "import":
+            print(f"{store.importer_fichiers(_fichiers(args.chemins))} documents importés dans {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Débit de la détection de mots-clés : automate (KEYWORDS.scan) contre recherches `mot in texte`
+
+Usage :
+    python bench_keywords.py                  # cas de validation + guidelines, 200 répétitions
+    python bench_keywords.py --repetitions 1000
+
+Les deux méthodes évaluent tous les groupes de l'automate (KEYWORD_GROUPS, synonymes,
+pathologies, régions anatomiques) sur chaque texte ; le résultat est vérifié identique.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from ollama import KEYWORDS
+
+ROOT = Path(__file__).resolve().parent
+VAL_CASES = ROOT.parent / "v_llm" / "data" / "clinical_cases_val.jsonl"
+
+
+def charger_corpus():
+    """Textes réels : cas cliniques de validation (si présents) et guidelines indexées"""
+    corpus = {}
+    if VAL_CASES.exists():
+        with VAL_CASES.open(encoding="utf-8") as fh:
+            corpus["cas de validation"] = [
+                json.loads(line)["instruction"].split("Cas clinique:", 1)[-1].strip() for line in fh
+            ]
+    guidelines = json.loads((ROOT / "guidelines.json").read_text(encoding="utf-8"))["guidelines"]
+    corpus["guidelines"] = [f"{g['motif']} {g['texte']}".lower() for g in guidelines]
+    return corpus
+
+
+def _groupes():
+    return {nom: KEYWORDS.patterns_from_mask(KEYWORDS.group_mask(nom)) for nom in KEYWORDS._groups}
+
+
+def detection_sous_chaines(texte, groupes):
+    """Version d'origine : une recherche `mot in texte` par mot-clé et par groupe"""
+    return {nom: any(mot in texte for mot in mots) for nom, mots in groupes.items()}
+
+
+def detection_automate(texte, groupes):
+    features = KEYWORDS.scan(texte)
+    return {nom: features.any(nom) for nom in groupes}
+
+
+def _mesurer(fonction, textes, groupes, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for texte in textes:
+            fonction(texte, groupes)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=200, help="nombre de passages sur chaque corpus")
+    args = parser.parse_args(argv)
+
+    groupes = _groupes()
+    print(f"Automate : {len(groupes)} groupes, {len(KEYWORDS._bits)} mots-clés")
+    for nom_corpus, textes in charger_corpus().items():
+        for texte in textes:
+            assert detection_sous_chaines(texte, groupes) == detection_automate(texte, groupes), texte
+        longueur = sum(map(len, textes)) / len(textes)
+        print(f"{nom_corpus} : {len(textes)} textes, {longueur:.0f} caractères en moyenne")
+        resultats = {}
+        for nom, fonction in (("sous-chaînes", detection_sous_chaines), ("automate", detection_automate)):
+            duree = _mesurer(fonction, textes, groupes, args.repetitions)
+            resultats[nom] = duree
+            par_texte = duree / (len(textes) * args.repetitions) * 1e6
+            print(f"  {nom:<13} {duree:6.2f}s  {par_texte:6.1f} µs/texte")
+        print(f"  Accélération : x{resultats['sous-chaînes'] / resultats['automate']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Backends d'embedding de l'index RAG
+- BlueBERT (sentence_transformers) : modèle médical de référence
+- BlueBERT ONNX : même encodeur exporté (fp32 ou int8) exécuté par ONNX Runtime sur CPU
+- Hachage : repli hors-ligne, sans réseau ni torch
+
+Chaque backend possède sa propre collection ChromaDB : basculer de l'un à
+l'autre ne supprime jamais les vecteurs déjà calculés.
+"""
+
+import json
+import os
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+MODEL_NAME = "bionlp/bluebert_pubmed_mimic_uncased_L-12_H-768_A-12"
+
+# Nom de la collection associée à chaque backend
+COLLECTIONS = {
+    "onnx": "imagerie_onnx",
+    "bluebert": "imagerie",
+    "hashing": "imagerie_hashing",
+}
+
+# Backend imposé via l'environnement ("onnx", "bluebert", "hashing"), sinon détection automatique
+BACKEND_ENV = "RAG_EMBEDDING_BACKEND"
+
+# Export ONNX de BlueBERT (voir export_onnx.py)
+ONNX_DIR_ENV = "RAG_ONNX_DIR"
+ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "bluebert_onnx")
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _normalize(text):
+    """Minuscules sans accents, pour des n-grammes robustes aux variantes d'écriture"""
+    text = unicodedata.normalize("NFKD", text)
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding par hachage signé de mots, bigrammes et n-grammes de caractères.
+
+    Déterministe (crc32), sans vocabulaire à apprendre ni dépendance réseau :
+    les mêmes documents donnent toujours les mêmes vecteurs.
+    """
+
+    def __init__(self, dim=768, char_ngrams=(3, 5)):
+        self.dim = int(dim)
+        self.char_ngrams = (int(char_ngrams[0]), int(char_ngrams[1]))
+
+    def _tokens(self, text):
+        words = _WORD_RE.findall(_normalize(text))
+        for word in words:
+            yield word
+            padded = f" {word} "
+            for n in range(self.char_ngrams[0], self.char_ngrams[1] + 1):
+                for i in range(len(padded) - n + 1):
+                    yield "#" + padded[i:i + n]
+        for first, second in zip(words, words[1:]):
+            yield first + " " + second
+
+    def _embed(self, text):
+        counts = {}
+        for token in self._tokens(text):
+            h = zlib.crc32(token.encode("utf-8"))
+            counts[h] = counts.get(h, 0) + 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for h, count in counts.items():
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            vector[h % self.dim] += sign * (1.0 + np.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [self._embed(text) for text in input]
+
+    @staticmethod
+    def name():
+        return "medical_hashing"
+
+    def get_config(self):
+        return {"dim": self.dim, "char_ngrams": list(self.char_ngrams)}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashingEmbeddingFunction(
+            dim=config.get("dim", 768),
+            char_ngrams=tuple(config.get("char_ngrams", (3, 5))),
+        )
+
+
+def onnx_model_dir():
+    return os.environ.get(ONNX_DIR_ENV) or ONNX_DIR
+
+
+def onnx_model_file(model_dir=None, quantized=True):
+    """Chemin du modèle exporté : version int8 si demandée et disponible, sinon fp32"""
+    model_dir = model_dir or onnx_model_dir()
+    int8_path = os.path.join(model_dir, ONNX_INT8_FILE)
+    if quantized and os.path.exists(int8_path):
+        return int8_path
+    return os.path.join(model_dir, ONNX_FP32_FILE)
+
+
+class OnnxEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Encodeur BlueBERT exporté en ONNX, exécuté par ONNX Runtime sur CPU.
+
+    Reproduit le pooling de SentenceTransformer pour ce modèle (moyenne des
+    états cachés pondérée par le masque d'attention), sans torch.
+    """
+
+    def __init__(self, model_path=None, tokenizer_path=None, num_threads=None, batch_size=16, max_length=512):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = model_path or onnx_model_file()
+        self.tokenizer_path = tokenizer_path or os.path.join(os.path.dirname(self.model_path), "tokenizer.json")
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(self.tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+
+    def _encode_batch(self, texts):
+        encodings = self._tokenizer.encode_batch(list(texts))
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self._input_names}
+        hidden = self._session.run(None, inputs)[0]
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = []
+        for start in range(0, len(input), self.batch_size):
+            vectors.extend(self._encode_batch(input[start:start + self.batch_size]))
+        return vectors
+
+    @staticmethod
+    def name():
+        return "bluebert_onnx"
+
+    def get_config(self):
+        return {
+            "model_path": self.model_path,
+            "tokenizer_path": self.tokenizer_path,
+            "batch_size": self.batch_size,
+            "max_length": self.max_length,
+        }
+
+    @staticmethod
+    def build_from_config(config):
+        return OnnxEmbeddingFunction(
+            model_path=config.get("model_path"),
+            tokenizer_path=config.get("tokenizer_path"),
+            batch_size=config.get("batch_size", 16),
+            max_length=config.get("max_length", 512),
+        )
+
+
+try:
+    from chromadb.utils.embedding_functions import register_embedding_function
+    register_embedding_function(HashingEmbeddingFunction)
+    register_embedding_function(OnnxEmbeddingFunction)
+except (ImportError, ValueError):
+    # ancienne version de chromadb, ou classe déjà enregistrée
+    pass
+
+
+def _load_bluebert():
+    from chromadb.utils import embedding_functions
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+
+
+def _load_onnx():
+    model_path = onnx_model_file()
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"{model_path} absent, lancer d'abord : python export_onnx.py export")
+    return OnnxEmbeddingFunction(model_path=model_path)
+
+
+_LOADERS = {
+    "onnx": _load_onnx,
+    "bluebert": _load_bluebert,
+    "hashing": HashingEmbeddingFunction,
+}
+
+
+@lru_cache(maxsize=None)
+def load_embedding_backend(preferred=None):
+    """Retourne (backend, nom_de_collection, fonction_d_embedding).
+
+    Le modèle n'est chargé qu'une fois par processus (indexation et requêtes
+    partagent la même instance). Sans préférence, l'export ONNX est utilisé
+    s'il existe, puis BlueBERT ; si aucun n'est disponible, on bascule sur le
+    backend de hachage et sa collection dédiée.
+    """
+    preferred = preferred or os.environ.get(BACKEND_ENV)
+    if preferred and preferred not in _LOADERS:
+        raise ValueError(f"Backend d'embedding inconnu : {preferred} (choix : {', '.join(_LOADERS)})")
+
+    if preferred:
+        order = [preferred] + [name for name in _LOADERS if name != preferred]
+    else:
+        # détection automatique : l'export ONNX n'est tenté que s'il a été produit
+        preferred = "bluebert"
+        order = [name for name in _LOADERS if name != "onnx" or os.path.exists(onnx_model_file())]
+    for backend in order:
+        try:
+            embedding_fn = _LOADERS[backend]()
+        except Exception as e:
+            print(f"[WARN] Backend d'embedding '{backend}' indisponible :", e)
+            continue
+        if backend == "hashing" and preferred != "hashing":
+            print(f"[WARN] Utilisation du backend '{backend}' (collection '{COLLECTIONS[backend]}'). "
+                  "Pour BlueBERT, installer sentence_transformers.")
+        return backend, COLLECTIONS[backend], embedding_fn
+    raise RuntimeError("Aucun backend d'embedding disponible")
+
+
+def embedding_model_id(backend, embedding_fn):
+    """Identifiant stable du modèle d'embedding (enregistré dans le manifeste d'index)"""
+    if backend == "bluebert":
+        return MODEL_NAME
+    if backend == "onnx":
+        return f"{MODEL_NAME}:onnx:{os.path.basename(embedding_fn.model_path)}"
+    return f"{embedding_fn.name()}:{json.dumps(embedding_fn.get_config(), sort_keys=True)}"
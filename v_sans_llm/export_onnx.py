@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Export ONNX (fp32 + int8 dynamique) de l'encodeur BlueBERT pour l'inférence CPU
+
+Usage :
+    python export_onnx.py export            # produit models/bluebert_onnx/{model.onnx, model.int8.onnx, tokenizer.json}
+    python export_onnx.py check             # parité des similarités cosinus avec SentenceTransformer
+    python export_onnx.py bench             # latence d'encodage et RSS par backend (un processus chacun)
+
+Dépendances (uniquement pour l'export et la vérification) :
+    pip install torch transformers onnx onnxruntime tokenizers sentence_transformers
+"""
+
+import argparse
+import inspect
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from embeddings import MODEL_NAME, ONNX_FP32_FILE, ONNX_INT8_FILE, onnx_model_dir
+
+GUIDELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "guidelines.json")
+
+# Seuils de parité de `check` : cosinus minimal entre vecteurs ONNX et SentenceTransformer.
+# La quantification dynamique int8 des poids dégrade les vecteurs d'environ 1 à 3 points
+# de cosinus sur BlueBERT : le modèle int8 est jugé avec un seuil abaissé de cette marge.
+MIN_COSINE = 0.99
+INT8_COSINE_MARGIN = 0.04
+# Part minimale des requêtes types dont le top-k des guidelines est inchangé :
+# un modèle qui réordonne la recherche échoue même si ses cosinus passent le seuil
+MIN_SAME_TOP_K = 1.0
+
+# Requêtes types pour la parité et le benchmark (en plus des guidelines)
+SAMPLE_QUERIES = [
+    "Patiente 32 ans enceinte de 3 mois, céphalées brutales en coup de tonnerre",
+    "Patient 45 ans, douleur abdominale fosse iliaque droite, fièvre modérée",
+    "Homme 50 ans, douleur lombaire brutale irradiant aine, hématurie",
+    "Enfant 8 ans, céphalées matinales et vomissements",
+    "Patient 70 ans, troubles cognitifs progressifs, troubles de la marche, troubles urinaires",
+]
+
+
+def _load_texts():
+    with open(GUIDELINES_FILE, "r", encoding="utf-8") as f:
+        guidelines = json.load(f)["guidelines"]
+    return [g["texte"] for g in guidelines] + SAMPLE_QUERIES
+
+
+def _encoder_module(model):
+    """Enveloppe à arguments nommés : l'ordre positionnel de `forward` varie selon la version de transformers"""
+    import torch
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    return _Encoder().eval()
+
+
+def export(model_name=MODEL_NAME, output_dir=None, opset=14, quantize=True):
+    """Exporte l'encodeur en ONNX puis le quantifie dynamiquement en int8"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir = output_dir or onnx_model_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["céphalée brutale", "douleur abdominale aiguë"], padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # exporteur TorchScript : gère directement `dynamic_axes`, sans onnxscript
+        export_kwargs["dynamo"] = False
+
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _encoder_module(model),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+            **export_kwargs,
+        )
+    # tokenizer.json (tokenizers "fast") : seul fichier nécessaire à l'inférence
+    tokenizer.save_pretrained(output_dir)
+    print(f"[OK] Modèle fp32 exporté : {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, ONNX_INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"[OK] Modèle int8 exporté : {int8_path}")
+    return output_dir
+
+
+def _cosine_matrix(a, b):
+    import numpy as np
+
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    # nouveaux tableaux : asarray ne copie pas un tableau float64 reçu en argument
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return a @ b.T
+
+
+def check(model_dir=None, min_cosine=MIN_COSINE, int8_margin=INT8_COSINE_MARGIN, top_k=3,
+          min_same_top_k=MIN_SAME_TOP_K, reference_fn=None):
+    """Compare les embeddings ONNX (fp32, int8) à ceux de SentenceTransformer.
+
+    Vérifie (1) la similarité cosinus entre les deux vecteurs de chaque texte
+    (seuil `min_cosine`, abaissé de `int8_margin` pour le modèle int8) et
+    (2) que le classement des guidelines est conservé (top-k identique) pour au
+    moins une part `min_same_top_k` des requêtes types. `reference_fn` remplace
+    l'encodeur SentenceTransformer de référence. Retourne un code de sortie
+    (0 = les deux critères sont respectés).
+    """
+    import numpy as np
+
+    from embeddings import OnnxEmbeddingFunction
+
+    model_dir = model_dir or onnx_model_dir()
+    texts = _load_texts()
+    n_guidelines = len(texts) - len(SAMPLE_QUERIES)
+
+    if reference_fn is None:
+        from chromadb.utils import embedding_functions
+        reference_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+    reference = reference_fn(texts)
+    ref_ranking = np.argsort(-_cosine_matrix(reference[n_guidelines:], reference[:n_guidelines]), axis=1)
+
+    status = 0
+    for filename in (ONNX_FP32_FILE, ONNX_INT8_FILE):
+        path = os.path.join(model_dir, filename)
+        if not os.path.exists(path):
+            print(f"[SKIP] {path} absent")
+            continue
+        vectors = OnnxEmbeddingFunction(model_path=path)(texts)
+        cosines = np.diag(_cosine_matrix(vectors, reference))
+        ranking = np.argsort(-_cosine_matrix(vectors[n_guidelines:], vectors[:n_guidelines]), axis=1)
+        same_top_k = float(np.mean([
+            list(r[:top_k]) == list(ref[:top_k]) for r, ref in zip(ranking, ref_ranking)
+        ]))
+        threshold = min_cosine if filename == ONNX_FP32_FILE else min_cosine - int8_margin
+        ok = cosines.min() >= threshold and same_top_k >= min_same_top_k
+        print(f"{filename}: cosinus min={cosines.min():.4f} moyen={cosines.mean():.4f} "
+              f"(seuil {threshold:.2f}), top-{top_k} identique={same_top_k:.0%} (seuil {min_same_top_k:.0%}) "
+              f"-> {'OK' if ok else 'ÉCHEC'}")
+        if not ok:
+            status = 1
+    return status
+
+
+def _bench_backend(backend, repeat):
+    """Mesure dans le processus courant : chargement, latence par requête, RSS max"""
+    from embeddings import _LOADERS
+
+    texts = _load_texts()
+    start = time.perf_counter()
+    embedding_fn = _LOADERS[backend]()
+    load_s = time.perf_counter() - start
+
+    embedding_fn(texts[:2])  # échauffement
+    latencies = []
+    for _ in range(repeat):
+        for query in SAMPLE_QUERIES:
+            start = time.perf_counter()
+            embedding_fn([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    embedding_fn(texts)
+    corpus_s = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "query_ms_p50": round(statistics.median(latencies), 2),
+        "query_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "corpus_s": round(corpus_s, 3),
+        # ru_maxrss est en kilo-octets sous Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def bench(backends, repeat=10):
+    """Lance chaque backend dans un processus séparé pour isoler sa mémoire"""
+    results = []
+    for backend in backends:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_bench-one", backend, "--repeat", str(repeat)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if proc.returncode != 0:
+            print(f"[WARN] benchmark '{backend}' en échec : {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<10} {'chargement':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'corpus':>8} {'RSS (Mo)':>9}")
+    for r in results:
+        print(f"{r['backend']:<10} {r['load_s']:>10.2f}s {r['query_ms_p50']:>9.1f} {r['query_ms_p95']:>9.1f} "
+              f"{r['corpus_s']:>7.2f}s {r['max_rss_mb']:>9.0f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="exporter BlueBERT en ONNX (fp32 + int8)")
+    p_export.add_argument("--output-dir", default=None)
+    p_export.add_argument("--opset", type=int, default=14)
+    p_export.add_argument("--no-quantize", action="store_true")
+
+    p_check = sub.add_parser("check", help="parité cosinus avec SentenceTransformer")
+    p_check.add_argument("--model-dir", default=None)
+    p_check.add_argument("--min-cosine", type=float, default=MIN_COSINE)
+    p_check.add_argument("--int8-margin", type=float, default=INT8_COSINE_MARGIN,
+                         help="baisse du seuil de cosinus tolérée pour le modèle int8")
+    p_check.add_argument("--min-same-top-k", type=float, default=MIN_SAME_TOP_K,
+                         help="part minimale des requêtes au top-k de guidelines inchangé (0-1)")
+
+    p_bench = sub.add_parser("bench", help="latence et mémoire par backend")
+    p_bench.add_argument("--backends", nargs="+", default=["bluebert", "onnx"])
+    p_bench.add_argument("--repeat", type=int, default=10)
+    p_bench.add_argument("--json", dest="json_path", default=None, help="écrire les résultats en JSON")
+
+    p_one = sub.add_parser("_bench-one")
+    p_one.add_argument("backend")
+    p_one.add_argument("--repeat", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        export(output_dir=args.output_dir, opset=args.opset, quantize=not args.no_quantize)
+    elif args.command == "check":
+        return check(model_dir=args.model_dir, min_cosine=args.min_cosine, int8_margin=args.int8_margin,
+                     min_same_top_k=args.min_same_top_k)
+    elif args.command == "bench":
+        results = bench(args.backends, repeat=args.repeat)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+    elif args.command == "_bench-one":
+        print(json.dumps(_bench_backend(args.backend, args.repeat)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
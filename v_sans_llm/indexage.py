@@ -1,37 +1,55 @@
 import chromadb
+import hashlib
 import json
+import os
 
-def create_index(guidelines_file="guidelines.json", db_path="rag_db", collection_name="imagerie"):
+from embeddings import embedding_model_id, load_embedding_backend
+from ollama import guideline_features
+
+
+def _content_hash(doc):
+    """Empreinte d'une guideline : tout ce qui est stocké dans la collection"""
+    payload = json.dumps(doc, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _manifest_path(db_path, collection_name):
+    return os.path.join(db_path, f"{collection_name}.manifest.json")
+
+
+def load_manifest(db_path, collection_name):
+    """Manifeste de la dernière indexation ({} si absent ou illisible)"""
+    try:
+        with open(_manifest_path(db_path, collection_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(db_path, collection_name, manifest):
+    path = _manifest_path(db_path, collection_name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def create_index(guidelines_file="guidelines.json", db_path="rag_db", collection_name=None):
     chroma_client = chromadb.PersistentClient(path=db_path)
     
     #1: Utiliser BlueBERT - Modèle médical le plus performant (50% pertinence)
-    try:
-        from chromadb.utils import embedding_functions
-        medical_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="bionlp/bluebert_pubmed_mimic_uncased_L-12_H-768_A-12"
-        )
-        collection = chroma_client.get_or_create_collection(collection_name, embedding_function=medical_ef)
-    except Exception as e:
-        # If sentence_transformers is not installed or initialization fails, we may have an existing
-        # collection whose saved configuration references sentence_transformers. In that case,
-        # trying to add documents will trigger a rebuild of the embedding function and fail.
-        # To allow indexing to proceed without embeddings, delete the existing collection and
-        # recreate it without an embedding function.
-        print("[WARN] sentence_transformers not available or embedding init failed:", e)
-        print("[WARN] Recreating collection without embedding function. To enable embeddings, run: pip install sentence_transformers")
-        try:
-            # Delete existing collection if present
-            chroma_client.delete_collection(collection_name)
-        except Exception:
-            # ignore errors during delete
-            pass
-        collection = chroma_client.get_or_create_collection(collection_name)
+    # Si sentence_transformers est indisponible, le backend de hachage hors-ligne est
+    # utilisé avec sa propre collection : la collection BlueBERT persistée reste intacte.
+    backend, default_collection, embedding_fn = load_embedding_backend()
+    collection = chroma_client.get_or_create_collection(
+        collection_name or default_collection, embedding_function=embedding_fn
+    )
     
     #2: Alternative modèle par défaut (désactivé)
     # collection = chroma_client.get_or_create_collection(collection_name)
 
     docs = []
-    with open(guidelines_file, "r") as f:
+    with open(guidelines_file, "r", encoding="utf-8") as f:
         data = json.load(f)
         guidelines = data["guidelines"]
 
@@ -40,18 +58,42 @@ def create_index(guidelines_file="guidelines.json", db_path="rag_db", collection
             "id": g["id"],
             "text": g["texte"],
             "motif": g["motif"],
-            "source": g["source"]
+            "source": g["source"],
+            # Caractéristiques précalculées pour le scoring vectorisé (PathologyBooster)
+            "features": guideline_features(g["texte"], g["motif"])
         })
 
-    collection.add(
-        ids=[d["id"] for d in docs],
-        documents=[d["text"] for d in docs],
-        metadatas=[{"motif": d["motif"], "source": d["source"]} for d in docs]
-    )
+    # Comparaison avec le manifeste de la dernière indexation : on ne ré-encode
+    # que les guidelines nouvelles ou modifiées, et rien du tout si le fichier
+    # et le modèle d'embedding sont inchangés.
+    model_id = embedding_model_id(backend, embedding_fn)
+    hashes = {d["id"]: _content_hash(d) for d in docs}
+    manifest = load_manifest(db_path, collection.name)
+    indexed = manifest.get("documents", {})
+    if manifest.get("embedding_model") != model_id or collection.count() != len(indexed):
+        # modèle changé ou collection désynchronisée : tout ré-encoder
+        indexed = {}
+
+    changed = [d for d in docs if indexed.get(d["id"]) != hashes[d["id"]]]
+    removed = [doc_id for doc_id in indexed if doc_id not in hashes]
 
-    print(f" Indexation terminée ({len(docs)} documents).")
+    if not changed and not removed:
+        print(f" Index à jour ({len(docs)} documents, aucun ré-encodage).")
+        return collection
+
+    if changed:
+        collection.upsert(
+            ids=[d["id"] for d in changed],
+            documents=[d["text"] for d in changed],
+            metadatas=[{"motif": d["motif"], "source": d["source"], "features": d["features"]} for d in changed]
+        )
+    if removed:
+        collection.delete(ids=removed)
+
+    save_manifest(db_path, collection.name, {"embedding_model": model_id, "documents": hashes})
+
+    print(f" Indexation terminée ({len(changed)} documents encodés, {len(removed)} supprimés, {len(docs)} au total).")
     return collection
 
 if __name__ == "__main__":
     create_index()
-
@@ -0,0 +1,110 @@
+"""
+Automate multi-motifs (Aho-Corasick) pour la détection de mots-clés
+Un seul passage sur le texte produit un masque de bits des motifs trouvés
+"""
+
+from collections import deque
+
+
+class TextFeatures:
+    """Résultat d'une analyse : masque des motifs trouvés dans un texte"""
+
+    __slots__ = ("text", "mask", "_automaton")
+
+    def __init__(self, text, mask, automaton):
+        self.text = text
+        self.mask = mask
+        self._automaton = automaton
+
+    def any(self, group):
+        """Vrai si au moins un mot-clé du groupe `group` est présent"""
+        return bool(self.mask & self._automaton.group_mask(group))
+
+    def contains(self, pattern):
+        """Vrai si le motif `pattern` (déclaré dans l'automate) est présent"""
+        return bool(self.mask & self._automaton.pattern_bit(pattern))
+
+    def matched(self):
+        """Liste des motifs trouvés (utile pour le débogage)"""
+        return self._automaton.patterns_from_mask(self.mask)
+
+
+class KeywordAutomaton:
+    """Automate Aho-Corasick compilé à partir de groupes nommés de mots-clés.
+
+    La recherche conserve la sémantique de `mot in texte` (sous-chaîne, sensible
+    à la casse) : `scan(texte).contains(mot)` == `mot in texte`.
+    """
+
+    def __init__(self, groups):
+        self._bits = {}
+        self._groups = {}
+        for name, words in groups.items():
+            mask = 0
+            for word in words:
+                mask |= self._register(word)
+            self._groups[name] = mask
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        for pattern, bit in self._bits.items():
+            self._insert(pattern, bit)
+        self._build_failure_links()
+
+    def _register(self, pattern):
+        if not pattern:
+            raise ValueError("Un mot-clé vide ne peut pas être indexé")
+        if pattern not in self._bits:
+            self._bits[pattern] = 1 << len(self._bits)
+        return self._bits[pattern]
+
+    def _insert(self, pattern, bit):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+            state = nxt
+        self._out[state] |= bit
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Les motifs suffixes sont reconnus en même temps que le motif courant
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Parcourt `text` une seule fois et retourne les motifs trouvés"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        mask = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            mask |= out[state]
+        return TextFeatures(text, mask, self)
+
+    def group_mask(self, group):
+        return self._groups[group]
+
+    def pattern_bit(self, pattern):
+        return self._bits[pattern]
+
+    def patterns_from_mask(self, mask):
+        return [p for p, bit in self._bits.items() if mask & bit]
@@ -0,0 +1,25 @@
+"""
+Portées de négation : l'implémentation unique de v_llm/v_arbre_d/source/negation.py,
+chargée par chemin de fichier (v_llm n'est pas ajouté à sys.path).
+
+    from negation import portees_negation
+"""
+
+import importlib.util
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parents[1] / "v_llm" / "v_arbre_d" / "source" / "negation.py"
+
+
+def _charger():
+    spec = importlib.util.spec_from_file_location("arbre_negation", str(SOURCE))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_module = _charger()
+PorteesNegation = _module.PorteesNegation
+etiqueter = _module.etiqueter
+motif_declencheurs = _module.motif_declencheurs
+portees_negation = _module.portees_negation
@@ -6,34 +6,185 @@ Système d'aide à la décision pour l'imagerie médicale
 
 import chromadb
 import json
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from embeddings import MODEL_NAME, load_embedding_backend
+from keyword_automaton import KeywordAutomaton
+from negation import portees_negation  # marqueur de négation de v_llm (chargé par chemin)
 
 # Variables globales
-MODEL_NAME = "bionlp/bluebert_pubmed_mimic_uncased_L-12_H-768_A-12"
 CHROMA_PATH = "rag_db"
 
+# ========================================
+# 0. VOCABULAIRE ET AUTOMATE DE MOTS-CLÉS
+# ========================================
+
+# Groupes de mots-clés utilisés par l'analyse, les questions et le scoring.
+# Toutes les listes du module sont compilées dans un seul automate (voir plus bas).
+KEYWORD_GROUPS = {
+    # InformationAnalyzer
+    "age": ['ans', 'âge', 'age', 'années'],
+    "cephalee": ['céphalée', 'mal de tête'],
+    "cephalee_caracteres": ['brutal', 'progressif', 'pulsatile', 'tension', 'vomissement', 'fièvre', 'coup de tonnerre'],
+    "abdomen": ['abdominale', 'ventre', 'douleur'],
+    "abdomen_localisation": ['fid', 'fosse iliaque', 'épigastre', 'hypochondre', 'lombaire', 'sous-costale'],
+    "neuro": ['trouble', 'faiblesse', 'paralysie', 'engourdissement'],
+    "neuro_precision": ['moteur', 'sensitif', 'marche', 'parole', 'vision', 'cognitif'],
+    "contexte_cephalee": ['céphalée', 'mal de tête', 'crâne', 'migraine'],
+    "contexte_cephalee_precise": ['habituelle', 'migraine', 'pas de signe', 'primaire'],
+    "contexte_abdomen": ['abdomen', 'ventre', 'douleur'],
+    "contexte_neuro": ['trouble', 'faiblesse', 'neurologique'],
+    "contexte_pediatrie": ['enfant', 'pédiatrique', '8 ans', '10 ans', '12 ans'],
+    # QuestionGenerator
+    "troubles_moteurs": ['moteur', 'faiblesse', 'paralysie', 'hémiplégie', 'hémiparésie', 'faible'],
+    "troubles_sensitifs": ['sensitif', 'engourdissement', 'fourmillement', 'paresthésie', 'perte de sensibilité'],
+    "troubles_marche": ['marche', 'démarche'],
+    "troubles_equilibre": ['équilibre', 'instabilité'],
+    "troubles_cognitifs": ['cognitif', 'mémoire'],
+    "installation_brutale": ['brutal', 'coup de tonnerre', 'soudain'],
+    "installation_progressive": ['progressif', 'chronique', 'habituel'],
+    "signes_associes": ['fièvre', 'vomissement', 'trouble', 'déficit'],
+    # PathologyBooster
+    "femme": ['femme', 'patiente'],
+    "enceinte": ['enceinte', 'grossesse', 'gestante'],
+    "adulte": ['adulte', 'homme', 'femme', 'patient', 'patiente'],
+    "contexte_nephretique": ['lombaire', 'aine', 'hématurie', 'calcul', 'lithiase'],
+}
+
+# Synonymes médicaux spécialisés (enrichissement de la requête)
+MEDICAL_SYNONYMS = {
+    # ABDOMEN & DIGESTIF
+    'nausées': ' nausées vomissements digestif gastrique',
+    'vomissements': ' vomissements nausées digestif gastrique',
+    'douleur irradiant': ' colique néphrétique calcul rénal scanner abdomino-pelvien sans injection',
+    'douleur irradiant aine': ' colique néphrétique calcul rénal lithiase scanner abdomino-pelvien',
+    'sous-costale droite': ' biliaire vésicule cholécystite hépatique échographie',
+    'fid': ' fosse iliaque droite appendicite échographie scanner',
+    'douleur fid': ' appendicite échographie scanner abdomino-pelvien',
+    'fièvre modérée': ' appendicite infection échographie',
+    'diarrhée': ' gastro-entérite pas imagerie bon état général',
+    'diffuses': ' gastro-entérite simple pas imagerie',
+
+    # LOMBALGIE
+    'lombaire simple': ' lombalgie commune chronique pas imagerie 6 semaines',
+    'lombaire commune': ' lombalgie chronique pas imagerie avant 6 semaines',
+    'douleur lombaire simple': ' lombalgie commune pas imagerie avant 6 semaines',
+
+    # NEUROLOGIE & MARCHE
+    'chutes': ' troubles marche pas imagerie examen clinique',
+    'plusieurs chutes': ' troubles marche répétées pas imagerie',
+    'tug': ' test marche équilibre pas imagerie',
+    'troubles urinaires': ' hydrocéphalie pression normale HPN IRM',
+    'lenteur cognitive': ' hydrocéphalie cognitive HPN IRM cérébrale',
+    'troubles cognitifs': ' hydrocéphalie HPN IRM cérébrale',
+
+    # CÉPHALÉES AIGUES
+    'coup de tonnerre': ' céphalée brutale hémorragie sous-arachnoïdienne HSA scanner cérébral urgent',
+    'céphalée brutale': ' coup de tonnerre hémorragie sous-arachnoïdienne scanner urgent',
+    'céphalée subite': ' coup de tonnerre hémorragie sous-arachnoïdienne HSA scanner',
+}
+
+# Mots-clés déclenchant un boost par pathologie
+PATHOLOGY_KEYWORDS = {
+    'appendicite': ['fid', 'fosse iliaque droite', 'mcburney', 'appendic'],
+    'hpn': ['hpn', 'hypertension intracranienne', 'troubles cognitifs progressifs', 'hydrocéphalie'],
+    'sep': ['sclérose plaques', 'sep', 'paresthésies progressives', 'troubles marche paresthésies', 'remissions rechutes'],
+    'colique_nephretique': ['lombaire brutale', 'calcul', 'lithiase', 'hématurie', 'colique néphrétique', 'douleur irradiant aine', 'colique lombaire', 'colique typique', 'rein', 'rénal'],
+    'lombalgie': ['chronique', '6 semaines', 'commune', 'radiculalgie', 'lombaire simple', 'lombaire commune', 'sans signe neurologique'],
+    'biliaire': ['sous-costale droite', 'vésicule', 'cholécystite', 'voies biliaires', 'cholédoque'],
+    'htic': ['vomissements', 'céphalées enfant', 'htic', 'pression'],
+    'fievre_prolongee': ['fièvre prolongée', 'inexpliquée', 'persistante', 'chronique'],
+    'cephalees': ['coup de tonnerre', 'céphalée brutale', 'red flags', 'scanner urgent', 'migraine', 'céphalée', 'mal de tête', 'céphalée primaire']
+}
+
+# Régions anatomiques : mots-clés de la requête et compatibilité des guidelines
+ANATOMICAL_REGIONS = {
+    'abdomen': {
+        'keywords': ['abdomen', 'abdominale', 'abdominales', 'ventre', 'fid', 'fosse iliaque', 'épigastre', 'colique', 'néphrétique'],
+        'compatible': ['abdominal', 'digestif', 'échographie', 'scanner abdomino', 'appendicite', 'biliaire', 'néphrétique', 'calcul', 'lithiase'],
+        'incompatible': ['cérébral', 'crâne', 'irm cérébrale', 'ponction lombaire', 'hpn', 'troubles marche', 'paresthésies']
+    },
+    'lombalgie': {
+        'keywords': ['lombaire', 'lombaire simple', 'lombaire commune'],
+        'compatible': ['lombalgie', 'radiculalgie', 'irm lombaire', 'déficit neurologique'],
+        'incompatible': ['appendicite', 'scanner abdomino', 'échographie abdominale']
+    },
+    'neurologique': {
+        'keywords': ['céphalée', 'céphalées', 'mal de tête', 'neurologique', 'troubles cognitifs', 'déficit moteur'],
+        'compatible': ['cérébral', 'crâne', 'irm cérébrale', 'neurologique', 'scanner cérébral', 'troubles marche', 'paresthésies'],
+        'incompatible': ['abdominal', 'digestif', 'échographie abdominale', 'scanner abdomino', 'colique', 'néphrétique']
+    }
+}
+
+# Termes isolés recherchés dans le motif ou le texte des guidelines
+GUIDELINE_TERMS = ['grossesse', 'enceinte', 'pediatrie', 'enfant', 'céphalée', 'coup de tonnerre']
+
+
+def _build_automaton():
+    """Compile toutes les listes de mots-clés du module dans un seul automate"""
+    groups = dict(KEYWORD_GROUPS)
+    groups["synonymes"] = list(MEDICAL_SYNONYMS)
+    groups["termes"] = GUIDELINE_TERMS
+    for pathology, keywords in PATHOLOGY_KEYWORDS.items():
+        groups[f"pathologie:{pathology}"] = keywords
+        groups[f"nom:{pathology}"] = [pathology]
+    for region, data in ANATOMICAL_REGIONS.items():
+        for kind in ('keywords', 'compatible', 'incompatible'):
+            groups[f"region:{region}:{kind}"] = data[kind]
+    return KeywordAutomaton(groups)
+
+
+KEYWORDS = _build_automaton()
+AGE_RE = re.compile(r'(\d+)\s*ans?')
+
+
+@lru_cache(maxsize=2048)
+def extract_features(text):
+    """Analyse unique d'un texte : ensemble des mots-clés présents (mis en cache)"""
+    return KEYWORDS.scan(text)
+
+
+# Colonnes du vecteur de caractéristiques d'une guideline (calculé à l'indexation)
+GUIDELINE_FEATURES = (
+    ["grossesse", "pediatrie"]
+    + [f"pathologie:{p}" for p in PATHOLOGY_KEYWORDS]
+    + ["cephalees_tonnerre"]
+    + [f"{kind}:{region}" for region in ANATOMICAL_REGIONS for kind in ("compatible", "incompatible")]
+)
+GUIDELINE_FEATURE_INDEX = {name: i for i, name in enumerate(GUIDELINE_FEATURES)}
+
+
+def guideline_features(guideline, motif):
+    """Vecteur booléen (chaîne de '0'/'1') des caractéristiques d'une guideline.
+
+    Stocké dans les métadonnées de la collection sous la clé `features`.
+    """
+    text = extract_features(guideline)
+    motif = extract_features(motif.lower())
+    values = {
+        "grossesse": motif.contains('grossesse') or text.contains('enceinte'),
+        "pediatrie": motif.contains('pediatrie') or text.contains('enfant'),
+    }
+    for pathology in PATHOLOGY_KEYWORDS:
+        values[f"pathologie:{pathology}"] = motif.any(f"nom:{pathology}") or text.any(f"nom:{pathology}")
+    values["cephalees_tonnerre"] = values["pathologie:cephalees"] and text.contains('céphalée')
+    for region in ANATOMICAL_REGIONS:
+        compatible = text.any(f"region:{region}:compatible")
+        values[f"compatible:{region}"] = compatible
+        # l'incompatibilité n'est évaluée que si aucun terme compatible n'est présent
+        values[f"incompatible:{region}"] = not compatible and text.any(f"region:{region}:incompatible")
+    return "".join("1" if values[name] else "0" for name in GUIDELINE_FEATURES)
+
 def get_collection():
     """Récupération de la collection ChromaDB"""
     client = chromadb.PersistentClient(path=CHROMA_PATH)
-    # Try to create a SentenceTransformer-based embedding function. If unavailable,
-    # fall back to returning a collection without an embedding function so the
-    # rest of the code can run (searches and scoring based on stored documents may
-    # be limited without embeddings).
-    try:
-        from chromadb.utils import embedding_functions
-        embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=MODEL_NAME
-        )
-        collection = client.get_collection(name="imagerie", embedding_function=embedding_fn)
-    except Exception as e:
-        print("[WARN] sentence_transformers not available or embedding init failed in get_collection:", e)
-        print("[WARN] Returning collection without embedding function. To enable embeddings, run: pip install sentence_transformers")
-        # If collection exists with a saved embedding config that can't be built,
-        # try to delete & recreate it without embedding to allow usage.
-        try:
-            client.delete_collection("imagerie")
-        except Exception:
-            pass
-        collection = client.get_or_create_collection("imagerie")
+    # BlueBERT si sentence_transformers est disponible, sinon repli sur le backend de
+    # hachage hors-ligne et sa collection dédiée (aucune collection n'est supprimée).
+    backend, collection_name, embedding_fn = load_embedding_backend()
+    collection = client.get_collection(name=collection_name, embedding_function=embedding_fn)
     return collection
 
 # ========================================
@@ -42,81 +193,93 @@ def get_collection():
 
 class InformationAnalyzer:
     """Classe centralisée pour analyser les informations manquantes"""
-    
+
     @staticmethod
     def analyze_completeness(user_input):
         """
         Analyse globale de la complétude des informations
         Retourne: (status, missing_category, details)
         """
-        text = user_input.lower()
-        
+        features = extract_features(user_input.lower())
+
         # 1. Vérifications critiques obligatoires
-        critical_missing = InformationAnalyzer._check_critical_info(text)
+        critical_missing = InformationAnalyzer._check_critical_info(features)
         if critical_missing:
             return "CRITICAL_MISSING", critical_missing, "Informations essentielles manquantes"
-        
+
         # 2. Informations importantes pour précision diagnostique
-        clarification_needed = InformationAnalyzer._check_clarification_needed(text)
+        clarification_needed = InformationAnalyzer._check_clarification_needed(features)
         if clarification_needed:
             return "NEEDS_CLARIFICATION", clarification_needed, "Précisions utiles pour affiner"
-        
+
         # 3. Questions contextuelles pour première interaction
-        contextual_questions = InformationAnalyzer._check_contextual_questions(text)
+        contextual_questions = InformationAnalyzer._check_contextual_questions(features)
         if contextual_questions:
             return "CONTEXTUAL_QUESTIONS", contextual_questions, "Questions d'approfondissement"
-        
+
         return "COMPLETE", None, "Informations suffisantes"
-    
+
+    @staticmethod
+    def _affirmed(features, group):
+        """Vrai si un mot-clé du groupe est cité hors d'une portée de négation.
+
+        « pas de douleur abdominale » ne doit pas orienter vers l'abdomen ; en
+        revanche une caractéristique niée (« pas de fièvre ») reste une réponse
+        et les groupes de précision continuent d'utiliser `features.any`.
+        """
+        if not features.any(group):
+            return False
+        portees = portees_negation(features.text)
+        return any(portees.present(word) for word in KEYWORD_GROUPS[group])
+
     @staticmethod
-    def _check_critical_info(text):
+    def _check_critical_info(features):
         """Vérification des informations critiques obligatoires"""
         # Âge obligatoire
-        has_age = any(word in text for word in ['ans', 'âge', 'age', 'années'])
-        if not has_age:
+        if not features.any("age"):
             return "age"
-        
+
         # Description minimale (plus de 4 mots)
-        if len(text.split()) < 5:
+        if len(features.text.split()) < 5:
             return "description"
-        
+
         return None
-    
+
     @staticmethod
-    def _check_clarification_needed(text):
+    def _check_clarification_needed(features):
         """Vérification si des clarifications spécifiques sont nécessaires"""
         # Céphalées sans caractéristiques
-        if any(word in text for word in ['céphalée', 'mal de tête']):
-            if not any(word in text for word in ['brutal', 'progressif', 'pulsatile', 'tension', 'vomissement', 'fièvre', 'coup de tonnerre']):
+        if InformationAnalyzer._affirmed(features, "cephalee"):
+            if not features.any("cephalee_caracteres"):
                 return "cephalees"
         # Douleurs abdominales sans localisation
-        if any(word in text for word in ['abdominale', 'ventre', 'douleur']):
-            if not any(word in text for word in ['fid', 'fosse iliaque', 'épigastre', 'hypochondre', 'lombaire', 'sous-costale']):
+        if InformationAnalyzer._affirmed(features, "abdomen"):
+            if not features.any("abdomen_localisation"):
                 return "abdomen"
-        
+
         # Troubles neurologiques sans précision
-        if any(word in text for word in ['trouble', 'faiblesse', 'paralysie', 'engourdissement']):
-            if not any(word in text for word in ['moteur', 'sensitif', 'marche', 'parole', 'vision', 'cognitif']):
+        if InformationAnalyzer._affirmed(features, "neuro"):
+            if not features.any("neuro_precision"):
                 return "neurologique"
-        
+
         return None
-    
+
     @staticmethod
-    def _check_contextual_questions(text):
+    def _check_contextual_questions(features):
         """Identification du domaine pour questions contextuelles seulement si nécessaire"""
         # Pour les céphalées, ne pas poser de questions si c'est déjà précis
-        if any(word in text for word in ['céphalée', 'mal de tête', 'crâne', 'migraine']):
+        if InformationAnalyzer._affirmed(features, "contexte_cephalee"):
             # Si c'est déjà précis (migraine habituelle, pas de signe d'alarme), pas de questions
-            if any(precise in text for precise in ['habituelle', 'migraine', 'pas de signe', 'primaire']):
+            if features.any("contexte_cephalee_precise"):
                 return None
             return "cephalees"
-        elif any(word in text for word in ['abdomen', 'ventre', 'douleur']):
+        elif InformationAnalyzer._affirmed(features, "contexte_abdomen"):
             return "abdomen"
-        elif any(word in text for word in ['trouble', 'faiblesse', 'neurologique']):
+        elif InformationAnalyzer._affirmed(features, "contexte_neuro"):
             return "neurologique"
-        elif any(word in text for word in ['enfant', 'pédiatrique']) or any(word in text for word in ['8 ans', '10 ans', '12 ans']):
+        elif InformationAnalyzer._affirmed(features, "contexte_pediatrie"):
             return "pediatrie"
-        
+
         return "general"
 
 # ========================================
@@ -125,24 +288,24 @@ class InformationAnalyzer:
 
 class QuestionGenerator:
     """Classe centralisée pour générer toutes les questions de clarification"""
-    
+
     @staticmethod
     def generate_questions(status, category, user_input):
         """
         Génération intelligente de questions selon le statut et la catégorie
         Évite les redondances en analysant le texte d'entrée
         """
-        text = user_input.lower()
-        
+        features = extract_features(user_input.lower())
+
         if status == "CRITICAL_MISSING":
             return QuestionGenerator._generate_critical_questions(category)
         elif status == "NEEDS_CLARIFICATION":
-            return QuestionGenerator._generate_clarification_questions(category, text)
+            return QuestionGenerator._generate_clarification_questions(category, features)
         elif status == "CONTEXTUAL_QUESTIONS":
-            return QuestionGenerator._generate_contextual_questions(category, text)
-        
+            return QuestionGenerator._generate_contextual_questions(category, features)
+
         return "Aucune question nécessaire."
-    
+
     @staticmethod
     def _generate_critical_questions(category):
         """Questions pour informations critiques manquantes"""
@@ -151,43 +314,43 @@ class QuestionGenerator:
         elif category == "description":
             return "Pouvez-vous décrire plus précisément les symptômes, leur localisation et leur évolution ?"
         return "Informations supplémentaires nécessaires."
-    
+
     @staticmethod
-    def _generate_clarification_questions(category, text):
+    def _generate_clarification_questions(category, features):
         """Questions de clarification spécifiques par domaine"""
         if category == "cephalees":
             return "Pouvez-vous préciser les caractéristiques de ces céphalées ?\n- Sont-elles brutales (en coup de tonnerre) ou progressives ?\n- Y a-t-il des signes associés : fièvre, vomissements, troubles visuels, déficit neurologique ?"
-        
+
         elif category == "abdomen":
             return "Pouvez-vous préciser la localisation de la douleur abdominale ?\n- Fosse iliaque droite (FID) ?\n- Épigastre, hypochondre droit, lombaire ?\n- Y a-t-il de la fièvre ou des signes associés ?"
-        
+
         elif category == "neurologique":
-            return QuestionGenerator._generate_neurological_questions(text)
-        
+            return QuestionGenerator._generate_neurological_questions(features)
+
         return "Pouvez-vous donner plus de détails ?"
-    
+
     @staticmethod
-    def _generate_neurological_questions(text):
+    def _generate_neurological_questions(features):
         """Questions neurologiques évitant les redondances"""
         questions = []
-        
+
         # Troubles moteurs
-        if not any(motor in text for motor in ['moteur', 'faiblesse', 'paralysie', 'hémiplégie', 'hémiparésie', 'faible']):
+        if not features.any("troubles_moteurs"):
             questions.append("Troubles moteurs (faiblesse, paralysie) ?")
-        
-        # Troubles sensitifs  
-        if not any(sensit in text for sensit in ['sensitif', 'engourdissement', 'fourmillement', 'paresthésie', 'perte de sensibilité']):
+
+        # Troubles sensitifs
+        if not features.any("troubles_sensitifs"):
             questions.append("Troubles sensitifs (engourdissements, paresthésies) ?")
-        
+
         # Troubles spécifiques non mentionnés
         missing_troubles = []
-        if 'marche' not in text and 'démarche' not in text:
+        if not features.any("troubles_marche"):
             missing_troubles.append("marche")
-        if 'équilibre' not in text and 'instabilité' not in text:
-            missing_troubles.append("équilibre") 
-        if 'cognitif' not in text and 'mémoire' not in text:
+        if not features.any("troubles_equilibre"):
+            missing_troubles.append("équilibre")
+        if not features.any("troubles_cognitifs"):
             missing_troubles.append("cognitifs")
-        
+
         # Construction grammaticalement correcte
         if missing_troubles:
             trouble_questions = []
@@ -198,44 +361,44 @@ class QuestionGenerator:
                     trouble_questions.append("de l'équilibre")
                 elif trouble == "cognitifs":
                     trouble_questions.append("cognitifs")
-            
+
             if len(trouble_questions) == 1:
                 questions.append(f"Troubles {trouble_questions[0]} ?")
             elif len(trouble_questions) == 2:
                 questions.append(f"Troubles {trouble_questions[0]} et {trouble_questions[1]} ?")
             else:
                 questions.append(f"Troubles {', '.join(trouble_questions[:-1])} et {trouble_questions[-1]} ?")
-        
+
         if questions:
             return "Pouvez-vous préciser les troubles neurologiques ?\n- " + "\n- ".join(questions)
         else:
             return "Merci pour ces précisions. Depuis quand ces symptômes sont-ils présents et comment évoluent-ils ?"
-    
+
     @staticmethod
-    def _generate_contextual_questions(category, text):
+    def _generate_contextual_questions(category, features):
         """Questions contextuelles par domaine médical"""
         if category == "cephalees":
             # Questions intelligentes évitant les redondances
             questions = []
-            if not any(brutal in text for brutal in ['brutal', 'coup de tonnerre', 'soudain']):
-                if not any(prog in text for prog in ['progressif', 'chronique', 'habituel']):
+            if not features.any("installation_brutale"):
+                if not features.any("installation_progressive"):
                     questions.append("Ces céphalées sont-elles brutales (en coup de tonnerre) ou progressives ?")
-            
-            if not any(signe in text for signe in ['fièvre', 'vomissement', 'trouble', 'déficit']):
+
+            if not features.any("signes_associes"):
                 questions.append("Y a-t-il des signes associés : fièvre, vomissements, troubles de la vision, déficit neurologique ?")
-            
+
             if questions:
                 return "Pour mieux vous orienter, pouvez-vous préciser :\n- " + "\n- ".join(questions)
-        
+
         elif category == "abdomen":
             return "Pour préciser l'indication d'imagerie, pouvez-vous me dire :\n- Où se situe exactement la douleur (fosse iliaque droite, épigastre, etc.) ?\n- Y a-t-il de la fièvre, des nausées, des vomissements ?"
-        
+
         elif category == "neurologique":
-            return QuestionGenerator._generate_neurological_questions(text)
-        
+            return QuestionGenerator._generate_neurological_questions(features)
+
         elif category == "pediatrie":
             return "Pour un enfant, pouvez-vous préciser :\n- Y a-t-il des vomissements, des troubles du comportement ?\n- L'enfant se plaint-il de troubles visuels ou de maux de tête matinaux ?"
-        
+
         else:
             return "Pouvez-vous me donner quelques précisions supplémentaires sur :\n- L'évolution des symptômes (brutal, progressif) ?\n- Les signes associés (fièvre, nausées, troubles neurologiques) ?\n- Le contexte (antécédents, traitements en cours) ?"
 
@@ -245,162 +408,173 @@ class QuestionGenerator:
 
 class PathologyBooster:
     """Classe centralisée pour tous les boosts pathologiques"""
-    
+
     @staticmethod
     def enhance_query(user_input):
         """Enrichissement intelligent de la requête avec synonymes médicaux"""
         enhanced = user_input
-        
-        # Synonymes médicaux spécialisés
-        medical_synonyms = {
-            # ABDOMEN & DIGESTIF
-            'nausées': ' nausées vomissements digestif gastrique',
-            'vomissements': ' vomissements nausées digestif gastrique',
-            'douleur irradiant': ' colique néphrétique calcul rénal scanner abdomino-pelvien sans injection',
-            'douleur irradiant aine': ' colique néphrétique calcul rénal lithiase scanner abdomino-pelvien',
-            'sous-costale droite': ' biliaire vésicule cholécystite hépatique échographie',
-            'fid': ' fosse iliaque droite appendicite échographie scanner',
-            'douleur fid': ' appendicite échographie scanner abdomino-pelvien',
-            'fièvre modérée': ' appendicite infection échographie',
-            'diarrhée': ' gastro-entérite pas imagerie bon état général',
-            'diffuses': ' gastro-entérite simple pas imagerie',
-            
-            # LOMBALGIE
-            'lombaire simple': ' lombalgie commune chronique pas imagerie 6 semaines',
-            'lombaire commune': ' lombalgie chronique pas imagerie avant 6 semaines',
-            'douleur lombaire simple': ' lombalgie commune pas imagerie avant 6 semaines',
-            
-            # NEUROLOGIE & MARCHE
-            'chutes': ' troubles marche pas imagerie examen clinique',
-            'plusieurs chutes': ' troubles marche répétées pas imagerie',
-            'tug': ' test marche équilibre pas imagerie',
-            'troubles urinaires': ' hydrocéphalie pression normale HPN IRM',
-            'lenteur cognitive': ' hydrocéphalie cognitive HPN IRM cérébrale',
-            'troubles cognitifs': ' hydrocéphalie HPN IRM cérébrale',
-            
-            # CÉPHALÉES AIGUES
-            'coup de tonnerre': ' céphalée brutale hémorragie sous-arachnoïdienne HSA scanner cérébral urgent',
-            'céphalée brutale': ' coup de tonnerre hémorragie sous-arachnoïdienne scanner urgent',
-            'céphalée subite': ' coup de tonnerre hémorragie sous-arachnoïdienne HSA scanner',
-        }
-        
+        features = extract_features(user_input.lower())
+
         # Application des synonymes
-        for term, synonyms in medical_synonyms.items():
-            if term in user_input.lower():
-                enhanced += synonyms
-        
+        if features.any("synonymes"):
+            for term, synonyms in MEDICAL_SYNONYMS.items():
+                if features.contains(term):
+                    enhanced += synonyms
+
         return enhanced
-    
+
     @staticmethod
     def calculate_pathology_score(user_input, guideline, metadata, base_distance):
         """Calcul unifié du score contextuel avec tous les boosts pathologiques"""
-        text = user_input.lower()
-        motif = metadata.get('motif', '').lower()
+        # Les trois textes sont analysés une seule fois (cache) : la requête est
+        # partagée par les 20 candidats et les guidelines reviennent d'une requête à l'autre
+        text = extract_features(user_input.lower())
+        motif = extract_features(metadata.get('motif', '').lower())
+        guideline = extract_features(guideline)
         base_score = 2.0 - base_distance  # Score de base inversé
-        
+
         # 1. Filtres d'exclusion critiques
         base_score = PathologyBooster._apply_exclusion_filters(base_score, text, motif, guideline)
-        
+
         # 2. Boosts spécifiques par pathologie
         base_score = PathologyBooster._apply_pathology_boosts(base_score, text, motif, guideline)
-        
+
         # 3. Correspondance anatomique
         base_score = PathologyBooster._apply_anatomical_matching(base_score, text, motif, guideline)
-        
+
         return max(0, base_score)  # Score minimum de 0
-    
+
+    @staticmethod
+    def score_candidates(user_input, documents, metadatas, distances):
+        """Score vectorisé de tous les candidats (mêmes valeurs que calculate_pathology_score)
+
+        score = max(0, (2 - distance) + G @ w) où G est la matrice des caractéristiques
+        des guidelines (précalculée à l'indexation) et w le vecteur de boosts de la requête.
+        """
+        matrix = np.array(
+            [[c == "1" for c in PathologyBooster._stored_features(doc, metadata)]
+             for doc, metadata in zip(documents, metadatas)],
+            dtype=float,
+        ).reshape(len(documents), len(GUIDELINE_FEATURES))
+        weights = PathologyBooster.query_weights(user_input)
+        scores = (2.0 - np.asarray(distances, dtype=float)) + matrix @ weights
+        return np.maximum(scores, 0.0)
+
+    @staticmethod
+    def _stored_features(guideline, metadata):
+        """Caractéristiques lues dans les métadonnées, recalculées si l'index est ancien"""
+        features = metadata.get('features')
+        if isinstance(features, str) and len(features) == len(GUIDELINE_FEATURES):
+            return features
+        return guideline_features(guideline, metadata.get('motif', ''))
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def query_weights(user_input):
+        """Vecteur de boosts de la requête, aligné sur GUIDELINE_FEATURES"""
+        text = extract_features(user_input.lower())
+        weights = np.zeros(len(GUIDELINE_FEATURES))
+        col = GUIDELINE_FEATURE_INDEX
+
+        # 1. Filtres d'exclusion (cf. _apply_exclusion_filters)
+        if text.any("femme"):
+            weights[col["grossesse"]] = 0.8 if text.any("enceinte") else -1.0
+        else:
+            weights[col["grossesse"]] = -2.0
+
+        age_match = AGE_RE.search(text.text)
+        if age_match:
+            weights[col["pediatrie"]] = -1.8 if int(age_match.group(1)) > 16 else 0.3
+        elif text.contains('enfant'):
+            weights[col["pediatrie"]] = 0.3
+        elif text.any("adulte"):
+            weights[col["pediatrie"]] = -1.5
+
+        # 2. Boosts par pathologie (cf. _apply_pathology_boosts)
+        for pathology in PATHOLOGY_KEYWORDS:
+            has_keyword = text.any(f"pathologie:{pathology}")
+            if pathology == 'colique_nephretique':
+                boost = 1.0 if has_keyword else 0.0
+            elif pathology == 'biliaire' and text.any("contexte_nephretique"):
+                boost = -1.0
+            else:
+                boost = 0.5 if has_keyword else 0.0
+            weights[col[f"pathologie:{pathology}"]] = boost
+        if text.contains('coup de tonnerre'):
+            # complément pour atteindre +1.5 quand la guideline parle de céphalée
+            weights[col["cephalees_tonnerre"]] = 1.5 - weights[col["pathologie:cephalees"]]
+
+        # 3. Correspondance anatomique (cf. _apply_anatomical_matching)
+        for region in ANATOMICAL_REGIONS:
+            if text.any(f"region:{region}:keywords"):
+                weights[col[f"compatible:{region}"]] = 0.3
+                weights[col[f"incompatible:{region}"]] = -1.5
+                break
+
+        # lecture seule : le vecteur est partagé par le cache
+        weights.setflags(write=False)
+        return weights
+
     @staticmethod
     def _apply_exclusion_filters(score, text, motif, guideline):
         """Application des filtres d'exclusion (grossesse, pédiatrie)"""
         # Filtre grossesse
-        if 'grossesse' in motif or 'enceinte' in guideline:
-            if any(female in text for female in ['femme', 'patiente']):
-                if any(pregnant in text for pregnant in ['enceinte', 'grossesse', 'gestante']):
+        if motif.contains('grossesse') or guideline.contains('enceinte'):
+            if text.any("femme"):
+                if text.any("enceinte"):
                     score += 0.8  # Boost pour vraie grossesse
                 else:
                     score -= 1.0  # Pénalité si femme mais pas enceinte
             else:
                 score -= 2.0  # Pénalité forte si pas femme du tout
-        
+
         # Filtre pédiatrique
-        if 'pediatrie' in motif or 'enfant' in guideline:
-            import re
-            age_match = re.search(r'(\d+)\s*ans?', text)
+        if motif.contains('pediatrie') or guideline.contains('enfant'):
+            age_match = AGE_RE.search(text.text)
             if age_match:
                 age = int(age_match.group(1))
                 if age > 16:
                     score -= 1.8  # Pénalité énorme pour adulte
                 else:
                     score += 0.3  # Bonus pour vrai enfant
-            elif 'enfant' in text:
+            elif text.contains('enfant'):
                 score += 0.3
-            elif any(adult_term in text for adult_term in ['adulte', 'homme', 'femme', 'patient', 'patiente']):
+            elif text.any("adulte"):
                 score -= 1.5
-        
+
         return score
-    
+
     @staticmethod
     def _apply_pathology_boosts(score, text, motif, guideline):
         """Application des boosts spécifiques par pathologie"""
-        pathology_boosts = {
-            'appendicite': ['fid', 'fosse iliaque droite', 'mcburney', 'appendic'],
-            'hpn': ['hpn', 'hypertension intracranienne', 'troubles cognitifs progressifs', 'hydrocéphalie'],
-            'sep': ['sclérose plaques', 'sep', 'paresthésies progressives', 'troubles marche paresthésies', 'remissions rechutes'],
-            'colique_nephretique': ['lombaire brutale', 'calcul', 'lithiase', 'hématurie', 'colique néphrétique', 'douleur irradiant aine', 'colique lombaire', 'colique typique', 'rein', 'rénal'],
-            'lombalgie': ['chronique', '6 semaines', 'commune', 'radiculalgie', 'lombaire simple', 'lombaire commune', 'sans signe neurologique'],
-            'biliaire': ['sous-costale droite', 'vésicule', 'cholécystite', 'voies biliaires', 'cholédoque'],
-            'htic': ['vomissements', 'céphalées enfant', 'htic', 'pression'],
-            'fievre_prolongee': ['fièvre prolongée', 'inexpliquée', 'persistante', 'chronique'],
-            'cephalees': ['coup de tonnerre', 'céphalée brutale', 'red flags', 'scanner urgent', 'migraine', 'céphalée', 'mal de tête', 'céphalée primaire']
-        }
-        
-        for pathology, keywords in pathology_boosts.items():
-            if pathology in motif or pathology in guideline:
-                if pathology == 'cephalees' and 'coup de tonnerre' in text and 'céphalée' in guideline:
+        for pathology in PATHOLOGY_KEYWORDS:
+            if motif.any(f"nom:{pathology}") or guideline.any(f"nom:{pathology}"):
+                if pathology == 'cephalees' and text.contains('coup de tonnerre') and guideline.contains('céphalée'):
                     score += 1.5  # Boost très fort pour coup de tonnerre
-                elif pathology == 'colique_nephretique' and any(keyword in text for keyword in keywords):
+                elif pathology == 'colique_nephretique' and text.any(f"pathologie:{pathology}"):
                     score += 1.0  # Boost fort pour colique néphrétique
-                elif pathology == 'biliaire' and any(nephro in text for nephro in ['lombaire', 'aine', 'hématurie', 'calcul', 'lithiase']):
+                elif pathology == 'biliaire' and text.any("contexte_nephretique"):
                     score -= 1.0  # Pénalité si contexte néphrétique
-                elif any(keyword in text for keyword in keywords):
+                elif text.any(f"pathologie:{pathology}"):
                     score += 0.5
-        
+
         return score
-    
+
     @staticmethod
     def _apply_anatomical_matching(score, text, motif, guideline):
         """Application de la correspondance anatomique"""
-        anatomical_regions = {
-            'abdomen': {
-                'keywords': ['abdomen', 'abdominale', 'abdominales', 'ventre', 'fid', 'fosse iliaque', 'épigastre', 'colique', 'néphrétique'],
-                'compatible': ['abdominal', 'digestif', 'échographie', 'scanner abdomino', 'appendicite', 'biliaire', 'néphrétique', 'calcul', 'lithiase'],
-                'incompatible': ['cérébral', 'crâne', 'irm cérébrale', 'ponction lombaire', 'hpn', 'troubles marche', 'paresthésies']
-            },
-            'lombalgie': {
-                'keywords': ['lombaire', 'lombaire simple', 'lombaire commune'],
-                'compatible': ['lombalgie', 'radiculalgie', 'irm lombaire', 'déficit neurologique'],
-                'incompatible': ['appendicite', 'scanner abdomino', 'échographie abdominale']
-            },
-            'neurologique': {
-                'keywords': ['céphalée', 'céphalées', 'mal de tête', 'neurologique', 'troubles cognitifs', 'déficit moteur'],
-                'compatible': ['cérébral', 'crâne', 'irm cérébrale', 'neurologique', 'scanner cérébral', 'troubles marche', 'paresthésies'],
-                'incompatible': ['abdominal', 'digestif', 'échographie abdominale', 'scanner abdomino', 'colique', 'néphrétique']
-            }
-        }
-        
         detected_region = None
-        for region, data in anatomical_regions.items():
-            if any(keyword in text for keyword in data['keywords']):
+        for region in ANATOMICAL_REGIONS:
+            if text.any(f"region:{region}:keywords"):
                 detected_region = region
                 break
-        
+
         if detected_region:
-            region_data = anatomical_regions[detected_region]
-            if any(compatible in guideline for compatible in region_data['compatible']):
+            if guideline.any(f"region:{detected_region}:compatible"):
                 score += 0.3
-            elif any(incompatible in guideline for incompatible in region_data['incompatible']):
+            elif guideline.any(f"region:{detected_region}:incompatible"):
                 score -= 1.5  # Pénalité forte pour incompatibilité anatomique
-        
+
         return score
 
 # ========================================
@@ -448,16 +622,14 @@ class RAGSystem:
         if not results['documents'][0]:
             return "Aucune guideline trouvée pour ce cas."
         
-        # Scoring contextuel unifié
-        scored_guidelines = []
-        for doc, metadata, distance in zip(results['documents'][0], results['metadatas'][0], results['distances'][0]):
-            score = self.booster.calculate_pathology_score(user_input, doc, metadata, distance)
-            scored_guidelines.append((score, doc, metadata))
-        
-        # Sélection de la meilleure
-        scored_guidelines.sort(key=lambda x: x[0], reverse=True)
-        best_score, best_guideline, best_metadata = scored_guidelines[0]
-        
+        # Scoring contextuel vectorisé (une seule opération pour tous les candidats)
+        scores = self.booster.score_candidates(
+            user_input, results['documents'][0], results['metadatas'][0], results['distances'][0]
+        )
+
+        # Sélection de la meilleure (premier maximum, comme un tri stable décroissant)
+        best_guideline = results['documents'][0][int(np.argmax(scores))]
+
         return best_guideline
 
 # ========================================
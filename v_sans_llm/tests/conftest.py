@@ -0,0 +1,5 @@
+import sys, os
+# Ajouter le dossier v_sans_llm dans sys.path pour les tests (modules importés par leur nom)
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root not in sys.path:
+    sys.path.insert(0, root)
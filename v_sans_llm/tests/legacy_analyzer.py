@@ -0,0 +1,205 @@
+"""
+Version d'origine (recherches `mot in texte`) de InformationAnalyzer et
+QuestionGenerator, avant l'automate de mots-clés ; conservée à l'identique
+comme référence du test de parité (test_keyword_automaton.py).
+"""
+
+
+class InformationAnalyzer:
+    """Classe centralisée pour analyser les informations manquantes"""
+
+    @staticmethod
+    def analyze_completeness(user_input):
+        """
+        Analyse globale de la complétude des informations
+        Retourne: (status, missing_category, details)
+        """
+        text = user_input.lower()
+
+        # 1. Vérifications critiques obligatoires
+        critical_missing = InformationAnalyzer._check_critical_info(text)
+        if critical_missing:
+            return "CRITICAL_MISSING", critical_missing, "Informations essentielles manquantes"
+
+        # 2. Informations importantes pour précision diagnostique
+        clarification_needed = InformationAnalyzer._check_clarification_needed(text)
+        if clarification_needed:
+            return "NEEDS_CLARIFICATION", clarification_needed, "Précisions utiles pour affiner"
+
+        # 3. Questions contextuelles pour première interaction
+        contextual_questions = InformationAnalyzer._check_contextual_questions(text)
+        if contextual_questions:
+            return "CONTEXTUAL_QUESTIONS", contextual_questions, "Questions d'approfondissement"
+
+        return "COMPLETE", None, "Informations suffisantes"
+
+    @staticmethod
+    def _check_critical_info(text):
+        """Vérification des informations critiques obligatoires"""
+        # Âge obligatoire
+        has_age = any(word in text for word in ['ans', 'âge', 'age', 'années'])
+        if not has_age:
+            return "age"
+
+        # Description minimale (plus de 4 mots)
+        if len(text.split()) < 5:
+            return "description"
+
+        return None
+
+    @staticmethod
+    def _check_clarification_needed(text):
+        """Vérification si des clarifications spécifiques sont nécessaires"""
+        # Céphalées sans caractéristiques
+        if any(word in text for word in ['céphalée', 'mal de tête']):
+            if not any(word in text for word in ['brutal', 'progressif', 'pulsatile', 'tension', 'vomissement', 'fièvre', 'coup de tonnerre']):
+                return "cephalees"
+        # Douleurs abdominales sans localisation
+        if any(word in text for word in ['abdominale', 'ventre', 'douleur']):
+            if not any(word in text for word in ['fid', 'fosse iliaque', 'épigastre', 'hypochondre', 'lombaire', 'sous-costale']):
+                return "abdomen"
+
+        # Troubles neurologiques sans précision
+        if any(word in text for word in ['trouble', 'faiblesse', 'paralysie', 'engourdissement']):
+            if not any(word in text for word in ['moteur', 'sensitif', 'marche', 'parole', 'vision', 'cognitif']):
+                return "neurologique"
+
+        return None
+
+    @staticmethod
+    def _check_contextual_questions(text):
+        """Identification du domaine pour questions contextuelles seulement si nécessaire"""
+        # Pour les céphalées, ne pas poser de questions si c'est déjà précis
+        if any(word in text for word in ['céphalée', 'mal de tête', 'crâne', 'migraine']):
+            # Si c'est déjà précis (migraine habituelle, pas de signe d'alarme), pas de questions
+            if any(precise in text for precise in ['habituelle', 'migraine', 'pas de signe', 'primaire']):
+                return None
+            return "cephalees"
+        elif any(word in text for word in ['abdomen', 'ventre', 'douleur']):
+            return "abdomen"
+        elif any(word in text for word in ['trouble', 'faiblesse', 'neurologique']):
+            return "neurologique"
+        elif any(word in text for word in ['enfant', 'pédiatrique']) or any(word in text for word in ['8 ans', '10 ans', '12 ans']):
+            return "pediatrie"
+
+        return "general"
+
+# ========================================
+# 2. GÉNÉRATEUR UNIFIÉ DE QUESTIONS
+# ========================================
+
+class QuestionGenerator:
+    """Classe centralisée pour générer toutes les questions de clarification"""
+
+    @staticmethod
+    def generate_questions(status, category, user_input):
+        """
+        Génération intelligente de questions selon le statut et la catégorie
+        Évite les redondances en analysant le texte d'entrée
+        """
+        text = user_input.lower()
+
+        if status == "CRITICAL_MISSING":
+            return QuestionGenerator._generate_critical_questions(category)
+        elif status == "NEEDS_CLARIFICATION":
+            return QuestionGenerator._generate_clarification_questions(category, text)
+        elif status == "CONTEXTUAL_QUESTIONS":
+            return QuestionGenerator._generate_contextual_questions(category, text)
+
+        return "Aucune question nécessaire."
+
+    @staticmethod
+    def _generate_critical_questions(category):
+        """Questions pour informations critiques manquantes"""
+        if category == "age":
+            return "Quel âge a le patient ?"
+        elif category == "description":
+            return "Pouvez-vous décrire plus précisément les symptômes, leur localisation et leur évolution ?"
+        return "Informations supplémentaires nécessaires."
+
+    @staticmethod
+    def _generate_clarification_questions(category, text):
+        """Questions de clarification spécifiques par domaine"""
+        if category == "cephalees":
+            return "Pouvez-vous préciser les caractéristiques de ces céphalées ?\n- Sont-elles brutales (en coup de tonnerre) ou progressives ?\n- Y a-t-il des signes associés : fièvre, vomissements, troubles visuels, déficit neurologique ?"
+
+        elif category == "abdomen":
+            return "Pouvez-vous préciser la localisation de la douleur abdominale ?\n- Fosse iliaque droite (FID) ?\n- Épigastre, hypochondre droit, lombaire ?\n- Y a-t-il de la fièvre ou des signes associés ?"
+
+        elif category == "neurologique":
+            return QuestionGenerator._generate_neurological_questions(text)
+
+        return "Pouvez-vous donner plus de détails ?"
+
+    @staticmethod
+    def _generate_neurological_questions(text):
+        """Questions neurologiques évitant les redondances"""
+        questions = []
+
+        # Troubles moteurs
+        if not any(motor in text for motor in ['moteur', 'faiblesse', 'paralysie', 'hémiplégie', 'hémiparésie', 'faible']):
+            questions.append("Troubles moteurs (faiblesse, paralysie) ?")
+
+        # Troubles sensitifs
+        if not any(sensit in text for sensit in ['sensitif', 'engourdissement', 'fourmillement', 'paresthésie', 'perte de sensibilité']):
+            questions.append("Troubles sensitifs (engourdissements, paresthésies) ?")
+
+        # Troubles spécifiques non mentionnés
+        missing_troubles = []
+        if 'marche' not in text and 'démarche' not in text:
+            missing_troubles.append("marche")
+        if 'équilibre' not in text and 'instabilité' not in text:
+            missing_troubles.append("équilibre")
+        if 'cognitif' not in text and 'mémoire' not in text:
+            missing_troubles.append("cognitifs")
+
+        # Construction grammaticalement correcte
+        if missing_troubles:
+            trouble_questions = []
+            for trouble in missing_troubles:
+                if trouble == "marche":
+                    trouble_questions.append("de la marche")
+                elif trouble == "équilibre":
+                    trouble_questions.append("de l'équilibre")
+                elif trouble == "cognitifs":
+                    trouble_questions.append("cognitifs")
+
+            if len(trouble_questions) == 1:
+                questions.append(f"Troubles {trouble_questions[0]} ?")
+            elif len(trouble_questions) == 2:
+                questions.append(f"Troubles {trouble_questions[0]} et {trouble_questions[1]} ?")
+            else:
+                questions.append(f"Troubles {', '.join(trouble_questions[:-1])} et {trouble_questions[-1]} ?")
+
+        if questions:
+            return "Pouvez-vous préciser les troubles neurologiques ?\n- " + "\n- ".join(questions)
+        else:
+            return "Merci pour ces précisions. Depuis quand ces symptômes sont-ils présents et comment évoluent-ils ?"
+
+    @staticmethod
+    def _generate_contextual_questions(category, text):
+        """Questions contextuelles par domaine médical"""
+        if category == "cephalees":
+            # Questions intelligentes évitant les redondances
+            questions = []
+            if not any(brutal in text for brutal in ['brutal', 'coup de tonnerre', 'soudain']):
+                if not any(prog in text for prog in ['progressif', 'chronique', 'habituel']):
+                    questions.append("Ces céphalées sont-elles brutales (en coup de tonnerre) ou progressives ?")
+
+            if not any(signe in text for signe in ['fièvre', 'vomissement', 'trouble', 'déficit']):
+                questions.append("Y a-t-il des signes associés : fièvre, vomissements, troubles de la vision, déficit neurologique ?")
+
+            if questions:
+                return "Pour mieux vous orienter, pouvez-vous préciser :\n- " + "\n- ".join(questions)
+
+        elif category == "abdomen":
+            return "Pour préciser l'indication d'imagerie, pouvez-vous me dire :\n- Où se situe exactement la douleur (fosse iliaque droite, épigastre, etc.) ?\n- Y a-t-il de la fièvre, des nausées, des vomissements ?"
+
+        elif category == "neurologique":
+            return QuestionGenerator._generate_neurological_questions(text)
+
+        elif category == "pediatrie":
+            return "Pour un enfant, pouvez-vous préciser :\n- Y a-t-il des vomissements, des troubles du comportement ?\n- L'enfant se plaint-il de troubles visuels ou de maux de tête matinaux ?"
+
+        else:
+            return "Pouvez-vous me donner quelques précisions supplémentaires sur :\n- L'évolution des symptômes (brutal, progressif) ?\n- Les signes associés (fièvre, nausées, troubles neurologiques) ?\n- Le contexte (antécédents, traitements en cours) ?"
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+import embeddings
+from embeddings import COLLECTIONS, HashingEmbeddingFunction
+from indexage import create_index
+
+GUIDELINES = Path(__file__).resolve().parents[1] / "guidelines.json"
+
+
+def test_hashing_embedding_is_deterministic_and_normalized():
+    ef = HashingEmbeddingFunction(dim=256)
+    a, b = ef(["Céphalée brutale en coup de tonnerre", "cephalee brutale en coup de tonnerre"])
+    assert len(a) == 256
+    assert abs(np.linalg.norm(a) - 1.0) < 1e-6
+    # accents ignorés : mêmes n-grammes, même vecteur
+    assert np.allclose(a, b)
+    assert np.allclose(ef(["fièvre"])[0], HashingEmbeddingFunction.build_from_config(ef.get_config())(["fièvre"])[0])
+
+
+def test_fallback_keeps_existing_bluebert_collection(tmp_path, monkeypatch):
+    db = str(tmp_path / "rag_db")
+    client = chromadb.PersistentClient(path=db)
+    existing = client.get_or_create_collection(COLLECTIONS["bluebert"])
+    existing.add(ids=["x"], documents=["vecteur déjà calculé"], embeddings=[[0.1, 0.2, 0.3]])
+
+    embeddings.load_embedding_backend.cache_clear()
+    monkeypatch.setenv(embeddings.BACKEND_ENV, "hashing")
+    try:
+        collection = create_index(str(GUIDELINES), db_path=db)
+    finally:
+        embeddings.load_embedding_backend.cache_clear()
+
+    assert collection.name == COLLECTIONS["hashing"]
+    assert collection.count() > 0
+    # la collection BlueBERT n'a pas été touchée
+    assert client.get_collection(COLLECTIONS["bluebert"]).get(ids=["x"])["ids"] == ["x"]
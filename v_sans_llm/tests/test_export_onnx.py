@@ -0,0 +1,81 @@
+import string
+
+import numpy as np
+import pytest
+
+import export_onnx
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+transformers = pytest.importorskip("transformers")
+
+
+@pytest.fixture(scope="module")
+def tiny_bert(tmp_path_factory):
+    """BERT aléatoire minuscule et son tokenizer (vocabulaire caractère par caractère)"""
+    path = tmp_path_factory.mktemp("tiny_bert")
+    chars = string.ascii_lowercase + string.digits + string.punctuation
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(chars) + [f"##{c}" for c in chars]
+    (path / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    transformers.BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+        intermediate_size=64, max_position_embeddings=512,
+    )
+    model = transformers.BertModel(config).eval()
+    model.save_pretrained(path)
+    return path, model, transformers.AutoTokenizer.from_pretrained(path)
+
+
+def _mean_pooling(model, tokenizer):
+    """Référence torch : même pooling que SentenceTransformer pour BlueBERT"""
+    def encode(texts):
+        batch = tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="pt")
+        with torch.no_grad():
+            hidden = model(**batch).last_hidden_state
+        mask = batch["attention_mask"][..., None].float()
+        return ((hidden * mask).sum(1) / mask.sum(1)).numpy()
+    return encode
+
+
+def test_export_then_check_parity(tiny_bert, tmp_path, capsys):
+    model_path, model, tokenizer = tiny_bert
+    output_dir = export_onnx.export(model_name=str(model_path), output_dir=str(tmp_path / "onnx"))
+
+    status = export_onnx.check(model_dir=output_dir, reference_fn=_mean_pooling(model, tokenizer))
+    out = capsys.readouterr().out
+    assert status == 0, out
+    assert "model.onnx:" in out and "model.int8.onnx:" in out
+
+    # un seuil impossible à atteindre fait échouer la vérification
+    assert export_onnx.check(model_dir=output_dir, min_cosine=1.01, int8_margin=0.0,
+                             reference_fn=_mean_pooling(model, tokenizer)) == 1
+
+
+def test_check_fails_when_ranking_changes(tiny_bert, tmp_path, capsys):
+    model_path, model, tokenizer = tiny_bert
+    output_dir = export_onnx.export(model_name=str(model_path), output_dir=str(tmp_path / "onnx"), quantize=False)
+    encode = _mean_pooling(model, tokenizer)
+
+    def reordered(texts):
+        # requêtes types permutées : le top-k de chaque requête change
+        vectors = encode(texts)
+        n = len(export_onnx.SAMPLE_QUERIES)
+        vectors[-n:] = vectors[-n:][::-1]
+        return vectors
+
+    # seuil de cosinus neutralisé : seul le classement décide
+    assert export_onnx.check(model_dir=output_dir, min_cosine=-1.0, reference_fn=reordered) == 1
+    assert "ÉCHEC" in capsys.readouterr().out
+    assert export_onnx.check(model_dir=output_dir, min_cosine=-1.0, min_same_top_k=0.0, reference_fn=reordered) == 0
+
+
+def test_cosine_matrix_leaves_inputs_untouched():
+    a = np.array([[3.0, 4.0], [1.0, 0.0]])
+    b = np.array([[0.0, 2.0]])
+    before = a.copy(), b.copy()
+    np.testing.assert_allclose(export_onnx._cosine_matrix(a, b), [[0.8], [0.0]])
+    np.testing.assert_array_equal(a, before[0])
+    np.testing.assert_array_equal(b, before[1])
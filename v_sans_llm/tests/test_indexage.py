@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+from chromadb.api.models.Collection import Collection
+
+import embeddings
+from indexage import create_index, load_manifest
+
+GUIDELINES = Path(__file__).resolve().parents[1] / "guidelines.json"
+
+
+@pytest.fixture
+def hashing_backend(monkeypatch):
+    embeddings.load_embedding_backend.cache_clear()
+    monkeypatch.setenv(embeddings.BACKEND_ENV, "hashing")
+    yield
+    embeddings.load_embedding_backend.cache_clear()
+
+
+def _write_guidelines(path, guidelines):
+    path.write_text(json.dumps({"guidelines": guidelines}, ensure_ascii=False), encoding="utf-8")
+
+
+def _spy_upsert(monkeypatch):
+    calls = []
+    original = Collection.upsert
+    monkeypatch.setattr(Collection, "upsert", lambda self, **k: calls.append(k["ids"]) or original(self, **k))
+    return calls
+
+
+def test_second_startup_skips_indexing(tmp_path, hashing_backend, monkeypatch, capsys):
+    db = str(tmp_path / "rag_db")
+    collection = create_index(str(GUIDELINES), db_path=db)
+    count = collection.count()
+
+    calls = _spy_upsert(monkeypatch)
+    create_index(str(GUIDELINES), db_path=db)
+
+    assert calls == []
+    assert "Index à jour" in capsys.readouterr().out
+    assert len(load_manifest(db, collection.name)["documents"]) == count
+
+
+def test_only_changed_guidelines_are_upserted(tmp_path, hashing_backend, monkeypatch):
+    guidelines = json.loads(GUIDELINES.read_text(encoding="utf-8"))["guidelines"][:4]
+    source = tmp_path / "guidelines.json"
+    db = str(tmp_path / "rag_db")
+    _write_guidelines(source, guidelines)
+    create_index(str(source), db_path=db)
+
+    guidelines[0] = dict(guidelines[0], texte=guidelines[0]["texte"] + " Mise à jour.")
+    removed = guidelines.pop()
+    _write_guidelines(source, guidelines)
+
+    calls = _spy_upsert(monkeypatch)
+    collection = create_index(str(source), db_path=db)
+
+    assert calls == [[guidelines[0]["id"]]]
+    assert collection.count() == 3
+    assert collection.get(ids=[removed["id"]])["ids"] == []
+    assert collection.get(ids=[guidelines[0]["id"]])["documents"][0].endswith("Mise à jour.")
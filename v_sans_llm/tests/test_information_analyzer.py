@@ -0,0 +1,23 @@
+from ollama import InformationAnalyzer
+
+
+def test_negated_domain_does_not_drive_questions():
+    # une douleur abdominale niée n'oriente pas vers l'abdomen
+    status, category, _ = InformationAnalyzer.analyze_completeness(
+        "Patient de 40 ans, fatigue importante, pas de douleur abdominale ni faiblesse"
+    )
+    assert (status, category) == ("CONTEXTUAL_QUESTIONS", "general")
+
+
+def test_affirmed_domain_still_detected():
+    status, category, _ = InformationAnalyzer.analyze_completeness(
+        "Patient de 40 ans, douleur abdominale intense depuis hier soir"
+    )
+    assert (status, category) == ("NEEDS_CLARIFICATION", "abdomen")
+
+
+def test_negated_characteristic_counts_as_an_answer():
+    status, _, _ = InformationAnalyzer.analyze_completeness(
+        "Patiente de 35 ans, céphalée depuis 3 jours, pas de fièvre"
+    )
+    assert status != "NEEDS_CLARIFICATION"
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import legacy_analyzer
+from keyword_automaton import KeywordAutomaton
+from negation import portees_negation
+from ollama import KEYWORD_GROUPS, InformationAnalyzer, QuestionGenerator
+from test_scoring_parity import CASES, _val_cases
+
+
+def _random_text(rng, alphabet, length):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def test_scan_matches_substring_search():
+    rng = random.Random(0)
+    alphabet = "ab c"
+    # motifs qui se chevauchent, suffixes d'autres motifs, préfixes communs
+    patterns = ["a", "ab", "bab", "abab", "b", "aab", "baa", "aaa", "b c", "c", "ca", "abc", " "]
+    patterns += list({_random_text(rng, alphabet, rng.randint(1, 6)) for _ in range(60)})
+    groups = {f"g{i}": patterns[i::5] for i in range(5)}
+    automaton = KeywordAutomaton(groups)
+    for _ in range(2000):
+        text = _random_text(rng, alphabet, rng.randint(0, 40))
+        features = automaton.scan(text)
+        for pattern in patterns:
+            assert features.contains(pattern) == (pattern in text), (pattern, text)
+        for name, words in groups.items():
+            assert features.any(name) == any(w in text for w in words), (name, text)
+        assert sorted(features.matched()) == sorted({p for p in patterns if p in text})
+
+
+def test_unicode_and_case_sensitivity():
+    automaton = KeywordAutomaton({"signes": ["fièvre", "céphalée", "mal de tête"]})
+    features = automaton.scan("céphalées et fièvre")
+    assert features.contains("fièvre") and features.contains("céphalée")
+    assert not features.contains("mal de tête")
+    assert not automaton.scan("Fièvre").any("signes")
+
+
+def test_empty_pattern_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordAutomaton({"g": [""]})
+
+
+def _corpus(n=3000, seed=0):
+    """Textes réels et textes synthétiques mêlant les mots-clés des groupes."""
+    rng = random.Random(seed)
+    words = sorted({w for ws in KEYWORD_GROUPS.values() for w in ws})
+    filler = ["patient", "patiente", "depuis", "2 jours", "droite", "intense", "et", "avec", "40 ans", "céphalées"]
+    texts = CASES + _val_cases()
+    for _ in range(n):
+        texts.append(" ".join(rng.sample(words, rng.randint(0, 4)) + rng.sample(filler, rng.randint(0, 6))))
+    return texts
+
+
+def test_analyzer_and_questions_match_substring_version():
+    compared = 0
+    for text in _corpus():
+        # la version d'origine ignore les négations (test_information_analyzer.py)
+        if portees_negation(text.lower()).debuts:
+            continue
+        compared += 1
+        status, category, details = InformationAnalyzer.analyze_completeness(text)
+        assert (status, category, details) == legacy_analyzer.InformationAnalyzer.analyze_completeness(text), text
+        assert QuestionGenerator.generate_questions(status, category, text) == \
+            legacy_analyzer.QuestionGenerator.generate_questions(status, category, text), text
+    assert compared > 2000
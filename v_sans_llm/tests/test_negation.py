@@ -0,0 +1,25 @@
+import negation
+from ollama import InformationAnalyzer
+
+
+def test_single_implementation():
+    # pas de copie : le module de v_llm est exécuté depuis son propre fichier
+    assert negation.SOURCE.exists()
+    assert negation._module.__file__ == str(negation.SOURCE)
+    assert negation.portees_negation.__wrapped__.__code__.co_filename == str(negation.SOURCE)
+
+
+def test_scopes():
+    portees = negation.portees_negation("céphalées brutales, pas de fièvre ni déficit")
+    assert portees.present("brutales")
+    assert portees.nie("fièvre") and portees.nie("déficit")
+
+
+def test_trigger_after_punctuation():
+    for texte in ["céphalées (pas de fièvre)", "céphalées (sans fièvre)", "céphalées «pas de fièvre»",
+                  "céphalées/pas de fièvre"]:
+        assert negation.portees_negation(texte).nie("fièvre"), texte
+    status, _, _ = InformationAnalyzer.analyze_completeness(
+        "Patiente de 35 ans, céphalée depuis 3 jours (pas de fièvre)"
+    )
+    assert status != "NEEDS_CLARIFICATION"
@@ -0,0 +1,67 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from ollama import PathologyBooster, guideline_features
+
+ROOT = Path(__file__).resolve().parents[1]
+VAL_CASES = ROOT.parent / "v_llm" / "data" / "clinical_cases_val.jsonl"
+
+GUIDELINES = json.loads((ROOT / "guidelines.json").read_text(encoding="utf-8"))["guidelines"]
+
+# Cas représentatifs de chaque filtre / boost du PathologyBooster
+CASES = [
+    "Patiente 32 ans enceinte de 3 mois, céphalées brutales en coup de tonnerre",
+    "Patiente 28 ans, douleur abdominale fid, fièvre modérée",
+    "Femme 45 ans, douleur sous-costale droite, fièvre, vésicule",
+    "Homme 50 ans, douleur lombaire brutale irradiant aine, hématurie",
+    "Enfant 8 ans, céphalées matinales et vomissements",
+    "Patient 70 ans, troubles cognitifs progressifs, troubles marche, troubles urinaires",
+    "Patient 35 ans, lombaire simple chronique sans signe neurologique depuis 6 semaines",
+    "Patiente 30 ans, paresthésies progressives, remissions rechutes, sclérose plaques",
+    "Patient 40 ans, fièvre prolongée inexpliquée persistante",
+    "Adulte 60 ans, mal de tête habituel, migraine",
+]
+
+
+def _val_cases():
+    if not VAL_CASES.exists():
+        return []
+    cases = []
+    with VAL_CASES.open(encoding="utf-8") as fh:
+        for line in fh:
+            instruction = json.loads(line)["instruction"]
+            cases.append(instruction.split("Cas clinique:", 1)[-1].strip())
+    return cases
+
+
+def _legacy_ranking(text, docs, metadatas, distances):
+    scored = [
+        (PathologyBooster.calculate_pathology_score(text, doc, meta, dist), i)
+        for i, (doc, meta, dist) in enumerate(zip(docs, metadatas, distances))
+    ]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [i for _, i in scored], [s for s, _ in scored]
+
+
+@pytest.mark.parametrize("stored", [True, False], ids=["indexed", "legacy-index"])
+@pytest.mark.parametrize("text", CASES + _val_cases())
+def test_vectorized_ranking_matches_legacy(text, stored):
+    rng = random.Random(text)
+    docs = [g["texte"] for g in GUIDELINES]
+    metadatas = []
+    for g in GUIDELINES:
+        meta = {"motif": g["motif"], "source": g["source"]}
+        if stored:
+            meta["features"] = guideline_features(g["texte"], g["motif"])
+        metadatas.append(meta)
+    distances = [rng.uniform(0.2, 1.2) for _ in GUIDELINES]
+
+    expected_order, expected_scores = _legacy_ranking(text, docs, metadatas, distances)
+    scores = PathologyBooster.score_candidates(text, docs, metadatas, distances)
+    order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+
+    assert order == expected_order
+    assert sorted(scores, reverse=True) == pytest.approx(expected_scores)